@@ -21,6 +21,7 @@
  ***************************************************************************/
 """
 from DsgTools.core.GeometricTools.featureHandler import FeatureHandler
+from DsgTools.core.GeometricTools.geometryCache import geometryCacheStoreForContext
 from DsgTools.core.Utils.FrameTools.map_index import UtmGrid
 from ...algRunner import AlgRunner
 import processing, os, requests
@@ -177,7 +178,8 @@ class CreateFramesWithConstraintAlgorithm(QgsProcessingAlgorithm):
             fields,
             xSubdivisions=xSubdivisions,
             ySubdivisions=ySubdivisions,
-            feedback=feedback
+            feedback=feedback,
+            cacheStore=geometryCacheStoreForContext(context)
         )
         list(
             map(
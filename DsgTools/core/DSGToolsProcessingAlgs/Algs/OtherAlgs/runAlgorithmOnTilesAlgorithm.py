@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import json
+
+from PyQt5.QtCore import QCoreApplication
+from qgis.core import (QgsApplication, QgsFeature, QgsFeatureSink, QgsField, QgsFields,
+                       QgsProcessing, QgsProcessingAlgorithm,
+                       QgsProcessingException,
+                       QgsProcessingParameterDistance,
+                       QgsProcessingParameterEnum,
+                       QgsProcessingParameterFeatureSink,
+                       QgsProcessingParameterNumber,
+                       QgsProcessingParameterString,
+                       QgsProcessingParameterVectorLayer, QgsWkbTypes)
+from qgis.PyQt.QtCore import QVariant
+
+from DsgTools.core.Utils.tiledExecution import (RegularTileGrid,
+                                                TiledExecution, UtmTileGrid)
+
+
+class RunAlgorithmOnTilesAlgorithm(QgsProcessingAlgorithm):
+    INPUT = 'INPUT'
+    ALG_NAME = 'ALG_NAME'
+    PARAMETER_DICT = 'PARAMETER_DICT'
+    INPUT_LAYER_PARAMETER_NAME = 'INPUT_LAYER_PARAMETER_NAME'
+    OUTPUT_LAYER_PARAMETER_NAME = 'OUTPUT_LAYER_PARAMETER_NAME'
+    GRID_TYPE = 'GRID_TYPE'
+    TILE_SIZE = 'TILE_SIZE'
+    SCALE = 'SCALE'
+    HALO = 'HALO'
+    MAX_WORKERS = 'MAX_WORKERS'
+    OUTPUT = 'OUTPUT'
+
+    def initAlgorithm(self, config=None):
+        """
+        Parameter setting.
+        """
+        self.addParameter(
+            QgsProcessingParameterVectorLayer(
+                self.INPUT,
+                self.tr('Input layer'),
+                [QgsProcessing.TypeVectorAnyGeometry]
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.ALG_NAME,
+                self.tr('Name of the algorithm with provider')
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.PARAMETER_DICT,
+                description=self.tr('Json parameter dict (without the input layer)'),
+                multiLine=True,
+                defaultValue='{}'
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.INPUT_LAYER_PARAMETER_NAME,
+                self.tr('Name of the key of the input'),
+                defaultValue='INPUT'
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.OUTPUT_LAYER_PARAMETER_NAME,
+                self.tr('Output layer parameter name'),
+                defaultValue='FLAGS'
+            )
+        )
+        self.gridTypes = [
+            self.tr('Regular grid'),
+            self.tr('Systematic map grid')
+        ]
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.GRID_TYPE,
+                self.tr('Tile grid'),
+                options=self.gridTypes,
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterDistance(
+                self.TILE_SIZE,
+                self.tr('Tile size (regular grid)'),
+                parentParameterName=self.INPUT,
+                minValue=0,
+                defaultValue=10000
+            )
+        )
+        self.scales = ['250', '100', '50', '25']
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.SCALE,
+                self.tr('Frame scale (systematic map grid)'),
+                options=['1:{0}.000'.format(scale) for scale in self.scales],
+                defaultValue=1
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterDistance(
+                self.HALO,
+                self.tr('Halo (at least the search radius of the algorithm)'),
+                parentParameterName=self.INPUT,
+                minValue=0,
+                defaultValue=10
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.MAX_WORKERS,
+                self.tr('Number of worker processes (0 runs the tiles on this process)'),
+                type=QgsProcessingParameterNumber.Integer,
+                minValue=0,
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT,
+                self.tr('Tiled run output')
+            )
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):
+        """
+        Here is where the processing itself takes place.
+        """
+        inputLyr = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        if inputLyr is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.INPUT))
+        algName = self.parameterAsString(parameters, self.ALG_NAME, context)
+        algParameterDict = json.loads(
+            self.parameterAsString(parameters, self.PARAMETER_DICT, context))
+        inputKey = self.parameterAsString(
+            parameters, self.INPUT_LAYER_PARAMETER_NAME, context)
+        outputKey = self.parameterAsString(
+            parameters, self.OUTPUT_LAYER_PARAMETER_NAME, context)
+        gridType = self.parameterAsEnum(parameters, self.GRID_TYPE, context)
+        halo = self.parameterAsDouble(parameters, self.HALO, context)
+        maxWorkers = self.parameterAsInt(parameters, self.MAX_WORKERS, context)
+        if gridType == 0:
+            tileSize = self.parameterAsDouble(parameters, self.TILE_SIZE, context)
+            if tileSize <= 0:
+                raise QgsProcessingException(self.tr('Tile size must be greater than zero.'))
+            grid = RegularTileGrid(tileSize)
+        else:
+            scale = int(self.scales[self.parameterAsEnum(parameters, self.SCALE, context)])
+            grid = UtmTileGrid(scale, inputLyr.crs(), context.transformContext())
+        tiledExecution = TiledExecution(grid, halo, maxWorkers=maxWorkers)
+        feedback.pushInfo(
+            self.tr('Running {algName} on {nTiles} tiles of {layerName}...').format(
+                algName=algName,
+                nTiles=len(grid.tileKeys(inputLyr.extent())),
+                layerName=inputLyr.name()
+            )
+        )
+        sink, sinkId, nFlags = None, None, 0
+        for fields, wkbType, flagList in tiledExecution.iterateFlags(
+                inputLyr,
+                algName,
+                algParameterDict,
+                context,
+                inputKey=inputKey,
+                outputKey=outputKey,
+                feedback=feedback):
+            if sink is None:
+                # the flag output of the first tile run gives the layout
+                (sink, sinkId) = self.prepareSink(
+                    parameters, context, fields, wkbType, inputLyr)
+            for geom, attributes in flagList:
+                if feedback.isCanceled():
+                    break
+                newFeat = QgsFeature(fields)
+                newFeat.setAttributes(attributes)
+                newFeat.setGeometry(geom)
+                sink.addFeature(newFeat, QgsFeatureSink.FastInsert)
+            nFlags += len(flagList)
+        if sink is None:
+            (sink, sinkId) = self.prepareSink(
+                parameters, context, None, self.declaredWkbType(algName, outputKey), inputLyr)
+        feedback.pushInfo(self.tr('{0} flags raised.').format(nFlags))
+        return {self.OUTPUT: sinkId}
+
+    def prepareSink(self, parameters, context, fields, wkbType, inputLyr):
+        if fields is None:
+            fields = QgsFields()
+            fields.append(QgsField('reason', QVariant.String))
+        (sink, sinkId) = self.parameterAsSink(
+            parameters,
+            self.OUTPUT,
+            context,
+            fields,
+            wkbType,
+            inputLyr.sourceCrs()
+        )
+        if sink is None:
+            raise QgsProcessingException(
+                self.invalidSinkError(parameters, self.OUTPUT))
+        return sink, sinkId
+
+    def declaredWkbType(self, algName, outputKey):
+        """
+        Wkb type given by the data type of the flag output of algName, used
+        when no tile is run.
+        """
+        alg = QgsApplication.processingRegistry().algorithmById(algName)
+        definition = alg.parameterDefinition(outputKey) if alg is not None else None
+        dataType = definition.dataType() \
+            if isinstance(definition, QgsProcessingParameterFeatureSink) else None
+        return {
+            QgsProcessing.TypeVectorPoint: QgsWkbTypes.Point,
+            QgsProcessing.TypeVectorLine: QgsWkbTypes.LineString,
+            QgsProcessing.TypeVectorPolygon: QgsWkbTypes.Polygon,
+        }.get(dataType, QgsWkbTypes.Point)
+
+    def name(self):
+        """
+        Returns the algorithm name, used for identifying the algorithm. This
+        string should be fixed for the algorithm, and must not be localised.
+        The name should be unique within each provider. Names should contain
+        lowercase alphanumeric characters only and no spaces or other
+        formatting characters.
+        """
+        return 'runalgorithmontiles'
+
+    def displayName(self):
+        """
+        Returns the translated algorithm name, which should be used for any
+        user-visible display of the algorithm name.
+        """
+        return self.tr('Run Algorithm on Tiles')
+
+    def group(self):
+        """
+        Returns the name of the group this algorithm belongs to. This string
+        should be localised.
+        """
+        return self.tr('Other Algorithms')
+
+    def groupId(self):
+        """
+        Returns the unique ID of the group this algorithm belongs to. This
+        string should be fixed for the algorithm, and must not be localised.
+        The group id should be unique within each provider. Group id should
+        contain lowercase alphanumeric characters only and no spaces or other
+        formatting characters.
+        """
+        return 'DSGTools: Other Algorithms'
+
+    def tr(self, string):
+        return QCoreApplication.translate('RunAlgorithmOnTilesAlgorithm', string)
+
+    def createInstance(self):
+        return RunAlgorithmOnTilesAlgorithm()
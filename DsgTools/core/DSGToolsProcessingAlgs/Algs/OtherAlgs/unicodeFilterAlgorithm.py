@@ -17,9 +17,10 @@ from qgis.core import (QgsProcessing,
 from qgis import processing
 from qgis.utils import iface
 import csv
-import concurrent.futures
 import os
 
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
+
 class UnicodeFilterAlgorithm(QgsProcessingAlgorithm): 
 
     INPUT_LAYERS = 'INPUT_LAYER_LIST'
@@ -80,13 +81,11 @@ class UnicodeFilterAlgorithm(QgsProcessingAlgorithm):
                 break
             flags[layer.geometryType()] += featuresNotApproved
 
-        pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count()-1)
-        futures = set()
-        for step, layer in enumerate(layerList):
+        for layer in layerList:
             if not(layer.geometryType() in flags):
                 flags[layer.geometryType()] = []
-            futures.add(pool.submit(checkUnicode, layer))
-        concurrent.futures.wait(futures, timeout=None, return_when=concurrent.futures.ALL_COMPLETED)
+        executor = BoundedChunkExecutor(chunkSize=1, feedback=feedback)
+        executor.run(checkUnicode, layerList, total=listSize)
         
         output = {self.OUTPUT1: '', self.OUTPUT2: '', self.OUTPUT3: ''}
         for geometryType in flags:
@@ -98,7 +98,9 @@ class AdjustNetworkConnectivityAlgorithm(ValidationAlgorithm):
         dangleLyr = algRunner.runIdentifyDangles(inputLyr, tol, context, feedback=multiStepFeedback, onlySelected=onlySelected)
 
         multiStepFeedback.setCurrentStep(1)
-        layerHandler.filterDangles(dangleLyr, tol, feedback=multiStepFeedback)
+        layerHandler.filterDangles(
+            dangleLyr, tol, feedback=multiStepFeedback,
+            cacheStore=self.geometryCacheStore(context))
 
         multiStepFeedback.setCurrentStep(2)
         multiStepFeedback.pushInfo(self.tr('Snapping layer {layer} to dangles...').format(layer=inputLyr.name()))
@@ -228,7 +228,8 @@ class CreateNetworkNodesAlgorithm(ValidationAlgorithm):
                 attributeBlackList=attributeBlackList,
                 excludePrimaryKeys=ignorePK,
                 ignoreVirtualFields=ignoreVirtual,
-                ditchLayer=ditchLayer
+                ditchLayer=ditchLayer,
+                cacheStore=self.geometryCacheStore(context)
             )
         currStep += 1
         #new step
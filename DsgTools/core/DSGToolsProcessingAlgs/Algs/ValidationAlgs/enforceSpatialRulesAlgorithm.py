@@ -29,6 +29,7 @@ from qgis.core import (QgsProject,
                        QgsProcessingContext,
                        QgsProcessingException,
                        QgsProcessingParameterType,
+                       QgsProcessingParameterBoolean,
                        QgsProcessingParameterDefinition,
                        QgsProcessingParameterFeatureSink)
 
@@ -40,6 +41,7 @@ from DsgTools.core.DSGToolsProcessingAlgs.Algs.ValidationAlgs.validationAlgorith
 
 class EnforceSpatialRulesAlgorithm(ValidationAlgorithm):
     RULES_SET = "RULES_SET"
+    DRY_RUN = "DRY_RUN"
     POINT_FLAGS = "POINT_FLAGS"
     LINE_FLAGS = "LINE_FLAGS"
     POLYGON_FLAGS = "POLYGON_FLAGS"
@@ -57,6 +59,14 @@ class EnforceSpatialRulesAlgorithm(ValidationAlgorithm):
         })
         self.addParameter(spatialRulesSetter)
 
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.DRY_RUN,
+                self.tr('Only report the rules execution plan (dry run)'),
+                defaultValue=False
+            )
+        )
+
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.POINT_FLAGS,
@@ -202,8 +212,9 @@ class EnforceSpatialRulesAlgorithm(ValidationAlgorithm):
             )
         # marked as 5 steps because I *arbitrarily* set the rule enforcing
         # steps to be 4:1 to the flag layers creation
+        dryRun = self.parameterAsBool(parameters, self.DRY_RUN, context)
         flagsDict = SpatialRelationsHandler().enforceRules(
-            rules, context, feedback)
+            rules, context, feedback, dryRun=dryRun)
         self.setFlags(flagsDict, pointFlags, lineFlags, polygonFlags)
         return {
             self.POINT_FLAGS: ptId,
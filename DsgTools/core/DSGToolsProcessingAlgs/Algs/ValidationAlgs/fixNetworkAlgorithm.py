@@ -185,7 +185,8 @@ class FixNetworkAlgorithm(ValidationAlgorithm):
         layerHandler.filterDangles(
             dangleLyr,
             tol,
-            feedback=multiStepFeedback
+            feedback=multiStepFeedback,
+            cacheStore=self.geometryCacheStore(context)
             )
         #snap layer to dangles
         multiStepFeedback.setCurrentStep(3)
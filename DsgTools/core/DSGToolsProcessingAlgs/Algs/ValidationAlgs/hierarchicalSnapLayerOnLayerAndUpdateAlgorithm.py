@@ -36,7 +36,7 @@ from qgis.core import (QgsProject,
                        QgsProcessingMultiStepFeedback,
                        QgsProcessingParameterDefinition)
 
-from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.GeometricTools.snapSession import SnapSession
 from ...algRunner import AlgRunner
 from .validationAlgorithm import ValidationAlgorithm
 
@@ -100,17 +100,17 @@ class HierarchicalSnapLayerOnLayerAndUpdateAlgorithm(ValidationAlgorithm):
         """
         Here is where the processing itself takes place.
         """
-        layerHandler = LayerHandler()
         snapDict = self.parameterAsSnapHierarchy(parameters, self.SNAP_HIERARCHY, context)
 
         onlySelected = self.parameterAsBool(parameters, self.SELECTED, context)
 
         behavior = self.parameterAsEnum(parameters, self.BEHAVIOR, context)
-        nSteps = 0
+        nSteps = 1
         for item in snapDict:
             nSteps += len(item['snapLayerList'])
         currStep = 0
         multiStepFeedback = QgsProcessingMultiStepFeedback(nSteps, feedback)
+        snapSession = SnapSession()
         for current, item in enumerate(snapDict):
             refLyr = self.layerFromProject(item['referenceLayer'])
             for i, lyr in enumerate(item['snapLayerList']):
@@ -125,15 +125,38 @@ class HierarchicalSnapLayerOnLayerAndUpdateAlgorithm(ValidationAlgorithm):
                         snap=item['snap']
                         )
                     )
-                layerHandler.snapToLayer(
+                report = snapSession.snapLayer(
                     lyr,
                     refLyr,
                     item['snap'],
                     behavior,
                     onlySelected=onlySelected,
+                    level=current,
                     feedback=multiStepFeedback
                     )
+                multiStepFeedback.pushInfo(
+                    self.tr('{changed} features changed, {deleted} deleted and {moved} vertexes moved in {elapsed:.2f} s.').format(
+                        changed=report['changedCount'],
+                        deleted=report['deletedCount'],
+                        moved=report['movedVertexCount'],
+                        elapsed=report['elapsed']
+                        )
+                    )
                 currStep += 1
+        if multiStepFeedback.isCanceled():
+            return {}
+        for report in snapSession.levelReports():
+            multiStepFeedback.pushInfo(
+                self.tr('Level {level}: {moved} vertexes moved on {changed} features in {elapsed:.2f} s.').format(
+                    level=report['level'] + 1,
+                    moved=report['movedVertexCount'],
+                    changed=report['changedCount'],
+                    elapsed=report['elapsed']
+                    )
+                )
+        multiStepFeedback.setCurrentStep(currStep)
+        multiStepFeedback.pushInfo(self.tr('Writing snapped geometries...'))
+        snapSession.commit()
         return {}
 
     def name(self):
@@ -19,8 +19,6 @@
  *                                                                         *
  ***************************************************************************/
 """
-import concurrent.futures
-import os
 
 import processing
 from qgis.core import (QgsFeature, QgsFeatureSink, QgsField, QgsFields,
@@ -31,6 +29,8 @@ from qgis.core import (QgsFeature, QgsFeatureSink, QgsField, QgsFields,
 from qgis.PyQt.QtCore import QCoreApplication, QVariant
 from qgis.utils import iface
 
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
+
 from .validationAlgorithm import ValidationAlgorithm
 
 
@@ -169,7 +169,6 @@ class IdentifyCountourStreamIntersectionAlgorithm(ValidationAlgorithm):
         )
 
     def findProblems(self, feedback, outputPointsSet, outputLinesSet, inputLyr, idDict):
-        total = 100.0 / inputLyr.featureCount() if inputLyr.featureCount() else 0
         def buildOutputs(riverFeat, feedback):
             if feedback.isCanceled():
                 return
@@ -187,20 +186,8 @@ class IdentifyCountourStreamIntersectionAlgorithm(ValidationAlgorithm):
         
         buildOutputsLambda = lambda x: buildOutputs(x, feedback)
         
-        pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count())
-        futures = set()
-        current_idx = 0
-        
-        for feat in inputLyr.getFeatures():
-            if feedback is not None and feedback.isCanceled():
-                break
-            futures.add(pool.submit(buildOutputsLambda, feat))
-        
-        for x in concurrent.futures.as_completed(futures):
-            if feedback is not None and feedback.isCanceled():
-                break
-            feedback.setProgress(current_idx * total)
-            current_idx += 1
+        executor = BoundedChunkExecutor(chunkSize=100, feedback=feedback)
+        executor.run(buildOutputsLambda, inputLyr.getFeatures(), total=inputLyr.featureCount())
 
     def outLayer(self, parameters, context, geometry, streamLayer, geomtype):
         newFields = QgsFields()
@@ -20,14 +20,15 @@
  *                                                                         *
  ***************************************************************************/
 """
-import concurrent.futures
-import os
-from collections import defaultdict
 from typing import DefaultDict, Dict, Tuple, Union
 
 import processing
 from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
+from DsgTools.core.GeometricTools.geometryCache import GeometryCacheStore
+from DsgTools.core.GeometricTools.geometryExecutionBackend import (
+    GeometryReference, ThreadGeometryBackend, getGeometryExecutionBackend)
 from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.GeometricTools.lineEndPoints import LineEndPoints
 from PyQt5.QtCore import QCoreApplication
 from qgis.core import (QgsFeatureRequest, QgsGeometry, QgsPointXY,
                        QgsProcessing, QgsProcessingFeatureSourceDefinition,
@@ -118,6 +119,7 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
                 optional=True
             )
         )
+        self.addIncrementalParameters()
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.FLAGS,
@@ -147,11 +149,13 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
         inputIsBoundaryLayer = self.parameterAsBool(
             parameters, self.INPUT_IS_BOUDARY_LAYER, context)
         geographicBoundsLyr = self.parameterAsVectorLayer(parameters, self.GEOGRAPHIC_BOUNDARY, context)
+        inputLyr, onlySelected = self.prepareIncrementalInput(
+            parameters, inputLyr, searchRadius, context, onlySelected=onlySelected, feedback=feedback)
         # cacheInput = self.parameterAsBool(parameters, self.CACHE_INPUT, context)
 
         # Compute the number of steps to display within the progress bar and
         # get features from source
-        feedbackTotal = 3
+        feedbackTotal = 2
         feedbackTotal += 1 if lineFilterLyrList or polygonFilterLyrList else 0
         feedbackTotal += 1 if not inputIsBoundaryLayer else 0
         # feedbackTotal += 2 if cacheInput else 0
@@ -171,30 +175,17 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
         onlySelected = False
         currentStep += 1
 
-        multiStepFeedback.setCurrentStep(currentStep)
-        algRunner.runCreateSpatialIndex(
-            inputLyr=inputLyr,
-            context=context,
-            feedback=multiStepFeedback
-        )
-        currentStep += 1
-
         multiStepFeedback.setCurrentStep(currentStep)
         multiStepFeedback.pushInfo(self.tr('Building search structure...'))
-        endVerticesDict = self.buildInitialAndEndPointDict(
-            inputLyr,
-            algRunner,
-            context=context,
-            geographicBoundsLyr=geographicBoundsLyr,
-            feedback=multiStepFeedback
-        )
+        endPoints = LineEndPoints.fromLayer(inputLyr, feedback=multiStepFeedback)
 
         # search for dangles candidates
         currentStep += 1
         multiStepFeedback.setCurrentStep(currentStep)
         multiStepFeedback.pushInfo(self.tr('Looking for dangle candidates...'))
-        pointSet = self.searchDanglesOnPointDict(
-            endVerticesDict, multiStepFeedback)
+        pointSet = self.searchDanglesOnEndPoints(
+            endPoints, multiStepFeedback, geographicBoundsLyr=geographicBoundsLyr,
+            cacheStore=self.geometryCacheStore(context))
         # build filter layer
         filterLayer = self.buildFilterLayer(
             lineFilterLyrList,
@@ -204,6 +195,7 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
             onlySelected=onlySelected
         )
         # filter pointList with filterLayer
+        backend = getGeometryExecutionBackend()
         dangleSet = set()
         relatedDict = dict()
 
@@ -217,6 +209,7 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
                 filterLayer,
                 searchRadius,
                 multiStepFeedback,
+                backend=backend
             )
             dangleSet = dangleSet.union(danglesWithFilterLayersSet)
             pointSet = pointSet.difference(dangleSet)
@@ -233,6 +226,7 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
             relatedDict=relatedDict,
             searchRadius=searchRadius,
             feedback=multiStepFeedback,
+            backend=backend
         )
         dangleSet = dangleSet.union(danglesOnInputLayerSet)
         # build flag list with filtered points
@@ -251,83 +245,42 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
                 )
                 multiStepFeedback.setProgress(current*currentTotal)
         # feedback.setProgress(100)
+        self.finishIncrementalRun(parameters, context, feedback=multiStepFeedback)
         return {self.FLAGS: self.flag_id}
 
-    def buildInitialAndEndPointDict(self, lyr, algRunner, context, feedback, geographicBoundsLyr=None):
-        pointDict = defaultdict(set)
-        nSteps = 5 if geographicBoundsLyr is not None else 3
-        currentStep = 0
-        multiStepFeedback = QgsProcessingMultiStepFeedback(nSteps, feedback)
-        multiStepFeedback.setCurrentStep(currentStep)
-        # this process of extracting the boundary is intentionally without the feedback
-        # to avoid the excessive amount of error messages that are generated due to closed lines.
-        boundaryLyr = algRunner.runBoundary(
-            inputLayer=lyr,
-            context=context
-        )
-        currentStep += 1
-        multiStepFeedback.setCurrentStep(currentStep)
-        boundaryLyr = algRunner.runMultipartToSingleParts(
-            inputLayer=boundaryLyr,
-            context=context,
-            feedback=multiStepFeedback
-        )
-        currentStep += 1
-        multiStepFeedback.setCurrentStep(currentStep)
-        if geographicBoundsLyr is not None:
-            algRunner.runCreateSpatialIndex(
-                inputLyr=boundaryLyr,
-                context=context,
-                feedback=multiStepFeedback
-            )
-            currentStep += 1
-            multiStepFeedback.setCurrentStep(currentStep)
-            boundaryLyr = algRunner.runExtractByLocation(
-                inputLyr=boundaryLyr,
-                intersectLyr=geographicBoundsLyr,
-                context=context,
-                feedback=multiStepFeedback
-            )
-            currentStep += 1
-
-        multiStepFeedback.setCurrentStep(currentStep)
-        featCount = boundaryLyr.featureCount()
-        if featCount == 0:
-            return pointDict
-        step = 100/featCount
-        for current, feat in enumerate(boundaryLyr.getFeatures()):
-            if multiStepFeedback.isCanceled():
-                break
-            geom = feat.geometry()
-            if geom is None or not geom.isGeosValid():
-                continue
-            id = feat["AUTO"]
-            pointList = geom.asMultiPoint() if geom.isMultipart() else [
-                geom.asPoint()]
-            for point in pointList:
-                pointDict[point].add(id)
-            multiStepFeedback.setProgress(current * step)
-        return pointDict
-
-    def searchDanglesOnPointDict(self, endVerticesDict: Dict, feedback: QgsProcessingFeedback) -> set:
+    def searchDanglesOnEndPoints(self, endPoints: LineEndPoints, feedback: QgsProcessingFeedback, geographicBoundsLyr: QgsVectorLayer = None, cacheStore: GeometryCacheStore = None) -> set:
         """
-        Counts the number of points on each endVerticesDict's key and returns a set of QgsPoint built from key candidate.
+        Gets the end points that are on the boundary of only one line. When
+        geographicBoundsLyr is given, only the points that intersect its
+        features are returned. Its index is taken from cacheStore, if given.
         """
         pointSet = set()
-        nVertexes = len(endVerticesDict)
-        if nVertexes == 0:
+        nodeIdxArray = endPoints.danglingNodes()
+        nNodes = len(nodeIdxArray)
+        if nNodes == 0:
             return pointSet
-        localTotal = 100/nVertexes if nVertexes else 0
-        # actual search for dangles
-        for current, point in enumerate(endVerticesDict):
+        if geographicBoundsLyr is not None:
+            # cached geometries never carry attributes
+            featureRequest = QgsFeatureRequest().setNoAttributes() if cacheStore is None else None
+            boundsIdx, boundsDict = self.layerHandler.buildSpatialIndexAndIdDict(
+                geographicBoundsLyr, featureRequest=featureRequest, cacheStore=cacheStore)
+        localTotal = 100/nNodes
+        for current, nodeIdx in enumerate(nodeIdxArray.tolist()):
             if feedback.isCanceled():
                 break
-            # this means we only have one occurrence of point, therefore it is a dangle
-            if len(endVerticesDict[point]) <= 1:
+            point = endPoints.nodePoint(nodeIdx)
+            if geographicBoundsLyr is None or self.pointIntersectsLayer(point, boundsIdx, boundsDict):
                 pointSet.add(point)
             feedback.setProgress(localTotal*current)
         return pointSet
 
+    def pointIntersectsLayer(self, point: QgsPointXY, spatialIdx: QgsSpatialIndex, idDict: Dict) -> bool:
+        geom = QgsGeometry.fromPointXY(point)
+        return any(
+            idDict[featId].geometry().intersects(geom)
+            for featId in spatialIdx.intersects(geom.boundingBox())
+        )
+
     def buildFilterLayer(self, lineLyrList, polygonLyrList, context, feedback, onlySelected=False):
         """
         Buils one layer of filter lines.
@@ -359,71 +312,56 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
 
     def getDanglesOnInputLayerFeatures(
         self, pointSet: set, inputLyr: QgsVectorLayer, searchRadius: float, ignoreDanglesOnUnsegmentedLines: bool = False,\
-        inputIsBoundaryLayer: bool = False, relatedDict: dict = None, feedback: QgsProcessingMultiStepFeedback = None
+        inputIsBoundaryLayer: bool = False, relatedDict: dict = None, feedback: QgsProcessingMultiStepFeedback = None,
+        backend: ThreadGeometryBackend = None
     ) -> set:
         inputLayerDangles = set()
         nPoints = len(pointSet)
         relatedDict = dict() if relatedDict is None else relatedDict
         if nPoints == 0:
             return inputLayerDangles
-        localTotal = 100/nPoints
-        pool = concurrent.futures.ThreadPoolExecutor(
-            max_workers=os.cpu_count()-1)
-        futures = set()
+        backend = getGeometryExecutionBackend() if backend is None else backend
 
-        def evaluate(point) -> Union[QgsPointXY, None]:
-            qgisPoint = QgsGeometry.fromPointXY(point)
-            buffer = qgisPoint.buffer(searchRadius, -1)
-            bufferBB = buffer.boundingBox()
-            # search radius to narrow down candidates
-            request = QgsFeatureRequest().setFilterRect(bufferBB)
-            bufferCount, intersectCount = 0, 0
-            point_relationship_lambda = lambda x: qgisPoint.intersects(x) \
-                if ignoreDanglesOnUnsegmentedLines else qgisPoint.touches(x)
-            for feat in inputLyr.getFeatures(request):
-                geom = feat.geometry()
-                if feedback is not None and feedback.isCanceled():
-                    return None
-                if geom.intersects(buffer):
-                    bufferCount += 1
-                    if point_relationship_lambda(geom):
-                        intersectCount += 1
+        def isDangle(point, bufferCount, intersectCount) -> bool:
             if inputIsBoundaryLayer and intersectCount == 1 and bufferCount == 1:
                 if relatedDict == dict():
-                    return point
+                    return True
                 if point in relatedDict and relatedDict[point]["candidateCount"] == relatedDict[point]["bufferCount"] and relatedDict[point]["candidateCount"] > 0:
-                    return None
-                return point
-            return point if bufferCount != intersectCount else None
+                    return False
+                return True
+            return bufferCount != intersectCount
 
         multiStepFeedback = QgsProcessingMultiStepFeedback(
             2, feedback) if feedback is not None else None
-        multiStepFeedback.setCurrentStep(0)
-        for current, point in enumerate(pointSet):
-            if multiStepFeedback is not None and multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, point))
-            if multiStepFeedback is not None:
-                multiStepFeedback.setProgress(current * localTotal)
-        multiStepFeedback.setCurrentStep(1)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback is not None and multiStepFeedback.isCanceled():
-                break
-            output = future.result()
-            if output is not None:
-                inputLayerDangles.add(output)
-            if multiStepFeedback is not None:
-                multiStepFeedback.setProgress(current * localTotal)
+        if multiStepFeedback is not None:
+            multiStepFeedback.setCurrentStep(0)
+        reference = GeometryReference.fromLayer(
+            inputLyr, feedback=multiStepFeedback)
+        pointList = list(pointSet)
+        if multiStepFeedback is not None:
+            multiStepFeedback.setCurrentStep(1)
+        countDict = self.countLinesNearPoints(
+            pointList,
+            reference,
+            searchRadius,
+            backend,
+            ignoreDanglesOnUnsegmentedLines=ignoreDanglesOnUnsegmentedLines,
+            feedback=multiStepFeedback
+        )
+        for idx, (bufferCount, intersectCount) in countDict.items():
+            point = pointList[idx]
+            if isDangle(point, bufferCount, intersectCount):
+                inputLayerDangles.add(point)
         return inputLayerDangles
 
     def getDanglesWithFilterLayers(
             self, pointSet: set, filterLayer: QgsVectorLayer, searchRadius: float,\
-            feedback: QgsProcessingMultiStepFeedback, ignoreNotSplit: bool = False
+            feedback: QgsProcessingMultiStepFeedback, ignoreNotSplit: bool = False,
+            backend: ThreadGeometryBackend = None
         ) -> Tuple[set, Dict[QgsPointXY, dict]]:
         """
-        Builds buffer areas from each point and evaluates the intersecting lines.
-        If the number of candidates that intersect the buffer is different than the 
-        number of intersections of the point with the neighbors, it is a dangle.
+        Counts the filter lines within searchRadius of each point and the ones
+        that intersect it. If both numbers are different, it is a dangle.
 
         Returns the set containing the dangles.
         """
@@ -432,63 +370,51 @@ class IdentifyDanglesAlgorithm(ValidationAlgorithm):
         relatedDict = dict()
         if nPoints == 0:
             return danglesWithFilterLayers, relatedDict
-        localTotal = 100/nPoints
-        multiStepFeedback = QgsProcessingMultiStepFeedback(4, feedback)
+        backend = getGeometryExecutionBackend() if backend is None else backend
+        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
         multiStepFeedback.setCurrentStep(0)
-        spatialIdx, allFeatureDict = self.buildSpatialIndexAndIdDict(
+        reference = GeometryReference.fromLayer(
             filterLayer, feedback=multiStepFeedback)
         multiStepFeedback.setCurrentStep(1)
-
-        def evaluate(point: QgsPointXY) -> dict:
-            candidateCount, bufferCount = 0, 0
-            qgisPoint = QgsGeometry.fromPointXY(point)
-            # search radius to narrow down candidates
-            buffer = qgisPoint.buffer(searchRadius, -1)
-            bufferBB = buffer.boundingBox()
-            # if there is only one feat in candidateIds, that means that it is not a dangle
-            for id in spatialIdx.intersects(bufferBB):
-                candidateGeom = allFeatureDict[id].geometry()
-                if multiStepFeedback.isCanceled():
-                    return None
-                if buffer.intersects(candidateGeom):
-                    bufferCount += 1
-                    if (qgisPoint.intersects(candidateGeom)):
-                        candidateCount += 1
-            return point, {"candidateCount": candidateCount, "bufferCount": bufferCount}
-
-        futures = set()
-        pool = concurrent.futures.ThreadPoolExecutor(
-            max_workers=os.cpu_count()-1)
-        multiStepFeedback.setCurrentStep(2)
-        for current, point in enumerate(pointSet):
-            if multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, point))
-            multiStepFeedback.setProgress(localTotal*current)
-        multiStepFeedback.setCurrentStep(3)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback.isCanceled():
-                break
-            dangle, dangleDict = future.result()
-            relatedDict[dangle] = dangleDict
-            if dangleDict["candidateCount"] != dangleDict["bufferCount"]:
+        pointList = list(pointSet)
+        countDict = self.countLinesNearPoints(
+            pointList,
+            reference,
+            searchRadius,
+            backend,
+            ignoreDanglesOnUnsegmentedLines=True,
+            feedback=multiStepFeedback
+        )
+        for idx, (bufferCount, candidateCount) in countDict.items():
+            dangle = pointList[idx]
+            relatedDict[dangle] = {"candidateCount": candidateCount, "bufferCount": bufferCount}
+            if candidateCount != bufferCount:
                 danglesWithFilterLayers.add(dangle)
-            multiStepFeedback.setProgress(localTotal*current)
-
         return danglesWithFilterLayers, relatedDict
 
-    def buildSpatialIndexAndIdDict(self, inputLyr, feedback=None):
+    def countLinesNearPoints(
+            self, pointList: list, reference: GeometryReference, searchRadius: float,
+            backend: ThreadGeometryBackend, ignoreDanglesOnUnsegmentedLines: bool = False,
+            feedback: QgsProcessingFeedback = None
+        ) -> Dict[int, Tuple[int, int]]:
         """
-        creates a spatial index for the centroid layer
+        Runs the dangle_count operation of the backend on every point. The
+        reference geometries are kept in memory, so the data source is not
+        read again, and the points are turned into WKB one batch at a time,
+        as the backend consumes them.
+        :return: (dict) {index on pointList: (bufferCount, intersectCount)}.
         """
-        spatialIdx = QgsSpatialIndex()
-        idDict = {}
-        for feat in inputLyr.getFeatures():
-            if feedback is not None and feedback.isCanceled():
-                break
-            spatialIdx.addFeature(feat)
-            idDict[feat.id()] = feat
-        return spatialIdx, idDict
+        return backend.run(
+            'dangle_count',
+            range(len(pointList)),
+            (bytes(QgsGeometry.fromPointXY(point).asWkb()) for point in pointList),
+            reference,
+            params={
+                'searchRadius': searchRadius,
+                'ignoreDanglesOnUnsegmentedLines': ignoreDanglesOnUnsegmentedLines
+            },
+            feedback=feedback
+        )
 
     def name(self):
         """
@@ -24,11 +24,10 @@
 from PyQt5.QtCore import QCoreApplication
 
 import processing
-import concurrent.futures
-import os
 from itertools import product, chain
 from DsgTools.core.GeometricTools.layerHandler import LayerHandler
 from DsgTools.core.GeometricTools.networkHandler import NetworkHandler
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 from qgis.core import (QgsDataSourceUri, QgsFeature, QgsFeatureSink,
                        QgsGeometry, QgsProcessing, QgsProcessingAlgorithm,
                        QgsProcessingException, QgsProcessingMultiStepFeedback,
@@ -479,7 +478,7 @@ class IdentifyDrainageFlowIssuesWithHydrographyElementsAlgorithm(ValidationAlgor
             inCount, outCount = 0, 0
             for drainageFeat in drainagesLyr.getFeatures(bbox):
                 if multiStepFeedback.isCanceled():
-                    return intersectionSet
+                    return intersectionSet, None
                 drainageGeom = drainageFeat.geometry()
                 if not geomEngine.intersects(drainageGeom.constGet()):
                     continue
@@ -497,20 +496,12 @@ class IdentifyDrainageFlowIssuesWithHydrographyElementsAlgorithm(ValidationAlgor
                 intersectionSet.add(interWkt)
             polygonWithProblem = None if flowCheckLambda([inCount, outCount]) else geom
             return intersectionSet, polygonWithProblem
-        stepSize = 100 / nFeats
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() - 1)
-        futures = set()
-        for current, feat in enumerate(waterBodyLyr.getFeatures()):
-            if multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, feat))
-            multiStepFeedback.setProgress(stepSize * current)
-
         multiStepFeedback.setCurrentStep(1)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
+        executor = BoundedChunkExecutor(chunkSize=50, feedback=multiStepFeedback)
+        for output in executor.map(evaluate, waterBodyLyr.getFeatures(), total=nFeats):
             if multiStepFeedback.isCanceled():
                 break
-            intersectionSet, polygonWithProblem = future.result()
+            intersectionSet, polygonWithProblem = output
             # intersectionSet, polygonWithProblem = evaluate(feat)
             # for wkt in intersectionSet:
             #     flagLineLambda(QgsGeometry.fromWkt(wkt))
@@ -518,7 +509,6 @@ class IdentifyDrainageFlowIssuesWithHydrographyElementsAlgorithm(ValidationAlgor
                 list(map(flagLineLambda, list(map(lambda x: QgsGeometry.fromWkt(x), intersectionSet))))
             if polygonWithProblem is not None:
                 flagPolygonLambda(polygonWithProblem)
-            multiStepFeedback.setProgress(current * stepSize)
     
     def validateDrainagesEndPoints(self, endPointDict, elementList, feedback):
         nFeats = len(endPointDict)
@@ -549,23 +539,13 @@ class IdentifyDrainageFlowIssuesWithHydrographyElementsAlgorithm(ValidationAlgor
                 if geomEngine.touches(candidateGeom.constGet()):
                     return None
             return geom
-        stepSize = 100 / nFeats
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() - 1)
-        futures = set()
-        for current, feat in enumerate(endPointDict.values()):
-            if multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, feat))
-            multiStepFeedback.setProgress(stepSize * current)
-
         multiStepFeedback.setCurrentStep(1)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
+        executor = BoundedChunkExecutor(chunkSize=100, feedback=multiStepFeedback)
+        for geom in executor.map(evaluate, endPointDict.values(), total=nFeats):
             if multiStepFeedback.isCanceled():
                 break
-            geom = future.result()
             if geom is not None:
                 flagPointLambda(geom)
-            multiStepFeedback.setProgress(current * stepSize)
 
 
     def name(self):
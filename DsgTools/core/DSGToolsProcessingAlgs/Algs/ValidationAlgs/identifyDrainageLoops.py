@@ -21,25 +21,19 @@
  ***************************************************************************/
 """
 
-import os
-import concurrent.futures
 from PyQt5.QtCore import QCoreApplication
-from qgis.core import (QgsProcessing, QgsProcessingException,
+from qgis.core import (QgsFeatureRequest, QgsGeometry, QgsProcessing,
                        QgsProcessingMultiStepFeedback,
-                       QgsProcessingParameterBoolean,
                        QgsProcessingParameterFeatureSink,
-                       QgsProcessingParameterFeatureSource, QgsGeometry,
-                       QgsWkbTypes, QgsPoint)
+                       QgsProcessingParameterFeatureSource, QgsWkbTypes)
 
-from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
-from DsgTools.core.GeometricTools.geometryHandler import GeometryHandler
+from DsgTools.core.GeometricTools.compactNetwork import CompactNetwork
 
 from .validationAlgorithm import ValidationAlgorithm
 
 
 class IdentifyDrainageLoops(ValidationAlgorithm):
     INPUT = 'INPUT'
-    BUILD_CACHE = 'BUILD_CACHE'
     FLAGS = 'FLAGS'
 
     def initAlgorithm(self, config=None):
@@ -52,12 +46,6 @@ class IdentifyDrainageLoops(ValidationAlgorithm):
                 ]
             )
         )
-        self.addParameter(
-            QgsProcessingParameterBoolean(
-                self.BUILD_CACHE,
-                self.tr('Build local cache of the input layer')
-            )
-        )
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.FLAGS,
@@ -66,141 +54,84 @@ class IdentifyDrainageLoops(ValidationAlgorithm):
         )
 
     def processAlgorithm(self, parameters, context, feedback):
-        try:
-            import networkx as nx
-        except ImportError:
-            raise QgsProcessingException(
-                self.tr('This algorithm requires the Python networkx library. Please install this library and try again.')
-            )
-        algRunner = AlgRunner()
-        geometryHandler = GeometryHandler()
-
         inputLyr = self.parameterAsVectorLayer(
             parameters,
             'INPUT',
             context
         )
-        buildCache = self.parameterAsBool(
-            parameters, self.BUILD_CACHE, context
-        )
         self.prepareFlagSink(parameters, inputLyr, QgsWkbTypes.LineString, context)
 
-        # Iterate over lines setting the dictionary counters:
-        nSteps = 6 if buildCache else 4
-        multiStepFeedback = QgsProcessingMultiStepFeedback(nSteps, feedback)
+        multiStepFeedback = QgsProcessingMultiStepFeedback(3, feedback)
         currentStep = 0
-        if buildCache:
-            multiStepFeedback.setCurrentStep(currentStep)
-            multiStepFeedback.setProgressText(self.tr("Building input cache..."))
-            inputLyr = algRunner.runAddAutoIncrementalField(
-                inputLyr=inputLyr, context=context, feedback=multiStepFeedback
-            )
-            currentStep += 1
-            multiStepFeedback.setCurrentStep(currentStep)
-            algRunner.runCreateSpatialIndex(
-                inputLyr=inputLyr, context=context, feedback=multiStepFeedback
-            )
-            currentStep += 1
-        
-        multiStepFeedback.setProgressText(self.tr("Building loop area candidates..."))
         multiStepFeedback.setCurrentStep(currentStep)
-        polygonLyr = algRunner.runPolygonize(
-            inputLyr=inputLyr, context=context, feedback=multiStepFeedback
-        )
+        multiStepFeedback.setProgressText(self.tr("Building drainage graph..."))
+        network, pieceList = self.buildVertexNetwork(inputLyr, multiStepFeedback)
         currentStep += 1
-
-        if polygonLyr.featureCount() == 0:
+        if multiStepFeedback.isCanceled():
             return {self.FLAGS: self.flag_id}
-        
+
         multiStepFeedback.setCurrentStep(currentStep)
-        mergedPolygons = algRunner.runDissolve(
-            inputLyr=polygonLyr, context=context, feedback=multiStepFeedback
-        )
+        multiStepFeedback.setProgressText(self.tr("Searching loops..."))
+        loopList = network.loopEdgeGroups()
         currentStep += 1
-        
-        multiStepFeedback.setCurrentStep(currentStep)
-        polygonLoops = algRunner.runMultipartToSingleParts(
-            inputLayer=mergedPolygons, context=context, feedback=multiStepFeedback
-        )
-        currentStep += 1
-        polygonCount = polygonLoops.featureCount()
-        if polygonCount == 0:
-            multiStepFeedback.setProgressText(self.tr("Building loop area candidates..."))
+        if not loopList:
             return {self.FLAGS: self.flag_id}
 
         multiStepFeedback.setCurrentStep(currentStep)
-        self.searchLoops(nx, geometryHandler, inputLyr, multiStepFeedback, polygonLoops, polygonCount)
+        multiStepFeedback.setProgressText(self.tr("Raising flags..."))
+        self.flagLoops(loopList, pieceList, multiStepFeedback)
 
         return {self.FLAGS: self.flag_id}
 
-    def searchLoops(self, nx, geometryHandler, inputLyr, feedback, polygonLoops, polygonCount):
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
-        stepSize = 100 / polygonCount
-        flagFeatLambda = lambda x: self.flagFeature(
-            flagGeom=x, flagText=self.tr('Loop on input drainages')
-        )
-        firstAndLastNode = lambda x: geometryHandler.getFirstAndLastNode(
-            inputLyr, x
-        )
-        multiStepFeedback.setCurrentStep(0)
-        multiStepFeedback.setProgressText(self.tr('Submitting tasks to thread'))
-        def evaluate(polygonFeature):
-            geom = polygonFeature.geometry()
-            geomEngine = QgsGeometry.createGeometryEngine(geom.constGet())
-            graph = nx.DiGraph()
-            for i, feat in enumerate(inputLyr.getFeatures()):
-                if not geomEngine.intersects(feat.geometry().constGet()):
-                    continue
-                p0, pn = firstAndLastNode(feat)
-                p0 = QgsGeometry.fromPointXY(p0)
-                pn = QgsGeometry.fromPointXY(pn)
-                if not geomEngine.intersects(p0.constGet()) or not geomEngine.intersects(pn.constGet()):
-                    continue
-                vertexList = list(feat.geometry().vertices())
-                for v1, v2 in zip(vertexList, vertexList[1:]):
-                    graph.add_edge(v1.asWkt(), v2.asWkt())
-            loopSet = self.findLoopsOnEdgeSet(nx, graph, feedback=multiStepFeedback)
-            return loopSet
-        pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count()-1)
-        futures = set()
-        for current, polygonFeature in enumerate(polygonLoops.getFeatures()):
-            if multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, polygonFeature))
-            multiStepFeedback.setCurrentStep(current * stepSize)
-
-        multiStepFeedback.setCurrentStep(1)
-        multiStepFeedback.setProgressText(self.tr('Evaluating results'))
-        
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback.isCanceled():
-                break
-            loopSet = future.result()
-            if loopSet != set():
-                list(map(flagFeatLambda, loopSet))
-            multiStepFeedback.setCurrentStep(current * stepSize)
-
-    def findLoopsOnEdgeSet(self, nx, graph, feedback):
-        # loops = nx.strongly_connected_components(graph)
-        loops = nx.simple_cycles(graph)
-        # loops = nx.kosaraju_strongly_connected_components(graph)
-        loopSet = set()
-        for loop in loops:
+    def buildVertexNetwork(self, inputLyr, feedback):
+        """
+        Builds the directed graph of the drainages over their vertices: lines
+        are split on the vertices they share, so that loops that go through
+        interior vertices of lines that were not split are found.
+        :param inputLyr: (QgsVectorLayer) drainage lines layer;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (tuple) (CompactNetwork) network and (list-of-list-of-
+            QgsPointXY) vertices of each of its edges.
+        """
+        featIds, polylineList = [], []
+        featCount = inputLyr.featureCount()
+        size = 100/featCount if featCount else 0
+        request = QgsFeatureRequest().setNoAttributes()
+        for current, feat in enumerate(inputLyr.getFeatures(request)):
             if feedback.isCanceled():
-                return loopSet
-            initialNode, *nodeList = loop
-            if nodeList == []:
+                break
+            geom = feat.geometry()
+            if geom.isNull() or geom.isEmpty():
                 continue
-            pointFromWkt = lambda x: QgsPoint(QgsGeometry.fromWkt(x).asPoint())
-            loopGeom = QgsGeometry.fromPolyline(
-                [pointFromWkt(initialNode)] + 
-                list(map(pointFromWkt, nodeList)) + 
-                [pointFromWkt(initialNode)]
-            )
-            loopSet.add(loopGeom)
-        return loopSet
-            
-        
+            for polyline in geom.asMultiPolyline() if geom.isMultipart() else [geom.asPolyline()]:
+                featIds.append(feat.id())
+                polylineList.append(polyline)
+            feedback.setProgress(size * current)
+        return CompactNetwork.fromPolylines(featIds, polylineList)
+
+    def flagLoops(self, loopList, pieceList, feedback):
+        """
+        Flags the lines of each loop, merged. A loop is a strongly connected
+        component of the graph, so the simple cycles that share lines are
+        flagged together instead of once each.
+        :param loopList: (list-of-np.ndarray) edge indexes of each loop;
+        :param pieceList: (list-of-list-of-QgsPointXY) vertices of each edge;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        """
+        loopCount = len(loopList)
+        size = 100/loopCount if loopCount else 0
+        for current, edgeGroup in enumerate(loopList):
+            if feedback.isCanceled():
+                return
+            loopGeom = QgsGeometry.collectGeometry(
+                [QgsGeometry.fromPolylineXY(pieceList[edge]) for edge in edgeGroup.tolist()]
+            ).mergeLines()
+            for part in loopGeom.asGeometryCollection() if loopGeom.isMultipart() else [loopGeom]:
+                self.flagFeature(
+                    flagGeom=part,
+                    flagText=self.tr('Loop on input drainages')
+                )
+            feedback.setProgress(size * current)
 
     def name(self):
         """
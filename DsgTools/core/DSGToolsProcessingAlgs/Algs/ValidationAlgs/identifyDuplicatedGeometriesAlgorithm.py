@@ -30,6 +30,9 @@ from qgis.core import (QgsDataSourceUri, QgsFeature, QgsFeatureSink,
                        QgsProcessingParameterVectorLayer, QgsWkbTypes)
 from qgis.PyQt.QtCore import QCoreApplication
 
+from DsgTools.core.dsgEnums import DsgEnums
+from DsgTools.core.Factories.SqlFactory.sqlGeneratorFactory import SqlGeneratorFactory
+
 from .validationAlgorithm import ValidationAlgorithm
 
 class IdentifyDuplicatedGeometriesAlgorithm(ValidationAlgorithm):
@@ -73,6 +76,8 @@ class IdentifyDuplicatedGeometriesAlgorithm(ValidationAlgorithm):
                 self.invalidSourceError(parameters, self.INPUT))
         onlySelected = self.parameterAsBool(parameters, self.SELECTED, context)
         self.prepareFlagSink(parameters, inputLyr, inputLyr.wkbType(), context)
+        if self.runSqlPushdown(inputLyr, parameters, context, feedback, onlySelected=onlySelected):
+            return {self.FLAGS: self.flag_id}
         # Compute the number of steps to display within the progress bar and
         # get features from source
         layerHandler = LayerHandler()
@@ -94,13 +99,26 @@ class IdentifyDuplicatedGeometriesAlgorithm(ValidationAlgorithm):
             if feedback.isCanceled():
                 break
             if len(featList) > 1:
-                idStrList = ', '.join(
-                    map(str, [feat.id() for feat in featList]))
-                flagText = self.tr('Features from layer {0} with ids=({1}) have the same set of attributes.').format(
-                    inputLyr.name(), idStrList)
+                flagText = self.getFlagText(inputLyr, [feat.id() for feat in featList])
                 self.flagFeature(featList[0].geometry(), flagText)
             feedback.setProgress(size * current)
 
+    def getFlagText(self, inputLyr, idList):
+        idStrList = ', '.join(map(str, idList))
+        return self.tr('Features from layer {0} with ids=({1}) have the same set of attributes.').format(
+            inputLyr.name(), idStrList)
+
+    def pushdownSql(self, source, parameters, context):
+        inputLyr = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        gen = SqlGeneratorFactory().createSqlGenerator(driver=DsgEnums.DriverPostGIS)
+        return gen.getDuplicatedGeometryFeatures(
+            source.relation, source.geometry, source.key, source.whereClause(),
+            QgsWkbTypes.isMultiType(int(inputLyr.wkbType()))
+        )
+
+    def pushdownFlagText(self, inputLyr, row, parameters, context):
+        return self.getFlagText(inputLyr, row[0])
+
     def name(self):
         """
         Returns the algorithm name, used for identifying the algorithm. This
@@ -20,11 +20,14 @@
  ***************************************************************************/
 """
 
+import struct
 from collections import defaultdict
 from dataclasses import dataclass
 from PyQt5.QtCore import QCoreApplication
 
 from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.GeometricTools.vertexArrays import (closeVertexMask,
+                                                       layerVertexArrays)
 from qgis.core import (QgsDataSourceUri, QgsFeature, QgsFeatureSink, QgsProcessing,
     QgsProcessingAlgorithm, QgsProcessingException, QgsProcessingMultiStepFeedback,
     QgsProcessingOutputVectorLayer, QgsProcessingParameterBoolean, QgsProcessingParameterDistance,
@@ -32,7 +35,6 @@ from qgis.core import (QgsDataSourceUri, QgsFeature, QgsFeatureSink, QgsProcessi
     QgsProcessingParameterField, QgsProcessingParameterVectorLayer, QgsWkbTypes, QgsProcessingFeatureSourceDefinition,
     QgsFeatureRequest)
 
-from ...algRunner import AlgRunner
 from .validationAlgorithm import ValidationAlgorithm
 
 
@@ -83,7 +85,6 @@ class IdentifyGeometriesWithLargeVertexDensityAlgorithm(ValidationAlgorithm):
         """
         Here is where the processing itself takes place.
         """
-        algRunner = AlgRunner()
         inputLyr = self.parameterAsVectorLayer(
             parameters,
             self.INPUT,
@@ -108,34 +109,22 @@ class IdentifyGeometriesWithLargeVertexDensityAlgorithm(ValidationAlgorithm):
         self.prepareFlagSink(parameters, inputLyr, QgsWkbTypes.Point, context)
         # Compute the number of steps to display within the progress bar and
         # get features from source
-        multiStepFeedback = QgsProcessingMultiStepFeedback(5, feedback)
+        multiStepFeedback = QgsProcessingMultiStepFeedback(3, feedback)
         multiStepFeedback.setCurrentStep(0)
-        multiStepFeedback.setProgressText(self.tr("Building aux structure..."))
-        usedInput = inputLyr if not onlySelected else QgsProcessingFeatureSourceDefinition(
-            inputLyr.id(), True)
-        incrementedLayer = algRunner.runAddAutoIncrementalField(
-            usedInput,
-            context,
-            feedback=multiStepFeedback
-        )
-        multiStepFeedback.setCurrentStep(1)
         multiStepFeedback.setProgressText(self.tr("Extracting vertexes..."))
-        vertexLayer = algRunner.runExtractVertices(
-            inputLyr=incrementedLayer,
-            context=context,
+        vertexArray, featIndex, _, _ = layerVertexArrays(
+            inputLyr, onlySelected=onlySelected, feedback=multiStepFeedback)
+        multiStepFeedback.setCurrentStep(1)
+        multiStepFeedback.setProgressText(self.tr("Searching close vertexes..."))
+        flagDict = self.getCloseVertexes(
+            vertexArray,
+            featIndex,
+            searchRadius,
+            hasZ=QgsWkbTypes.hasZ(inputLyr.wkbType()),
+            hasM=QgsWkbTypes.hasM(inputLyr.wkbType()),
             feedback=multiStepFeedback
         )
         multiStepFeedback.setCurrentStep(2)
-        multiStepFeedback.setProgressText(self.tr("Building spatial index on extracted vertexes..."))
-        algRunner.runCreateSpatialIndex(
-            inputLyr=vertexLayer,
-            context=context,
-            feedback=multiStepFeedback
-        )
-        multiStepFeedback.setCurrentStep(3)
-        multiStepFeedback.setProgressText(self.tr("Searching close vertexes..."))
-        flagDict = self.getCloseVertexes(vertexLayer, searchRadius, feedback=multiStepFeedback)
-        multiStepFeedback.setCurrentStep(4)
         multiStepFeedback.setProgressText(self.tr("Raising flags (if any)..."))
         self.raiseFlags(flagDict, feedback=multiStepFeedback)
 
@@ -161,26 +150,41 @@ class IdentifyGeometriesWithLargeVertexDensityAlgorithm(ValidationAlgorithm):
             if feedback is not None:
                 feedback.setProgress(current * size)
 
-    def getCloseVertexes(self, vertexLayer, searchRadius, feedback=None):
+    def getCloseVertexes(self, vertexArray, featIndex, searchRadius, hasZ=False, hasM=False, feedback=None):
+        """
+        Finds, for each feature, the vertexes that are closer than searchRadius
+        to another vertex of the same feature.
+        :param vertexArray: (np.ndarray) (n, 4) vertexes (x, y, z, m) of every
+            feature, as read by layerVertexArrays;
+        :param featIndex: (np.ndarray) index of the feature of each vertex, in
+            the order the features were read;
+        :param searchRadius: (float) search distance;
+        :param hasZ: (bool) whether flags keep the z of the vertexes;
+        :param hasM: (bool) whether flags keep the m of the vertexes;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (dict) { (int) feature number (starting at 1) : (set-of-bytes)
+            WKB of its close vertexes }
+        """
         flagDict = defaultdict(set) # key: featid, value: set of vertexes
-        featCount = vertexLayer.featureCount()
-        if featCount == 0:
+        if len(vertexArray) == 0:
             return flagDict
-        size = 100 / featCount
-        for current, feat in enumerate(vertexLayer.getFeatures()):
+        mask = closeVertexMask(
+            vertexArray[:, :2], searchRadius, groups=featIndex, feedback=feedback)
+        wkbType = QgsWkbTypes.Point
+        columns = [0, 1]
+        if hasZ:
+            wkbType = QgsWkbTypes.addZ(wkbType)
+            columns.append(2)
+        if hasM:
+            wkbType = QgsWkbTypes.addM(wkbType)
+            columns.append(3)
+        header = struct.pack('<bI', 1, int(wkbType))
+        coordFormat = '<{0}d'.format(len(columns))
+        for featNumber, coords in zip(
+                (featIndex[mask] + 1).tolist(), vertexArray[mask][:, columns].tolist()):
             if feedback is not None and feedback.isCanceled():
                 break
-            geom = feat.geometry()
-            buffer = geom.buffer(searchRadius, -1)
-            bufferBB = buffer.boundingBox()
-            request = QgsFeatureRequest().setFilterExpression(f"featid = {feat['featid']}").setFilterRect(bufferBB)
-            for candidateFeat in vertexLayer.getFeatures(request):
-                if candidateFeat.id() == feat.id() or candidateFeat.geometry() in flagDict[feat["featid"]]:
-                    continue
-                if candidateFeat.geometry().intersects(buffer):
-                    flagDict[feat["featid"]].add(geom.asWkb())
-            if feedback is not None:
-                feedback.setProgress(size * current)
+            flagDict[featNumber].add(header + struct.pack(coordFormat, *coords))
         return flagDict
 
     def name(self):
@@ -22,10 +22,9 @@
 """
 
 import itertools
-import concurrent.futures
-import os
 from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
 from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 from .validationAlgorithm import ValidationAlgorithm
 from PyQt5.QtCore import QCoreApplication
 from qgis.core import (
@@ -214,7 +213,6 @@ class IdentifyNetworkConstructionIssuesAlgorithm(ValidationAlgorithm):
         nFeats = mergedLines.featureCount()
         if nFeats == 0:
             return
-        stepSize = 100 / nFeats
         errorSet = set()
         def evaluate(feat):
             outputSet = set()
@@ -244,25 +242,18 @@ class IdentifyNetworkConstructionIssuesAlgorithm(ValidationAlgorithm):
                         outputSet.add(wkb)
             return outputSet
         
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()-1)
-        futures = set()
-        for current, feat in enumerate(mergedLines.getFeatures()):
+        executor = BoundedChunkExecutor(chunkSize=100, feedback=multiStepFeedback)
+        for outputSet in executor.map(evaluate, mergedLines.getFeatures(), total=nFeats):
             if multiStepFeedback.isCanceled():
                 break
-            #put this into a thread after it is working
-            futures.add(pool.submit(evaluate, feat))
-            multiStepFeedback.setProgress(current * stepSize)
-        concurrent.futures.wait(futures, timeout=None, return_when=concurrent.futures.ALL_COMPLETED)
-        multiStepFeedback.setCurrentStep(3)
-        stepSize = 100/len(futures)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback.isCanceled():
-                break
-            outputSet = future.result()
             errorSet = errorSet.union(outputSet)
-            multiStepFeedback.setProgress(current * stepSize)
+        multiStepFeedback.setCurrentStep(3)
         flagLambda = lambda x: self.flagFeature(x, self.tr("Line from input not split on intersection."), fromWkb=True)
-        list(map(flagLambda, errorSet))
+        self.startFlagWriter()
+        try:
+            list(map(flagLambda, errorSet))
+        finally:
+            self.closeFlagWriter(feedback=multiStepFeedback)
     
     def getFilterLayers(self, lineFilter, polygonFilter, algRunner, feedback, context):
         nSteps = len(polygonFilter) + 2
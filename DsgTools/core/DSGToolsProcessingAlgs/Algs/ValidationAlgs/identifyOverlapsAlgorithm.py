@@ -22,11 +22,10 @@
 
 from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
 from PyQt5.QtCore import QCoreApplication
-import os
 import processing
-import concurrent.futures
 from DsgTools.core.GeometricTools.geometryHandler import GeometryHandler
 from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 from qgis.core import (QgsDataSourceUri, QgsFeature, QgsFeatureSink,
                        QgsProcessing, QgsProcessingAlgorithm,
                        QgsProcessingException, QgsProcessingMultiStepFeedback,
@@ -99,11 +98,16 @@ class IdentifyOverlapsAlgorithm(ValidationAlgorithm):
         multiStepFeedback.setCurrentStep(2)
         multiStepFeedback.setProgressText(self.tr("Raising flags..."))
         total = len(geometrySet)
-        for current, geom in enumerate(geometrySet):
-            if multiStepFeedback.isCanceled():
-                break
-            self.flagFeature(geom, self.tr('Overlap on layer {0}').format(inputLyr.name()))
-            multiStepFeedback.setProgress(current * total)
+        # the same overlap may be found from more than one pair of features
+        self.startFlagWriter(deduplicate=True)
+        try:
+            for current, geom in enumerate(geometrySet):
+                if multiStepFeedback.isCanceled():
+                    break
+                self.flagFeature(geom, self.tr('Overlap on layer {0}').format(inputLyr.name()))
+                multiStepFeedback.setProgress(current * total)
+        finally:
+            self.closeFlagWriter(feedback=feedback)
 
         return {self.FLAGS: self.flag_id}
 
@@ -143,9 +147,9 @@ class IdentifyOverlapsAlgorithm(ValidationAlgorithm):
         return joinLyr, idDict
 
     def findOverlaps(self, inputLyr, idDict, feedback=None):
-        total = 100.0 / inputLyr.featureCount() if inputLyr.featureCount() else 0
+        nFeats = inputLyr.featureCount()
         geomType = inputLyr.geometryType()
-        if not total:
+        if not nFeats:
             return set()
         def _processFeature(feat, feedback):
             outputSet = set()
@@ -160,27 +164,16 @@ class IdentifyOverlapsAlgorithm(ValidationAlgorithm):
                 set(intersects.asGeometryCollection()) if intersects.isMultipart() else {intersects}
             ) if intersects.type() == geomType else outputSet 
         
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
+        multiStepFeedback = QgsProcessingMultiStepFeedback(1, feedback)
         multiStepFeedback.setCurrentStep(0)
-        multiStepFeedback.setProgressText(self.tr("Finding overlaps: submitting to thread..."))
+        multiStepFeedback.setProgressText(self.tr("Finding overlaps..."))
         processLambda = lambda x: _processFeature(x, multiStepFeedback)
-        pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count())
-        futures = set()
-        outputSet = set()
-        for current, feat in enumerate(inputLyr.getFeatures()):
-            if multiStepFeedback is not None and multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(processLambda, feat))
-        
-        multiStepFeedback.setCurrentStep(1)
-        multiStepFeedback.setProgressText(self.tr("Finding overlaps: processing thread outputs..."))
+        executor = BoundedChunkExecutor(chunkSize=100, feedback=multiStepFeedback)
         outputSet = set()
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback is not None and multiStepFeedback.isCanceled():
+        for output in executor.map(processLambda, inputLyr.getFeatures(), total=nFeats):
+            if multiStepFeedback.isCanceled():
                 break
-            outputSet = outputSet.union(future.result())
-            # outputSet = outputSet.union(processLambda(feat))
-            multiStepFeedback.setProgress(current * total)
+            outputSet.update(output)
         return outputSet
 
     def name(self):
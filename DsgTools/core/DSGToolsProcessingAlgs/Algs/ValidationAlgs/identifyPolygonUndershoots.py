@@ -20,13 +20,13 @@
  *                                                                         *
  ***************************************************************************/
 """
-import concurrent.futures
-import os
-
 from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
+from DsgTools.core.GeometricTools.geometryCache import LayerGeometryCache
+from DsgTools.core.GeometricTools.geometryExecutionBackend import (
+    GeometryReference, getGeometryExecutionBackend)
 from DsgTools.core.GeometricTools.layerHandler import LayerHandler
 from PyQt5.QtCore import QCoreApplication
-from qgis.core import (QgsProcessing, QgsProcessingMultiStepFeedback,
+from qgis.core import (QgsGeometry, QgsProcessing, QgsProcessingMultiStepFeedback,
                        QgsProcessingParameterFeatureSink,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterNumber, QgsWkbTypes)
@@ -147,44 +147,37 @@ class IdentifyPolygonUndershootsAlgorithm(ValidationAlgorithm):
         self.flagFeatures(undershootSet, multiStepFeedback)
         return {"FLAGS": self.flag_id}
 
-    def getUndershoots(self, boundaryLyr, referenceSegmentsLyr, searchRadius, feedback):
+    def getUndershoots(self, boundaryLyr, referenceSegmentsLyr, searchRadius, feedback, backend=None):
+        """
+        Evaluates each boundary segment against the reference segments.
+        :param backend: (ThreadGeometryBackend) geometry execution backend.
+            If not given, the one set on DSGTools settings is used.
+        """
         undershootSet = set()
         nFeats = boundaryLyr.featureCount()
         if nFeats == 0:
             return undershootSet
-
-        def evaluate(feat):
-            geom = feat.geometry()
-            geomBuffer = geom.buffer(searchRadius, -1)
-            bbox = geomBuffer.boundingBox()
-            for boundFeat in referenceSegmentsLyr.getFeatures(bbox):
-                if feedback.isCanceled():
-                    return None
-                boundGeom = boundFeat.geometry()
-                buffer = boundGeom.buffer(searchRadius, -1)
-                if not geom.intersects(buffer):
-                    continue
-                if geom.distance(boundGeom) > 10**-9:
-                    return geom
-            return None
-        
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()-1)
-        futures = set()
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
+        backend = getGeometryExecutionBackend() if backend is None else backend
+        multiStepFeedback = QgsProcessingMultiStepFeedback(3, feedback)
         multiStepFeedback.setCurrentStep(0)
-        for current, boundaryFeature in enumerate(boundaryLyr.getFeatures()):
-            if feedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, boundaryFeature))
-            feedback.setProgress(current * 100 / nFeats)
+        reference = GeometryReference.fromLayer(
+            referenceSegmentsLyr, feedback=multiStepFeedback)
         multiStepFeedback.setCurrentStep(1)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback.isCanceled():
-                break
-            result = future.result()
-            if result is not None:
-                undershootSet.add(result)
-            feedback.setProgress(current * 100 / nFeats)
+        boundaryCache = LayerGeometryCache.fromLayer(
+            boundaryLyr, feedback=multiStepFeedback)
+        multiStepFeedback.setCurrentStep(2)
+        resultDict = backend.run(
+            'undershoot',
+            boundaryCache.ids,
+            boundaryCache.wkbList,
+            reference,
+            params={'searchRadius': searchRadius},
+            feedback=multiStepFeedback
+        )
+        for wkb in resultDict.values():
+            geom = QgsGeometry()
+            geom.fromWkb(wkb)
+            undershootSet.add(geom)
         return undershootSet
 
     def flagFeatures(self, undershootSet, multiStepFeedback):
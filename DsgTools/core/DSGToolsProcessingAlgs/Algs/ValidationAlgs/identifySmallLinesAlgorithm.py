@@ -31,6 +31,9 @@ from qgis.core import (QgsDataSourceUri, QgsFeature, QgsFeatureSink,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterVectorLayer, QgsWkbTypes)
 
+from DsgTools.core.dsgEnums import DsgEnums
+from DsgTools.core.Factories.SqlFactory.sqlGeneratorFactory import SqlGeneratorFactory
+
 from .validationAlgorithm import ValidationAlgorithm
 
 
@@ -87,6 +90,8 @@ class IdentifySmallLinesAlgorithm(ValidationAlgorithm):
         onlySelected = self.parameterAsBool(parameters, self.SELECTED, context)
         tol = self.parameterAsDouble(parameters, self.TOLERANCE, context)
         self.prepareFlagSink(parameters, inputLyr, inputLyr.wkbType(), context)
+        if self.runSqlPushdown(inputLyr, parameters, context, feedback, onlySelected=onlySelected):
+            return {self.FLAGS: self.flag_id}
         # Compute the number of steps to display within the progress bar and
         # get features from source
         featureList, total = self.getIteratorAndFeatureCount(inputLyr, onlySelected=onlySelected)           
@@ -96,13 +101,25 @@ class IdentifySmallLinesAlgorithm(ValidationAlgorithm):
             if feedback.isCanceled():
                 break
             if feat.geometry().length() < tol:
-                flagText = self.tr('Feature from layer {0} with id={1} has length of value {2:.2f}, which is lesser than the tolerance of {3} units.').format(inputLyr.name(), feat.id(), feat.geometry().length(), tol)
+                flagText = self.getFlagText(inputLyr, feat.id(), feat.geometry().length(), tol)
                 self.flagFeature(feat.geometry(), flagText)      
             # Update the progress bar
             feedback.setProgress(int(current * total))
 
         return {self.FLAGS: self.flag_id}
 
+    def getFlagText(self, inputLyr, featId, value, tol):
+        return self.tr('Feature from layer {0} with id={1} has length of value {2:.2f}, which is lesser than the tolerance of {3} units.').format(inputLyr.name(), featId, value, tol)
+
+    def pushdownSql(self, source, parameters, context):
+        tol = self.parameterAsDouble(parameters, self.TOLERANCE, context)
+        gen = SqlGeneratorFactory().createSqlGenerator(driver=DsgEnums.DriverPostGIS)
+        return gen.getSmallLengthFeatures(source.relation, source.geometry, source.key, source.whereClause(), tol)
+
+    def pushdownFlagText(self, inputLyr, row, parameters, context):
+        featId, value = row
+        return self.getFlagText(inputLyr, featId, value, self.parameterAsDouble(parameters, self.TOLERANCE, context))
+
     def name(self):
         """
         Returns the algorithm name, used for identifying the algorithm. This
@@ -21,12 +21,11 @@
  ***************************************************************************/
 """
 
-import concurrent.futures
 from collections import defaultdict
-import os
 
 from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
 from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 from PyQt5.QtCore import QCoreApplication
 from qgis.core import (QgsFeatureRequest, QgsGeometry, QgsProcessing,
                        QgsProcessingFeatureSourceDefinition,
@@ -178,7 +177,6 @@ class IdentifyUnmergedLinesWithSameAttributeSetAlgorithm(ValidationAlgorithm):
         }
 
     def evaluateFlagCandidates(self, fieldList, fieldIdList, multiStepFeedback, localLyr, initialAndEndPointDict, mergedLineLyr, dictSize, filterPointSet):
-        stepSize = 100 / dictSize
         multiStepFeedback = QgsProcessingMultiStepFeedback(2, multiStepFeedback)
         multiStepFeedback.setCurrentStep(0)
         def evaluate(pointXY, idSet):
@@ -200,29 +198,28 @@ class IdentifyUnmergedLinesWithSameAttributeSetAlgorithm(ValidationAlgorithm):
                 .setFlags(QgsFeatureRequest.NoGeometry)\
                 .setSubsetOfAttributes(fieldIdList)
             f1, f2 = [i for i in localLyr.getFeatures(request)]
-            differentFeats = any(f1[k] != f2[k] for k in fieldList)
-            return geomWkb if not differentFeats else None
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()-1)
-        futures = set()
-
-        for current, (pointXY, idSet) in enumerate(initialAndEndPointDict.items()):
-            if multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, pointXY, idSet))
-            multiStepFeedback.setProgress(current * stepSize)
-        
+            if any(f1[k] != f2[k] for k in fieldList):
+                return None
+            # the flag writer is thread safe, so the flags are raised by the
+            # workers themselves
+            self.flagFeature(
+                flagGeom=geomWkb,
+                flagText=self.tr("Not merged lines with same attribute set"),
+                fromWkb=True
+            )
         multiStepFeedback.setCurrentStep(1)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback.isCanceled():
-                break
-            geomWkb = future.result()
-            if geomWkb is not None:
-                self.flagFeature(
-                    flagGeom=geomWkb,
-                    flagText=self.tr("Not merged lines with same attribute set"),
-                    fromWkb=True
-                )
-            multiStepFeedback.setProgress(current * stepSize)
+        executor = BoundedChunkExecutor(chunkSize=200, feedback=multiStepFeedback)
+        self.startFlagWriter()
+        try:
+            for _ in executor.map(
+                lambda item: evaluate(*item),
+                initialAndEndPointDict.items(),
+                total=dictSize
+            ):
+                if multiStepFeedback.isCanceled():
+                    break
+        finally:
+            self.closeFlagWriter(feedback=multiStepFeedback)
     
     def buildInitialAndEndPointDict(self, lyr, algRunner, context, feedback):
         pointDict = defaultdict(set)
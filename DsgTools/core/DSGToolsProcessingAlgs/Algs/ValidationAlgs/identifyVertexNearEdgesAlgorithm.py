@@ -69,6 +69,8 @@ class IdentifyVertexNearEdgesAlgorithm(ValidationAlgorithm):
             )
         )
 
+        self.addIncrementalParameters()
+
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.FLAGS,
@@ -103,6 +105,8 @@ class IdentifyVertexNearEdgesAlgorithm(ValidationAlgorithm):
         # output flag type is a polygon because the flag will be a circle with 
         # radius tol and center as the vertex
         self.prepareFlagSink(parameters, inputLyr, QgsWkbTypes.Point, context)
+        inputLyr, onlySelected = self.prepareIncrementalInput(
+            parameters, inputLyr, searchRadius, context, onlySelected=onlySelected, feedback=feedback)
         # Compute the number of steps to display within the progress bar and
         # get features from source
         multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
@@ -120,6 +124,7 @@ class IdentifyVertexNearEdgesAlgorithm(ValidationAlgorithm):
             vertexNearEdgeFlagDict,
             multiStepFeedback
         )
+        self.finishIncrementalRun(parameters, context, feedback=multiStepFeedback)
 
         return {self.FLAGS: self.flag_id}
 
@@ -137,7 +142,7 @@ class IdentifyVertexNearEdgesAlgorithm(ValidationAlgorithm):
                     ).format(
                         lyr_name=inputLyr.name(),
                         vertex_geom=vertexWkt,
-                        feat_id=featid,
+                        feat_id=self.originalFeatureId(featid),
                         edge_text=edgeText
                     )
                 flagGeom = flagDict['flagGeom']
@@ -21,9 +21,8 @@
 """
 
 import math
-import concurrent.futures
-import os
 
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 from PyQt5.QtCore import QCoreApplication, QVariant
 from qgis.core import (QgsFeature, QgsFeatureRequest, QgsField, QgsFields,
                        QgsGeometry, QgsGeometryUtils, QgsPoint, QgsPointXY,
@@ -157,7 +156,6 @@ class identifyZAnglesBetweenFeaturesAlgorithm(ValidationAlgorithm):
         lineCount = lines.featureCount()
         if lineCount == 0:
             return featsToAnalyse
-        total = 100 / lineCount
         def evaluateLine(feat1):
             featsToAnalyse = []
             if feedback is not None and feedback.isCanceled():
@@ -198,22 +196,9 @@ class identifyZAnglesBetweenFeaturesAlgorithm(ValidationAlgorithm):
                                     featsToAnalyse.append(toAnalyse)
             return featsToAnalyse
         
-        futures = set()
-        pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count()-1)
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
-        multiStepFeedback.setCurrentStep(0)
-        multiStepFeedback.pushInfo(self.tr("Submitting tasks to thread"))
-        for i, feat1 in enumerate(lines.getFeatures()):
-            futures.add(pool.submit(evaluateLine, feat1))
-        multiStepFeedback.setCurrentStep(1)
-        multiStepFeedback.pushInfo(self.tr("Evaluating tasks"))
-        concurrent.futures.wait(futures, timeout=None, return_when=concurrent.futures.ALL_COMPLETED)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if feedback is not None and feedback.isCanceled():
-                break
-            featsToAnalyse += future.result()
-            multiStepFeedback.setProgress(total * current)
-
+        executor = BoundedChunkExecutor(feedback=feedback)
+        for output in executor.map(evaluateLine, lines.getFeatures(), ordered=True, total=lineCount):
+            featsToAnalyse += output
         return featsToAnalyse
 
     def checkIntersectionAndCreateFeature4p(self, v1, v2, v3, v4, angle):
@@ -112,7 +112,8 @@ class LineOnLineOverlayerAlgorithm(ValidationAlgorithm):
             layerHandler.filterDangles(
                 dangleLyr,
                 tol,
-                feedback=multiStepFeedback
+                feedback=multiStepFeedback,
+                cacheStore=self.geometryCacheStore(context)
                 )
 
             multiStepFeedback.setCurrentStep(2)
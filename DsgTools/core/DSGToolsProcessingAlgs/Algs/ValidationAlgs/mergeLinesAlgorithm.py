@@ -46,6 +46,7 @@ class MergeLinesAlgorithm(ValidationAlgorithm):
     ATTRIBUTE_BLACK_LIST = 'ATTRIBUTE_BLACK_LIST'
     IGNORE_VIRTUAL_FIELDS = 'IGNORE_VIRTUAL_FIELDS'
     IGNORE_PK_FIELDS = 'IGNORE_PK_FIELDS'
+    MAX_VERTEX_COUNT = 'MAX_VERTEX_COUNT'
     OUTPUT = 'OUTPUT'
 
     def initAlgorithm(self, config):
@@ -90,6 +91,16 @@ class MergeLinesAlgorithm(ValidationAlgorithm):
                 defaultValue=True
             )
         )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.MAX_VERTEX_COUNT,
+                self.tr('Maximum number of vertexes of a merged line (0 for no limit)'),
+                type=QgsProcessingParameterNumber.Integer,
+                minValue=0,
+                defaultValue=0,
+                optional=True
+            )
+        )
         self.addOutput(
             QgsProcessingOutputVectorLayer(
                 self.OUTPUT,
@@ -127,6 +138,11 @@ class MergeLinesAlgorithm(ValidationAlgorithm):
             self.IGNORE_PK_FIELDS,
             context
             )
+        maxVertexCount = self.parameterAsInt(
+            parameters,
+            self.MAX_VERTEX_COUNT,
+            context
+            )
 
         layerHandler.mergeLinesOnLayer(
             inputLyr,
@@ -134,7 +150,8 @@ class MergeLinesAlgorithm(ValidationAlgorithm):
             onlySelected=onlySelected,
             ignoreVirtualFields=ignoreVirtual,
             attributeBlackList=attributeBlackList,
-            excludePrimaryKeys=ignorePK
+            excludePrimaryKeys=ignorePK,
+            maxVertexCount=maxVertexCount
             )
 
         return {self.OUTPUT: inputLyr}
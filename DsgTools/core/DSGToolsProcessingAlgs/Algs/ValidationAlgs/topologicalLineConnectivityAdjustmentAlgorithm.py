@@ -108,7 +108,9 @@ class TopologicalLineConnectivityAdjustment(ValidationAlgorithm):
         dangleLyr = algRunner.runIdentifyDangles(coverage, tol, context, feedback=multiStepFeedback, onlySelected=onlySelected)
 
         multiStepFeedback.setCurrentStep(2)
-        layerHandler.filterDangles(dangleLyr, tol, feedback=multiStepFeedback)
+        layerHandler.filterDangles(
+            dangleLyr, tol, feedback=multiStepFeedback,
+            cacheStore=self.geometryCacheStore(context))
 
         multiStepFeedback.setCurrentStep(3)
         multiStepFeedback.pushInfo(self.tr('Snapping layer {layer} to dangles...').format(layer=coverage.name()))
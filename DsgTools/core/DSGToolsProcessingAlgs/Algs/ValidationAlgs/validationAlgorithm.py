@@ -27,14 +27,39 @@ from qgis.core import QgsGeometry, QgsFeature, QgsField, QgsProcessingAlgorithm
 from qgis.core import (QgsFeatureSink,
                        QgsProcessingAlgorithm,
                        QgsFeature,
+                       QgsFeatureRequest,
                        QgsFields,
+                       QgsMemoryProviderUtils,
                        QgsProcessingException,
-                       QgsProject)
+                       QgsProcessingParameterBoolean,
+                       QgsProcessingParameterVectorLayer,
+                       QgsProject,
+                       QgsCoordinateTransform,
+                       QgsVectorLayer)
+
+import hashlib
+import json
+
+import psycopg2
+
+from DsgTools.core.GeometricTools.dirtyRegionTracker import DirtyRegion, dirtyRegionTracker
+from DsgTools.core.GeometricTools.geometryCache import geometryCacheStoreForContext
+from DsgTools.core.Utils.flagWriter import FlagWriter
+from DsgTools.core.Utils.sqlPushdown import PostgisLayerSource, isPushdownEnabled
 
 class ValidationAlgorithm(QgsProcessingAlgorithm):
     """
     Processing algorithm with handy stuff for other algs.
     """
+    INCREMENTAL = 'INCREMENTAL'
+    PREVIOUS_FLAGS = 'PREVIOUS_FLAGS'
+    # set by prepareIncrementalInput
+    incrementalState = None
+    incrementalFlagRegion = None
+    incrementalIdDict = None
+    # set by startFlagWriter
+    flagWriter = None
+
     def getIteratorAndFeatureCount(self, lyr, onlySelected = False):
         """
         Gets the iterator and feature count from lyr.
@@ -84,17 +109,134 @@ class ValidationAlgorithm(QgsProcessingAlgorithm):
         :param flagGeom: (QgsGeometry) geometry of the flag;
         :param flagText: (string) Text of the flag
         """
+        if sink is None and self.flagWriter is not None and \
+                self.incrementalFlagRegion is None:
+            self.flagWriter.addFlag(flagGeom, flagText)
+            return
         flagSink = self.flagSink if sink is None else sink
         newFeat = QgsFeature(self.getFlagFields())
         newFeat['reason'] = flagText
         if fromWkb:
             geom = QgsGeometry()
             geom.fromWkb(flagGeom)
-            newFeat.setGeometry(geom)
-        else:
-            newFeat.setGeometry(flagGeom)
+            flagGeom = geom
+        if self.incrementalFlagRegion is not None and \
+                not self.incrementalFlagRegion.intersects(flagGeom):
+            # outside the edited region the flags of the previous run are kept
+            return
+        if sink is None and self.flagWriter is not None:
+            self.flagWriter.addFlag(flagGeom, flagText)
+            return
+        newFeat.setGeometry(flagGeom)
         flagSink.addFeature(newFeat, QgsFeatureSink.FastInsert)
+
+    def startFlagWriter(self, bufferSize=1000, deduplicate=False):
+        """
+        Makes flagFeature write to self.flagSink through a FlagWriter, so
+        that flags may be raised from worker threads and are written in
+        batches. Must be called after prepareFlagSink and paired with
+        closeFlagWriter.
+        :param bufferSize: (int) number of flags written per batch;
+        :param deduplicate: (bool) if True, flags with the same geometry and
+            text are written only once.
+        """
+        self.flagWriter = FlagWriter(
+            self.flagSink,
+            self.getFlagFields(),
+            bufferSize=bufferSize,
+            deduplicate=deduplicate
+        )
+
+    def closeFlagWriter(self, feedback=None):
+        """
+        Writes the pending flags of the flag writer and stops it.
+        :param feedback: (QgsProcessingFeedback) feedback that receives the
+            writer counters.
+        :return: (dict) counters of the writer.
+        """
+        if self.flagWriter is None:
+            return dict()
+        flagWriter, self.flagWriter = self.flagWriter, None
+        flagWriter.close()
+        counters = flagWriter.counters()
+        if feedback is not None:
+            feedback.pushInfo(
+                self.tr('{flagsWritten} flags written in {batchesFlushed} batches ({duplicatesSkipped} duplicates skipped).').format(**counters)
+            )
+        return counters
     
+    def geometryCacheStore(self, context):
+        """
+        Geometry cache store shared by every algorithm run with context, so
+        that a layer read by one algorithm of a model is not read again by
+        the next ones while it is unchanged.
+        :param context: (QgsProcessingContext) processing context.
+        :return: (GeometryCacheStore) store of the context.
+        """
+        return geometryCacheStoreForContext(context)
+
+    def pushdownSql(self, source, parameters, context):
+        """
+        Optional server side implementation of the check, used by
+        runSqlPushdown on layers read from PostGIS. Algorithms that have one
+        return a select whose first column is the flag geometry as WKB; the
+        other columns are given to pushdownFlagText.
+        :param source: (PostgisLayerSource) input table. Its whereClause
+            must filter the features;
+        :param parameters: (dict) algorithm parameters;
+        :param context: (QgsProcessingContext) processing context.
+        :return: (str) select statement or None if the check cannot run on
+            the server with these parameters.
+        """
+        return None
+
+    def pushdownFlagText(self, inputLyr, row, parameters, context):
+        """
+        Text of a flag raised from a row of pushdownSql. By default, the
+        columns of the row are listed after the layer name; algorithms may
+        reimplement it to match the text of their client side flags.
+        :param row: (tuple) columns of the row, except the geometry.
+        """
+        if not row:
+            return self.tr('Flag raised on layer {0}.').format(inputLyr.name())
+        return self.tr('Flag raised on layer {0}: {1}.').format(
+            inputLyr.name(), ', '.join(map(str, row)))
+
+    def runSqlPushdown(self, inputLyr, parameters, context, feedback, onlySelected=False):
+        """
+        Runs pushdownSql on the server when inputLyr is a PostGIS table
+        without unsaved edits, so that only the flagged rows are read. The
+        subset string of the layer and, if onlySelected, the selected ids
+        are applied on the server. Must be called after prepareFlagSink.
+        :return: (bool) True if the check ran on the server. Otherwise the
+            caller must run the client side implementation.
+        """
+        if not isPushdownEnabled() or self.incrementalFlagRegion is not None:
+            return False
+        source = PostgisLayerSource.fromLayer(inputLyr)
+        if source is None:
+            return False
+        if onlySelected:
+            source.setFeatureIds(inputLyr.selectedFeatureIds())
+        sql = self.pushdownSql(source, parameters, context)
+        if sql is None:
+            return False
+        flagCount = 0
+        try:
+            for row in source.fetchRows(sql, feedback=feedback):
+                self.flagFeature(row[0], self.pushdownFlagText(inputLyr, row[1:], parameters, context))
+                flagCount += 1
+        except psycopg2.Error as e:
+            if flagCount:
+                raise QgsProcessingException(self.tr('Problem running the check on the server: ') + str(e))
+            feedback.pushInfo(
+                self.tr('Check could not run on the server, reading the features instead. Error message: {0}').format(str(e).strip())
+            )
+            return False
+        feedback.pushInfo(self.tr('Check run on the server: {0} flags raised.').format(flagCount))
+        feedback.setProgress(100)
+        return True
+
     def getFlagsFromOutput(self, output):
         if 'FLAGS' not in output:
             return []
@@ -103,4 +245,197 @@ class ValidationAlgorithm(QgsProcessingAlgorithm):
     def flagFeaturesFromProcessOutput(self, output):
         if 'FLAGS' in output:
             for feat in output['FLAGS'].getFeatures():
-                self.flagSink.addFeature(feat, QgsFeatureSink.FastInsert)
\ No newline at end of file
+                self.flagSink.addFeature(feat, QgsFeatureSink.FastInsert)
+
+    def addIncrementalParameters(self):
+        """
+        Adds the parameters of the incremental mode. Algorithms that support
+        it must call prepareIncrementalInput before reading the input layer
+        and finishIncrementalRun after raising their flags.
+        """
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.INCREMENTAL,
+                self.tr('Incremental mode (only validate the regions edited since the last run)'),
+                defaultValue=False
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterVectorLayer(
+                self.PREVIOUS_FLAGS,
+                self.tr('Flags of the last run (kept outside of the edited regions)'),
+                optional=True
+            )
+        )
+
+    def prepareIncrementalInput(self, parameters, inputLyr, searchRadius, context, onlySelected=False, feedback=None):
+        """
+        Gets the layer to be validated. In incremental mode, it is a memory
+        copy of the features of inputLyr that intersect the regions edited
+        since the last run of the algorithm with the same parameters, on
+        inputLyr or on any other layer parameter (e.g. filter layers), grown
+        by twice the search radius so that every neighbour of an edited
+        feature is evaluated. Only the flags within the edited regions grown
+        by the search radius are kept.
+        :param parameters: (dict) algorithm parameters;
+        :param inputLyr: (QgsVectorLayer) input layer;
+        :param searchRadius: (float) search radius of the algorithm, in layer
+            units;
+        :param context: (QgsProcessingContext) processing context;
+        :param onlySelected: (bool) whether only selected features are
+            validated. Such runs do not mark the edits as validated;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (tuple) (QgsVectorLayer) layer to be validated and (bool)
+            onlySelected flag to be used with it.
+        """
+        self.incrementalState, self.incrementalFlagRegion, self.incrementalIdDict = None, None, None
+        if not dirtyRegionTracker.isRunning():
+            # checkpoints are only meaningful while every edit is tracked
+            if feedback is not None and self.INCREMENTAL in parameters and \
+                    self.parameterAsBool(parameters, self.INCREMENTAL, context):
+                feedback.pushInfo(
+                    self.tr('Edits are not being tracked (incremental validation is disabled on DSGTools settings), the whole layer will be validated.')
+                )
+            return inputLyr, onlySelected
+        checkpointKey = self.incrementalCheckpointKey(parameters, context)
+        layerList = self.incrementalLayers(parameters, inputLyr, context)
+        if not onlySelected:
+            self.incrementalState = (
+                checkpointKey,
+                [(lyr, dirtyRegionTracker.currentSerial(lyr)) for lyr in layerList]
+            )
+        if self.INCREMENTAL not in parameters or \
+                not self.parameterAsBool(parameters, self.INCREMENTAL, context):
+            return inputLyr, onlySelected
+        dirtyRegion = self.incrementalDirtyRegion(inputLyr, layerList, checkpointKey, context)
+        if dirtyRegion is None:
+            if feedback is not None:
+                feedback.pushInfo(
+                    self.tr('{0} was not validated by this algorithm with these parameters yet, the whole layer will be validated.').format(inputLyr.name())
+                )
+            return inputLyr, onlySelected
+        featIds = dirtyRegion.buffered(2*searchRadius).featureIds(inputLyr, onlySelected=onlySelected)
+        if feedback is not None:
+            feedback.pushInfo(
+                self.tr('Incremental mode: {0} features of {1} are near the edited regions.').format(
+                    len(featIds), inputLyr.name())
+            )
+        subsetLyr = QgsMemoryProviderUtils.createMemoryLayer(
+            inputLyr.name(), inputLyr.fields(), inputLyr.wkbType(), inputLyr.crs())
+        featList = list(inputLyr.getFeatures(QgsFeatureRequest().setFilterFids(list(featIds))))
+        _, addedFeatList = subsetLyr.dataProvider().addFeatures(featList)
+        self.incrementalIdDict = {
+            addedFeat.id(): feat.id() for addedFeat, feat in zip(addedFeatList, featList)
+        }
+        self.incrementalFlagRegion = dirtyRegion.buffered(searchRadius)
+        return subsetLyr, False
+
+    def incrementalCheckpointKey(self, parameters, context):
+        """
+        Key of the validation checkpoints: the algorithm name and a hash of
+        the parameters that change its flags (layers, tolerances, options).
+        Runs with other parameters do not share checkpoints.
+        :return: (str) checkpoint key.
+        """
+        valueDict = dict()
+        for definition in self.parameterDefinitions():
+            name = definition.name()
+            if definition.isDestination() or name in (self.INCREMENTAL, self.PREVIOUS_FLAGS, 'SELECTED'):
+                continue
+            if definition.type() in ('vector', 'source', 'multilayer'):
+                value = [lyr.id() for lyr in self.parameterLayerList(parameters, definition, context)]
+            else:
+                value = parameters.get(name, definition.defaultValue())
+            valueDict[name] = str(value)
+        digest = hashlib.sha1(json.dumps(valueDict, sort_keys=True).encode('utf-8')).hexdigest()
+        return '{0}:{1}'.format(self.name(), digest[:16])
+
+    def parameterLayerList(self, parameters, definition, context):
+        if definition.type() == 'multilayer':
+            return [
+                lyr for lyr in self.parameterAsLayerList(parameters, definition.name(), context)
+                if isinstance(lyr, QgsVectorLayer)
+            ]
+        lyr = self.parameterAsVectorLayer(parameters, definition.name(), context)
+        return [] if lyr is None else [lyr]
+
+    def incrementalLayers(self, parameters, inputLyr, context):
+        """
+        Layers whose edits may change the flags: inputLyr and the layers of
+        every other layer parameter, except the flags of the last run.
+        """
+        layerDict = {inputLyr.id(): inputLyr}
+        for definition in self.parameterDefinitions():
+            if definition.isDestination() or definition.name() == self.PREVIOUS_FLAGS or \
+                    definition.type() not in ('vector', 'source', 'multilayer'):
+                continue
+            for lyr in self.parameterLayerList(parameters, definition, context):
+                layerDict.setdefault(lyr.id(), lyr)
+        return list(layerDict.values())
+
+    def incrementalDirtyRegion(self, inputLyr, layerList, checkpointKey, context):
+        """
+        Union of the regions of layerList edited since checkpointKey, in the
+        CRS of inputLyr.
+        :return: (DirtyRegion) edited region or None if any of the layers
+            was not validated with checkpointKey yet or is not tracked.
+        """
+        region = DirtyRegion()
+        for lyr in layerList:
+            if not dirtyRegionTracker.isTracked(lyr):
+                return None
+            lyrRegion = dirtyRegionTracker.dirtyRegion(lyr, checkpointKey)
+            if lyrRegion is None:
+                return None
+            if lyr.crs() != inputLyr.crs():
+                lyrRegion = lyrRegion.transformed(
+                    QgsCoordinateTransform(lyr.crs(), inputLyr.crs(), context.transformContext()))
+            region = region.union(lyrRegion)
+        return region
+
+    def originalFeatureId(self, featId):
+        """
+        Maps the id of a feature of the layer returned by
+        prepareIncrementalInput to the id on the original input layer.
+        """
+        if self.incrementalIdDict is None:
+            return featId
+        return self.incrementalIdDict.get(featId, featId)
+
+    def finishIncrementalRun(self, parameters, context, feedback=None, sink=None):
+        """
+        Copies the flags of the last run that are outside of the edited
+        regions to the flag sink and marks the edits of the layers as
+        validated by this algorithm with these parameters (unless only the
+        selected features were validated).
+        """
+        if feedback is not None and feedback.isCanceled():
+            return
+        if self.incrementalFlagRegion is not None:
+            previousFlagLyr = self.parameterAsVectorLayer(parameters, self.PREVIOUS_FLAGS, context)
+            if previousFlagLyr is not None:
+                self.copyPreviousFlags(previousFlagLyr, sink=sink, feedback=feedback)
+            elif feedback is not None:
+                feedback.pushInfo(
+                    self.tr('No flags of the last run were given, only the flags of the edited regions were raised.')
+                )
+        if self.incrementalState is None:
+            return
+        checkpointKey, serialList = self.incrementalState
+        for lyr, serial in serialList:
+            dirtyRegionTracker.setCheckpoint(lyr, checkpointKey, serial)
+
+    def copyPreviousFlags(self, previousFlagLyr, sink=None, feedback=None):
+        flagSink = self.flagSink if sink is None else sink
+        flagFields = self.getFlagFields()
+        fieldNames = [field.name() for field in flagFields if previousFlagLyr.fields().indexOf(field.name()) >= 0]
+        for feat in previousFlagLyr.getFeatures():
+            if feedback is not None and feedback.isCanceled():
+                break
+            if feat.hasGeometry() and self.incrementalFlagRegion.intersects(feat.geometry()):
+                continue
+            newFeat = QgsFeature(flagFields)
+            for fieldName in fieldNames:
+                newFeat[fieldName] = feat[fieldName]
+            newFeat.setGeometry(feat.geometry())
+            flagSink.addFeature(newFeat, QgsFeatureSink.FastInsert)
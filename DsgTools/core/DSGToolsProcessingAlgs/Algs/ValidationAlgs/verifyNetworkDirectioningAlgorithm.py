@@ -233,7 +233,8 @@ class VerifyNetworkDirectioningAlgorithm(ValidationAlgorithm):
             ditchLayer=ditchLayer,
             attributeBlackList=attributeBlackList,
             excludePrimaryKeys=ignorePK,
-            ignoreVirtualFields=ignoreVirtual
+            ignoreVirtualFields=ignoreVirtual,
+            cacheStore=self.geometryCacheStore(context)
         )
         multiStepFeedback.setCurrentStep(1)
         #these are counted as one set of operations
@@ -35,6 +35,8 @@ from qgis.PyQt.QtCore import pyqtSignal, QCoreApplication
 from processing.tools import dataobjects
 import processing
 
+from DsgTools.core.GeometricTools.geometryCache import geometryCacheStoreRegistry
+
 class DsgToolsProcessingModel(QgsTask):
     """
     Handles models and materializes QgsProcessingModels from a DSGTools default
@@ -379,12 +381,16 @@ class DsgToolsProcessingModel(QgsTask):
             return {}
         context = dataobjects.createContext(
             feedback=feedback)
-        out = processing.run(
-            model,
-            { param : "memory:" for param in self.modelParameters(model) },
-            feedback=feedback,
-            context=context
-        )
+        try:
+            out = processing.run(
+                model,
+                { param : "memory:" for param in self.modelParameters(model) },
+                feedback=feedback,
+                context=context
+            )
+        finally:
+            # geometries cached by the child algorithms are not needed anymore
+            geometryCacheStoreRegistry.releaseContext(context)
         # not sure exactly when, but on 3.16 LTR output from model runs include
         # new items on it. these new items break our implementation =)
         # hence the popitems
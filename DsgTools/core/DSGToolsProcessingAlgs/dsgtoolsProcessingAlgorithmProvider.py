@@ -88,6 +88,8 @@ from DsgTools.core.DSGToolsProcessingAlgs.Algs.OtherAlgs.raiseFlagsAlgorithm imp
     RaiseFlagsAlgorithm
 from DsgTools.core.DSGToolsProcessingAlgs.Algs.OtherAlgs.ruleStatisticsAlgorithm import \
     RuleStatisticsAlgorithm
+from DsgTools.core.DSGToolsProcessingAlgs.Algs.OtherAlgs.runAlgorithmOnTilesAlgorithm import \
+    RunAlgorithmOnTilesAlgorithm
 from DsgTools.core.DSGToolsProcessingAlgs.Algs.OtherAlgs.runFMESAPAlgorithm import \
     RunFMESAPAlgorithm
 from DsgTools.core.DSGToolsProcessingAlgs.Algs.OtherAlgs.runRemoteFMEAlgorithm import (
@@ -315,6 +317,7 @@ class DSGToolsProcessingAlgorithmProvider(QgsProcessingProvider):
             AssignActionsToLayersAlgorithm(),
             BuildJoinsOnLayersAlgorithm(),
             BatchRunAlgorithm(),
+            RunAlgorithmOnTilesAlgorithm(),
             StringCsvToLayerListAlgorithm(),
             IdentifyWrongBuildingAnglesAlgorithm(),
             IdentifyVertexNearEdgesAlgorithm(),
@@ -30,6 +30,7 @@ from qgis.PyQt.QtSql import QSqlQuery
 from qgis.PyQt.QtCore import pyqtSignal, QObject
 
 from ...Utils.utils import Utils
+from .metadataCache import MetadataCache
 from DsgTools.core.Utils.FrameTools.map_index import UtmGrid
 
 class DbSignals(QObject):
@@ -48,6 +49,8 @@ class AbstractDb(QObject):
         self.slotConnected = False
         self.versionFolderDict = dict({'2.1.3':'edgv_213','2.1.3 Pro':'edgv_213_pro','FTer_2a_Ed':'edgv_FTer_2a_Ed','3.0':'3','3.0 Pro':'3_Pro'})
         self.utmGrid = UtmGrid()
+        # catalogue metadata of the connection, see invalidateMetadataCache
+        self.metadataCache = MetadataCache()
 
     def __del__(self):
         """
@@ -60,6 +63,15 @@ class AbstractDb(QObject):
     
     def closeDatabase(self):
         pass
+
+    def invalidateMetadataCache(self, kind=None):
+        """
+        Drops the cached catalogue metadata. Must be called after any change
+        of the database structure (DDL).
+        :param kind: (str) kind of metadata to be dropped. If None, every
+            kind is dropped.
+        """
+        self.metadataCache.invalidate(kind)
             
     def checkAndOpenDb(self):
         """
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import threading
+import time
+from collections import defaultdict
+
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QCoreApplication, QSettings, QThread, Qt
+from qgis.PyQt.QtSql import QSqlDatabase, QSqlQuery
+
+POOL_SETTINGS_KEY = 'DSGTools/useConnectionPool'
+
+
+class ConnectionPoolExhausted(Exception):
+    pass
+
+
+class PooledConnection(QSqlDatabase):
+    """
+    QPSQL connection handed out by the pool. It tracks the transactions
+    opened through transaction(), so that release only rolls back when one
+    is still open. Transactions opened with a BEGIN statement are not seen.
+    """
+    def __init__(self):
+        super(PooledConnection, self).__init__('QPSQL')
+        self.transactionOpen = False
+
+    def transaction(self):
+        success = super(PooledConnection, self).transaction()
+        self.transactionOpen = self.transactionOpen or success
+        return success
+
+    def commit(self):
+        success = super(PooledConnection, self).commit()
+        if success:
+            self.transactionOpen = False
+        return success
+
+    def rollback(self):
+        success = super(PooledConnection, self).rollback()
+        if success:
+            self.transactionOpen = False
+        return success
+
+
+class ConnectionPool(object):
+    """
+    Pool of QPSQL connections keyed by (host, port, database, user).
+
+    QSqlDatabase connections cannot cross threads, so checkout is thread
+    affine: a connection is only handed back to the thread that opened it.
+    Threads are identified by their QThread, which is kept referenced
+    while the pool holds connections of it, and the idle connections of a
+    thread are closed when it finishes.
+    Idle connections are kept per key and thread and are checked with a
+    cheap query before being reused. maxSize bounds the number of
+    connections of a key checked out at the same time for a unit of work;
+    further checkouts from worker threads wait up to checkoutTimeout for one
+    to be released, while the ones from the main thread fail at once, so
+    that the GUI is never blocked. Either way ConnectionPoolExhausted is
+    raised and callers may open an unpooled connection instead.
+    Pinned checkouts, the ones kept by an object for its whole lifetime
+    (e.g. a PostgisDb instance), are not counted on maxSize and never wait:
+    they only reuse idle connections, so that long-lived objects do not
+    block the short units of work of other threads.
+
+    Usage:
+        db = connectionPool.acquire(host, port, database, user, password)
+        ...
+        connectionPool.release(db)
+    """
+    def __init__(self, maxSize=10, maxIdlePerThread=2, idleTimeout=300,
+                 checkoutTimeout=5, healthCheckSql='SELECT 1'):
+        """
+        :param maxSize: (int) maximum number of checked out connections per
+            key;
+        :param maxIdlePerThread: (int) idle connections kept per key and
+            thread;
+        :param idleTimeout: (float) seconds after which idle connections are
+            closed;
+        :param checkoutTimeout: (float) seconds acquire waits for a free
+            slot on a worker thread before raising;
+        :param healthCheckSql: (str) query run on idle connections before
+            they are reused.
+        """
+        self.maxSize = maxSize
+        self.maxIdlePerThread = maxIdlePerThread
+        self.idleTimeout = idleTimeout
+        self.checkoutTimeout = checkoutTimeout
+        self.healthCheckSql = healthCheckSql
+        # (key, QThread): [(QSqlDatabase, releaseTime)]
+        self.idleDict = defaultdict(list)
+        # id(QSqlDatabase): (key, QThread, QSqlDatabase, pinned)
+        self.checkedOutDict = dict()
+        self.watchedThreads = set()
+        self.checkedOutCount = defaultdict(int)
+        self.pinnedCount = defaultdict(int)
+        self.statDict = defaultdict(int)
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def connectionKey(host, port, database, user):
+        return (str(host), int(port), str(database), str(user))
+
+    @staticmethod
+    def isFinishedThread(thread):
+        return sip.isdeleted(thread) or thread.isFinished()
+
+    def currentThread(self):
+        """
+        Returns the QThread of the caller. The first time a thread is seen,
+        its finished signal is connected so that its idle connections are
+        closed on the thread itself.
+        :return: (QThread) current thread.
+        """
+        thread = QThread.currentThread()
+        with self._condition:
+            if thread in self.watchedThreads:
+                return thread
+            self.watchedThreads.add(thread)
+        thread.finished.connect(self.threadFinished, Qt.DirectConnection)
+        return thread
+
+    def isEnabled(self):
+        """
+        The pool is opt-in: it is turned on on QSettings under
+        POOL_SETTINGS_KEY.
+        """
+        return QSettings().value(POOL_SETTINGS_KEY, False, type=bool)
+
+    @staticmethod
+    def isMainThread(thread):
+        app = QCoreApplication.instance()
+        return app is not None and thread is app.thread()
+
+    def acquire(self, host, port, database, user, password, pinned=False):
+        """
+        Checks out an open connection for the current thread, reusing an
+        idle one when it is healthy. The main thread does not wait for a
+        free slot.
+        :param pinned: (bool) whether the connection is kept by the caller
+            for its whole lifetime. Pinned connections are not counted on
+            maxSize.
+        :return: (PooledConnection) open connection.
+        """
+        key = self.connectionKey(host, port, database, user)
+        thread = self.currentThread()
+        timeout = 0 if self.isMainThread(thread) else self.checkoutTimeout
+        counter = self.pinnedCount if pinned else self.checkedOutCount
+        with self._condition:
+            if not pinned and not self._condition.wait_for(
+                    lambda: self.checkedOutCount[key] < self.maxSize,
+                    timeout=timeout):
+                self._count('timeouts')
+                raise ConnectionPoolExhausted(
+                    'Connection pool exhausted for database {0} on {1}:{2}'.format(
+                        database, host, port)
+                )
+            counter[key] += 1
+            idleList = self.idleDict[(key, thread)]
+        try:
+            db = self._takeIdle(idleList)
+            if db is None:
+                db = self.openConnection(host, port, database, user, password)
+                self._count('created')
+            else:
+                self._count('reused')
+        except Exception:
+            with self._condition:
+                counter[key] -= 1
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            self.checkedOutDict[id(db)] = (key, thread, db, pinned)
+        return db
+
+    def _takeIdle(self, idleList):
+        while True:
+            with self._condition:
+                if not idleList:
+                    return None
+                db, releaseTime = idleList.pop()
+            if time.monotonic() - releaseTime > self.idleTimeout:
+                self._count('expired')
+                db.close()
+                continue
+            if self.isHealthy(db):
+                return db
+            self._count('healthCheckFailures')
+            db.close()
+
+    def isHealthy(self, db):
+        return db.isOpen() and QSqlQuery(db).exec_(self.healthCheckSql)
+
+    def openConnection(self, host, port, database, user, password):
+        db = PooledConnection()
+        db.setHostName(str(host))
+        db.setPort(int(port))
+        db.setDatabaseName(str(database))
+        db.setUserName(str(user))
+        db.setPassword(str(password))
+        if not db.open():
+            raise Exception('Error opening database: ' + db.lastError().text())
+        return db
+
+    def owns(self, db):
+        with self._condition:
+            return id(db) in self.checkedOutDict
+
+    def ownerThread(self, db):
+        with self._condition:
+            item = self.checkedOutDict.get(id(db))
+            return None if item is None else item[1]
+
+    def release(self, db, discard=False):
+        """
+        Gives a connection back to the pool. Closed connections, the ones
+        released with discard and the ones released from a thread other
+        than their owner are dropped. The latter are not closed here, since
+        they cannot be used outside their thread; they are closed when the
+        last reference to them goes away.
+        """
+        with self._condition:
+            item = self.checkedOutDict.get(id(db))
+        if item is None:
+            return
+        key, thread, _, pinned = item
+        isOwner = thread is QThread.currentThread()
+        discard = discard or not isOwner
+        if not discard and db.isOpen() and db.transactionOpen:
+            # closing a connection would discard an unfinished transaction,
+            # the next user must not inherit it
+            db.rollback()
+            self._count('rollbacks')
+        with self._condition:
+            if self.checkedOutDict.pop(id(db), None) is None:
+                # already released by another caller
+                return
+            (self.pinnedCount if pinned else self.checkedOutCount)[key] -= 1
+            self._condition.notify_all()
+            keep = not discard and db.isOpen()
+            if keep:
+                self.idleDict[(key, thread)].append((db, time.monotonic()))
+            self._count('released')
+        if not keep:
+            self._count('discarded')
+            if isOwner:
+                db.close()
+        self.pruneIdle()
+
+    def pruneIdle(self):
+        """
+        Closes the idle connections of the current thread that exceed
+        maxIdlePerThread or idleTimeout, and the ones left behind by
+        finished threads. Connections of running threads are left to them.
+        """
+        thread = QThread.currentThread()
+        now = time.monotonic()
+        toClose = []
+        with self._condition:
+            for (key, owner), idleList in list(self.idleDict.items()):
+                if owner is not thread:
+                    if self.isFinishedThread(owner):
+                        toClose.extend(db for db, _ in self.idleDict.pop((key, owner)))
+                        self.watchedThreads.discard(owner)
+                    continue
+                keptList = [i for i in idleList if now - i[1] <= self.idleTimeout]
+                keptList = keptList[-self.maxIdlePerThread:] if self.maxIdlePerThread else []
+                keptIds = set(id(i[0]) for i in keptList)
+                toClose.extend(i[0] for i in idleList if id(i[0]) not in keptIds)
+                idleList[:] = keptList
+        for db in toClose:
+            self._count('expired')
+            db.close()
+
+    def closeThreadConnections(self):
+        """
+        Closes the idle connections of the current thread. It is called
+        when a thread seen by the pool finishes, and worker threads that are
+        reused, such as the ones of a thread pool, should call it when their
+        task is done.
+        """
+        thread = QThread.currentThread()
+        with self._condition:
+            keyList = [i for i in self.idleDict if i[1] is thread]
+            toClose = [db for k in keyList for db, _ in self.idleDict.pop(k)]
+        for db in toClose:
+            db.close()
+
+    def threadFinished(self):
+        """
+        Runs on a finishing thread: closes its idle connections and stops
+        referencing it.
+        """
+        self.closeThreadConnections()
+        with self._condition:
+            self.watchedThreads.discard(QThread.currentThread())
+
+    def closeAll(self):
+        """
+        Closes every idle connection. Used when the plugin is unloaded.
+        """
+        with self._condition:
+            toClose = [db for idleList in self.idleDict.values() for db, _ in idleList]
+            self.idleDict.clear()
+        for db in toClose:
+            db.close()
+
+    def _count(self, name):
+        with self._condition:
+            self.statDict[name] += 1
+
+    def stats(self):
+        """
+        :return: (dict) counters (created, reused, released, discarded,
+            rollbacks, expired, healthCheckFailures, timeouts) and the number of
+            checked out, pinned and idle connections per key.
+        """
+        with self._condition:
+            statDict = dict(self.statDict)
+            statDict['checkedOut'] = {k: v for k, v in self.checkedOutCount.items() if v}
+            statDict['pinned'] = {k: v for k, v in self.pinnedCount.items() if v}
+            idleCount = defaultdict(int)
+            for (key, _), idleList in self.idleDict.items():
+                idleCount[key] += len(idleList)
+            statDict['idle'] = {k: v for k, v in idleCount.items() if v}
+            return statDict
+
+
+connectionPool = ConnectionPool()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import binascii
+import io
+import struct
+
+from qgis.core import QgsGeometry, QgsWkbTypes
+
+import psycopg2
+
+# EWKB flag telling that the geometry type is followed by a SRID
+EWKB_SRID_FLAG = 0x20000000
+
+GEOMETRY_DIMENSIONS = {
+    QgsWkbTypes.PointGeometry: 0,
+    QgsWkbTypes.LineGeometry: 1,
+    QgsWkbTypes.PolygonGeometry: 2,
+}
+
+
+def geometryFromValue(value):
+    """
+    Builds a QgsGeometry from the geometry values accepted by the flag
+    methods of PostgisDb.
+    :param value: (QgsGeometry, bytes or str) geometry, WKB, hex (E)WKB or
+        WKT.
+    :return: (QgsGeometry) geometry. It is null if value could not be read.
+    """
+    if isinstance(value, QgsGeometry):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        geom = QgsGeometry()
+        geom.fromWkb(bytes(value))
+        return geom
+    value = str(value).strip()
+    if value.upper().startswith('SRID='):
+        # EWKT
+        value = value.split(';', 1)[-1]
+    try:
+        wkb = binascii.unhexlify(value)
+    except (binascii.Error, ValueError):
+        return QgsGeometry.fromWkt(value)
+    return geometryFromValue(stripEwkbSrid(wkb))
+
+
+def stripEwkbSrid(wkb):
+    """
+    Removes the SRID of an EWKB, returning a plain WKB.
+    """
+    byteOrder = '<' if wkb[0] == 1 else '>'
+    wkbType, = struct.unpack(byteOrder + 'I', wkb[1:5])
+    if not wkbType & EWKB_SRID_FLAG:
+        return wkb
+    return wkb[:1] + struct.pack(byteOrder + 'I', wkbType & ~EWKB_SRID_FLAG) + wkb[9:]
+
+
+def hexEwkb(wkb, srid):
+    """
+    Converts a WKB into the hex EWKB PostGIS reads as a geometry literal,
+    embedding srid.
+    :param wkb: (bytes) ISO or OGC WKB;
+    :param srid: (int) SRID of the geometry.
+    :return: (str) hex encoded EWKB.
+    """
+    wkb = stripEwkbSrid(bytes(wkb))
+    byteOrder = '<' if wkb[0] == 1 else '>'
+    wkbType, = struct.unpack(byteOrder + 'I', wkb[1:5])
+    ewkb = wkb[:1] + struct.pack(byteOrder + 'Ii', wkbType | EWKB_SRID_FLAG, int(srid)) + wkb[5:]
+    return binascii.hexlify(ewkb).decode('ascii')
+
+
+def geometryDimension(geom):
+    """
+    Same value as PostGIS ST_Dimension for non collection geometries.
+    :return: (int) 0 for points, 1 for lines, 2 for polygons and None for
+        null or unknown geometries.
+    """
+    if geom is None or geom.isNull():
+        return None
+    return GEOMETRY_DIMENSIONS.get(geom.type())
+
+
+def copyValue(value):
+    """
+    Escapes value for the text format of COPY.
+    """
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t')\
+        .replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copyStream(rowList):
+    """
+    Serializes rowList as the tab separated text stream read by
+    COPY ... FROM STDIN.
+    :param rowList: (iterable) sequences of values of each row.
+    :return: (io.StringIO) stream positioned at its start.
+    """
+    stream = io.StringIO()
+    for row in rowList:
+        stream.write('\t'.join(copyValue(value) for value in row))
+        stream.write('\n')
+    stream.seek(0)
+    return stream
+
+
+def sqlLiteral(value):
+    """
+    Quotes value as a SQL literal, used by the multi-row INSERT fallback.
+    """
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return "'{0}'".format(str(value).replace("'", "''"))
+
+
+def psycopg2Connection(db):
+    """
+    Opens a psycopg2 connection to the same database of a QSqlDatabase, so
+    that COPY can be used (QPSQL cannot stream COPY data).
+    :param db: (QSqlDatabase) open QPSQL database.
+    :return: (psycopg2.extensions.connection) connection, not in autocommit.
+    """
+    return psycopg2.connect(
+        host=db.hostName(),
+        port=db.port(),
+        dbname=db.databaseName(),
+        user=db.userName(),
+        password=db.password()
+    )
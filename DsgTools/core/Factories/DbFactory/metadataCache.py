@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import copy
+import threading
+import time
+from collections import defaultdict
+
+
+class MetadataCache(object):
+    """
+    Cache of catalogue metadata (SRIDs, geometry columns, table schemas,
+    domains, structure...) of one database connection. Each kind of
+    metadata is loaded by its loader on first use and kept until it is
+    invalidated, either explicitly (after DDL) or when it is older than ttl.
+    Callers get deep copies, so they may change the returned values.
+    """
+    def __init__(self, ttl=None):
+        """
+        :param ttl: (float) maximum age, in seconds, of a cached entry. If
+            None, entries are kept until invalidated.
+        """
+        self.ttl = ttl
+        self.entryDict = dict()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._lock = threading.RLock()
+
+    def get(self, kind, loader, key=None):
+        """
+        Gets a cached value, loading it on a miss.
+        :param kind: (str) kind of metadata, used by the counters and by
+            invalidate;
+        :param loader: (callable) function without arguments that queries
+            the value;
+        :param key: (hashable) distinguishes entries of the same kind.
+        :return: copy of the cached value.
+        """
+        with self._lock:
+            entry = self.entryDict.get((kind, key))
+            if entry is not None and not self.isExpired(entry[0]):
+                self.hits[kind] += 1
+                return copy.deepcopy(entry[1])
+            self.misses[kind] += 1
+            value = loader()
+            self.entryDict[(kind, key)] = (time.monotonic(), value)
+            return copy.deepcopy(value)
+
+    def isExpired(self, loadTime):
+        return self.ttl is not None and time.monotonic() - loadTime > self.ttl
+
+    def invalidate(self, kind=None):
+        """
+        Drops the cached entries of kind, or every entry if kind is None.
+        """
+        with self._lock:
+            if kind is None:
+                self.entryDict.clear()
+                return
+            for entryKey in [i for i in self.entryDict if i[0] == kind]:
+                self.entryDict.pop(entryKey)
+
+    def stats(self):
+        """
+        :return: (dict) {kind: {'hits': int, 'misses': int}} and the totals
+            under 'total'.
+        """
+        with self._lock:
+            statsDict = {
+                kind: {'hits': self.hits[kind], 'misses': self.misses[kind]}
+                for kind in set(self.hits) | set(self.misses)
+            }
+            statsDict['total'] = {
+                'hits': sum(self.hits.values()),
+                'misses': sum(self.misses.values())
+            }
+            return statsDict
+
+    def resetStats(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
@@ -23,7 +23,7 @@
 
 from qgis.core import Qgis
 from qgis.PyQt.QtSql import QSqlQuery, QSqlDatabase
-from qgis.PyQt.QtCore import QSettings
+from qgis.PyQt.QtCore import QSettings, QThread
 from qgis.core import (Qgis,
                        QgsMessageLog,
                        QgsCredentials,
@@ -31,6 +31,10 @@ from qgis.core import (Qgis,
                        QgsDataSourceUri)
 
 from .abstractDb import AbstractDb
+from .connectionPool import ConnectionPoolExhausted, connectionPool
+from ...Utils.executorTools import BoundedChunkExecutor
+from .copyTools import (copyStream, geometryDimension, geometryFromValue,
+                        hexEwkb, psycopg2Connection, sqlLiteral)
 from ..SqlFactory.sqlGeneratorFactory import SqlGeneratorFactory
 from ....gui.CustomWidgets.BasicInterfaceWidgets.progressWidget import ProgressWidget
 from DsgTools.core.dsgEnums import DsgEnums
@@ -38,11 +42,16 @@ from DsgTools.core.dsgEnums import DsgEnums
 from osgeo import ogr
 from uuid import uuid4
 from collections import defaultdict
-import codecs, os, json, binascii, re
+import codecs, os, json, binascii, re, time
 import psycopg2
 
 
 class PostgisDb(AbstractDb):
+    # modes of getLayerCountDict
+    COUNT_ESTIMATED = 'estimated'
+    COUNT_EXISTS = 'exists'
+    COUNT_EXACT = 'exact'
+
     def __init__(self):
         """
         Constructor
@@ -55,10 +64,54 @@ class PostgisDb(AbstractDb):
         self.databaseEncoding = 'utf-8'
 
     def closeDatabase(self):
-        if self.db is not None and self.db.isOpen():
+        if self.db is not None and connectionPool.owns(self.db):
+            self.releaseConnection()
+        elif self.db is not None and self.db.isOpen():
             # self.dropAllConections(self.getDatabaseName())
             self.db.close()
 
+    def checkAndOpenDb(self):
+        """
+        Check and open the database. When the connection pool is enabled,
+        the connection is checked out from it for the current thread. It is
+        kept until closeDatabase, so it is pinned: it reuses the idle
+        connections of the pool without taking one of its slots.
+        """
+        if connectionPool.owns(self.db):
+            if self.db.isOpen() and connectionPool.ownerThread(self.db) is QThread.currentThread():
+                return
+            # closed after DDL or used from another thread
+            self.releaseConnection()
+        if self.db.isOpen() or not connectionPool.isEnabled():
+            return super(PostgisDb, self).checkAndOpenDb()
+        try:
+            self.db = connectionPool.acquire(
+                self.db.hostName(),
+                self.db.port(),
+                self.db.databaseName(),
+                self.db.userName(),
+                self.db.password(),
+                pinned=True
+            )
+        except ConnectionPoolExhausted:
+            return super(PostgisDb, self).checkAndOpenDb()
+
+    def releaseConnection(self):
+        """
+        Gives a pooled connection back to the pool, keeping its parameters on
+        a new unopened QSqlDatabase.
+        """
+        if not connectionPool.owns(self.db):
+            return
+        pooledDb = self.db
+        self.db = QSqlDatabase('QPSQL')
+        self.db.setHostName(pooledDb.hostName())
+        self.db.setPort(pooledDb.port())
+        self.db.setDatabaseName(pooledDb.databaseName())
+        self.db.setUserName(pooledDb.userName())
+        self.db.setPassword(pooledDb.password())
+        connectionPool.release(pooledDb)
+
     def getDatabaseParameters(self):
         """
         Gets (host, port, user, password)
@@ -113,6 +166,8 @@ class PostgisDb(AbstractDb):
                 QgsCredentials.instance().put(conInfo, user, password)
 
     def testCredentials(self, host, port, database, user, password):
+        self.invalidateMetadataCache()
+        self.releaseConnection()
         try:
             self.db.setHostName(host)
             if not isinstance(port, int):
@@ -133,6 +188,8 @@ class PostgisDb(AbstractDb):
         """
         #getting connection parameters from qsettings
         (host, port, database, user, password) = self.getConnectionFromQSettings(name)
+        self.invalidateMetadataCache()
+        self.releaseConnection()
         self.db.setHostName(host)
         if type(port) != 'int':
             self.db.setPort(int(port))
@@ -289,10 +346,42 @@ class PostgisDb(AbstractDb):
         settings.endGroup()
         return (host, port, user, password)
 
+    def findEPSG(self, parameters=dict()):
+        """
+        Finds the database EPSG, or the one of the geometry column given by
+        parameters ('tableSchema', 'tableName' and 'geometryColumn').
+        Every geometry column SRID is read once, with a single query.
+        """
+        sridTupleList = self.metadataCache.get('sridTupleList', self.querySridTupleList)
+        keyDict = {'tableSchema': 0, 'tableName': 1, 'geometryColumn': 2}
+        for sridTuple in sridTupleList:
+            if not parameters and sridTuple[0] in ('tiger', 'topology'):
+                continue
+            if all(sridTuple[keyDict[key]] == value for key, value in parameters.items() if key in keyDict):
+                return sridTuple[3]
+        return -1
+
+    def querySridTupleList(self):
+        """
+        List in the form [(tableSchema, tableName, geometryColumn, srid)].
+        """
+        self.checkAndOpenDb()
+        sql = self.gen.getSridTupleList()
+        query = QSqlQuery(sql, self.db)
+        if not query.isActive():
+            raise Exception(self.tr("Problem finding EPSG: ")+query.lastError().text())
+        sridTupleList = []
+        while query.next():
+            sridTupleList.append((query.value(0), query.value(1), query.value(2), query.value(3)))
+        return sridTupleList
+
     def getStructureDict(self):
         """
         Gets database structure according to the edgv version
         """
+        return self.metadataCache.get('structureDict', self.queryStructureDict)
+
+    def queryStructureDict(self):
         self.checkAndOpenDb()
         classDict = dict()
         sql = self.gen.getStructure(self.getDatabaseVersion())        
@@ -359,6 +448,9 @@ class PostgisDb(AbstractDb):
         SHOULD BE DEPRECATED OR IN FOR A MAJOR REFACTORY!!!!!
         Gets the domain dictionary for the edgv database used
         """
+        return self.metadataCache.get('domainDict', self.queryDomainDict)
+
+    def queryDomainDict(self):
         self.checkAndOpenDb()        
         if self.getDatabaseVersion() == '2.1.3':
             schemaList = ['cb', 'complexos', 'dominios']
@@ -413,6 +505,138 @@ class PostgisDb(AbstractDb):
         if ogrOutput.GetDriver().name == 'PostgreSQL':
             return lyr
 
+    def countElements(self, layers):
+        """
+        Counts the number of elements in each layer present in layers. The
+        counts run concurrently, see getLayerCountDict. Raises if any of the
+        layers could not be counted.
+        """
+        self.checkAndOpenDb()
+        layerList = [
+            layer for layer in layers
+            if layer.split('_')[-1].lower() in ['p','l','a'] or self.getTableSchema(layer)[0] == 'complexos'
+        ]
+        tableList = [self.getTableSchema(layer) for layer in layerList]
+        countDict = self.getLayerCountDict(tableList, mode=self.COUNT_EXACT)
+        notCounted = [layer for layer, table in zip(layerList, tableList) if table not in countDict]
+        if notCounted:
+            raise Exception(self.tr("Problem counting elements: ") + ', '.join(notCounted))
+        return [[layer, countDict[table]] for layer, table in zip(layerList, tableList)]
+
+    def getLayersWithElementsV2(self, layerList, useInheritance = False, mode = COUNT_EXISTS):
+        """
+        Gets the names of the tables of layerList that have elements.
+        :param layerList: (list) layers as dicts with tableSchema and
+            tableName, 'schema.table' strings or table names;
+        :param useInheritance: (bool) whether elements of child tables count;
+        :param mode: (str) COUNT_EXISTS (default, one query), COUNT_ESTIMATED
+            (catalogue statistics, one query, may be stale) or COUNT_EXACT.
+        :return: (list-of-str) table names.
+        """
+        self.checkAndOpenDb()
+        tableList = []
+        for layer in layerList:
+            if isinstance(layer, dict):
+                tableList.append((layer['tableSchema'], layer['tableName']))
+            elif '.' in layer:
+                tableList.append(tuple(layer.replace('"','').split('.')))
+            else:
+                tableList.append((self.getTableSchemaFromDb(layer), layer))
+        try:
+            countDict = self.getLayerCountDict(tableList, useInheritance=useInheritance, mode=mode)
+        except Exception as e:
+            # e.g. the user cannot read some of the tables, each one is tried
+            # on its own
+            QgsMessageLog.logMessage(
+                self.tr("Unable to count elements with a single query, counting each table. Error message: '{0}'").format(':'.join(map(str, e.args))),
+                "DSGTools Plugin",
+                Qgis.Warning
+            )
+            return super(PostgisDb, self).getLayersWithElementsV2(layerList, useInheritance=useInheritance)
+        return [table[1] for table in tableList if countDict.get(table, 0) > 0]
+
+    def getLayerCountDict(self, tableList, useInheritance = False, mode = COUNT_EXACT, maxWorkers = None):
+        """
+        Counts the elements of several tables.
+        :param tableList: (list-of-tuple) (tableSchema, tableName) of each
+            table;
+        :param useInheritance: (bool) whether elements of child tables count;
+        :param mode: (str) COUNT_ESTIMATED reads pg_class.reltuples and
+            pg_stat_user_tables in a single query; COUNT_EXISTS tells only
+            whether each table has elements (1 or 0), with a single UNION ALL
+            query; COUNT_EXACT runs count queries on parallel connections;
+        :param maxWorkers: (int) number of connections used by COUNT_EXACT.
+        :return: (dict) {(tableSchema, tableName): count}.
+        """
+        tableList = [table for table in dict.fromkeys(tableList) if table[0] is not None]
+        if not tableList:
+            return dict()
+        self.checkAndOpenDb()
+        if mode == self.COUNT_EXACT:
+            return self.getExactLayerCountDict(tableList, useInheritance=useInheritance, maxWorkers=maxWorkers)
+        if mode == self.COUNT_EXISTS:
+            sql = self.gen.getLayersWithElementsExists(tableList, useInheritance)
+        elif mode == self.COUNT_ESTIMATED:
+            sql = self.gen.getEstimatedElementCount(sorted(set(table[0] for table in tableList)), useInheritance)
+        else:
+            raise ValueError('Unknown count mode: {0}'.format(mode))
+        query = QSqlQuery(sql, self.db)
+        if not query.isActive():
+            raise Exception(self.tr("Problem counting elements: ")+query.lastError().text())
+        countDict = dict()
+        while query.next():
+            countDict[(query.value(0), query.value(1))] = int(query.value(2))
+        return {table: countDict.get(table, 0) for table in tableList}
+
+    def getExactLayerCountDict(self, tableList, useInheritance = False, maxWorkers = None):
+        """
+        Runs one count query per table, spread over worker threads that have
+        their own connections (QSqlDatabase connections cannot cross
+        threads). Tables that cannot be read are logged and left out.
+        """
+        maxWorkers = min(4, len(tableList)) if maxWorkers is None else max(1, maxWorkers)
+        (host, port, user, password) = self.getDatabaseParameters()
+        database = self.getDatabaseName()
+
+        def countTables(tableChunk):
+            workerDb = PostgisDb()
+            try:
+                if not workerDb.testCredentials(host, port, database, user, password):
+                    raise Exception(self.tr('Unable to connect to database {0}.').format(database))
+                return [(table, workerDb.countTableElements(table, useInheritance)) for table in tableChunk]
+            finally:
+                workerDb.closeDatabase()
+                connectionPool.closeThreadConnections()
+
+        chunkList = [tableList[i::maxWorkers] for i in range(maxWorkers)]
+        executor = BoundedChunkExecutor(maxWorkers=maxWorkers, chunkSize=1)
+        countDict = dict()
+        for output in executor.map(countTables, chunkList):
+            countDict.update((table, count) for table, count in output if count is not None)
+        return countDict
+
+    def countTableElements(self, table, useInheritance = False):
+        """
+        :param table: (tuple) (tableSchema, tableName).
+        :return: (int) number of elements or None if the table could not be
+            read.
+        """
+        self.checkAndOpenDb()
+        query = QSqlQuery(self.gen.getElementCountFromLayerV2(table[0], table[1], useInheritance), self.db)
+        if not query.next():
+            # use may not have permission to read the table from schema
+            QgsMessageLog.logMessage(
+                self.tr("Unable to read table {0}. Error message: '{1}'")\
+                    .format(
+                        '.'.join(table),
+                        query.lastError().databaseText()
+                    ),
+                "DSGTools Plugin",
+                Qgis.Warning
+            )
+            return None
+        return query.value(0)
+
     def getTableSchema(self,lyr):
         """
         DEPRECATED
@@ -975,41 +1199,112 @@ class PostgisDb(AbstractDb):
             invalidRecordsList.append( (featId, reason, geom) )
         return invalidRecordsList
     
-    def insertFlags(self, flagTupleList, processName, useTransaction = True):
-        """
-        Inserts flags into database
-        flagTupleList: flag tuple list
+    def insertFlags(self, flagTupleList, processName, useTransaction = True, useCopy = True, batchSize = 1000):
+        """
+        Inserts flags into database. SRIDs are looked up once per layer and
+        the flags are sent as hex EWKB, streamed with COPY into a staging
+        table (through a psycopg2 connection) and moved to the flag tables
+        with one INSERT per dimension, all within one transaction. When COPY
+        cannot be used (useTransaction is False, so the flags must be written
+        on the caller's transaction, or psycopg2 cannot connect) the flags are
+        sent by multi-row INSERT statements of batchSize rows.
+        flagTupleList: flag tuple list in the form
+            (layer, feat_id, reason, geom, geometry_column)
         processName: process name
+        useTransaction: whether the insertion runs on its own transaction
+        useCopy: whether COPY may be used
+        batchSize: rows per INSERT statement of the fallback
         """
         self.checkAndOpenDb()
-        if len(flagTupleList) > 0:
-            if useTransaction:
-                self.db.transaction()
-            query = QSqlQuery(self.db)
-            for record in flagTupleList:
-                try:
-                    dimension = self.getDimension(record[3]) # getting geometry dimension
-                except Exception as e:
-                    raise e
-                # specific EPSG search
-                flagSRID = self.findEPSG(parameters={'tableSchema':'validation', 'tableName':'aux_flags_validacao_p', 'geometryColumn':'geom'})
+        if len(flagTupleList) == 0:
+            return 0
+        flagSRID = self.findEPSG(parameters={'tableSchema':'validation', 'tableName':'aux_flags_validacao_p', 'geometryColumn':'geom'})
+        flagRows = self.prepareFlagRows(flagTupleList, flagSRID)
+        if useTransaction and useCopy:
+            try:
+                return self.copyFlags(flagRows, processName, flagSRID)
+            except psycopg2.OperationalError as e:
+                QgsMessageLog.logMessage(
+                    self.tr('COPY of flags not available, using INSERT statements: ') + str(e),
+                    'DSGTools Plugin',
+                    Qgis.Warning
+                )
+        return self.insertFlagRows(flagRows, processName, flagSRID, useTransaction=useTransaction, batchSize=batchSize)
+
+    def prepareFlagRows(self, flagTupleList, flagSRID):
+        """
+        Builds the rows (layer, feat_id, reason, hex ewkb, dimension,
+        geometry_column) of the flags, resolving each layer SRID only once.
+        """
+        sridDict = dict()
+        flagRows = []
+        for layer, featId, reason, geomValue, geometryColumn in flagTupleList:
+            geom = geometryFromValue(geomValue)
+            dimension = geometryDimension(geom)
+            if dimension is None:
+                raise Exception(self.tr('Problem inserting flags: ') + self.tr('invalid flag geometry on layer {0}').format(layer))
+            if (layer, geometryColumn) not in sridDict:
                 try:
-                    tableSchema, tableName = record[0].split('.')
-                    parameters = {'tableSchema':tableSchema, 'tableName':tableName, 'geometryColumn':record[4]}
-                    srid = self.findEPSG(parameters=parameters)
+                    tableSchema, tableName = layer.split('.')
+                    parameters = {'tableSchema':tableSchema, 'tableName':tableName, 'geometryColumn':geometryColumn}
+                    sridDict[(layer, geometryColumn)] = self.findEPSG(parameters=parameters)
                 except:
-                    srid = flagSRID
-                #actual flag insertion
-                sql = self.gen.insertFlagIntoDb(record[0], record[1], record[2], record[3], srid, processName, dimension, record[4], flagSRID)
+                    sridDict[(layer, geometryColumn)] = flagSRID
+            srid = sridDict[(layer, geometryColumn)]
+            flagRows.append(
+                (layer, featId, reason, hexEwkb(geom.asWkb(), srid), dimension, geometryColumn)
+            )
+        return flagRows
+
+    def getCopyConnection(self):
+        """
+        Connection used to stream COPY data.
+        """
+        return psycopg2Connection(self.db)
+
+    def copyFlags(self, flagRows, processName, flagSRID):
+        """
+        Streams flagRows into a staging table and inserts them on the flag
+        tables, on a single transaction.
+        """
+        stagingTable = 'dsgtools_flag_staging'
+        conn = self.getCopyConnection()
+        try:
+            with conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(self.gen.createFlagStagingTable(stagingTable))
+                    cursor.copy_expert(self.gen.copyFlagsIntoStagingTable(stagingTable), copyStream(flagRows))
+                    for dimension in sorted(set(row[4] for row in flagRows)):
+                        cursor.execute(self.gen.insertFlagsFromStagingTable(stagingTable, processName, dimension, flagSRID))
+        except psycopg2.OperationalError:
+            raise
+        except psycopg2.Error as e:
+            raise Exception(self.tr('Problem inserting flags: ') + str(e))
+        finally:
+            conn.close()
+        return len(flagRows)
+
+    def insertFlagRows(self, flagRows, processName, flagSRID, useTransaction = True, batchSize = 1000):
+        """
+        Inserts flagRows with multi-row INSERT statements on self.db.
+        """
+        rowDict = defaultdict(list)
+        for row in flagRows:
+            rowDict[row[4]].append(tuple(sqlLiteral(value) for value in row))
+        if useTransaction:
+            self.db.transaction()
+        query = QSqlQuery(self.db)
+        batchSize = max(1, batchSize)
+        for dimension, valueList in sorted(rowDict.items()):
+            for i in range(0, len(valueList), batchSize):
+                sql = self.gen.insertFlagValuesIntoDb(processName, dimension, valueList[i:i+batchSize], flagSRID)
                 if not query.exec_(sql):
                     if useTransaction:
                         self.db.rollback()
                     raise Exception(self.tr('Problem inserting flags: ') + query.lastError().text())
-            if useTransaction:
-                self.db.commit()
-            return len(flagTupleList)
-        else:
-            return 0
+        if useTransaction:
+            self.db.commit()
+        return len(flagRows)
     
     def deleteProcessFlags(self, processName=None, className=None, flagId=None):
         """
@@ -1054,6 +1349,7 @@ class PostgisDb(AbstractDb):
                     raise Exception(self.tr('Problem creating structure: ') + query.lastError().text())
             if useTransaction:
                 self.db.commit()
+            self.invalidateMetadataCache()
                 
     def getValidationStatus(self, processName):
         """
@@ -1474,33 +1770,105 @@ class PostgisDb(AbstractDb):
                     result.append(query.value(0))
         return result
     
-    def updateGeometries(self, tableSchema, tableName, tuplas, epsg, useTransaction = True):
+    def updateGeometries(self, tableSchema, tableName, tuplas, epsg, useTransaction = True, useCopy = True):
         """
-        Updates geometries on database
+        Updates geometries on database and deletes the features whose ids
+        are not in tuplas. The geometries are streamed with COPY into a
+        staging table and the table is changed by one UPDATE and one DELETE,
+        all within one transaction. When COPY cannot be used (useTransaction
+        is False or psycopg2 cannot connect) one UPDATE per id is sent.
         tableSchema: table schema
         tableName: table name
-        tuplas: tuples used during the update
+        tuplas: tuples used during the update, in the form {id: [wkb, ...]}
         epsg: geometry srid
+        useTransaction: whether the update runs on its own transaction
+        useCopy: whether COPY may be used
+        returns a dict with the number of updated and deleted rows and the
+        elapsed time in seconds
+        """
+        self.checkAndOpenDb()
+        if not tuplas:
+            # every feature would be deleted
+            raise Exception(self.tr('Problem updating geometries: ') + self.tr('no geometries to update.'))
+        start = time.perf_counter()
+        output = None
+        if useTransaction and useCopy:
+            try:
+                output = self.copyGeometries(tableSchema, tableName, tuplas, epsg)
+            except psycopg2.OperationalError as e:
+                QgsMessageLog.logMessage(
+                    self.tr('COPY of geometries not available, using UPDATE statements: ') + str(e),
+                    'DSGTools Plugin',
+                    Qgis.Warning
+                )
+        if output is None:
+            output = self.updateGeometriesById(tableSchema, tableName, tuplas, epsg, useTransaction=useTransaction)
+        output['elapsed'] = time.perf_counter() - start
+        QgsMessageLog.logMessage(
+            self.tr('{0}.{1}: {2} features updated and {3} deleted in {4:.2f} s.').format(
+                tableSchema, tableName, output['updated'], output['deleted'], output['elapsed']
+            ),
+            'DSGTools Plugin',
+            Qgis.Info
+        )
+        return output
+
+    def copyGeometries(self, tableSchema, tableName, tuplas, epsg):
+        """
+        Streams the (id, wkb) rows of tuplas into a staging table and updates
+        tableSchema.tableName from it, on a single transaction.
+        """
+        stagingTable = 'dsgtools_geometry_staging'
+        rowList = (
+            (featId, wkb.hex() if isinstance(wkb, (bytes, bytearray)) else wkb)
+            for featId, wkbList in tuplas.items() for wkb in wkbList
+        )
+        conn = self.getCopyConnection()
+        try:
+            with conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(self.gen.createGeometryStagingTable(stagingTable))
+                    cursor.copy_expert(self.gen.copyGeometriesIntoStagingTable(stagingTable), copyStream(rowList))
+                    for sql in self.gen.indexGeometryStagingTable(stagingTable).split('#'):
+                        cursor.execute(sql)
+                    cursor.execute(self.gen.updateOriginalTableFromStagingTable(tableSchema, tableName, stagingTable, epsg))
+                    updated = cursor.rowcount
+                    cursor.execute(self.gen.deleteFeaturesNotInStagingTable(tableSchema, tableName, stagingTable))
+                    deleted = cursor.rowcount
+        except psycopg2.OperationalError:
+            raise
+        except psycopg2.Error as e:
+            raise Exception(self.tr('Problem updating geometries: ') + str(e))
+        finally:
+            conn.close()
+        return {'updated': updated, 'deleted': deleted}
+
+    def updateGeometriesById(self, tableSchema, tableName, tuplas, epsg, useTransaction = True):
+        """
+        Updates geometries with one UPDATE per id on self.db.
         """
-        self.checkAndOpenDb()
         sqls = self.gen.updateOriginalTable(tableSchema, tableName, tuplas, epsg)
         query = QSqlQuery(self.db)
         if useTransaction:
             self.db.transaction()
+        updated = 0
         for sql in sqls:
             if not query.exec_(sql):
                 if useTransaction:
                     self.db.rollback()
                 raise Exception(self.tr('Problem updating geometries: ') + query.lastError().text())
+            updated += max(0, query.numRowsAffected())
         sqlDel = self.gen.deleteFeaturesNotIn(tableSchema, tableName, list(tuplas.keys()))
         query2 = QSqlQuery(self.db)
         if not query2.exec_(sqlDel):
             if useTransaction:
                 self.db.rollback()
-            raise Exception(self.tr('Problem deleting geometries: ') + query.lastError().text())            
+            raise Exception(self.tr('Problem deleting geometries: ') + query2.lastError().text())
+        deleted = max(0, query2.numRowsAffected())
         if useTransaction:
             self.db.commit()
-    
+        return {'updated': updated, 'deleted': deleted}
+
     def checkCentroidAuxStruct(self):
         """
         Checks the centroid structure
@@ -1967,13 +2335,22 @@ class PostgisDb(AbstractDb):
                     raise Exception(self.tr('Problem importing style ')+style+':'+':'.join(e.args))
 
     def getTableSchemaFromDb(self,table):
+        return self.metadataCache.get('tableSchemaDict', self.queryTableSchemaDict).get(table)
+
+    def queryTableSchemaDict(self):
+        """
+        Dict in the form {tableName: tableSchema} of every table outside of
+        the validation and views schemas, read with a single query.
+        """
         self.checkAndOpenDb()
-        sql = self.gen.getTableSchemaFromDb(table)
+        sql = self.gen.getTableSchemaDictFromDb()
         query = QSqlQuery(sql, self.db)
         if not query.isActive():
             raise Exception(self.tr("Problem getting table schema from db: ") + query.lastError().text())
+        tableSchemaDict = dict()
         while query.next():
-            return query.value(0)
+            tableSchemaDict.setdefault(query.value(0), query.value(1))
+        return tableSchemaDict
     
     def getAllStylesDict(self, perspective = 'style'):
         """
@@ -2002,6 +2379,8 @@ class PostgisDb(AbstractDb):
         self.checkAndOpenDb()
         file = codecs.open(sqlFilePath, encoding=encoding, mode='r')
         sql = file.read()
+        # the file may change the database structure
+        self.invalidateMetadataCache()
         query = QSqlQuery(self.db)
         if useTransaction:
             self.db.transaction()
@@ -2321,6 +2700,9 @@ class PostgisDb(AbstractDb):
         """
         Dict in the form 'geomName':[-list of table names-]
         """
+        return self.metadataCache.get('geomColumnDict', self.queryGeomColumnDict)
+
+    def queryGeomColumnDict(self):
         self.checkAndOpenDb()
         sql = self.gen.getGeomColumnDict()
         query = QSqlQuery(sql, self.db)
@@ -2647,6 +3029,7 @@ class PostgisDb(AbstractDb):
         if not query.exec_(sql):
             raise Exception(self.tr('Problem creating from template: ') + query.lastError().text())
         self.checkAndCreateStyleTable()
+        self.invalidateMetadataCache()
         #this close is to allow creation from template
         self.db.close()
         if parentWidget:
@@ -2711,6 +3094,7 @@ class PostgisDb(AbstractDb):
                 progress.step()
         if useTransaction:
             self.db.commit()
+        self.invalidateMetadataCache()
         #this close is to allow creation from template
         if closeAfterUse:
             self.db.close()
@@ -3232,6 +3616,9 @@ class PostgisDb(AbstractDb):
         return valueList
     
     def getInheritanceTreeDict(self):
+        return self.metadataCache.get('inheritanceTreeDict', self.queryInheritanceTreeDict)
+
+    def queryInheritanceTreeDict(self):
         self.checkAndOpenDb()
         inhDict = self.getInheritanceDict()
         layerList = self.listGeomClassesFromDatabase()
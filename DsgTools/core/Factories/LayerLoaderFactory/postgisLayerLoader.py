@@ -99,7 +99,8 @@ class PostGISLayerLoader(EDGVLayerLoader):
         filterList = []
         lyrsWithElements = self.abstractDb.getLayersWithElementsV2(
             layerList,
-            useInheritance=useInheritance
+            useInheritance=useInheritance,
+            mode=self.abstractDb.COUNT_EXISTS
         ) if onlyWithElements else layerList
         if len(geomFilterList) > 0:
             finalSet = set()
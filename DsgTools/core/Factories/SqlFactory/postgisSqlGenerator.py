@@ -111,6 +111,52 @@ class PostGISSqlGenerator(SqlGenerator):
             sql = '''SELECT count(a) FROM ( SELECT * FROM "{0}"."{1}" ) as a'''.format(schema,table)
         return sql
 
+    def getLayersWithElementsExists(self, tableList, useInheritance):
+        """
+        One row (schema, table, hasElements) per table of tableList, where
+        hasElements is 1 or 0. Each table is scanned only until its first row.
+        :param tableList: (list-of-tuple) (tableSchema, tableName) of each table.
+        """
+        only = '' if useInheritance else 'ONLY '
+        sql = """\nUNION ALL\n""".join(
+            """SELECT '{0}'::text, '{1}'::text, (EXISTS (SELECT 1 FROM {2}"{0}"."{1}"))::int""".format(schema, table, only)
+            for schema, table in tableList
+        )
+        return sql
+
+    def getEstimatedElementCount(self, schemaList, useInheritance):
+        """
+        Estimated number of rows of each table of schemaList, read from the
+        planner statistics (pg_class.reltuples) and from the live tuple
+        counter of pg_stat_user_tables, whichever is greater. With
+        useInheritance, the estimates of the descendant tables are added.
+        """
+        schemas = ','.join("'{0}'".format(schema) for schema in schemaList)
+        estimate = """GREATEST(c.reltuples, COALESCE(s.n_live_tup, 0), 0)"""
+        if not useInheritance:
+            sql = """SELECT n.nspname::text, c.relname::text, {0}::bigint
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+                WHERE n.nspname IN ({1}) AND c.relkind IN ('r', 'p')""".format(estimate, schemas)
+        else:
+            sql = """WITH RECURSIVE tree(root, child) AS (
+                    SELECT c.oid, c.oid FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname IN ({1}) AND c.relkind IN ('r', 'p')
+                    UNION
+                    SELECT tree.root, i.inhrelid FROM tree
+                    JOIN pg_inherits i ON i.inhparent = tree.child
+                )
+                SELECT n.nspname::text, r.relname::text, sum({0})::bigint
+                FROM tree
+                JOIN pg_class r ON r.oid = tree.root
+                JOIN pg_namespace n ON n.oid = r.relnamespace
+                JOIN pg_class c ON c.oid = tree.child
+                LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+                GROUP BY n.nspname, r.relname""".format(estimate, schemas)
+        return sql
+
     def getElementCountFromLayerWithInh(self, layer):
         sql = "SELECT count(*) FROM "+layer
         return sql
@@ -415,6 +461,34 @@ class PostGISSqlGenerator(SqlGenerator):
         ('{1}','{2}',{3},'{4}',ST_Transform(ST_SetSRID(ST_Multi('{5}'),{6}),{7}), {8}, '{9}');""".format(tableName, processName, layer, str(feat_id), reason, geom, srid, flagSRID, dimension, geometryColumn)
         return sql
     
+    def flagTableName(self, dimension):
+        return {0: 'aux_flags_validacao_p', 1: 'aux_flags_validacao_l', 2: 'aux_flags_validacao_a'}[dimension]
+
+    def createFlagStagingTable(self, stagingTable):
+        sql = """CREATE TEMP TABLE {0} (layer text, feat_id bigint, reason text, geom geometry, dimension smallint, geometry_column text) ON COMMIT DROP""".format(stagingTable)
+        return sql
+
+    def copyFlagsIntoStagingTable(self, stagingTable):
+        sql = """COPY {0} (layer, feat_id, reason, geom, dimension, geometry_column) FROM STDIN""".format(stagingTable)
+        return sql
+
+    def insertFlagsFromStagingTable(self, stagingTable, processName, dimension, flagSRID):
+        sql = u"""INSERT INTO validation.{0} (process_name, layer, feat_id, reason, geom, dimension, geometry_column)
+        SELECT '{1}', layer, feat_id, reason, ST_Transform(ST_Multi(geom),{2}), dimension, geometry_column FROM {3} WHERE dimension = {4}""".format(self.flagTableName(dimension), processName.replace("'", "''"), flagSRID, stagingTable, dimension)
+        return sql
+
+    def insertFlagValuesIntoDb(self, processName, dimension, valueList, flagSRID):
+        """
+        Multi-row insert of flags of the same dimension.
+        valueList: list of already quoted value tuples in the form
+        (layer, feat_id, reason, hex ewkb, dimension, geometry_column)
+        """
+        values = ',\n'.join('({0})'.format(','.join(row)) for row in valueList)
+        sql = u"""INSERT INTO validation.{0} (process_name, layer, feat_id, reason, geom, dimension, geometry_column)
+        SELECT '{1}', f.layer, f.feat_id::bigint, f.reason, ST_Transform(ST_Multi(f.geom::geometry),{2}), f.dimension::smallint, f.geometry_column
+        FROM (VALUES {3}) AS f(layer, feat_id, reason, geom, dimension, geometry_column)""".format(self.flagTableName(dimension), processName.replace("'", "''"), flagSRID, values)
+        return sql
+
     def getRunningProc(self):
         sql = "SELECT process_name, status FROM validation.process_history ORDER BY finished DESC LIMIT 1;"
         return sql
@@ -542,6 +616,45 @@ class PostGISSqlGenerator(SqlGenerator):
         ) as foo2 where len < {2} order by foo2."{4}" """.format(schema, cl, areaTolerance, geometryColumn, keyColumn)
         return sql
     
+    def getSmallLengthFeatures(self, relation, geometryColumn, keyColumn, whereClause, tolerance):
+        """
+        Rows (wkb, id, length) of the filtered features of relation that are
+        shorter than tolerance. Identifiers must be already quoted.
+        """
+        sql = """SELECT ST_AsBinary({1}), {2}, ST_Length({1}) FROM {0}
+        WHERE ({3}) AND ST_Length({1}) < {4} ORDER BY {2}""".format(relation, geometryColumn, keyColumn, whereClause, float(tolerance))
+        return sql
+
+    def getSmallAreaFeatures(self, relation, geometryColumn, keyColumn, whereClause, tolerance):
+        """
+        Rows (wkb, id, area) of the filtered features of relation whose
+        areas are smaller than tolerance. Identifiers must be already quoted.
+        """
+        sql = """SELECT ST_AsBinary({1}), {2}, ST_Area({1}) FROM {0}
+        WHERE ({3}) AND ST_Area({1}) < {4} ORDER BY {2}""".format(relation, geometryColumn, keyColumn, whereClause, float(tolerance))
+        return sql
+
+    def getDuplicatedGeometryFeatures(self, relation, geometryColumn, keyColumn, whereClause, isMulti):
+        """
+        Rows (wkb, ids) for each set of filtered features of relation with
+        the same normalized geometry. Only the ids are aggregated; the
+        geometry is read from the feature of the lowest id of each set.
+        Identifiers must be already quoted.
+        """
+        geom = 'ST_Multi({0})' if isMulti else '{0}'
+        sql = """SELECT ST_AsBinary({4}), duplicated.ids FROM (
+            SELECT min({2}) AS first_id, array_agg({2} ORDER BY {2}) AS ids FROM {0}
+            WHERE ({3}) GROUP BY ST_AsBinary(ST_Normalize({1})) HAVING count(*) > 1
+        ) AS duplicated JOIN {0} AS feature ON feature.{2} = duplicated.first_id
+        ORDER BY duplicated.first_id""".format(
+            relation,
+            geom.format(geometryColumn),
+            keyColumn,
+            whereClause,
+            geom.format('feature.' + geometryColumn)
+        )
+        return sql
+
     def prepareVertexNearEdgesStruct(self, tableSchema, tableName, geometryColumn, keyColumn, geomType):
         if 'POLYGON' in geomType:
             sql = """drop table if exists seg#
@@ -595,6 +708,33 @@ class PostGISSqlGenerator(SqlGenerator):
         WHERE id not in ({2})""" .format(schema,table,','.join(map(str,idList)))
         return sql        
     
+    def createGeometryStagingTable(self, stagingTable):
+        sql = """CREATE TEMP TABLE {0} (id bigint, geom geometry) ON COMMIT DROP""".format(stagingTable)
+        return sql
+
+    def copyGeometriesIntoStagingTable(self, stagingTable):
+        sql = """COPY {0} (id, geom) FROM STDIN""".format(stagingTable)
+        return sql
+
+    def indexGeometryStagingTable(self, stagingTable):
+        sql = """CREATE INDEX ON {0} (id)#ANALYZE {0}""".format(stagingTable)
+        return sql
+
+    def updateOriginalTableFromStagingTable(self, tableSchema, tableName, stagingTable, epsg):
+        """
+        Same update of updateOriginalTable, with the geometries of each id
+        read from stagingTable.
+        """
+        sql = """UPDATE "{0}"."{1}" AS t SET geom = ST_Multi(s.geom)
+        FROM (SELECT id, ST_Union(ST_SetSRID(ST_Multi(geom), {3})) AS geom FROM {2} GROUP BY id) AS s
+        WHERE t.id = s.id""".format(tableSchema, tableName, stagingTable, epsg)
+        return sql
+
+    def deleteFeaturesNotInStagingTable(self, tableSchema, tableName, stagingTable):
+        sql = """DELETE FROM "{0}"."{1}" AS t
+        WHERE NOT EXISTS (SELECT 1 FROM {2} AS s WHERE s.id = t.id)""".format(tableSchema, tableName, stagingTable)
+        return sql
+
     def getNotSimple(self, tableSchema, tableName, geometryColumn, keyColumn):
         sql = """select foo."{3}" as "{3}", ST_MULTI(st_startpoint(foo."{2}")) as "{2}" from (
         select "{3}" as "{3}", (ST_Dump(ST_Node(ST_SetSRID(ST_MakeValid("{2}"),ST_SRID("{2}"))))).geom as "{2}" from "{0}"."{1}"  
@@ -949,6 +1089,14 @@ class PostGISSqlGenerator(SqlGenerator):
         sql = """INSERT INTO  public.layer_styles (styleqml, f_table_name, description, f_geometry_column, stylename, f_table_schema, f_table_catalog, useasdefault) VALUES ('"""+parsedQml.replace("'","''")+"""','{0}','{1}','{2}','{3}','{4}','{5}',FALSE)""".format(table_name, styleName, geomColumn, styleName.split('/')[-1]+'/'+table_name, tableSchema, dbName)
         return sql
     
+    def getTableSchemaDictFromDb(self):
+        sql = """select distinct table_name, table_schema from information_schema.columns where table_schema not in ('validation','views') order by table_name, table_schema"""
+        return sql
+
+    def getSridTupleList(self):
+        sql = """SELECT f_table_schema, f_table_name, f_geometry_column, srid from geometry_columns"""
+        return sql
+
     def getTableSchemaFromDb(self, table):
         sql = """select distinct table_schema from information_schema.columns where table_name = '{0}' and table_schema not in ('validation','views')""".format(table)
         return sql
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import numpy as np
+
+from .lineEndPoints import quantizeCoordinates
+
+
+class NodeBitset(object):
+    """
+    Set of node indexes from 0 to size - 1, one bit per node.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) >> 3)
+
+    def add(self, idx):
+        self.bits[idx >> 3] |= 1 << (idx & 7)
+
+    def discard(self, idx):
+        self.bits[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+
+    def __contains__(self, idx):
+        return bool(self.bits[idx >> 3] & (1 << (idx & 7)))
+
+    def __len__(self):
+        return int(np.unpackbits(np.frombuffer(bytes(self.bits), dtype=np.uint8)).sum())
+
+
+class CompactNetwork(object):
+    """
+    Line network stored with integer node and edge ids. Each line is an edge
+    from the node of its first vertex to the node of its last vertex and the
+    adjacency of the nodes is kept in CSR form (indptr, indices, edgeIds):
+    the neighbours of node i are indices[indptr[i]:indptr[i+1]] and the
+    lines that lead to them are edgeIds on the same positions.
+    """
+    def __init__(self, lineIds, startNode, endNode, nodeCount, nodeKeys=None):
+        """
+        :param lineIds: (np.ndarray) int64 feature id of each edge;
+        :param startNode: (np.ndarray) int64 node id of the first vertex of
+            each edge;
+        :param endNode: (np.ndarray) int64 node id of the last vertex of
+            each edge;
+        :param nodeCount: (int) number of nodes;
+        :param nodeKeys: (list) object (e.g. QgsPointXY) that represents each
+            node id outside the network, if any.
+        """
+        self.lineIds = np.asarray(lineIds, dtype=np.int64)
+        self.startNode = np.asarray(startNode, dtype=np.int64)
+        self.endNode = np.asarray(endNode, dtype=np.int64)
+        self.numNodes = nodeCount
+        self.nodeKeys = nodeKeys
+        self.nodeIndex = {key: idx for idx, key in enumerate(nodeKeys)} \
+            if nodeKeys is not None else dict()
+        self.edgeIndex = {lineId: idx for idx, lineId in enumerate(self.lineIds.tolist())}
+        edges = np.arange(len(self.lineIds), dtype=np.int64)
+        self.indptr, self.indices, self.edgeIds = self.buildAdjacency(
+            np.concatenate((self.startNode, self.endNode)),
+            np.concatenate((self.endNode, self.startNode)),
+            np.concatenate((edges, edges))
+        )
+        # plain lists are faster than arrays for item access in python loops
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+
+    @classmethod
+    def fromLineEndPoints(cls, endPoints):
+        """
+        Builds the network from the nodes computed by a LineEndPoints.
+        :param endPoints: (LineEndPoints) line end points.
+        :return: (CompactNetwork) network with one edge per line part.
+        """
+        return cls(
+            endPoints.featIds,
+            endPoints.startNode,
+            endPoints.endNode,
+            endPoints.nodeCount(),
+            nodeKeys=[endPoints.nodePoint(i) for i in range(endPoints.nodeCount())]
+        )
+
+    @classmethod
+    def fromPolylines(cls, featIds, polylineList, tolerance=None):
+        """
+        Builds the network over the vertices of the lines. Each line is split
+        on the vertices it shares with other lines (or that it visits more
+        than once), so that lines that meet on an interior vertex are
+        connected. Repeated consecutive vertices are skipped.
+        :param featIds: (list-of-int) feature id of each polyline;
+        :param polylineList: (list-of-list-of-QgsPointXY) vertices of each
+            polyline;
+        :param tolerance: (float) grid size used on the quantization. If None,
+            only equal coordinates share a node.
+        :return: (tuple) (CompactNetwork) network with one edge per piece of
+            line and (list-of-list-of-QgsPointXY) vertices of each piece.
+        """
+        coords = np.array(
+            [(point.x(), point.y()) for polyline in polylineList for point in polyline],
+            dtype=np.float64
+        ).reshape(-1, 2)
+        if not len(coords):
+            return cls([], [], [], 0), []
+        _, inverse, nodeCounts = np.unique(
+            quantizeCoordinates(coords, tolerance),
+            axis=0,
+            return_inverse=True,
+            return_counts=True
+        )
+        inverse = inverse.reshape(-1).tolist()
+        isShared = (nodeCounts > 1).tolist()
+        lineIds, startNode, endNode, pieceList = [], [], [], []
+        offset = 0
+        for featId, polyline in zip(featIds, polylineList):
+            nodeList = inverse[offset:offset + len(polyline)]
+            offset += len(polyline)
+            pieceNodes, piecePoints = [], []
+            for node, point in zip(nodeList, polyline):
+                if pieceNodes and node == pieceNodes[-1]:
+                    continue
+                pieceNodes.append(node)
+                piecePoints.append(point)
+                if len(pieceNodes) > 1 and isShared[node]:
+                    lineIds.append(featId)
+                    startNode.append(pieceNodes[0])
+                    endNode.append(node)
+                    pieceList.append(piecePoints)
+                    pieceNodes, piecePoints = [node], [point]
+            if len(pieceNodes) > 1:
+                lineIds.append(featId)
+                startNode.append(pieceNodes[0])
+                endNode.append(pieceNodes[-1])
+                pieceList.append(piecePoints)
+        return cls(lineIds, startNode, endNode, len(nodeCounts)), pieceList
+
+    @classmethod
+    def fromNodeDict(cls, nodeDict, tolerance=None):
+        """
+        Builds the network from a NetworkHandler node dict. Node ids are given
+        by the quantized node coordinates, so nodes closer than tolerance get
+        the same id.
+        :param nodeDict: (dict) { (QgsPointXY) node : { 'start' : (list-of-
+            QgsFeature) lines starting on node, 'end' : (list-of-QgsFeature)
+            lines ending on node } };
+        :param tolerance: (float) grid size used on the quantization. If None,
+            only equal coordinates share an id.
+        :return: (CompactNetwork) network with one edge per line.
+        """
+        nodeKeys = list(nodeDict)
+        if not nodeKeys:
+            return cls([], [], [], 0, nodeKeys=[])
+        coords = np.array([(node.x(), node.y()) for node in nodeKeys], dtype=np.float64)
+        _, firstIdx, inverse = np.unique(
+            quantizeCoordinates(coords, tolerance),
+            axis=0,
+            return_index=True,
+            return_inverse=True
+        )
+        inverse = inverse.reshape(-1).tolist()
+        startDict, endDict = dict(), dict()
+        for node, nodeId in zip(nodeKeys, inverse):
+            for line in nodeDict[node]['start']:
+                startDict[line.id()] = nodeId
+            for line in nodeDict[node]['end']:
+                endDict[line.id()] = nodeId
+        lineIds = [lineId for lineId in startDict if lineId in endDict]
+        network = cls(
+            lineIds,
+            [startDict[lineId] for lineId in lineIds],
+            [endDict[lineId] for lineId in lineIds],
+            len(firstIdx),
+            nodeKeys=[nodeKeys[idx] for idx in firstIdx.tolist()]
+        )
+        # every original key is resolved, including the ones that were merged
+        network.nodeIndex.update(zip(nodeKeys, inverse))
+        return network
+
+    def buildAdjacency(self, source, target, edges):
+        """
+        Sorts (source, target) node pairs into CSR arrays.
+        :param source: (np.ndarray) node id where each entry starts;
+        :param target: (np.ndarray) node id where each entry ends;
+        :param edges: (np.ndarray) edge index of each entry.
+        :return: (tuple-of-np.ndarray) indptr, indices and edgeIds.
+        """
+        order = np.argsort(source, kind='stable')
+        indptr = np.zeros(self.numNodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=self.numNodes), out=indptr[1:])
+        return indptr, target[order], edges[order]
+
+    def directedAdjacency(self):
+        """
+        CSR arrays of the edges following their direction (first vertex to
+        last vertex).
+        :return: (tuple-of-np.ndarray) indptr, indices and edgeIds.
+        """
+        return self.buildAdjacency(
+            self.startNode,
+            self.endNode,
+            np.arange(len(self.lineIds), dtype=np.int64)
+        )
+
+    def nodeCount(self):
+        return self.numNodes
+
+    def edgeCount(self):
+        return len(self.lineIds)
+
+    def nodeId(self, node):
+        """
+        :param node: (QgsPointXY) node as stored on nodeKeys.
+        :return: (int) node id or None, if node is not on the network.
+        """
+        return self.nodeIndex.get(node)
+
+    def nodeKey(self, nodeId):
+        return self.nodeKeys[nodeId]
+
+    def neighbors(self, nodeId):
+        """
+        :return: (list-of-int) ids of the nodes at the other end of each line
+            connected to nodeId (repeated for parallel lines).
+        """
+        return self._indices[self._indptr[nodeId]:self._indptr[nodeId + 1]]
+
+    def degree(self, nodeId):
+        return self._indptr[nodeId + 1] - self._indptr[nodeId]
+
+    def otherEnd(self, lineId, nodeId):
+        """
+        :param lineId: (int) feature id of a line;
+        :param nodeId: (int) id of one of the nodes of the line.
+        :return: (int) id of the node on the other end of the line or None, if
+            the line is not connected to nodeId.
+        """
+        edgeIdx = self.edgeIndex.get(lineId)
+        if edgeIdx is None:
+            return None
+        start, end = int(self.startNode[edgeIdx]), int(self.endNode[edgeIdx])
+        if start == nodeId:
+            return end
+        if end == nodeId:
+            return start
+        return None
+
+    def stronglyConnectedComponents(self):
+        """
+        Labels the strongly connected components of the directed network
+        (iterative Tarjan, O(V + E)).
+        :return: (tuple) (np.ndarray) component label of each node and (int)
+            number of components.
+        """
+        indptr, indices, _ = self.directedAdjacency()
+        indptr, indices = indptr.tolist(), indices.tolist()
+        nodeCount = self.numNodes
+        index, low = [-1] * nodeCount, [0] * nodeCount
+        labels = [-1] * nodeCount
+        onStack = bytearray(nodeCount)
+        stack = []
+        counter, componentCount = 0, 0
+        for root in range(nodeCount):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            onStack[root] = 1
+            # each work item is a node and the position of its next edge
+            work = [(root, indptr[root])]
+            while work:
+                node, ptr = work[-1]
+                end = indptr[node + 1]
+                while ptr < end:
+                    child = indices[ptr]
+                    ptr += 1
+                    if index[child] == -1:
+                        work[-1] = (node, ptr)
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        onStack[child] = 1
+                        work.append((child, indptr[child]))
+                        break
+                    if onStack[child] and index[child] < low[node]:
+                        low[node] = index[child]
+                else:
+                    # every edge of node was explored
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if low[node] < low[parent]:
+                            low[parent] = low[node]
+                    if low[node] == index[node]:
+                        while True:
+                            member = stack.pop()
+                            onStack[member] = 0
+                            labels[member] = componentCount
+                            if member == node:
+                                break
+                        componentCount += 1
+        return np.array(labels, dtype=np.int64), componentCount
+
+    def loopEdgeGroups(self):
+        """
+        Finds the loops of the directed network. Each strongly connected
+        component that has an edge inside it (more than one node, or a line
+        that starts and ends on the same node) is a loop.
+        :return: (list-of-np.ndarray) edge indexes of each loop.
+        """
+        if not len(self.lineIds):
+            return []
+        labels, _ = self.stronglyConnectedComponents()
+        startLabel = labels[self.startNode]
+        innerEdges = np.flatnonzero(startLabel == labels[self.endNode])
+        if not len(innerEdges):
+            return []
+        order = np.argsort(startLabel[innerEdges], kind='stable')
+        innerEdges, innerLabels = innerEdges[order], startLabel[innerEdges][order]
+        splitIdx = np.flatnonzero(np.diff(innerLabels)) + 1
+        return np.split(innerEdges, splitIdx)
+
+    def degreeTwoChains(self, edgeGroups, vertexCounts=None, maxVertexCount=None):
+        """
+        Finds the maximal chains of edges that go through nodes where exactly
+        two distinct edges of the same group meet. Every edge is on exactly
+        one chain; closed chains (rings) are also returned.
+        :param edgeGroups: (np.ndarray) int64 group of each edge. Edges with a
+            negative group are never chained;
+        :param vertexCounts: (np.ndarray) number of vertexes of each edge;
+        :param maxVertexCount: (int) maximum number of vertexes of a chain
+            once its edges are merged. Longer chains are split. If None or 0,
+            chains are not split.
+        :return: (list-of-list-of-int) edge indexes of each chain, in the
+            order they are connected.
+        """
+        edgeCount = self.edgeCount()
+        edgeGroups = np.asarray(edgeGroups, dtype=np.int64)
+        # links[e] holds the edge chained to e through its start and end nodes
+        links = np.full((edgeCount, 2), -1, dtype=np.int64)
+        passNodes = np.flatnonzero(np.diff(self.indptr) == 2)
+        first = self.edgeIds[self.indptr[passNodes]]
+        second = self.edgeIds[self.indptr[passNodes] + 1]
+        mask = (first != second) & (edgeGroups[first] >= 0) & \
+            (edgeGroups[first] == edgeGroups[second])
+        passNodes, first, second = passNodes[mask], first[mask], second[mask]
+        links[first, (self.startNode[first] != passNodes).astype(np.int64)] = second
+        links[second, (self.startNode[second] != passNodes).astype(np.int64)] = first
+        links = links.tolist()
+        visited = bytearray(edgeCount)
+        chainList = []
+
+        def walk(edge):
+            chain = [edge]
+            visited[edge] = 1
+            previous, current = edge, links[edge][0] if links[edge][0] != -1 else links[edge][1]
+            while current != -1 and not visited[current]:
+                chain.append(current)
+                visited[current] = 1
+                startLink, endLink = links[current]
+                previous, current = current, startLink if endLink == previous else endLink
+            return chain
+
+        # open chains start on an edge with a free end, rings anywhere
+        for edge in range(edgeCount):
+            if not visited[edge] and -1 in links[edge]:
+                chainList.append(walk(edge))
+        for edge in range(edgeCount):
+            if not visited[edge]:
+                chainList.append(walk(edge))
+        if not maxVertexCount or vertexCounts is None:
+            return chainList
+        return [
+            piece for chain in chainList
+            for piece in self.splitChain(chain, vertexCounts, maxVertexCount)
+        ]
+
+    def splitChain(self, chain, vertexCounts, maxVertexCount):
+        """
+        Splits chain so that no piece has more than maxVertexCount vertexes
+        once merged (consecutive edges share one vertex). An edge that alone
+        exceeds the limit is kept as a piece of its own.
+        :return: (list-of-list-of-int) pieces of the chain.
+        """
+        pieceList, piece, pieceCount = [], [], 0
+        for edge in chain:
+            edgeVertexCount = int(vertexCounts[edge])
+            if piece and pieceCount + edgeVertexCount - 1 > maxVertexCount:
+                pieceList.append(piece)
+                piece, pieceCount = [], 0
+            pieceCount += edgeVertexCount - 1 if piece else edgeVertexCount
+            piece.append(edge)
+        if piece:
+            pieceList.append(piece)
+        return pieceList
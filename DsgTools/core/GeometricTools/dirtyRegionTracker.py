@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import json
+import threading
+
+from qgis.core import (QgsFeatureRequest, QgsGeometry, QgsMapLayer,
+                       QgsProject, QgsRectangle)
+from qgis.PyQt.QtCore import QObject, QSettings, QThread, QTimer, pyqtSignal
+
+PROJECT_SCOPE = 'DSGTools'
+PROJECT_KEY = 'dirtyRegions/{0}'
+TRACKER_SETTINGS_KEY = 'DSGTools/incrementalValidation'
+
+
+class DirtyRegion(object):
+    """
+    Set of rectangles (in the layer CRS) where a layer was edited.
+    """
+    def __init__(self, rectList=None):
+        self.rectList = [] if rectList is None else rectList
+
+    def isEmpty(self):
+        return not self.rectList
+
+    def buffered(self, distance):
+        """
+        :param distance: (float) distance, in layer units.
+        :return: (DirtyRegion) region with every rectangle grown by distance.
+        """
+        return DirtyRegion([rect.buffered(distance) for rect in self.rectList])
+
+    def union(self, other):
+        """
+        :param other: (DirtyRegion) region in the same CRS.
+        :return: (DirtyRegion) region with the rectangles of both regions.
+        """
+        return DirtyRegion(self.rectList + other.rectList)
+
+    def transformed(self, coordinateTransform):
+        """
+        :param coordinateTransform: (QgsCoordinateTransform) transform from
+            the CRS of the region.
+        :return: (DirtyRegion) region with the bounding boxes of the
+            transformed rectangles.
+        """
+        return DirtyRegion([
+            coordinateTransform.transformBoundingBox(rect) for rect in self.rectList
+        ])
+
+    def intersects(self, geom):
+        """
+        :param geom: (QgsGeometry) geometry in the layer CRS.
+        :return: (bool) True if geom intersects any rectangle of the region.
+        """
+        bbox = geom.boundingBox()
+        return any(
+            rect.intersects(bbox) and geom.intersects(QgsGeometry.fromRect(rect))
+            for rect in self.rectList
+        )
+
+    def featureIds(self, lyr, onlySelected=False):
+        """
+        Ids of the features of lyr that intersect the region.
+        :return: (set-of-int) feature ids.
+        """
+        selectedIds = set(lyr.selectedFeatureIds()) if onlySelected else None
+        featIdSet = set()
+        for rect in self.rectList:
+            request = QgsFeatureRequest().setFilterRect(rect).setNoAttributes()
+            request.setFlags(request.flags() | QgsFeatureRequest.ExactIntersect)
+            for feat in lyr.getFeatures(request):
+                if selectedIds is None or feat.id() in selectedIds:
+                    featIdSet.add(feat.id())
+        return featIdSet
+
+
+class LayerDirtyState(object):
+    """
+    Edited rectangles of a layer, each one tagged with an increasing serial
+    number, and the last serial number each algorithm has validated.
+    """
+    maxRectangles = 256
+
+    def __init__(self, serial=0, rectList=None, checkpointDict=None):
+        self.serial = serial
+        # list of [serial, xmin, ymin, xmax, ymax]
+        self.rectList = [] if rectList is None else rectList
+        self.checkpointDict = dict() if checkpointDict is None else checkpointDict
+
+    @classmethod
+    def fromJson(cls, jsonString):
+        stateDict = json.loads(jsonString)
+        return cls(
+            serial=stateDict.get('serial', 0),
+            rectList=stateDict.get('rectangles', []),
+            checkpointDict=stateDict.get('checkpoints', dict())
+        )
+
+    def toJson(self):
+        return json.dumps({
+            'serial': self.serial,
+            'rectangles': self.rectList,
+            'checkpoints': self.checkpointDict
+        })
+
+    def addRectangle(self, rect):
+        """
+        Records an edited rectangle. When there are too many rectangles, the
+        new one is merged into the rectangle that grows the least.
+        """
+        self.serial += 1
+        newItem = [self.serial, rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum()]
+        if len(self.rectList) < self.maxRectangles:
+            self.rectList.append(newItem)
+            return
+
+        def growth(item):
+            _, xmin, ymin, xmax, ymax = item
+            merged = (max(xmax, newItem[3]) - min(xmin, newItem[1])) * \
+                (max(ymax, newItem[4]) - min(ymin, newItem[2]))
+            return merged - (xmax - xmin) * (ymax - ymin)
+        item = min(self.rectList, key=growth)
+        item[:] = [
+            self.serial,
+            min(item[1], newItem[1]),
+            min(item[2], newItem[2]),
+            max(item[3], newItem[3]),
+            max(item[4], newItem[4])
+        ]
+
+    def regionSince(self, serial):
+        return DirtyRegion([
+            QgsRectangle(xmin, ymin, xmax, ymax)
+            for itemSerial, xmin, ymin, xmax, ymax in self.rectList
+            if itemSerial > serial
+        ])
+
+    def prune(self):
+        """
+        Drops the rectangles already validated by every algorithm.
+        """
+        if not self.checkpointDict:
+            return
+        minCheckpoint = min(self.checkpointDict.values())
+        self.rectList = [item for item in self.rectList if item[0] > minCheckpoint]
+
+
+class DirtyRegionTracker(QObject):
+    """
+    Tracks the regions edited on each vector layer of the project, so that
+    validation algorithms may revalidate only what changed since their last
+    run. Edit buffer signals give the old and new extents of each edit and
+    the committed signals catch the changes written to the provider. The
+    old extents are read from the provider in batches: the ids of the edited
+    features are queued and read with a single request when control returns
+    to the event loop, before the edits are committed or before the state
+    of the layer is read. The state of each layer is stored as a project
+    entry when the project is written, so it survives saving and reopening
+    the project.
+
+    Tracking is only started when the incremental validation mode is
+    enabled on QSettings under TRACKER_SETTINGS_KEY.
+    """
+    # emitted with the layer id. The project entry of the layer is marked
+    # to be written on the thread of the tracker (the main thread), as
+    # checkpoints are set from the processing worker threads
+    stateChanged = pyqtSignal(str)
+
+    def __init__(self):
+        super(DirtyRegionTracker, self).__init__()
+        self.stateChanged.connect(self.markLayerState)
+        self.stateDict = dict()
+        self.trackedLayerDict = dict()
+        # layer id: set of ids of features whose provider geometry is dirty
+        self.pendingDict = dict()
+        self.unsavedLayerIds = set()
+        self.flushScheduled = False
+        self._lock = threading.Lock()
+        self.project = None
+
+    @staticmethod
+    def isEnabled():
+        return QSettings().value(TRACKER_SETTINGS_KEY, False, type=bool)
+
+    def isRunning(self):
+        return self.project is not None
+
+    def start(self, project=None):
+        """
+        Starts tracking every vector layer of project (and the ones added
+        later).
+        """
+        self.project = QgsProject.instance() if project is None else project
+        self.project.layersAdded.connect(self.trackLayers)
+        self.project.readProject.connect(self.reloadProject)
+        self.project.cleared.connect(self.reloadProject)
+        self.project.writeProject.connect(self.writeProjectStates)
+        self.trackLayers(self.project.mapLayers().values())
+
+    def stop(self):
+        if self.project is None:
+            return
+        self.flushPending()
+        self.writeProjectStates()
+        self.project.layersAdded.disconnect(self.trackLayers)
+        self.project.readProject.disconnect(self.reloadProject)
+        self.project.cleared.disconnect(self.reloadProject)
+        self.project.writeProject.disconnect(self.writeProjectStates)
+        for lyr, connectionList in self.trackedLayerDict.values():
+            for signal, slot in connectionList:
+                try:
+                    signal.disconnect(slot)
+                except TypeError:
+                    pass
+        self.trackedLayerDict.clear()
+        self.stateDict.clear()
+        self.project = None
+
+    def reloadProject(self, *args):
+        with self._lock:
+            self.stateDict.clear()
+            self.pendingDict.clear()
+            self.unsavedLayerIds.clear()
+
+    def trackLayers(self, layerList):
+        for lyr in layerList:
+            if lyr.type() == QgsMapLayer.VectorLayer and lyr.isSpatial():
+                self.trackLayer(lyr)
+
+    def trackLayer(self, lyr):
+        layerId = lyr.id()
+        if layerId in self.trackedLayerDict:
+            return
+        onGeometryChanged = lambda fid, geom: self.geometryChanged(lyr, fid, geom)
+        onFeatureAdded = lambda fid: self.featureAdded(lyr, fid)
+        onFeatureDeleted = lambda fid: self.featureDeleted(lyr, fid)
+        onCommittedGeometries = lambda _, geometryMap: self.addGeometries(
+            lyr, geometryMap.values())
+        onCommittedFeatures = lambda _, featureList: self.addGeometries(
+            lyr, [feat.geometry() for feat in featureList])
+        onBeforeCommit = lambda: self.flushLayer(lyr)
+        onWillBeDeleted = lambda: self.forgetLayer(layerId)
+        connectionList = [
+            (lyr.geometryChanged, onGeometryChanged),
+            (lyr.featureAdded, onFeatureAdded),
+            (lyr.featureDeleted, onFeatureDeleted),
+            (lyr.beforeCommitChanges, onBeforeCommit),
+            (lyr.committedGeometriesChanges, onCommittedGeometries),
+            (lyr.committedFeaturesAdded, onCommittedFeatures),
+            (lyr.willBeDeleted, onWillBeDeleted),
+        ]
+        for signal, slot in connectionList:
+            signal.connect(slot)
+        self.trackedLayerDict[layerId] = (lyr, connectionList)
+
+    def forgetLayer(self, layerId):
+        self.trackedLayerDict.pop(layerId, None)
+        with self._lock:
+            self.pendingDict.pop(layerId, None)
+
+    def providerGeometries(self, lyr, fidList):
+        """
+        Geometries of fidList as stored on the provider, i.e., before the
+        edits of the edit buffer, read with a single request.
+        """
+        if not fidList or lyr.dataProvider() is None:
+            return []
+        request = QgsFeatureRequest().setFilterFids(fidList).setNoAttributes()
+        return [feat.geometry() for feat in lyr.dataProvider().getFeatures(request)]
+
+    def queueProviderGeometry(self, lyr, fid):
+        """
+        Queues the provider geometry of fid to be added to the dirty region
+        of lyr. Features added on the edit buffer are not on the provider,
+        so they are not queued.
+        """
+        if fid < 0:
+            return
+        if QThread.currentThread() is not self.thread():
+            # edits made out of the main thread are read at once
+            self.addGeometries(lyr, self.providerGeometries(lyr, [fid]))
+            return
+        with self._lock:
+            self.pendingDict.setdefault(lyr.id(), set()).add(fid)
+        if not self.flushScheduled:
+            self.flushScheduled = True
+            QTimer.singleShot(0, self.flushPending)
+
+    def flushLayer(self, lyr):
+        """
+        Reads the queued provider geometries of lyr. It must be called on
+        the main thread.
+        """
+        with self._lock:
+            fidSet = self.pendingDict.pop(lyr.id(), None)
+        if fidSet:
+            self.addGeometries(lyr, self.providerGeometries(lyr, list(fidSet)))
+
+    def flushPending(self):
+        self.flushScheduled = False
+        with self._lock:
+            layerIdList = list(self.pendingDict)
+        for layerId in layerIdList:
+            item = self.trackedLayerDict.get(layerId)
+            if item is None:
+                with self._lock:
+                    self.pendingDict.pop(layerId, None)
+                continue
+            self.flushLayer(item[0])
+
+    def flushBeforeRead(self, lyr):
+        """
+        Reads the queued provider geometries of lyr before its state is
+        read, when called from the main thread. Worker threads only run
+        after the event loop, and therefore the scheduled flush, had the
+        chance to run.
+        """
+        if QThread.currentThread() is self.thread():
+            self.flushLayer(lyr)
+
+    def geometryChanged(self, lyr, fid, geom):
+        self.queueProviderGeometry(lyr, fid)
+        self.addGeometries(lyr, [geom])
+
+    def featureAdded(self, lyr, fid):
+        feat = lyr.getFeature(fid)
+        self.addGeometries(lyr, [feat.geometry()])
+
+    def featureDeleted(self, lyr, fid):
+        self.queueProviderGeometry(lyr, fid)
+
+    def addGeometries(self, lyr, geomList):
+        rectList = [
+            geom.boundingBox() for geom in geomList
+            if geom is not None and not geom.isNull() and not geom.isEmpty()
+        ]
+        if not rectList:
+            return
+        with self._lock:
+            state = self.layerState(lyr)
+            for rect in rectList:
+                state.addRectangle(rect)
+            self.saveLayerState(lyr, state)
+
+    def layerState(self, lyr):
+        """
+        Gets the dirty state of lyr, reading it from the project on first
+        access. Must be called with the lock held.
+        """
+        state = self.stateDict.get(lyr.id())
+        if state is not None:
+            return state
+        project = QgsProject.instance() if self.project is None else self.project
+        jsonString, found = project.readEntry(PROJECT_SCOPE, PROJECT_KEY.format(lyr.id()), '')
+        state = LayerDirtyState.fromJson(jsonString) if found and jsonString else LayerDirtyState()
+        self.stateDict[lyr.id()] = state
+        return state
+
+    def saveLayerState(self, lyr, state):
+        self.stateChanged.emit(lyr.id())
+
+    def markLayerState(self, layerId):
+        self.unsavedLayerIds.add(layerId)
+
+    def writeProjectStates(self, *args):
+        """
+        Stores the changed layer states on the project, as it is written.
+        Writing them does not mark the project as modified.
+        """
+        project = QgsProject.instance() if self.project is None else self.project
+        with self._lock:
+            jsonDict = {
+                layerId: self.stateDict[layerId].toJson()
+                for layerId in self.unsavedLayerIds if layerId in self.stateDict
+            }
+            self.unsavedLayerIds.clear()
+        if not jsonDict:
+            return
+        wasDirty = project.isDirty()
+        for layerId, jsonString in jsonDict.items():
+            project.writeEntry(PROJECT_SCOPE, PROJECT_KEY.format(layerId), jsonString)
+        if not wasDirty:
+            project.setDirty(False)
+
+    def isTracked(self, lyr):
+        """
+        Edits are only recorded for the vector layers of the project.
+        """
+        return lyr.id() in self.trackedLayerDict
+
+    def currentSerial(self, lyr):
+        self.flushBeforeRead(lyr)
+        with self._lock:
+            return self.layerState(lyr).serial
+
+    def checkpoint(self, lyr, key):
+        """
+        :param lyr: (QgsVectorLayer) validated layer;
+        :param key: (str) id of the validation (e.g. the algorithm name).
+        :return: (int) serial of the last validated edit or None, if the
+            validation was never run on lyr.
+        """
+        self.flushBeforeRead(lyr)
+        with self._lock:
+            return self.layerState(lyr).checkpointDict.get(key)
+
+    def dirtyRegion(self, lyr, key):
+        """
+        :return: (DirtyRegion) region edited since the last run of the
+            validation identified by key, or None if it was never run.
+        """
+        self.flushBeforeRead(lyr)
+        with self._lock:
+            state = self.layerState(lyr)
+            if key not in state.checkpointDict:
+                return None
+            return state.regionSince(state.checkpointDict[key])
+
+    def setCheckpoint(self, lyr, key, serial):
+        """
+        Marks every edit up to serial as validated by key.
+        """
+        with self._lock:
+            state = self.layerState(lyr)
+            if state.checkpointDict.get(key) == serial:
+                return
+            state.checkpointDict[key] = serial
+            state.prune()
+            self.saveLayerState(lyr, state)
+
+
+dirtyRegionTracker = DirtyRegionTracker()
@@ -34,7 +34,7 @@ from qgis.PyQt.Qt import QObject, QVariant
 from .geometryHandler import GeometryHandler
 from .attributeHandler import AttributeHandler
 from DsgTools.core.Utils.FrameTools.map_index import UtmGrid
-import concurrent.futures
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 
 
 class FeatureHandler(QObject):
@@ -204,41 +204,41 @@ class FeatureHandler(QObject):
             donutHoleList.append(newFeat)
         return outershellList, donutHoleList
 
-    def mergeLineFeatures(self, featList, lyr, idsToRemove, networkDict, parameterDict=None, feedback=None):
+    def mergeLineFeatures(self, chainList, lyr, geometryDict, parameterDict=None, feedback=None):
+        """
+        Merges each chain of lines into the line of the chain with the lowest
+        id, so that its id, primary key and attributes are kept.
+        :param chainList: (list-of-list-of-int) ids of connected lines, in
+            the order they are connected;
+        :param lyr: (QgsVectorLayer) layer in edit mode;
+        :param geometryDict: (dict) {featId: QgsGeometry} of every chained line;
+        :param parameterDict: (dict) destination parameters of lyr;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (list-of-int) ids of the lines that were merged into another
+            one and must be deleted.
+        """
         parameterDict = {} if parameterDict is None else parameterDict
-        changeDict = dict()
-        size = 100 / len(featList)
-        for current, feat_a in enumerate(featList):
-            if feedback:
-                if feedback.isCanceled():
-                    break
-            id_a = feat_a.id()
-            if id_a in idsToRemove:
+        idsToRemove = []
+        size = 100 / len(chainList) if chainList else 0
+        for current, chain in enumerate(chainList):
+            if feedback is not None and feedback.isCanceled():
+                break
+            mergedGeom = QgsGeometry.collectGeometry(
+                [geometryDict[featId] for featId in chain]).mergeLines()
+            # a chain always merges into a single line; skip it otherwise
+            if mergedGeom.isNull() or mergedGeom.constGet().partCount() != 1:
                 continue
-            for feat_b in featList:
-                if feedback:
-                    if feedback.isCanceled():
-                        break
-                id_b = feat_b.id()
-                if id_a == id_b or id_b in idsToRemove:
-                    continue
-                geom_a = feat_a.geometry()
-                geom_b = feat_b.geometry()
-                if geom_a.touches(geom_b):
-                    intersectionPoint = geom_a.intersection(geom_b)
-                    for pointPart in intersectionPoint.asGeometryCollection():
-                        point = pointPart.asPoint()
-                        if (point in networkDict and len(networkDict[point]) == 2):
-                            newGeom = self.geometryHandler.handleGeometry(geom_a.combine(geom_b).mergeLines(
-                            ), parameterDict)[0]  # only one candidate is possible because features are touching
-                            feat_a.setGeometry(newGeom)
-                            lyr.updateFeature(feat_a)
-                            idsToRemove.append(id_b)
-                            # changeDict[id_a] = newGeom
-            if feedback:
-                feedback.setProgress(size*current)
-        # for id, geom in changeDict.items():
-        #     lyr.changeGeometry(id, geom)
+            newGeomList = self.geometryHandler.handleGeometry(mergedGeom, parameterDict)
+            if len(newGeomList) != 1:
+                continue
+            # the lowest id survives, as when features were merged in
+            # iteration order
+            keptId = min(chain)
+            lyr.changeGeometry(keptId, newGeomList[0])
+            idsToRemove.extend(featId for featId in chain if featId != keptId)
+            if feedback is not None:
+                feedback.setProgress(size * current)
+        return idsToRemove
 
     def getNewGridFeat(self, index, geom, fields):
         feat = QgsFeature(fields)
@@ -338,7 +338,8 @@ class FeatureHandler(QObject):
             xSubdivisions=3,
             ySubdivisions=3,
             feedback=None,
-            predicate=None
+            predicate=None,
+            cacheStore=None
         ):
         """
         TODO: Progress
@@ -351,7 +352,8 @@ class FeatureHandler(QObject):
         multiStepFeedback.pushInfo(self.tr('Creating spatial index'))
         spatialIdx, idDict = self.buildSpatialIndexAndIdDict(
             inputLyr,
-            feedback=multiStepFeedback
+            feedback=multiStepFeedback,
+            cacheStore=cacheStore
         )
         multiStepFeedback.pushInfo(self.tr('Getting candidate start indexes'))
         xmin, ymin, xmax, ymax = self.getLyrUnprojectedGeographicBounds(
@@ -385,31 +387,31 @@ class FeatureHandler(QObject):
                 constraintDict=constraintDict,
                 feedback=gridMultistepFeedback
             )
-        pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count())
-        futures = []
-        current_idx = 0
-        for inomen in inomenList:
-            # gridMultistepFeedback.setCurrentStep(i)
-            if gridMultistepFeedback.isCanceled():
-                break
-            futures.append(
-                pool.submit(compute, inomen)
-            )
-
-        for x in concurrent.futures.as_completed(futures):
+        executor = BoundedChunkExecutor(
+            maxWorkers=os.cpu_count(),
+            chunkSize=1,
+            feedback=gridMultistepFeedback
+        )
+        for current_idx, _ in enumerate(executor.map(compute, inomenList)):
             if gridMultistepFeedback.isCanceled():
                 break
             gridMultistepFeedback.setCurrentStep(current_idx)
-            current_idx += 1
 
     def buildSpatialIndexAndIdDict(self, inputLyr, feedback=None,
-                                   featureRequest=None):
+                                   featureRequest=None, cacheStore=None):
         """
         creates a spatial index for the input layer
         :param inputLyr: (QgsVectorLayer) input layer;
         :param feedback: (QgsProcessingFeedback) processing feedback;
         :param featureRequest: (QgsFeatureRequest) optional feature request;
+        :param cacheStore: (GeometryCacheStore) if given (and there is no
+            feature request), the index is taken from the geometries cached
+            on the store. In this case, the features from idDict only carry
+            their geometries.
         """
+        if cacheStore is not None and featureRequest is None:
+            geometryCache = cacheStore.getLayerCache(inputLyr, feedback=feedback)
+            return geometryCache.spatialIndex(), geometryCache.idDict()
         spatialIdx = QgsSpatialIndex()
         idDict = {}
         featCount = inputLyr.featureCount()
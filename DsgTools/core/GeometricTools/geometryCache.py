@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import threading
+from collections.abc import Mapping
+from itertools import count
+
+import numpy as np
+
+from qgis.core import (QgsFeature, QgsFeatureRequest, QgsGeometry,
+                       QgsRectangle, QgsSpatialIndex)
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import Qt
+
+
+class LayerGeometryCache(object):
+    """
+    Columnar snapshot of the geometries of a layer. Only what spatial
+    searches need is kept: feature ids, bounding boxes and WKB blobs.
+    Attributes are never fetched from the provider.
+    """
+    def __init__(self, ids, bboxes, wkbList, stateKey=None):
+        """
+        :param ids: (np.ndarray) int64 array of feature ids;
+        :param bboxes: (np.ndarray) float64 array of shape (n, 4) in the
+            form (xmin, ymin, xmax, ymax);
+        :param wkbList: (list-of-bytes) WKB of each feature, in the same
+            order as ids;
+        :param stateKey: (tuple) layer state the snapshot was taken from.
+        """
+        self.ids = ids
+        self.bboxes = bboxes
+        self.wkbList = wkbList
+        self.stateKey = stateKey
+        self.rowDict = {fid: row for row, fid in enumerate(ids.tolist())}
+        self._spatialIdx = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fromLayer(cls, inputLyr, feedback=None, stateKey=None):
+        """
+        Reads every geometry of inputLyr once, without attributes.
+        :param inputLyr: (QgsVectorLayer) input layer;
+        :param feedback: (QgsProcessingFeedback) processing feedback;
+        :param stateKey: (tuple) layer state key to be stored on the cache.
+        :return: (LayerGeometryCache) filled cache.
+        """
+        featCount = inputLyr.featureCount()
+        size = 100/featCount if featCount else 0
+        request = QgsFeatureRequest().setNoAttributes()
+        ids, bboxList, wkbList = [], [], []
+        for current, feat in enumerate(inputLyr.getFeatures(request)):
+            if feedback is not None and feedback.isCanceled():
+                break
+            geom = feat.geometry()
+            bbox = geom.boundingBox()
+            ids.append(feat.id())
+            bboxList.append(
+                (bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum())
+            )
+            wkbList.append(bytes(geom.asWkb()))
+            if feedback is not None:
+                feedback.setProgress(size * current)
+        return cls(
+            np.array(ids, dtype=np.int64),
+            np.array(bboxList, dtype=np.float64).reshape(-1, 4),
+            wkbList,
+            stateKey=stateKey
+        )
+
+    def __len__(self):
+        return len(self.wkbList)
+
+    def __contains__(self, fid):
+        return fid in self.rowDict
+
+    def geometry(self, fid):
+        """
+        Builds a new QgsGeometry for the given feature id.
+        """
+        geom = QgsGeometry()
+        geom.fromWkb(self.wkbList[self.rowDict[fid]])
+        return geom
+
+    def feature(self, fid):
+        """
+        Builds a geometry-only QgsFeature for the given feature id.
+        """
+        feat = QgsFeature(fid)
+        feat.setGeometry(self.geometry(fid))
+        return feat
+
+    def boundingBox(self, fid):
+        return QgsRectangle(*self.bboxes[self.rowDict[fid]])
+
+    def spatialIndex(self):
+        """
+        Spatial index built from the cached bounding boxes. It is built only
+        once and shared by every caller; QgsSpatialIndex is safe for
+        concurrent reads.
+        """
+        with self._lock:
+            if self._spatialIdx is None:
+                spatialIdx = QgsSpatialIndex()
+                for fid, bbox in zip(self.ids.tolist(), self.bboxes.tolist()):
+                    spatialIdx.addFeature(fid, QgsRectangle(*bbox))
+                self._spatialIdx = spatialIdx
+        return self._spatialIdx
+
+    def idDict(self):
+        """
+        Returns a read-only mapping {featId: QgsFeature} whose features are
+        built on access and carry only the geometry.
+        """
+        return GeometryOnlyFeatureDict(self)
+
+    def intersectingRows(self, xmin, ymin, xmax, ymax):
+        """
+        Vectorized bounding box test against every cached feature.
+        :return: (np.ndarray) rows whose bounding boxes intersect the
+            given rectangle.
+        """
+        bboxes = self.bboxes
+        mask = (bboxes[:, 0] <= xmax) & (bboxes[:, 2] >= xmin) & \
+            (bboxes[:, 1] <= ymax) & (bboxes[:, 3] >= ymin)
+        return np.flatnonzero(mask)
+
+
+class GeometryOnlyFeatureDict(Mapping):
+    """
+    Dict-like view of a LayerGeometryCache, used as the idDict returned by
+    LayerHandler.buildSpatialIndexAndIdDict when the cache is used.
+    """
+    def __init__(self, geometryCache):
+        self.geometryCache = geometryCache
+
+    def __getitem__(self, fid):
+        if fid not in self.geometryCache:
+            raise KeyError(fid)
+        return self.geometryCache.feature(fid)
+
+    def __iter__(self):
+        return iter(self.geometryCache.ids.tolist())
+
+    def __len__(self):
+        return len(self.geometryCache)
+
+
+class GeometryCacheStore(object):
+    """
+    Store of LayerGeometryCache objects, keyed by the layer id and the layer
+    modification state. A store is passed explicitly to every step that
+    should share the cached layers. Algorithms get the store of their
+    processing context from geometryCacheStoreForContext, so that every
+    algorithm of a model run shares it.
+    """
+    def __init__(self):
+        self.cacheDict = dict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def getLayerCache(self, inputLyr, feedback=None):
+        """
+        Gets the cached geometries of inputLyr, reading the layer only if it
+        is not cached yet or if it was modified since it was cached.
+        """
+        stateKey = layerStateKey(inputLyr)
+        with self._lock:
+            geometryCache = self.cacheDict.get(inputLyr.id())
+            if geometryCache is not None and geometryCache.stateKey == stateKey:
+                self.hits += 1
+                return geometryCache
+            self.misses += 1
+            geometryCache = LayerGeometryCache.fromLayer(
+                inputLyr, feedback=feedback, stateKey=stateKey)
+            if feedback is None or not feedback.isCanceled():
+                self.cacheDict[inputLyr.id()] = geometryCache
+            return geometryCache
+
+    def invalidate(self, layerId=None):
+        with self._lock:
+            if layerId is None:
+                self.cacheDict.clear()
+            else:
+                self.cacheDict.pop(layerId, None)
+
+
+class GeometryCacheStoreRegistry(object):
+    """
+    Geometry cache stores scoped to a processing run. Every algorithm run
+    with the same QgsProcessingContext (e.g. the child algorithms of a
+    model) gets the same store. A store is dropped when the context is
+    destroyed or when it is released explicitly.
+    """
+    def __init__(self):
+        # address of the C++ context: GeometryCacheStore
+        self.storeDict = dict()
+        self._lock = threading.Lock()
+
+    def contextKey(self, context):
+        """
+        The Python wrapper of a context may be renewed between the runs of
+        the algorithms of a model, so the wrapped object is used as key.
+        """
+        return sip.unwrapinstance(context)
+
+    def storeForContext(self, context):
+        """
+        Gets the store of context, creating it on the first call.
+        :param context: (QgsProcessingContext) processing context. If None,
+            a store that is not shared is returned.
+        :return: (GeometryCacheStore) store of the context.
+        """
+        if context is None:
+            return GeometryCacheStore()
+        key = self.contextKey(context)
+        with self._lock:
+            store = self.storeDict.get(key)
+            if store is not None:
+                return store
+            store = GeometryCacheStore()
+            self.storeDict[key] = store
+        # the temporary layer store is a QObject owned by the context
+        context.temporaryLayerStore().destroyed.connect(
+            lambda: self.releaseKey(key), Qt.DirectConnection)
+        return store
+
+    def releaseContext(self, context):
+        """
+        Drops the store of context, if any. Meant to be called when a run
+        that owns the context ends.
+        """
+        self.releaseKey(self.contextKey(context))
+
+    def releaseKey(self, key):
+        with self._lock:
+            self.storeDict.pop(key, None)
+
+
+geometryCacheStoreRegistry = GeometryCacheStoreRegistry()
+
+
+def geometryCacheStoreForContext(context):
+    """
+    Shortcut to geometryCacheStoreRegistry.storeForContext.
+    """
+    return geometryCacheStoreRegistry.storeForContext(context)
+
+
+class LayerGenerationRegistry(object):
+    """
+    Counts the data changes of the layers read by the geometry caches. Each
+    layer gets a generation number, unique among every layer ever seen, that
+    is renewed by its dataChanged signal. The signals are disconnected when
+    the layer is deleted.
+    """
+    def __init__(self):
+        self.layerGenerationDict = dict()
+        # layer id: list of (signal, slot) connected to the layer
+        self.connectionDict = dict()
+        self.generationCounter = count()
+        self._lock = threading.Lock()
+
+    def layerGeneration(self, inputLyr):
+        """
+        Generation of inputLyr data. The counter is updated by the layer's
+        dataChanged signal, that is emitted on edit buffer changes, commits
+        and rollbacks.
+        """
+        layerId = inputLyr.id()
+        with self._lock:
+            if layerId in self.layerGenerationDict:
+                return self.layerGenerationDict[layerId]
+            self.layerGenerationDict[layerId] = next(self.generationCounter)
+            connectionList = [
+                (inputLyr.dataChanged, lambda: self.bumpGeneration(layerId)),
+                (inputLyr.willBeDeleted, lambda: self.forgetLayer(layerId)),
+            ]
+            self.connectionDict[layerId] = connectionList
+        for signal, slot in connectionList:
+            signal.connect(slot, Qt.DirectConnection)
+        return self.layerGenerationDict[layerId]
+
+    def bumpGeneration(self, layerId):
+        with self._lock:
+            if layerId in self.layerGenerationDict:
+                self.layerGenerationDict[layerId] = next(self.generationCounter)
+
+    def forgetLayer(self, layerId):
+        with self._lock:
+            self.layerGenerationDict.pop(layerId, None)
+            connectionList = self.connectionDict.pop(layerId, [])
+        for signal, slot in connectionList:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass
+
+
+layerGenerationRegistry = LayerGenerationRegistry()
+
+
+def layerStateKey(inputLyr):
+    """
+    Key that changes whenever the data read from inputLyr would change.
+    """
+    provider = inputLyr.dataProvider()
+    return (
+        inputLyr.id(),
+        provider.dataSourceUri() if provider is not None else '',
+        inputLyr.subsetString(),
+        inputLyr.featureCount(),
+        layerGenerationRegistry.layerGeneration(inputLyr)
+    )
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import concurrent.futures
+import multiprocessing
+import multiprocessing.spawn
+import os
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+import numpy as np
+
+from qgis.core import QgsGeometry, QgsRectangle, QgsSpatialIndex
+from qgis.PyQt.QtCore import QSettings
+
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
+
+from .geometryCache import LayerGeometryCache
+
+BACKEND_SETTINGS_KEY = 'DSGTools/geometryExecutionBackend'
+
+
+class GeometryReference(object):
+    """
+    Picklable set of reference geometries (the layer that the evaluated
+    geometries are compared against). Only plain arrays and WKB blobs are
+    shipped to the workers; the spatial index, the QgsGeometry objects and
+    their prepared engines are built lazily on the side that uses them.
+    """
+    def __init__(self, ids, bboxes, wkbList):
+        self.ids = ids
+        self.bboxes = bboxes
+        self.wkbList = wkbList
+        self._spatialIdx = None
+        self._geomDict = None
+        self._engineDict = dict()
+        self._engineLock = threading.Lock()
+
+    @classmethod
+    def fromLayer(cls, inputLyr, feedback=None):
+        geometryCache = LayerGeometryCache.fromLayer(inputLyr, feedback=feedback)
+        return cls.fromGeometryCache(geometryCache)
+
+    @classmethod
+    def fromGeometryCache(cls, geometryCache):
+        return cls(geometryCache.ids, geometryCache.bboxes, geometryCache.wkbList)
+
+    def __getstate__(self):
+        return {'ids': self.ids, 'bboxes': self.bboxes, 'wkbList': self.wkbList}
+
+    def __setstate__(self, state):
+        self.__init__(state['ids'], state['bboxes'], state['wkbList'])
+
+    def prepare(self):
+        """
+        Builds the spatial index and the geometries. Must be called before
+        sharing the reference among threads.
+        """
+        if self._spatialIdx is not None:
+            return
+        spatialIdx = QgsSpatialIndex()
+        geomDict = dict()
+        for fid, bbox, wkb in zip(self.ids.tolist(), self.bboxes.tolist(), self.wkbList):
+            geom = QgsGeometry()
+            geom.fromWkb(wkb)
+            geomDict[fid] = geom
+            spatialIdx.addFeature(fid, QgsRectangle(*bbox))
+        self._geomDict = geomDict
+        self._spatialIdx = spatialIdx
+
+    def candidates(self, bbox):
+        """
+        :param bbox: (QgsRectangle) search rectangle.
+        :return: (list-of-QgsGeometry) reference geometries whose bounding
+            boxes intersect bbox.
+        """
+        self.prepare()
+        return [self._geomDict[fid] for fid in self._spatialIdx.intersects(bbox)]
+
+    def engine(self, fid):
+        """
+        Prepared geometry engine of a reference geometry. Engines are built
+        on first use and shared afterwards.
+        :param fid: (int) id of the reference geometry.
+        :return: (QgsGeometryEngine) prepared engine.
+        """
+        engine = self._engineDict.get(fid)
+        if engine is not None:
+            return engine
+        with self._engineLock:
+            engine = self._engineDict.get(fid)
+            if engine is None:
+                engine = QgsGeometry.createGeometryEngine(self._geomDict[fid].constGet())
+                engine.prepareGeometry()
+                self._engineDict[fid] = engine
+        return engine
+
+    def candidateEngines(self, bbox):
+        """
+        :param bbox: (QgsRectangle) search rectangle.
+        :return: (list-of-QgsGeometryEngine) prepared engines of the reference
+            geometries whose bounding boxes intersect bbox.
+        """
+        self.prepare()
+        return [self.engine(fid) for fid in self._spatialIdx.intersects(bbox)]
+
+
+def undershootOperation(geom, reference, searchRadius):
+    """
+    Flags geom when it is near (but not on) a reference segment.
+    :return: (bytes) WKB of the flagged geometry or None.
+    """
+    bbox = geom.buffer(searchRadius, -1).boundingBox()
+    for refGeom in reference.candidates(bbox):
+        if not geom.intersects(refGeom.buffer(searchRadius, -1)):
+            continue
+        if geom.distance(refGeom) > 10**-9:
+            return bytes(geom.asWkb())
+    return None
+
+
+def dangleCountOperation(geom, reference, searchRadius, ignoreDanglesOnUnsegmentedLines=False):
+    """
+    Counts the reference lines that are within searchRadius of the point
+    geom and the ones that actually touch it (or intersect it, when
+    ignoreDanglesOnUnsegmentedLines is True). No buffer is built: candidates
+    come from the point bounding box grown by searchRadius and are tested
+    with the distance of their prepared engines.
+    :return: (tuple) (bufferCount, intersectCount).
+    """
+    point = geom.constGet()
+    bbox = geom.boundingBox()
+    bbox.grow(searchRadius)
+    bufferCount, intersectCount = 0, 0
+    for engine in reference.candidateEngines(bbox):
+        if engine.distance(point) > searchRadius:
+            continue
+        bufferCount += 1
+        if ignoreDanglesOnUnsegmentedLines:
+            intersectCount += 1 if engine.intersects(point) else 0
+        else:
+            intersectCount += 1 if engine.touches(point) else 0
+    return bufferCount, intersectCount
+
+
+GEOMETRY_OPERATIONS = {
+    'undershoot': undershootOperation,
+    'dangle_count': dangleCountOperation,
+}
+
+# reference set on each worker process by its initializer
+_workerReference = None
+
+
+def _initWorker(reference):
+    global _workerReference
+    reference.prepare()
+    _workerReference = reference
+
+
+def evaluateGeometry(operationName, params, reference, item):
+    """
+    Runs an operation from GEOMETRY_OPERATIONS on one geometry.
+    :param operationName: (str) key of GEOMETRY_OPERATIONS;
+    :param params: (dict) keyword arguments of the operation;
+    :param reference: (GeometryReference) reference geometries. If None,
+        the one installed on the worker process is used;
+    :param item: (tuple) (id, wkb) of the evaluated geometry.
+    :return: (tuple) (id, result).
+    """
+    reference = _workerReference if reference is None else reference
+    id_, wkb = item
+    geom = QgsGeometry()
+    geom.fromWkb(wkb)
+    return id_, GEOMETRY_OPERATIONS[operationName](geom, reference, **params)
+
+
+class ThreadGeometryBackend(object):
+    """
+    Runs the geometry operations on a thread pool of the current process.
+    This is the historical behaviour of the validation algorithms.
+    """
+    name = 'thread'
+
+    def __init__(self, maxWorkers=None, chunkSize=256):
+        self.maxWorkers = max(1, os.cpu_count()-1) if maxWorkers is None else maxWorkers
+        self.chunkSize = chunkSize
+
+    def buildExecutor(self, reference, feedback=None):
+        reference.prepare()
+        return BoundedChunkExecutor(
+            maxWorkers=self.maxWorkers,
+            chunkSize=self.chunkSize,
+            feedback=feedback
+        )
+
+    def evaluationFunction(self, operationName, params, reference):
+        return partial(evaluateGeometry, operationName, params, reference)
+
+    def run(self, operationName, ids, wkbList, reference, params=None, feedback=None):
+        """
+        Evaluates operationName on every geometry.
+        :param operationName: (str) key of GEOMETRY_OPERATIONS;
+        :param ids: (iterable) ids of the evaluated geometries;
+        :param wkbList: (list-of-bytes) WKB of the evaluated geometries;
+        :param reference: (GeometryReference) reference geometries;
+        :param params: (dict) keyword arguments of the operation;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (dict) {id: result} for each result that is not None.
+        """
+        params = dict() if params is None else params
+        ids = np.asarray(ids).tolist()
+        outputDict = dict()
+        if not ids:
+            return outputDict
+        executor = self.buildExecutor(reference, feedback=feedback)
+        func = self.evaluationFunction(operationName, params, reference)
+        for id_, result in executor.map(func, zip(ids, wkbList), total=len(ids)):
+            if result is not None:
+                outputDict[id_] = result
+        return outputDict
+
+
+class ProcessGeometryBackend(ThreadGeometryBackend):
+    """
+    Runs the geometry operations on worker processes, so that GEOS calls are
+    not serialized by the GIL. The reference geometries are sent once to
+    each worker and chunks of WKB are sent per task.
+    """
+    name = 'process'
+
+    def buildExecutor(self, reference, feedback=None):
+        # the worker interpreter is set by run, while the pool is alive
+        mpContext = multiprocessing.get_context('spawn')
+        return BoundedChunkExecutor(
+            maxWorkers=self.maxWorkers,
+            chunkSize=self.chunkSize,
+            feedback=feedback,
+            executorClass=concurrent.futures.ProcessPoolExecutor,
+            executorKwargs={
+                'mp_context': mpContext,
+                'initializer': _initWorker,
+                'initargs': (reference,)
+            }
+        )
+
+    def evaluationFunction(self, operationName, params, reference):
+        # the reference is already installed on the workers
+        return partial(evaluateGeometry, operationName, params, None)
+
+    def run(self, operationName, ids, wkbList, reference, params=None, feedback=None):
+        # workers are spawned on demand, so the executable is kept until the pool shuts down
+        with spawnExecutable():
+            return super(ProcessGeometryBackend, self).run(
+                operationName, ids, wkbList, reference, params=params, feedback=feedback)
+
+
+GEOMETRY_BACKENDS = {
+    ThreadGeometryBackend.name: ThreadGeometryBackend,
+    ProcessGeometryBackend.name: ProcessGeometryBackend,
+}
+
+
+def pythonExecutable():
+    """
+    Inside QGIS sys.executable is the QGIS binary, not a python interpreter,
+    so the worker processes must be started with the interpreter QGIS uses.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    candidates = [
+        os.path.join(sys.exec_prefix, 'python.exe'),
+        os.path.join(sys.exec_prefix, 'python3.exe'),
+        os.path.join(sys.exec_prefix, 'bin', 'python3'),
+    ]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return shutil.which('python3') or sys.executable
+
+
+@contextmanager
+def spawnExecutable(executable=None):
+    """
+    Makes the spawn start method run executable while the block runs.
+    multiprocessing keeps a single executable for the whole process (the
+    set_executable of a spawn context sets it as well), so the previous one
+    is restored on exit and QGIS or other plugins are not affected.
+    :param executable: (str) python interpreter. Defaults to pythonExecutable();
+    :return: (multiprocessing.context.SpawnContext) spawn context.
+    """
+    previous = multiprocessing.spawn.get_executable()
+    multiprocessing.spawn.set_executable(pythonExecutable() if executable is None else executable)
+    try:
+        yield multiprocessing.get_context('spawn')
+    finally:
+        multiprocessing.spawn.set_executable(previous)
+
+
+def getGeometryExecutionBackend(name=None, maxWorkers=None):
+    """
+    Instantiates a geometry execution backend.
+    :param name: (str) 'thread' or 'process'. If not given, the value stored
+        on QSettings under BACKEND_SETTINGS_KEY is used (default 'thread').
+    :param maxWorkers: (int) number of workers.
+    :return: (ThreadGeometryBackend) backend instance.
+    """
+    if name is None:
+        name = QSettings().value(BACKEND_SETTINGS_KEY, ThreadGeometryBackend.name)
+    if name not in GEOMETRY_BACKENDS:
+        raise ValueError('Unknown geometry execution backend: {0}'.format(name))
+    return GEOMETRY_BACKENDS[name](maxWorkers=maxWorkers)
@@ -696,6 +696,46 @@ class GeometryHandler(QObject):
         elif n:
             return n[0], n[-1]
 
+    def normalizeGeometry(self, geom, gridSize=None):
+        """
+        Builds a canonical copy of geom, so that equal geometries written with
+        a different ring orientation, start vertex, line direction or part
+        order get the same WKB.
+        :param geom: (QgsGeometry) geometry to be normalized;
+        :param gridSize: (float) if given, vertices are snapped to a grid of
+            this size before normalizing.
+        :return: (QgsGeometry) normalized geometry.
+        """
+        normalized = QgsGeometry(geom)
+        if gridSize:
+            normalized = normalized.snappedToGrid(gridSize, gridSize)
+        if normalized.isNull() or normalized.isEmpty():
+            return normalized
+        if normalized.type() == QgsWkbTypes.LineGeometry:
+            normalized = self.normalizeLineDirection(normalized)
+        normalized.normalize()
+        return normalized
+
+    def normalizeLineDirection(self, geom):
+        """
+        Reverses each open line part whose last vertex is lower than its
+        first one (ordering by x, then y). Closed parts are handled by
+        QgsGeometry.normalize.
+        """
+        def _isReversed(curve):
+            if curve.isClosed() or curve.nCoordinates() < 2:
+                return False
+            first, last = curve.startPoint(), curve.endPoint()
+            return (last.x(), last.y()) < (first.x(), first.y())
+        abstractGeom = geom.constGet()
+        if not geom.isMultipart():
+            return QgsGeometry(abstractGeom.reversed()) if _isReversed(abstractGeom) else geom
+        collection = abstractGeom.createEmptyWithSameType()
+        for i in range(abstractGeom.numGeometries()):
+            part = abstractGeom.geometryN(i)
+            collection.addGeometry(part.reversed() if _isReversed(part) else part.clone())
+        return QgsGeometry(collection)
+
     def multiToSinglePart(self, geom):
         """
         Converts a multipart geometry to a list of single part.
@@ -23,26 +23,30 @@
 
 from collections import defaultdict
 import copy
+import hashlib
 from functools import partial
-from itertools import combinations
-import os
 
-from processing.tools import dataobjects
+import numpy as np
 
-import concurrent.futures
+from processing.tools import dataobjects
 
 from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 from DsgTools.core.Utils.FrameTools.map_index import UtmGrid
 from qgis.analysis import QgsGeometrySnapper, QgsInternalGeometrySnapper
 from qgis.core import (edit, Qgis, QgsCoordinateReferenceSystem, QgsCoordinateTransform,
-                       QgsExpression, QgsFeature, QgsFeatureRequest, QgsField, QgsFields, QgsGeometry, QgsMessageLog,
-                       QgsProcessingContext, QgsProcessingMultiStepFeedback, QgsProcessingUtils, QgsProject,
+                       QgsExpression, QgsFeature, QgsFeatureRequest, QgsField, QgsFields, QgsGeometry, QgsLineString,
+                       QgsMessageLog, QgsPoint, QgsProcessingContext, QgsProcessingMultiStepFeedback, QgsProcessingUtils, QgsProject,
                        QgsSpatialIndex, QgsVectorDataProvider, QgsVectorLayer, QgsVectorLayerUtils, QgsWkbTypes,
                        QgsProcessingFeatureSourceDefinition, QgsFeatureSink)
 from qgis.PyQt.Qt import QObject, QVariant
 
 from .featureHandler import FeatureHandler
+from .geometryCache import geometryCacheStoreForContext
 from .geometryHandler import GeometryHandler
+from .compactNetwork import CompactNetwork
+from .lineEndPoints import LineEndPoints
+from .vertexArrays import layerVertexArrays, vertexNearSegmentPairs
 
 
 class LayerHandler(QObject):
@@ -367,13 +371,9 @@ class LayerHandler(QObject):
         idsToRemove, featuresToAdd = set(), set()
         lyr.startEditing()
         lyr.beginEditCommand('Updating layer {0}'.format(lyr.name()))
-        localTotal = 100/len(inputDict) if inputDict else 0
-        futures = set()
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()-1)
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
         def evaluate(id_, featDict):
             idsToRemove, featuresToAdd, geometriesToChange = set(), set(), set()
-            if multiStepFeedback.isCanceled():
+            if feedback is not None and feedback.isCanceled():
                 return idsToRemove, featuresToAdd, geometriesToChange
             outFeats = featDict['featList']
             if len(outFeats) == 0:
@@ -393,71 +393,102 @@ class LayerHandler(QObject):
             featuresToAdd = set(addedFeatures)
             return idsToRemove, featuresToAdd, geometriesToChange
 
-        multiStepFeedback.setCurrentStep(0)
-        multiStepFeedback.pushInfo(self.tr("Submitting tasks to thread..."))
-        for current, (id_, featDict) in enumerate(inputDict.items()):
-            if feedback is not None and feedback.isCanceled():
-                return
-            futures.add(pool.submit(evaluate, id_, featDict))
-            if feedback is not None:
-                feedback.setProgress(localTotal*current)
-        multiStepFeedback.setCurrentStep(1)
-        multiStepFeedback.pushInfo(self.tr("Evaluating results..."))
         changeGeometryLambda = lambda x: lyr.changeGeometry(x[0], x[1], skipDefaultValue=True)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if feedback is not None and feedback.isCanceled():
-                return
-            deletedIds, addedFeatures, geometriesToChange = future.result()
+        executor = BoundedChunkExecutor(feedback=feedback)
+        for deletedIds, addedFeatures, geometriesToChange in executor.map(
+            lambda x: evaluate(*x), inputDict.items(), total=len(inputDict)):
             list(map(changeGeometryLambda, geometriesToChange))
             featuresToAdd = featuresToAdd.union(addedFeatures)
             idsToRemove = idsToRemove.union(deletedIds)
-            if feedback is not None:
-                feedback.setProgress(localTotal*current)
+        if feedback is not None and feedback.isCanceled():
+            return
         lyr.addFeatures(list(featuresToAdd))
         if not keepFeatures:
             lyr.deleteFeatures(list(idsToRemove))
         lyr.endEditCommand()
 
-    def mergeLinesOnLayer(self, lyr, onlySelected=False, feedback=None, ignoreVirtualFields=True, attributeBlackList=None, excludePrimaryKeys=True):
-        attributeBlackList = [] if attributeBlackList is None else attributeBlackList
-        if feedback:
-            localFeedback = QgsProcessingMultiStepFeedback(3, feedback)
-            localFeedback.setCurrentStep(0)
-        # build attribute dict
-        attributeFeatDict = self.buildAttributeFeatureDict(
-            lyr, onlySelected=onlySelected, feedback=localFeedback, attributeBlackList=attributeBlackList)
-
-        # build network dict
-        if feedback:
-            localFeedback.setCurrentStep(1)
-        networkDict = self.buildInitialAndEndPointDict(
-            lyr, onlySelected=onlySelected, feedback=localFeedback)
-
+    def mergeLinesOnLayer(self, lyr, onlySelected=False, feedback=None, ignoreVirtualFields=True, attributeBlackList=None, excludePrimaryKeys=True, maxVertexCount=None):
+        """
+        Merges the lines of lyr that have the same attributes. Lines are
+        chained through the nodes where exactly two lines meet, both single
+        part and with the same attributes, and each maximal chain becomes one
+        feature. Chains are found on the end point graph, so the run time is
+        linear on the number of lines.
+        :param lyr: (QgsVectorLayer) line layer;
+        :param onlySelected: (bool) if True, only selected lines are merged
+            and only them are considered when counting lines on a node;
+        :param feedback: (QgsProcessingFeedback) processing feedback;
+        :param ignoreVirtualFields: (bool) ignores virtual fields on the
+            attribute comparison;
+        :param attributeBlackList: (list-of-str) fields ignored on the
+            attribute comparison;
+        :param excludePrimaryKeys: (bool) ignores primary key fields on the
+            attribute comparison;
+        :param maxVertexCount: (int) maximum number of vertexes of a merged
+            line. Longer chains are split into several features. If None or
+            0, chains are not split.
+        """
+        multiStepFeedback = QgsProcessingMultiStepFeedback(
+            3, feedback) if feedback is not None else None
+        if multiStepFeedback is not None:
+            multiStepFeedback.setCurrentStep(0)
+        columns = self.getAttributesFromBlackList(
+            lyr,
+            attributeBlackList=attributeBlackList,
+            ignoreVirtualFields=ignoreVirtualFields,
+            excludePrimaryKeys=excludePrimaryKeys
+        )
+        iterator, featCount = self.getFeatureList(lyr, onlySelected=onlySelected)
+        groupDict, featGroupDict, geometryDict = dict(), dict(), dict()
+        def _storeFeatures(iterator):
+            for feat in iterator:
+                geometryDict[feat.id()] = feat.geometry()
+                featGroupDict[feat.id()] = groupDict.setdefault(
+                    self.getAttributeKey(feat, columns), len(groupDict))
+                yield feat
+        endPoints = LineEndPoints.fromFeatures(
+            _storeFeatures(iterator), feedback=multiStepFeedback, total=featCount)
+        if multiStepFeedback is not None:
+            if multiStepFeedback.isCanceled():
+                return
+            multiStepFeedback.setCurrentStep(1)
+        network = CompactNetwork(
+            endPoints.featIds,
+            endPoints.startNode,
+            endPoints.endNode,
+            endPoints.nodeCount()
+        )
+        lineIds = network.lineIds.tolist()
+        # multi part lines keep their nodes, but are never chained
+        _, partIdx, partCounts = np.unique(
+            network.lineIds, return_inverse=True, return_counts=True)
+        edgeGroups = np.array(
+            [featGroupDict[lineId] for lineId in lineIds], dtype=np.int64)
+        edgeGroups[partCounts[partIdx.reshape(-1)] > 1] = -1
+        vertexCounts = np.array(
+            [geometryDict[lineId].constGet().nCoordinates() for lineId in lineIds],
+            dtype=np.int64
+        )
+        chainList = [
+            [lineIds[edge] for edge in chain]
+            for chain in network.degreeTwoChains(
+                edgeGroups, vertexCounts=vertexCounts, maxVertexCount=maxVertexCount)
+            if len(chain) > 1
+        ]
+        if multiStepFeedback is not None:
+            if multiStepFeedback.isCanceled():
+                return
+            multiStepFeedback.setCurrentStep(2)
         parameterDict = self.getDestinationParameters(lyr)
-
-        idsToRemove = []
-        if feedback:
-            localFeedback.setCurrentStep(2)
-            localTotal = 100/(len(attributeFeatDict)
-                              ) if len(attributeFeatDict) != 0 else 0
-            mergeFeedback = QgsProcessingMultiStepFeedback(
-                len(attributeFeatDict), localFeedback)
         lyr.startEditing()
         lyr.beginEditCommand(self.tr('Merging Lines'))
-
-        for current, (key, featList) in enumerate(attributeFeatDict.items()):
-            if feedback:
-                if feedback.isCanceled():
-                    break
-                mergeFeedback.setCurrentStep(current)
-            self.featureHandler.mergeLineFeatures(
-                featList=featList,
-                lyr=lyr,
-                idsToRemove=idsToRemove,
-                parameterDict=parameterDict,
-                feedback=mergeFeedback,
-                networkDict=networkDict
-            )
+        idsToRemove = self.featureHandler.mergeLineFeatures(
+            chainList=chainList,
+            lyr=lyr,
+            geometryDict=geometryDict,
+            parameterDict=parameterDict,
+            feedback=multiStepFeedback
+        )
         lyr.deleteFeatures(idsToRemove)
         lyr.endEditCommand()
 
@@ -484,8 +515,29 @@ class LayerHandler(QObject):
         ) not in typeBlackList and field.name() not in attributeBlackList]
         return columns
 
+    def getAttributeKey(self, feat, columns):
+        """
+        Builds a hashable key with the values of columns on feat. NULL
+        values are turned into None and unhashable values (e.g. lists and
+        maps) into their string representation.
+        :param feat: (QgsFeature) feature;
+        :param columns: (list-of-str) field names.
+        :return: (tuple) attribute key.
+        """
+        attrKey = []
+        for column in columns:
+            value = feat[column]
+            if isinstance(value, QVariant):
+                value = None if value.isNull() else value.value()
+            try:
+                hash(value)
+            except TypeError:
+                value = '{}'.format(value)
+            attrKey.append(value)
+        return tuple(attrKey)
+
     def appendFeatOnAttrsDict(self, inputDict, feat, columns):
-        attrKey = ','.join(['{}'.format(feat[column]) for column in columns])
+        attrKey = self.getAttributeKey(feat, columns)
         if attrKey not in inputDict:
             inputDict[attrKey] = []
         inputDict[attrKey].append(feat)
@@ -493,159 +545,147 @@ class LayerHandler(QObject):
     def buildInitialAndEndPointDict(self, lyr, onlySelected=False, feedback=None, addFeatureToList=False, recordStepProgress=True):
         """
         Calculates initial point and end point from each line from lyr.
+        :return: (dict) {QgsPointXY: -list of feature ids (or features, if
+            addFeatureToList is True) that start or end on the point-}
         """
-        # start and end points dict
         endVerticesDict = dict()
-        # iterating over features to store start and end points
-        iterator = lyr.getFeatures() if not onlySelected else lyr.getSelectedFeatures()
-        if recordStepProgress:
-            featCount = lyr.featureCount() if not onlySelected else lyr.selectedFeatureCount()
-            if featCount == 0:
-                return endVerticesDict
-            size = 100 / featCount
-        for current, feat in enumerate(iterator):
-            if feedback is not None and feedback.isCanceled():
-                break
-            geom = feat.geometry()
-            lineList = geom.asMultiPolyline() if geom.isMultipart() else [
-                geom.asPolyline()]
-            for line in lineList:
-                self.addFeatToDict(
-                    endVerticesDict=endVerticesDict,
-                    line=line,
-                    item=feat if addFeatureToList else feat.id()
-                )
-            if feedback is not None and recordStepProgress:
-                feedback.setProgress(size*current)
+        if addFeatureToList:
+            iterator, featCount = self.getFeatureList(lyr, onlySelected=onlySelected)
+            featDict = dict()
+            def _storeFeatures(iterator):
+                for feat in iterator:
+                    featDict[feat.id()] = feat
+                    yield feat
+            endPoints = LineEndPoints.fromFeatures(
+                _storeFeatures(iterator),
+                feedback=feedback if recordStepProgress else None,
+                total=featCount
+            )
+        else:
+            endPoints = LineEndPoints.fromLayer(
+                lyr,
+                onlySelected=onlySelected,
+                feedback=feedback if recordStepProgress else None
+            )
+        if feedback is not None and feedback.isCanceled():
+            return endVerticesDict
+        for nodeIdx, idArray in enumerate(endPoints.featureIdsByNode()):
+            idList = idArray.tolist()
+            endVerticesDict[endPoints.nodePoint(nodeIdx)] = [
+                featDict[featId] for featId in idList] if addFeatureToList else idList
         return endVerticesDict
 
-    def getDuplicatedFeaturesDict(self, lyr, onlySelected=False, attributeBlackList=None, ignoreVirtualFields=True, excludePrimaryKeys=True, useAttributes=False, feedback=None):
-        """
-        returns geomDict = {
-            'bbox_geom' : {geomKey : -list of duplicated feats-}
-        }
+    def getDuplicatedFeaturesDict(self, lyr, onlySelected=False, attributeBlackList=None, ignoreVirtualFields=True, excludePrimaryKeys=True, useAttributes=False, gridSize=None, feedback=None):
+        """
+        Finds the features of lyr that have the same normalized geometry (see
+        searchDuplicatedFeatures).
+        :param lyr: (QgsVectorLayer) input layer;
+        :param onlySelected: (bool) if True, only selected features are used;
+        :param attributeBlackList: (list-of-str) fields ignored on the
+            attribute comparison;
+        :param ignoreVirtualFields: (bool) ignores virtual fields on the
+            attribute comparison;
+        :param excludePrimaryKeys: (bool) ignores primary key fields on the
+            attribute comparison;
+        :param useAttributes: (bool) if True, features are duplicated only if
+            they also have the same attribute values;
+        :param gridSize: (float) if given, geometries are snapped to a grid of
+            this size before being compared;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (dict) {geomWkb : -list of duplicated feats-}
         """
-        geomDict = dict()
         isMulti = QgsWkbTypes.isMultiType(int(lyr.wkbType()))
         iterator, featCount = self.getFeatureList(
             lyr, onlySelected=onlySelected, returnIterator=True)
-        size = 100/featCount if featCount else 0
         columns = self.getAttributesFromBlackList(
             lyr, attributeBlackList=attributeBlackList, ignoreVirtualFields=ignoreVirtualFields, excludePrimaryKeys=excludePrimaryKeys)
-        multiStepFeedback = QgsProcessingMultiStepFeedback(
-            2, feedback) if feedback else None
-        multiStepFeedback.setCurrentStep(0)
-        # builds bounding box dict to do a geos comparison for each feat in list
-        bbDict = self.getFeaturesWithSameBoundingBox(
-            iterator, isMulti, featCount, columns=columns, feedback=feedback)
-        multiStepFeedback.setCurrentStep(1)
-        for current, (key, featList) in enumerate(bbDict.items()):
-            if feedback is not None and feedback.isCanceled():
-                break
-            if len(featList) > 1:
-                duplicatedDict = self.searchDuplicatedFeatures(
-                    featList, columns=columns, useAttributes=useAttributes)
-                geomDict.update(duplicatedDict)
-            if feedback is not None:
-                feedback.setProgress(size * current)
-        return geomDict
+        if feedback is not None:
+            feedback.setProgressText(self.tr("Building duplicated search structure..."))
+        entries = self.getNormalizedGeometryEntries(
+            iterator, isMulti, featCount, gridSize=gridSize, feedback=feedback)
+        return self.searchDuplicatedFeatures(
+            entries, columns=columns, useAttributes=useAttributes, feedback=feedback)
 
-    def getFeaturesWithSameBoundingBox(self, iterator, isMulti, size, columns=None, feedback=None):
+    def getNormalizedGeometryEntries(self, iterator, isMulti, size, gridSize=None, feedback=None):
         """
-        Iterates over iterator and gets 
+        Normalizes the geometries of the features of iterator on a thread pool.
+        :return: (generator) {'geom', 'feat', 'normalizedWkb'} for each
+            feature, in the same order of iterator.
         """
-        bbDict = defaultdict(list)
-        if feedback is not None:
-            feedback.setProgressText(self.tr("Building duplicated search structure..."))
-        def _buildBBDictEntry(feat, columns):
-            if feedback.isCanceled():
-                return
+        def _buildEntry(feat):
+            if feedback is not None and feedback.isCanceled():
+                return None
             geom = feat.geometry()
             if isMulti and not geom.isMultipart():
                 geom.convertToMultiType()
-            geomBB_key = geom.boundingBox().asWktPolygon()
-            attrKey = ','.join(['{}'.format(feat[column])
-                                for column in columns]) if columns is not None else ''
-            return (geomBB_key, {'geom': geom, 'feat': feat, 'attrKey': attrKey})
-        futures = set()
-        pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count()-1)
-        func = lambda x: _buildBBDictEntry(x, columns)
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback) if feedback is not None else None
-        multiStepFeedback.setCurrentStep(0)
-        multiStepFeedback.pushInfo(self.tr("Submitting tasks to thread"))
-        for feat in iterator:
+            normalizedGeom = self.geometryHandler.normalizeGeometry(geom, gridSize=gridSize)
+            return {
+                'geom': geom,
+                'feat': feat,
+                'normalizedWkb': bytes(normalizedGeom.asWkb())
+            }
+        executor = BoundedChunkExecutor(feedback=feedback)
+        for entry in executor.map(lambda x: _buildEntry(QgsFeature(x)), iterator, ordered=True, total=size):
+            if entry is not None:
+                yield entry
+
+    def searchDuplicatedFeatures(self, featList, columns=None, useAttributes=False, gridSize=None, feedback=None):
+        """
+        Groups the features by a hash of their normalized WKB (and of their
+        attribute values, when useAttributes is True). Exact equality is only
+        checked among features that share the same hash, so the search is
+        linear on the number of features.
+        Geometries are duplicated only if their normalized WKB is the same.
+        Unlike QgsGeometry.isGeosEqual, topologically equal geometries with
+        different vertices (e.g. an extra vertex on a straight segment) are
+        not duplicated; gridSize may be used to absorb coordinate noise.
+        :param featList: (iterable) {'geom': geom, 'feat': feat} dicts. The
+            'normalizedWkb' key is computed when missing;
+        :param columns: (list-of-str) fields compared when useAttributes is
+            True;
+        :param useAttributes: (bool) folds the attribute values on the key;
+        :param gridSize: (float) grid used to normalize the geometries that do
+            not have 'normalizedWkb';
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (dict) {geomWkb : -list of duplicated feats-}. When
+            useAttributes is True, keys are (geomWkb, attribute values).
+        """
+        columns = [] if columns is None else columns
+        hashDict = defaultdict(list)
+        for entry in featList:
             if feedback is not None and feedback.isCanceled():
                 break
-            futures.add(pool.submit(func, QgsFeature(feat)))
-        multiStepFeedback.setCurrentStep(1)
-        multiStepFeedback.pushInfo(self.tr("Evaluating results"))
-        for current, x in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback is not None and multiStepFeedback.isCanceled():
-                break
-            key, value = x.result()
-            bbDict[key].append(value)
-            if multiStepFeedback is not None:
-                multiStepFeedback.setProgress(size * current)
-        return bbDict
-        # """
-        # Iterates over iterator and gets 
-        # """
-        # bbDict = defaultdict(list)
-        # for current, feat in enumerate(iterator):
-        #     if feedback is not None and feedback.isCanceled():
-        #         break
-        #     geom = feat.geometry()
-        #     if isMulti and not geom.isMultipart():
-        #         geom.convertToMultiType()
-        #     geomKey = geom.asWkb()
-        #     geomBB_key = geom.boundingBox().asWktPolygon()
-        #     attrKey = ','.join(['{}'.format(feat[column])
-        #                         for column in columns]) if columns is not None else ''
-        #     bbDict[geomBB_key].append(
-        #         {'geom': geom, 'feat': feat, 'attrKey': attrKey})
-        #     if feedback is not None:
-        #         feedback.setProgress(size * current)
-        # return bbDict
-
-    def searchDuplicatedFeatures(self, featList, columns, useAttributes=False):
-        """
-        featList = list of {'geom': geom, 'feat':feat}
-        returns {geomKey : -list of duplicated feats-}
-        """
+            normalizedWkb = entry.get('normalizedWkb')
+            if normalizedWkb is None:
+                normalizedWkb = bytes(
+                    self.geometryHandler.normalizeGeometry(
+                        entry['geom'], gridSize=gridSize).asWkb()
+                )
+            attrKey = tuple('{}'.format(entry['feat'][column])
+                            for column in columns) if useAttributes else tuple()
+            key = hashlib.blake2b(normalizedWkb, digest_size=16).digest()
+            # each hash keeps the groups of really equal geometries, so that
+            # collisions are solved by comparing the normalized WKB
+            for group in hashDict[key]:
+                if group['normalizedWkb'] == normalizedWkb and group['attrKey'] == attrKey:
+                    group['featList'].append(entry['feat'])
+                    break
+            else:
+                hashDict[key].append({
+                    'normalizedWkb': normalizedWkb,
+                    'attrKey': attrKey,
+                    'geomWkb': entry['geom'].asWkb(),
+                    'featList': [entry['feat']]
+                })
         duplicatedDict = dict()
-        if featList:
-            fields = [f.name() for f in featList[0]['feat'].fields()]
-        for dict_feat1, dict_feat2 in combinations(featList, 2):
-            geom1 = dict_feat1['geom']
-            geom2 = dict_feat2['geom']
-            feat1 = dict_feat1['feat']
-            feat2 = dict_feat2['feat']
-            wkb1 = geom1.asWkb()
-            wkb2 = geom2.asWkb()
-            if not geom1.isGeosEqual(geom2):
-                continue
-            elif useAttributes:
-                # do things to check attributes
-                try:
-                    for attr in fields:
-                        if attr not in columns:
-                            continue
-                        elif feat1[attr] != feat2[attr]:
-                            raise Exception('Skip outter loop')
-                except:
+        for groupList in hashDict.values():
+            for group in groupList:
+                if len(group['featList']) < 2:
                     continue
-            if wkb1 in duplicatedDict:
-                duplicatedDict[wkb1].append(feat2)
-            elif wkb2 in duplicatedDict:
-                duplicatedDict[wkb2].append(feat1)
-            else:
-                duplicatedDict[wkb1] = [feat1, feat2]
+                key = (group['geomWkb'], group['attrKey']) if useAttributes else group['geomWkb']
+                duplicatedDict[key] = group['featList']
         return duplicatedDict
 
-    def addFeatToDict(self, endVerticesDict, line, item):
-        self.addPointToDict(line[0], endVerticesDict, item)
-        self.addPointToDict(line[len(line) - 1], endVerticesDict, item)
-
     def addPointToDict(self, point, pointDict, item):
         if point not in pointDict:
             pointDict[point] = []
@@ -788,7 +828,7 @@ class LayerHandler(QObject):
         )
         return pointList
 
-    def filterDangles(self, lyr, searchRadius, feedback=None):
+    def filterDangles(self, lyr, searchRadius, feedback=None, cacheStore=None):
         deleteSet = set()
         if feedback is not None:
             multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
@@ -796,7 +836,7 @@ class LayerHandler(QObject):
         else:
             multiStepFeedback = None
         spatialIdx, idDict = self.buildSpatialIndexAndIdDict(
-            lyr, feedback=multiStepFeedback)
+            lyr, feedback=multiStepFeedback, cacheStore=cacheStore)
         if multiStepFeedback is not None:
             multiStepFeedback.setCurrentStep(1)
         featSize = len(idDict)
@@ -820,13 +860,21 @@ class LayerHandler(QObject):
         lyr.deleteFeatures(list(deleteSet))
         lyr.commitChanges()
 
-    def buildSpatialIndexAndIdDict(self, inputLyr, feedback=None, featureRequest=None):
+    def buildSpatialIndexAndIdDict(self, inputLyr, feedback=None, featureRequest=None, cacheStore=None):
         """
         creates a spatial index for the input layer
         :param inputLyr: (QgsVectorLayer) input layer;
         :param feedback: (QgsProcessingFeedback) processing feedback;
         :param featureRequest: (QgsFeatureRequest) optional feature request;
-        """
+        :param cacheStore: (GeometryCacheStore) if given (and there is no
+            feature request), the index is taken from the geometries cached
+            on the store, which are shared by every caller of the same
+            store. In this case, the features from idDict only carry their
+            geometries.
+        """
+        if cacheStore is not None and featureRequest is None:
+            geometryCache = cacheStore.getLayerCache(inputLyr, feedback=feedback)
+            return geometryCache.spatialIndex(), geometryCache.idDict()
         spatialIdx = QgsSpatialIndex()
         idDict = {}
         featCount = inputLyr.featureCount()
@@ -948,7 +996,6 @@ class LayerHandler(QObject):
             inputLyr, onlySelected=onlySelected)
         if featCount == 0:
             return
-        size = 100/featCount
         deleteSet = set()
         inputLyr.startEditing()
         inputLyr.beginEditCommand('Snapping Features')
@@ -970,20 +1017,8 @@ class LayerHandler(QObject):
             if geom is None:
                 return featid
             return featid, outputGeom
-        futures = set()
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()-1)
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
-        multiStepFeedback.setCurrentStep(0)
-        for current, feat in enumerate(iterator):
-            if multiStepFeedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, feat))
-            multiStepFeedback.setProgress(current * size)
-        multiStepFeedback.setCurrentStep(1)
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if multiStepFeedback.isCanceled():
-                break
-            result = future.result()
+        executor = BoundedChunkExecutor(feedback=feedback)
+        for result in executor.map(evaluate, iterator, total=featCount):
             if result is None:
                 continue
             if isinstance(result, int):
@@ -991,8 +1026,6 @@ class LayerHandler(QObject):
                 continue
             featid, outputGeom = result
             inputLyr.changeGeometry(featid, outputGeom)
-            if multiStepFeedback is not None:
-                multiStepFeedback.setProgress(size * current)
         inputLyr.deleteFeatures(list(deleteSet))
         inputLyr.endEditCommand()
 
@@ -1075,13 +1108,6 @@ class LayerHandler(QObject):
     def identifyInvalidGeometries(self, iterator, featCount, inputLyr, ignoreClosed, fixInput, parameterDict, geometryType, feedback=None):
         flagDict = dict()
         newFeatSet = set()
-        stepSize = 100/featCount if featCount else 0
-        futures = set()
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()-1)
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback) if feedback is not None else None
-        if multiStepFeedback is not None:
-            multiStepFeedback.setCurrentStep(0)
-            multiStepFeedback.pushInfo(self.tr("Submitting tasks to thread..."))
         def evaluate(feat):
             _newFeatSet = set()
             geom = feat.geometry()
@@ -1090,19 +1116,8 @@ class LayerHandler(QObject):
             if fixInput:
                 self.fixGeometryFromInput(inputLyr, parameterDict, geometryType, _newFeatSet, feat, geom, id)
             return flagDict, _newFeatSet
-        for current, feat in enumerate(iterator):
-            if feedback is not None and feedback.isCanceled():
-                break
-            futures.add(pool.submit(evaluate, feat))
-            if feedback is not None:
-                feedback.setProgress(stepSize*current)
-        if multiStepFeedback is not None:
-            multiStepFeedback.setCurrentStep(1)
-            multiStepFeedback.pushInfo(self.tr("Evaluating results..."))
-        for current, future in enumerate(concurrent.futures.as_completed(futures)):
-            if feedback is not None and feedback.isCanceled():
-                break
-            output, _newFeatSet = future.result()
+        executor = BoundedChunkExecutor(feedback=feedback)
+        for output, _newFeatSet in executor.map(evaluate, iterator, total=featCount):
             if output:
                 for point, errorDict in output.items():
                     if point in flagDict:
@@ -1111,8 +1126,6 @@ class LayerHandler(QObject):
                         flagDict[point] = errorDict
             if _newFeatSet:
                 newFeatSet = newFeatSet.union(_newFeatSet)
-            if feedback is not None:
-                feedback.setProgress(stepSize*current)
         return flagDict, newFeatSet
 
     def checkGeomIsValid(self, geom, ignoreClosed, feedback=None):
@@ -1232,81 +1245,34 @@ class LayerHandler(QObject):
         :param onlySelected: (Boolean) If true, gets only selected layer
         :param tol: (float) search radius
         :param feedback (QgsProcessingFeedback) QGIS object to keep track of progress/cancelling option.
+        :return: (dict) flags by feature id, as in getVertexNearEdgeFlagDict.
         """
         if inputLyr.geometryType() == QgsWkbTypes.PointGeometry:
             raise Exception('Vertex near edge not defined for point geometry')
-        algRunner = AlgRunner() if algRunner is None else algRunner
-        context = dataobjects.createContext(
-            feedback=feedback) if context is None else context
-        multiStepFeedback = QgsProcessingMultiStepFeedback(3, feedback)
+        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
         multiStepFeedback.setCurrentStep(0)
-        multiStepFeedback.pushInfo(self.tr('Creating index'))
-        usedInput = inputLyr if not onlySelected else QgsProcessingFeatureSourceDefinition(
-            inputLyr.id(), True)
-        incrementedLayer = algRunner.runAddAutoIncrementalField(
-            usedInput,
-            context,
+        multiStepFeedback.pushInfo(self.tr('Reading vertexes and edges'))
+        vertexArray, featIndex, featIds, ringSizes = layerVertexArrays(
+            inputLyr,
+            onlySelected=onlySelected,
             feedback=multiStepFeedback
         )
         multiStepFeedback.setCurrentStep(1)
-        multiStepFeedback.pushInfo(
-            self.tr('Building auxiliar search structures'))
-        edgeSpatialIdx, edgeIdDict = self.buildEdgesAuxStructure(
-            incrementedLayer,
-            feedback=multiStepFeedback,
-            algRunner=algRunner,
-            context=context
-        )
-        multiStepFeedback.setCurrentStep(2)
         multiStepFeedback.pushInfo(self.tr('Getting flags'))
         vertexNearEdgeFlagDict = self.getVertexNearEdgeFlagDict(
-            incrementedLayer,
-            edgeSpatialIdx,
-            edgeIdDict,
+            vertexArray,
+            featIndex,
+            ringSizes,
             tol,
+            featIds=featIds,
+            hasZ=QgsWkbTypes.hasZ(inputLyr.wkbType()),
             feedback=multiStepFeedback,
-            algRunner=algRunner,
-            context=context,
             ignoreErrorsOnSameFeat=ignoreErrorsOnSameFeat
         )
         return vertexNearEdgeFlagDict
 
-    def buildEdgesAuxStructure(self, inputLyr, algRunner=None, feedback=None, context=None):
-        """
-        returns a spatialIndex of lines and a dict of the features
-        :param inputLyr: (QgsVectorLayer) layer to run build the aux structure.
-        :param feedback (QgsProcessingFeedback) QGIS object to keep track of progress/cancelling option.
-        """
-        nSteps = 3 if inputLyr.geometryType() == QgsWkbTypes.PolygonGeometry else 2
-        algRunner = AlgRunner() if algRunner is None else algRunner
-        context = dataobjects.createContext(
-            feedback=feedback) if context is None else context
-        multiStepFeedback = QgsProcessingMultiStepFeedback(nSteps, feedback)
-        currentStep = 0
-        multiStepFeedback.setCurrentStep(currentStep)
-        edgeLyr = inputLyr if inputLyr.geometryType() == QgsWkbTypes.LineGeometry \
-            else algRunner.runPolygonsToLines(
-            inputLyr,
-            context,
-            feedback=multiStepFeedback
-        )
-        currentStep += 1
-        multiStepFeedback.setCurrentStep(currentStep)
-        explodedEdges = algRunner.runExplodeLines(
-            edgeLyr,
-            context,
-            feedback=multiStepFeedback
-        )
-        currentStep += 1
-        multiStepFeedback.setCurrentStep(currentStep)
-        spatialIdx, idDict = self.buildSpatialIndexAndIdDict(
-            explodedEdges,
-            feedback=multiStepFeedback
-        )
-        return spatialIdx, idDict
-
-    def getVertexNearEdgeFlagDict(self, inputLyr, edgeSpatialIdx, edgeIdDict,
-                                  searchRadius, feedback=None, algRunner=None, context=None, ignoreErrorsOnSameFeat=False):
+    def getVertexNearEdgeFlagDict(self, vertexArray, featIndex, ringSizes, searchRadius,
+                                  featIds=None, hasZ=False, feedback=None, ignoreErrorsOnSameFeat=False):
         """
         returns a dict in the following format:
             {'featid':{
@@ -1317,56 +1283,46 @@ class LayerHandler(QObject):
 
             }
             } 
-        :param inputLyr: (QgsVectorLayer) layer to run build the aux structure.
-        :param edgeSpatialIdx: (QgsSpatialIndex) spatial index to perform the search
-        :param edgeIdDict: (dict) dictionary in the format {featid:QgsFeature}
+        featid is the id of the feature, taken from featIds. If featIds is
+        not given, it is the position of the feature in the reading order,
+        starting at 1.
+        :param vertexArray: (np.ndarray) (n, 4) vertexes, as read by layerVertexArrays;
+        :param featIndex: (np.ndarray) index of the feature of each vertex;
+        :param ringSizes: (list-of-int) number of vertexes of each line or ring;
         :param searchRadius: (float) search radius
+        :param featIds: (list-of-int) id of each feature, as read by layerVertexArrays;
+        :param hasZ: (bool) whether flags and edges keep the z of the vertexes;
         :param feedback (QgsProcessingFeedback) QGIS object to keep track of progress/cancelling option.
+        :param ignoreErrorsOnSameFeat: (bool) if True, edges of the feature of the vertex are not checked.
         """
         flagDict = defaultdict(lambda: defaultdict(lambda: {'edges': set()}))
-        algRunner = AlgRunner() if algRunner is None else algRunner
-        context = dataobjects.createContext(
-            feedback=feedback) if context is None else context
-        multiStepFeedback = QgsProcessingMultiStepFeedback(2, feedback)
-        # step 1: extract vertexes
-        multiStepFeedback.setCurrentStep(0)
-        vertexLyr = algRunner.runExtractVertices(
-            inputLyr,
-            context,
-            feedback=multiStepFeedback
-        )
-        # step 2: for each vertex, get the buffer, the buffer BoundingBox and
-        # assess wich edge intersects the buffer. If there is any, this is a flag
-        multiStepFeedback.setCurrentStep(1)
-        iterator, size = self.getFeatureList(
-            vertexLyr, returnIterator=True, onlySelected=False)
-        if size == 0:
+        if len(vertexArray) == 0:
             return {}
-        stepSize = 100/size
-        for current, pointFeat in enumerate(iterator):
-            if multiStepFeedback.isCanceled():
+        vertexIdx, segmentIdx = vertexNearSegmentPairs(
+            vertexArray[:, :2],
+            featIndex,
+            ringSizes,
+            searchRadius,
+            ignoreSameGroup=ignoreErrorsOnSameFeat,
+            feedback=feedback
+        )
+        pointFromRow = (lambda row: QgsPoint(*vertexArray[row, :3].tolist())) if hasZ \
+            else (lambda row: QgsPoint(*vertexArray[row, :2].tolist()))
+        edgeDict = dict()
+        for vertex, segment in zip(vertexIdx.tolist(), segmentIdx.tolist()):
+            if feedback is not None and feedback.isCanceled():
                 break
-            pointGeom = pointFeat.geometry()
-            buffer = pointGeom.buffer(searchRadius, -1)
-            bufferBB = buffer.boundingBox()
-            featId = pointFeat['featid']
+            pointGeom = QgsGeometry(pointFromRow(vertex))
             # pointWkt is used as a key because it is unique and hashable
             pointWkt = pointGeom.asWkt()
-            for candidateId in edgeSpatialIdx.intersects(bufferBB):
-                if multiStepFeedback.isCanceled():
-                    break
-                edgeGeom = edgeIdDict[candidateId].geometry()
-                # must ignore search within the same feature and
-                # must be with not adjacent edges
-                if pointGeom.touches(edgeGeom) or \
-                    (ignoreErrorsOnSameFeat and featId == edgeIdDict[candidateId]['featid'] and
-                        pointFeat['layer'] == edgeIdDict[candidateId]['layer']):
-                    continue
-                if buffer.intersects(edgeGeom):
-                    flagDict[featId][pointWkt]['flagGeom'] = pointGeom
-                    flagDict[featId][pointWkt]['edges'].add(edgeGeom)
-            # make progress
-            multiStepFeedback.setProgress(current * stepSize)
+            if segment not in edgeDict:
+                edgeDict[segment] = QgsGeometry(
+                    QgsLineString([pointFromRow(segment), pointFromRow(segment + 1)])
+                )
+            featId = int(featIndex[vertex]) + 1 if featIds is None \
+                else featIds[featIndex[vertex]]
+            flagDict[featId][pointWkt]['flagGeom'] = pointGeom
+            flagDict[featId][pointWkt]['edges'].add(edgeDict[segment])
         return flagDict
 
     def getUnsharedVertexOnSharedEdgesDict(self, inputLineLyrList, inputPolygonLyrList, searchRadius, onlySelected=False, feedback=None, context=None, algRunner=None):
@@ -1502,19 +1458,11 @@ class LayerHandler(QObject):
                     if not hasVertex:
                         return geomWkb
             return None
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()-1)
-        futures = set()
         vertexSet = set()
         for feat in pointsLyr.getFeatures():
-            # futures.add(pool.submit(compute, feat))
             result = compute(feat)
             if result is not None:
                 vertexSet.add(result)
-        # vertexSet = set(
-        #     future.result() for future in concurrent.futures.as_completed(
-        #         futures
-        #     ) if future.result() is not None
-        # )
         return vertexSet
 
     def getLinesLayerFromPolygonsAndLinesLayers(self, inputLineLyrList, inputPolygonLyrList, algRunner=None, onlySelected=False, feedback=None, context=None):
@@ -1635,7 +1583,8 @@ class LayerHandler(QObject):
             self.tr('Building auxiliar search structures'))
         constraintSpatialIdx, constraintIdDict = self.buildSpatialIndexAndIdDict(
             linesLyr,
-            feedback=multiStepFeedback
+            feedback=multiStepFeedback,
+            cacheStore=geometryCacheStoreForContext(context)
         )
         multiStepFeedback.setCurrentStep(2)
         edgeLyr = algRunner.runPolygonsToLines(
@@ -1905,7 +1854,8 @@ class LayerHandler(QObject):
             constraintPolygonLyrSpatialIdx, constraintPolygonLyrIdDict = \
             self.buildSpatialIndexAndIdDict(
                 constraintPolygonLyr,
-                feedback=multiStepFeedback
+                feedback=multiStepFeedback,
+                cacheStore=geometryCacheStoreForContext(context)
             )
             currentStep += 1
         else: 
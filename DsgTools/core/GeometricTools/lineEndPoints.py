@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import numpy as np
+
+from qgis.core import QgsFeatureRequest, QgsPointXY
+
+
+def quantizeCoordinates(coords, tolerance=None):
+    """
+    Turns (k, 2) float64 coordinates into (k, 2) int64 keys.
+    :param coords: (np.ndarray) coordinates;
+    :param tolerance: (float) grid size. If None, the exact float bits are
+        used as keys, so only equal coordinates share a key.
+    :return: (np.ndarray) int64 keys.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if tolerance:
+        return np.rint(coords / tolerance).astype(np.int64)
+    # adding 0.0 turns -0.0 into 0.0, so that both get the same bits
+    return np.ascontiguousarray(coords + 0.0).view(np.int64)
+
+
+class LineEndPoints(object):
+    """
+    First and last vertices of every part of a set of lines, stored as NumPy
+    arrays, and the nodes they form. Coordinates are turned into int64 keys
+    (quantized to a tolerance, or the exact float bits when no tolerance is
+    given), so that nodes, degrees and in/out counts are computed with
+    np.unique and np.bincount instead of point dictionaries.
+    """
+    def __init__(self, featIds, startPoints, endPoints, tolerance=None):
+        """
+        :param featIds: (np.ndarray) int64 feature id of each line part;
+        :param startPoints: (np.ndarray) (n, 2) float64 first vertices;
+        :param endPoints: (np.ndarray) (n, 2) float64 last vertices;
+        :param tolerance: (float) size of the grid used to merge close end
+            points. If None, only exactly equal points are merged.
+        """
+        self.featIds = featIds
+        self.startPoints = startPoints
+        self.endPoints = endPoints
+        self.tolerance = tolerance
+        self.buildNodes()
+
+    @classmethod
+    def fromFeatures(cls, featureIterator, tolerance=None, feedback=None, total=None):
+        """
+        Reads the end points of each part of the lines of featureIterator.
+        :param featureIterator: (iterable) QgsFeature iterator;
+        :param tolerance: (float) see __init__;
+        :param feedback: (QgsProcessingFeedback) processing feedback;
+        :param total: (int) number of features, used to report progress.
+        :return: (LineEndPoints) filled object.
+        """
+        size = 100/total if total else 0
+        featIds, coords = [], []
+        for current, feat in enumerate(featureIterator):
+            if feedback is not None and feedback.isCanceled():
+                break
+            geom = feat.geometry()
+            if geom.isNull() or geom.isEmpty():
+                continue
+            abstractGeom = geom.constGet()
+            partList = [abstractGeom.geometryN(i) for i in range(abstractGeom.numGeometries())] \
+                if geom.isMultipart() else [abstractGeom]
+            for part in partList:
+                if part.nCoordinates() == 0:
+                    continue
+                startPoint, endPoint = part.startPoint(), part.endPoint()
+                featIds.append(feat.id())
+                coords.extend(
+                    (startPoint.x(), startPoint.y(), endPoint.x(), endPoint.y())
+                )
+            if feedback is not None and size:
+                feedback.setProgress(size * current)
+        coordArray = np.array(coords, dtype=np.float64).reshape(-1, 4)
+        return cls(
+            np.array(featIds, dtype=np.int64),
+            np.ascontiguousarray(coordArray[:, :2]),
+            np.ascontiguousarray(coordArray[:, 2:]),
+            tolerance=tolerance
+        )
+
+    @classmethod
+    def fromLayer(cls, lyr, tolerance=None, onlySelected=False, feedback=None):
+        """
+        Reads the end points of the lines of lyr, without fetching attributes.
+        """
+        request = QgsFeatureRequest().setNoAttributes()
+        if onlySelected:
+            iterator, total = lyr.getSelectedFeatures(request), lyr.selectedFeatureCount()
+        else:
+            iterator, total = lyr.getFeatures(request), lyr.featureCount()
+        return cls.fromFeatures(
+            iterator, tolerance=tolerance, feedback=feedback, total=total)
+
+    def __len__(self):
+        return len(self.featIds)
+
+    def quantize(self, coords):
+        """
+        Turns (k, 2) float64 coordinates into (k, 2) int64 keys.
+        """
+        return quantizeCoordinates(coords, self.tolerance)
+
+    def buildNodes(self):
+        """
+        Merges the end points into nodes. After this call:
+            nodeCoords: (m, 2) coordinates of each node (first occurrence);
+            startNode, endNode: node index of the first and last vertex of
+                each line part;
+            degree, outDegree, inDegree: (m,) number of line ends, line starts
+                and line ends on each node.
+        """
+        nParts = len(self.featIds)
+        allCoords = np.concatenate((self.startPoints, self.endPoints)).reshape(-1, 2)
+        if nParts == 0:
+            self.nodeCoords = allCoords
+            self.startNode = self.endNode = np.zeros(0, dtype=np.int64)
+            self.degree = self.outDegree = self.inDegree = np.zeros(0, dtype=np.int64)
+            return
+        _, firstIdx, inverse, counts = np.unique(
+            self.quantize(allCoords),
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+            return_counts=True
+        )
+        inverse = inverse.reshape(-1)
+        nNodes = len(counts)
+        self.nodeCoords = allCoords[firstIdx]
+        self.startNode = inverse[:nParts]
+        self.endNode = inverse[nParts:]
+        self.degree = counts
+        self.outDegree = np.bincount(self.startNode, minlength=nNodes)
+        self.inDegree = np.bincount(self.endNode, minlength=nNodes)
+
+    def nodeCount(self):
+        return len(self.nodeCoords)
+
+    def nodePoint(self, nodeIdx):
+        x, y = self.nodeCoords[nodeIdx]
+        return QgsPointXY(float(x), float(y))
+
+    def boundaryDegree(self):
+        """
+        Number of features whose boundary contains each node. As in the OGC
+        boundary of a (multi)line, an end point that appears an even number of
+        times on the same feature (closed lines, parts touching each other)
+        is not on its boundary.
+        :return: (np.ndarray) (m,) int64 counts.
+        """
+        nNodes = self.nodeCount()
+        if nNodes == 0:
+            return np.zeros(0, dtype=np.int64)
+        pairs = np.column_stack((
+            np.concatenate((self.startNode, self.endNode)),
+            np.concatenate((self.featIds, self.featIds))
+        ))
+        uniquePairs, pairCounts = np.unique(pairs, axis=0, return_counts=True)
+        return np.bincount(uniquePairs[pairCounts % 2 == 1, 0], minlength=nNodes)
+
+    def danglingNodes(self):
+        """
+        :return: (np.ndarray) indexes of the nodes that are on the boundary of
+            a single feature.
+        """
+        return np.flatnonzero(self.boundaryDegree() == 1)
+
+    def groupByNode(self, nodeIdx, values):
+        """
+        Groups values by node.
+        :param nodeIdx: (np.ndarray) node index of each value;
+        :param values: (np.ndarray) values to be grouped.
+        :return: (list-of-np.ndarray) values of each node, in their original
+            order.
+        """
+        order = np.argsort(nodeIdx, kind='stable')
+        splitIdx = np.cumsum(np.bincount(nodeIdx, minlength=self.nodeCount()))[:-1]
+        return np.split(values[order], splitIdx)
+
+    def featureIdsByNode(self):
+        """
+        :return: (list-of-np.ndarray) ids of the features that start or end on
+            each node. A feature is listed once for each line end on the node,
+            starts before ends of the same part.
+        """
+        nodeIdx = np.column_stack((self.startNode, self.endNode)).reshape(-1)
+        return self.groupByNode(nodeIdx, np.repeat(self.featIds, 2))
+
+    def startFeatureIdsByNode(self):
+        return self.groupByNode(self.startNode, self.featIds)
+
+    def endFeatureIdsByNode(self):
+        return self.groupByNode(self.endNode, self.featIds)
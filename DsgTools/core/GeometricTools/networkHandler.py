@@ -25,8 +25,11 @@ from builtins import range
 from itertools import combinations, chain
 import math
 from math import pi
+import numpy as np
 from .geometryHandler import GeometryHandler
 from .layerHandler import LayerHandler
+from .compactNetwork import CompactNetwork, NodeBitset
+from .lineEndPoints import LineEndPoints
 from qgis.core import QgsMessageLog, QgsVectorLayer, QgsGeometry, QgsField, \
                       QgsVectorDataProvider, QgsFeatureRequest, QgsExpression, \
                       QgsFeature, QgsSpatialIndex, Qgis, QgsCoordinateTransform, \
@@ -41,12 +44,32 @@ class NetworkHandler(QObject):
     AttributeChange, NodeNextToWaterBody, \
     AttributeChangeFlag, NodeOverload, DisconnectedLine, \
     DitchNode, SpillwayNode = list(range(14))
+    # flow permitions of each node type
+    # reference is the node (e.g. 'in' = lines  are ENDING at analyzed node)
+    nodeFlowTypes = {
+        Flag : None, # 0 - Flag (fim de trecho sem 'justificativa espacial')
+        Sink : 'in', # 1 - Sumidouro
+        WaterwayBegin : 'out', # 2 - Fonte D'Água
+        DownHillNode : 'in', # 3 - Interrupção à Jusante
+        UpHillNode : 'out', # 4 - Interrupção à Montante
+        Confluence : 'in and out', # 5 - Confluência
+        Ramification : 'in and out', # 6 - Ramificação
+        AttributeChange : 'in and out', # 7 - Mudança de Atributo
+        NodeNextToWaterBody : 'in or out', # 8 - Nó próximo a corpo d'água
+        AttributeChangeFlag : None, # 9 - Nó de mudança de atributos conectado em linhas que não mudam de atributos
+        NodeOverload : None, # 10 - Há igual número de linhas (>1 para cada fluxo) entrando e saindo do nó
+        DisconnectedLine : None, # 11 - Nó conectado a uma linha perdida na rede (teria dois inícios de rede)
+        DitchNode : 'in and out', # 12 - Nó de vala 
+        SpillwayNode : 'out' # 13 - Vertedouro
+    }
     def __init__(self):
         super(NetworkHandler, self).__init__()
         self.geometryHandler = GeometryHandler()
         self.layerHandler = LayerHandler()
         self.nodeDict = None
         self.nodeTypeDict = None
+        # ids of the lines merged while directioning, whose geometries no longer match the node dict
+        self.modifiedLineIds = set()
         self.nodeTypeNameDict = {
             NetworkHandler.Flag : self.tr("Flag"),#0
             NetworkHandler.Sink : self.tr("Sink"),#1
@@ -83,40 +106,30 @@ class NetworkHandler(QObject):
             }
         """
         nodeDict = dict()
-        isMulti = QgsWkbTypes.isMultiType(int(networkLayer.wkbType()))
         iterator = networkLayer.getFeatures() if not onlySelected else networkLayer.getSelectedFeatures()
         featCount = networkLayer.featureCount() if not onlySelected else networkLayer.selectedFeatureCount()
-        size = 100/featCount if featCount else 0
-        for current, feat in enumerate(iterator):
-            if feedback is not None and feedback.isCanceled():
-                break
-            nodes = self.geometryHandler.getFeatureNodes(networkLayer, feat)
-            if nodes != []:
-                if isMulti:
-                    if len(nodes) > 1:
-                        # if feat is multipart and has more than one part, a flag should be raised
-                        continue # CHANGE TO RAISE FLAG
-                    elif len(nodes) == 0:
-                        # if no part is found, skip feature
-                        continue
-                    else:
-                        # if feat is multipart, "nodes" is a list of list
-                        nodes = nodes[0]                
-                # initial node
-                pInit, pEnd = nodes[0], nodes[-1]
-                # filling starting node information into dictionary
-                if pInit not in nodeDict:
-                    # if the point is not already started into dictionary, it creates a new item
-                    nodeDict[pInit] = { 'start' : [], 'end' : [] }
-                if feat not in nodeDict[pInit]['start']:
-                    nodeDict[pInit]['start'].append(feat)                            
-                # filling ending node information into dictionary
-                if pEnd not in nodeDict:
-                    nodeDict[pEnd] = { 'start' : [], 'end' : [] }
-                if feat not in nodeDict[pEnd]['end']:
-                    nodeDict[pEnd]['end'].append(feat)
-            if feedback is not None:
-                feedback.setProgress(size * current)
+        featDict = dict()
+        def _singlePartFeatures(iterator):
+            for feat in iterator:
+                geom = feat.geometry()
+                # if feat is multipart and has more than one part, a flag should be raised
+                if geom.isMultipart() and geom.constGet().numGeometries() > 1:
+                    continue # CHANGE TO RAISE FLAG
+                featDict[feat.id()] = feat
+                yield feat
+        endPoints = LineEndPoints.fromFeatures(
+            _singlePartFeatures(iterator), feedback=feedback, total=featCount)
+        if feedback is not None and feedback.isCanceled():
+            return nodeDict
+        # each feature has a single part, so it is listed at most once on the
+        # start (and on the end) list of each node
+        startIdsByNode = endPoints.startFeatureIdsByNode()
+        endIdsByNode = endPoints.endFeatureIdsByNode()
+        for nodeIdx in range(endPoints.nodeCount()):
+            nodeDict[endPoints.nodePoint(nodeIdx)] = {
+                'start': [featDict[featId] for featId in startIdsByNode[nodeIdx].tolist()],
+                'end': [featDict[featId] for featId in endIdsByNode[nodeIdx].tolist()]
+            }
         return nodeDict
 
     def changeLineDict(self, nodeList, line):
@@ -514,7 +527,7 @@ class NetworkHandler(QObject):
             # case 3 "ramification"
             return NetworkHandler.Ramification
 
-    def classifyAllNodes(self, networkLayer, frameLyrContourList, waterBodiesLayers, searchRadius, waterSinkLayer=None, spillwayLayer=None, nodeList=None, feedback=None, attributeBlackList=None, ignoreVirtualFields=True, excludePrimaryKeys=True, ditchLayer=None):
+    def classifyAllNodes(self, networkLayer, frameLyrContourList, waterBodiesLayers, searchRadius, waterSinkLayer=None, spillwayLayer=None, nodeList=None, feedback=None, attributeBlackList=None, ignoreVirtualFields=True, excludePrimaryKeys=True, ditchLayer=None, cacheStore=None):
         """
         Classifies all identified nodes from the hidrography line layer.
         :param networkLayer: (QgsVectorLayer) network lines layer.
@@ -525,6 +538,8 @@ class NetworkHandler(QObject):
                          to be classified. Node MUST be in dict given, if not, it'll be ignored.
         :param waterSinkLayer: (QgsVectorLayer) water sink layer.
         :param ditchLayer: (QgsVectorLayer) ditch layer.
+        :param cacheStore: (GeometryCacheStore) geometry cache store that
+                        provides the spatial indexes of the layers.
         :return: a (dict) dictionary of node and its node type ( { (QgsPoint)node : (int)nodeType } ). 
         """
         networkLayerGeomType = networkLayer.geometryType()
@@ -543,7 +558,8 @@ class NetworkHandler(QObject):
             spillwayLayer=spillwayLayer,
             waterSinkLayer=waterSinkLayer,
             ditchLayer=ditchLayer,
-            feedback=multiStepFeedback)
+            feedback=multiStepFeedback,
+            cacheStore=cacheStore)
         nodeCount = len(self.nodeDict)
         size = 100/nodeCount if nodeCount else 0
         if feedback is not None:
@@ -575,7 +591,7 @@ class NetworkHandler(QObject):
                 multiStepFeedback.setProgress(size * current)
         return nodeTypeDict, flagNodeDict
     
-    def getAuxIndexStructure(self, networkLayer, waterBodiesLayers=None, waterSinkLayer=None, spillwayLayer=None, ditchLayer=None, feedback=None):
+    def getAuxIndexStructure(self, networkLayer, waterBodiesLayers=None, waterSinkLayer=None, spillwayLayer=None, ditchLayer=None, feedback=None, cacheStore=None):
         auxStructDict = dict()
         steps = 1
         if waterBodiesLayers is not None:
@@ -587,29 +603,29 @@ class NetworkHandler(QObject):
         multiStepFeedback = QgsProcessingMultiStepFeedback(steps, feedback)
         currStep = 0
         multiStepFeedback.setCurrentStep(currStep)
-        spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(networkLayer, feedback=multiStepFeedback)
+        spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(networkLayer, feedback=multiStepFeedback, cacheStore=cacheStore)
         auxStructDict['networkLayer']={'spatialIdx':spatialIdx, 'idDict':idDict}
         currStep += 1
         if waterBodiesLayers is not None:
             auxStructDict['waterBodies'] = []
             multiStepFeedback.setCurrentStep(currStep)
             for lyr in waterBodiesLayers:
-                spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(lyr, feedback=multiStepFeedback)
+                spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(lyr, feedback=multiStepFeedback, cacheStore=cacheStore)
                 auxStructDict['waterBodies'].append({'spatialIdx':spatialIdx, 'idDict':idDict})
             currStep += 1
         if waterSinkLayer is not None:
             multiStepFeedback.setCurrentStep(currStep)
-            spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(waterSinkLayer, feedback=multiStepFeedback)
+            spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(waterSinkLayer, feedback=multiStepFeedback, cacheStore=cacheStore)
             auxStructDict['waterSinkLayer'] = {'spatialIdx':spatialIdx, 'idDict':idDict}
             currStep += 1
         if spillwayLayer is not None:
             multiStepFeedback.setCurrentStep(currStep)
-            spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(spillwayLayer, feedback=multiStepFeedback)
+            spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(spillwayLayer, feedback=multiStepFeedback, cacheStore=cacheStore)
             auxStructDict['spillwayLayer'] = {'spatialIdx':spatialIdx, 'idDict':idDict}
             currStep += 1
         if ditchLayer is not None:
             multiStepFeedback.setCurrentStep(currStep)
-            spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(ditchLayer, feedback=multiStepFeedback)
+            spatialIdx, idDict = self.layerHandler.buildSpatialIndexAndIdDict(ditchLayer, feedback=multiStepFeedback, cacheStore=cacheStore)
             auxStructDict['ditchLayer'] = {'spatialIdx':spatialIdx, 'idDict':idDict}
             currStep += 1
         return auxStructDict
@@ -786,7 +802,7 @@ class NetworkHandler(QObject):
         Validates a set of lines connected to a node as for the angle formed between them.
         :param node: (QgsPoint) hidrography node to be validated.
         :param networkLayer: (QgsVectorLayer) hidrography line layer.
-        :param connectedValidLines: list of (QgsFeature) lines connected to 'node' that are already verified.
+        :param connectedValidLines: (set-of-int) ids of the lines that are already verified.
         :param geomType: (int) layer geometry type. If not given, it'll be evaluated OTF.
         :return: (list-of-obj [dict, dict, str]) returns the dict. of valid lines, dict of inval. lines and
                  invalidation reason, if any, respectively.
@@ -813,9 +829,9 @@ class NetworkHandler(QObject):
                     if not self.checkLineDirectionConcordance(line_a=key1, line_b=key2, networkLayer=networkLayer, geomType=geomType):
                         reason = self.tr('Lines id={0} and id={1} have conflicting directions ({2:.2f} deg).').format(key1.id(), key2.id(), absAzimuthDifference)
                         # checks if any of connected lines are already validated by any previous iteration
-                        if key1 not in connectedValidLines:
+                        if key1.id() not in connectedValidLines:
                             inval[key1.id()] = key1
-                        if key2 not in connectedValidLines:
+                        if key2.id() not in connectedValidLines:
                             inval[key2.id()] = key2
                         return val, inval, reason
                 elif absAzimuthDifference != 90:
@@ -824,9 +840,9 @@ class NetworkHandler(QObject):
                 else:
                     # if lines touch each other at a right angle, then it is impossible to infer waterway direction
                     reason = self.tr('Cannot infer directions for lines {0} and {1} (Right Angle)').format(key1.id(), key2.id())
-                    if key1 not in connectedValidLines:
+                    if key1.id() not in connectedValidLines:
                             inval[key1.id()] = key1
-                    if key2 not in connectedValidLines:
+                    if key2.id() not in connectedValidLines:
                         inval[key2.id()] = key2
                     return val, inval, reason
         if not inval:
@@ -838,30 +854,14 @@ class NetworkHandler(QObject):
         Checks if lines connected to a node have their flows compatible to node type and valid lines
         connected to it.
         :param node: (QgsPoint) node which lines connected to it are going to be verified.
-        :param connectedValidLines: list of (QgsFeature) lines connected to 'node' that are already verified.
+        :param connectedValidLines: (set-of-int) ids of the lines that are already verified.
         :param networkLayer: (QgsVectorLayer) layer that contains the lines of analyzed network.
         :param geomType: (int) layer geometry type. If not given, it'll be evaluated OTF.
         :return: (list-of-obj [dict, dict, str]) returns the dict. of valid lines, dict of inval. lines and
                  invalidation reason, if any, respectively.
         """
         # getting flow permitions based on node type
-        # reference is the node (e.g. 'in' = lines  are ENDING at analyzed node)
-        flowType = {
-                    NetworkHandler.Flag : None, # 0 - Flag (fim de trecho sem 'justificativa espacial')
-                    NetworkHandler.Sink : 'in', # 1 - Sumidouro
-                    NetworkHandler.WaterwayBegin : 'out', # 2 - Fonte D'Água
-                    NetworkHandler.DownHillNode : 'in', # 3 - Interrupção à Jusante
-                    NetworkHandler.UpHillNode : 'out', # 4 - Interrupção à Montante
-                    NetworkHandler.Confluence : 'in and out', # 5 - Confluência
-                    NetworkHandler.Ramification : 'in and out', # 6 - Ramificação
-                    NetworkHandler.AttributeChange : 'in and out', # 7 - Mudança de Atributo
-                    NetworkHandler.NodeNextToWaterBody : 'in or out', # 8 - Nó próximo a corpo d'água
-                    NetworkHandler.AttributeChangeFlag : None, # 9 - Nó de mudança de atributos conectado em linhas que não mudam de atributos
-                    NetworkHandler.NodeOverload : None, # 10 - Há igual número de linhas (>1 para cada fluxo) entrando e saindo do nó
-                    NetworkHandler.DisconnectedLine : None, # 11 - Nó conectado a uma linha perdida na rede (teria dois inícios de rede)
-                    NetworkHandler.DitchNode : 'in and out', # 12 - Nó de vala 
-                    NetworkHandler.SpillwayNode : 'out' # 13 - Vertedouro
-                   }
+        flowType = NetworkHandler.nodeFlowTypes
         # to avoid calculations in expense of memory
         nodeType = self.nodeTypeDict[node]
         # if node is introduced by operator's modification, it won't be saved to the layer
@@ -872,7 +872,7 @@ class NetworkHandler(QObject):
         flow = flowType[int(nodeType)]
         nodePointDict = self.nodeDict[node]
         # getting all connected lines to node that are not already validated
-        linesNotValidated = set( nodePointDict['start']  + nodePointDict['end'] ) - set(connectedValidLines)
+        linesNotValidated = set( line for line in nodePointDict['start']  + nodePointDict['end'] if line.id() not in connectedValidLines )
         # starting dicts of valid and invalid lines
         validLines, invalidLines = dict(), dict()
         if not flow:
@@ -963,7 +963,7 @@ class NetworkHandler(QObject):
         """
         Checks whether a node is valid or not.
         :param node: (QgsPoint) node which lines connected to it are going to be verified.
-        :param connectedValidLines: list of (QgsFeature) lines connected to 'node' that are already verified.
+        :param connectedValidLines: (set-of-int) ids of the lines that are already verified.
         :param networkLayer: (QgsVectorLayer) layer that contains the lines of analyzed network.
         :param geomType: (int) layer geometry type. If not given, it'll be evaluated OTF.
         :param deltaLinesCheckList: (list-of-int) node types that must be checked for their connected lines angles.
@@ -1016,7 +1016,7 @@ class NetworkHandler(QObject):
         """
         Checks if any of next nodes is a contour condition to directioning process.
         :param node: (QgsPoint) node which needs to have its next nodes checked.
-        :param validLines: (list-of-QgsFeature) lines that were alredy checked and validated.
+        :param validLines: (set-of-int) ids of the lines that were alredy checked and validated.
         :param networkLayer: (QgsVectorLayer) network lines layer.
         :param nodeLayer: (QgsVectorLayer) network nodes layer.
         :param geomType: (int) network lines layer geometry type code.
@@ -1074,6 +1074,80 @@ class NetworkHandler(QObject):
             map(reclassifyNodeAlias, chain(map(initialNode, flippedLines), map(lastNode, flippedLines)))
         return hasStartCondition, flippedLinesIds
 
+    def staticNodeValidity(self, network, networkLayer, geomType=None, deltaLinesCheckList=None):
+        """
+        Evaluates, for all nodes at once, whether checkNodeValidity would accept them as
+        the network currently is: connected lines flow as their node type allows and, for
+        the types on deltaLinesCheckList, no pair of lines forms a beak with opposing
+        directions nor a right angle. The result stays true while the lines of the node
+        are neither flipped nor merged and the node is not reclassified.
+        :param network: (CompactNetwork) network built from current node dict.
+        :param networkLayer: (QgsVectorLayer) hidrography line layer.
+        :param geomType: (int) layer geometry type. If not given, it'll be evaluated OTF.
+        :param deltaLinesCheckList: (list-of-int) node types that must be checked for their connected lines angles.
+        :return: (tuple-of-np.ndarray) boolean mask of valid nodes and the node type each
+                 of them was evaluated with (-1 for unclassified nodes).
+        """
+        if not deltaLinesCheckList:
+            deltaLinesCheckList = [NetworkHandler.Confluence, NetworkHandler.Ramification]
+        nodeCount = network.nodeCount()
+        nodeKeys = network.nodeKeys
+        nodeTypes = np.array(
+            [int(self.nodeTypeDict.get(node, -1)) for node in nodeKeys],
+            dtype=np.int64
+        )
+        startNode, endNode = network.startNode, network.endNode
+        startCount = np.bincount(startNode, minlength=nodeCount)
+        endCount = np.bincount(endNode, minlength=nodeCount)
+        loopCount = np.bincount(startNode[startNode == endNode], minlength=nodeCount)
+        # nodes with lines that are not on the network or with closed lines are left to checkNodeValidity
+        consistent = (loopCount == 0) \
+            & (startCount == [len(self.nodeDict[node]['start']) for node in nodeKeys]) \
+            & (endCount == [len(self.nodeDict[node]['end']) for node in nodeKeys])
+        def flowMask(flow):
+            return np.isin(nodeTypes, [k for k, v in NetworkHandler.nodeFlowTypes.items() if v == flow])
+        valid = consistent & (
+            (flowMask('in') & (startCount == 0))
+            | (flowMask('out') & (endCount == 0))
+            | (flowMask('in and out') & (startCount > 0) & (endCount > 0))
+            | flowMask('in or out')
+        )
+        deltaMask = valid & np.isin(nodeTypes, deltaLinesCheckList)
+        if not deltaMask.any():
+            return valid, nodeTypes
+        # azimuth of each CSR entry of the delta nodes, as seen from the node
+        indptr, edgeIds = network.indptr, network.edgeIds
+        entryNode = np.repeat(np.arange(nodeCount), np.diff(indptr))
+        entryAzimuth = np.zeros(len(edgeIds), dtype=np.float64)
+        lineIds = network.lineIds.tolist()
+        conflicting = np.zeros(nodeCount, dtype=bool)
+        for nodeId in np.flatnonzero(deltaMask).tolist():
+            try:
+                azimuthDict = {
+                    line.id(): azimuth for line, azimuth in self.calculateAzimuthFromNode(
+                        node=nodeKeys[nodeId], networkLayer=networkLayer, geomType=geomType
+                    ).items()
+                }
+            except TypeError:
+                # multipart lines have no second/penult node
+                conflicting[nodeId] = True
+                continue
+            for entry in range(indptr[nodeId], indptr[nodeId + 1]):
+                entryAzimuth[entry] = azimuthDict[lineIds[edgeIds[entry]]]
+        # every pair of lines of a node is compared, one entry offset at a time
+        entries = np.flatnonzero(deltaMask[entryNode])
+        entryEnd = indptr[entryNode[entries] + 1]
+        for offset in range(1, int(np.diff(indptr)[deltaMask].max())):
+            first = entries[entries + offset < entryEnd]
+            second = first + offset
+            absAzimuthDifference = np.fmod(entryAzimuth[first] - entryAzimuth[second] + 360, 360)
+            absAzimuthDifference = np.where(absAzimuthDifference > 180, 360 - absAzimuthDifference, absAzimuthDifference)
+            lineA, lineB = edgeIds[first], edgeIds[second]
+            concordant = (startNode[lineA] == startNode[lineB]) | (endNode[lineA] == endNode[lineB])
+            invalidPair = ((absAzimuthDifference < 90) & ~concordant) | (absAzimuthDifference == 90)
+            conflicting[entryNode[first[invalidPair]]] = True
+        return valid & ~conflicting, nodeTypes
+
     def directNetwork(self, networkLayer, nodeLayer, nodeList=None):
         """
         For every node over the frame [or set as a line beginning], checks for network coherence regarding
@@ -1093,15 +1167,40 @@ class NetworkHandler(QObject):
                 return None, None, self.tr("No network starting point was found")
         # to avoid unnecessary calculations
         geomType = networkLayer.geometryType()
-        # initiating the list of nodes already checked and the list of nodes to be checked next iteration
-        visitedNodes, newNextNodes = [], []
+        # integer ids and CSR adjacency of the nodes. Flips do not change the nodes connected by
+        # each line, but merges do: the nodes of merged lines are read from their current
+        # geometries, as getNextNodes does
+        network = CompactNetwork.fromNodeDict(self.nodeDict)
+        modifiedLineIds = self.modifiedLineIds
+        # node validity is evaluated once for the whole network. Nodes are only checked again
+        # if they were reclassified or their lines were flipped (touchedLineIds) or merged
+        staticValid, staticNodeTypes = self.staticNodeValidity(
+            network=network, networkLayer=networkLayer, geomType=geomType, deltaLinesCheckList=deltaLinesCheckList
+        )
+        touchedLineIds = set()
+        def nodeValidity(nodeId, node, nodeLines, nodeLineIds):
+            if staticValid[nodeId] and self.nodeTypeDict.get(node, -1) == staticNodeTypes[nodeId] \
+                and touchedLineIds.isdisjoint(nodeLineIds) and modifiedLineIds.isdisjoint(nodeLineIds):
+                return {line.id(): line for line in nodeLines if line.id() not in validLineIds}, dict(), ''
+            return self.checkNodeValidity(node=node, connectedValidLines=validLineIds,\
+                                          networkLayer=networkLayer, deltaLinesCheckList=deltaLinesCheckList, geomType=geomType)
+        # nodes that are not on the network are ignored
+        nodeList = sorted(set(
+            nodeId for nodeId in map(network.nodeId, nodeList) if nodeId is not None
+        ))
+        # initiating the set of nodes already checked and the set of nodes to be checked next iteration
+        visitedNodes, newNextNodes = NodeBitset(network.nodeCount()), set()
         nodeFlags = dict()
         # starting dict of (in)valid lines to be returned by the end of method
         validLines, invalidLines = dict(), dict()
+        # ids of the valid lines, updated alongside validLines, to be passed to node checks.
+        # Features are not kept in a set, since flips and merges change their hashes
+        validLineIds = set()
         # initiate relation of modified features
         flippedLinesIds, mergedLinesString = set([]), ""
         while nodeList:
-            for node in nodeList:
+            for nodeId in nodeList:
+                node = network.nodeKey(nodeId)
                 # first thing to be done: check if there are more than one non-validated line (hence, enough information for a decision)
                 if node in self.nodeDict:
                     startLines = self.nodeDict[node]['start']
@@ -1112,20 +1211,19 @@ class NetworkHandler(QObject):
                         self.reclassifyNodeType[node] = self.nodeTypeDict[node]
                 else:
                     # ignore node for possible next iterations by adding it to visited nodes
-                    visitedNodes.append(node)
+                    visitedNodes.add(nodeId)
                     continue
-                nodeLines = startLines + endLines
-                validLinesList = validLines.values()
-                if len(set(nodeLines) - set(validLinesList)) > 1:
-                    hasStartCondition, flippedLines = self.checkForStartConditions(node=node, validLines=validLinesList, networkLayer=networkLayer, nodeLayer=nodeLayer, geomType=geomType)
+                nodeLineIds = set(line.id() for line in startLines + endLines)
+                if sum(1 for lineId in nodeLineIds if lineId not in validLines) > 1:
+                    hasStartCondition, flippedLines = self.checkForStartConditions(node=node, validLines=validLineIds, networkLayer=networkLayer, nodeLayer=nodeLayer, geomType=geomType)
                     if hasStartCondition:
                         flippedLinesIds |= set(flippedLines)
+                        touchedLineIds.update(map(int, flippedLines))
                     else:
                         # if it is not connected to a start condition, check if node has a valid line connected to it
-                        if (set(nodeLines) & set(validLinesList)):
+                        if any(lineId in validLines for lineId in nodeLineIds):
                             # if it does and, check if it is a valid node
-                            val, inval, reason = self.checkNodeValidity(node=node, connectedValidLines=validLinesList,\
-                                                                        networkLayer=networkLayer, deltaLinesCheckList=deltaLinesCheckList, geomType=geomType)
+                            val, inval, reason = nodeValidity(nodeId, node, startLines + endLines, nodeLineIds)
                             # if node has a valid line connected to it and it is valid, then non-validated lines are proven to be in conformity to
                             # start conditions, then they should be validated and node should be set as visited
                             if reason:
@@ -1133,25 +1231,27 @@ class NetworkHandler(QObject):
                             # node will neither be checked nor marked as visited
                                 continue
                 # check coherence to node type and waterway flow
-                val, inval, reason = self.checkNodeValidity(node=node, connectedValidLines=validLinesList,\
-                                                            networkLayer=networkLayer, deltaLinesCheckList=deltaLinesCheckList, geomType=geomType)
+                val, inval, reason = nodeValidity(nodeId, node, startLines + endLines, nodeLineIds)
                 # nodes to be removed from next nodes
-                removeNode = []
+                removeNode = set()
                 # if a reason is given, then node is invalid (even if there are no invalid lines connected to it).
                 if reason:
                     # try to fix node issues
                     # note that val, inval and reason MAY BE MODIFIED - and there is no problem...
                     flippedLinesIds_, mergedLinesString_ = self.fixNodeFlagsNew(node=node, valDict=val, invalidDict=inval, reason=reason, \
-                                                                            connectedValidLines=validLinesList, networkLayer=networkLayer, \
+                                                                            connectedValidLines=validLineIds, networkLayer=networkLayer, \
                                                                             nodeLayer=nodeLayer, geomType=geomType, deltaLinesCheckList=deltaLinesCheckList)
                     # keep track of all modifications made
                     if flippedLinesIds_:
+                        touchedLineIds.update(map(int, flippedLinesIds_))
                         # IDs not registered yet will be added to final list
                         addIds = set(flippedLinesIds_) - set(flippedLinesIds)
                         # IDs that are registered will be removed (flipping a flipped line returns to original state)
                         removeIds = set(flippedLinesIds_) - addIds
                         flippedLinesIds = (set(flippedLinesIds) - removeIds) | addIds
                     if mergedLinesString_:
+                        # the lines of this node were merged into one another
+                        modifiedLineIds |= nodeLineIds
                         if not mergedLinesString:
                             mergedLinesString = mergedLinesString_
                         else:
@@ -1160,27 +1260,38 @@ class NetworkHandler(QObject):
                     if reason:
                         nodeFlags[node] = reason
                     # get next nodes connected to invalid lines
-                    for line in inval.values():
-                        if line in endLines:
-                            removeNode.append(self.getFirstNode(lyr=networkLayer, feat=line))
+                    endLineIds = set(line.id() for line in endLines)
+                    for lineId, line in inval.items():
+                        if lineId not in modifiedLineIds:
+                            otherNode = network.otherEnd(lineId, nodeId)
+                        elif lineId in endLineIds:
+                            otherNode = network.nodeId(self.getFirstNode(lyr=networkLayer, feat=line, geomType=geomType))
                         else:
-                            removeNode.append(self.getLastNode(lyr=networkLayer, feat=line))
+                            otherNode = network.nodeId(self.getLastNode(lyr=networkLayer, feat=line, geomType=geomType))
+                        if otherNode is not None:
+                            removeNode.add(otherNode)
                 # set node as visited
-                if node not in visitedNodes:
-                    visitedNodes.append(node)
+                visitedNodes.add(nodeId)
                 # update general dictionaries with final values
+                validLineIds.update(val)
                 validLines.update(val)
                 invalidLines.update(inval)
                 # get next iteration nodes
-                newNextNodes += self.getNextNodes(node=node, networkLayer=networkLayer, geomType=geomType)
+                if modifiedLineIds.isdisjoint(nodeLineIds):
+                    newNextNodes.update(network.neighbors(nodeId))
+                else:
+                    newNextNodes.update(
+                        nextNode for nextNode in map(
+                            network.nodeId,
+                            self.getNextNodes(node=node, networkLayer=networkLayer, geomType=geomType)
+                        ) if nextNode is not None
+                    )
                 # remove next nodes connected to invalid lines
                 if removeNode:
-                    newNextNodes = list( set(newNextNodes) - set(removeNode) )
-            # remove nodes that were already visited
-            newNextNodes = list( set(newNextNodes) - set(visitedNodes) )
-            # if new nodes are detected, repeat for those
-            nodeList = newNextNodes
-            newNextNodes = []
+                    newNextNodes -= removeNode
+            # remove nodes that were already visited and repeat for the new ones, if any
+            nodeList = sorted(nextNode for nextNode in newNextNodes if nextNode not in visitedNodes)
+            newNextNodes = set()
         # log all features that were merged and/or flipped
         self.logAlteredFeatures(flippedLines=flippedLinesIds, mergedLinesString=mergedLinesString)
         return nodeFlags, invalidLines, validLines
@@ -1246,7 +1357,7 @@ class NetworkHandler(QObject):
         Fixes lines connected to nodes flagged as one way flowing node where it cannot be.
         :param node: (QgsPoint) invalid node to have its lines flipped.
         :param networkLayer: (QgsVectorLayer) layer containing target feature.
-        :param validLines: (list-of-QgsFeature) list of all validated lines.
+        :param validLines: (set-of-int) ids of all validated lines.
         :param geomType: (int) layer geometry type code.
         :return: (QgsFeature) flipped line.
         """
@@ -1257,12 +1368,12 @@ class NetworkHandler(QObject):
         # it is considered that 
         if endDict:
             # get invalid line connected to node
-            invalidLine = list(set(endDict) - set(validLines))
+            invalidLine = [line for line in endDict if line.id() not in validLines]
             if invalidLine:
                 invalidLine = invalidLine[0]
         else:
             # get invalid line connected to node
-            invalidLine = list(set(startDict) - set(validLines))
+            invalidLine = [line for line in startDict if line.id() not in validLines]
             if invalidLine:
                 invalidLine = invalidLine[0]
         # if no invalid lines are identified, something else is wrong and flipping won't be the solution
@@ -1330,7 +1441,7 @@ class NetworkHandler(QObject):
         Tries to fix nodes flagged because of their delta angles.
         :param node: (QgsPoint) invalid node.
         :param network: (QgsVectorLayer) contains network lines.
-        :param validLines: (list-of-QgsFeature) lines already validated.
+        :param validLines: (set-of-int) ids of the lines already validated.
         :param reason: (str) reason of node invalidation.
         :param reasonType: (int) code for invalidation reason.
         :param geomType: (int) code for the layer that contains the network lines.
@@ -1339,7 +1450,7 @@ class NetworkHandler(QObject):
         flipCandidates = self.getLineIdFromReason(reason=reason, reasonType=reasonType)
         for line in self.nodeDict[node]['start'] + self.nodeDict[node]['end']:
             lineId = str(line.id())
-            if lineId in flipCandidates and line not in validLines:
+            if lineId in flipCandidates and line.id() not in validLines:
                 # flip line that is exposed in invalidation reason and is not previously validated
                 self.flipSingleLine(line=line, layer=networkLayer, geomType=geomType)
                 return line
@@ -1367,7 +1478,7 @@ class NetworkHandler(QObject):
             featIdFlipCandidates = self.getLineIdFromReason(reason=reason, reasonType=reasonType)
             for lineId in featIdFlipCandidates:
                 line = invalidDict[int(lineId)]
-                if line not in connectedValidLines:
+                if line.id() not in connectedValidLines:
                     # only non-valid lines may be modified
                     self.flipSingleLine(line=line, layer=networkLayer, geomType=geomType)
                     flippedLinesIds.append(lineId)
@@ -1510,7 +1621,7 @@ class NetworkHandler(QObject):
             featList.append(feat)
         return featList
     
-    def verifyNetworkDirectioning(self, networkLayer, networkNodeLayer, frame, searchRadius, waterBodyClasses=None, waterSinkLayer=None, spillwayLayer=None, ditchLayer=None, max_amount_cycles=1, attributeBlackList=None, feedback=None, selectValid=False, excludePrimaryKeys=True, ignoreVirtualFields=True):
+    def verifyNetworkDirectioning(self, networkLayer, networkNodeLayer, frame, searchRadius, waterBodyClasses=None, waterSinkLayer=None, spillwayLayer=None, ditchLayer=None, max_amount_cycles=1, attributeBlackList=None, feedback=None, selectValid=False, excludePrimaryKeys=True, ignoreVirtualFields=True, cacheStore=None):
         fieldList = self.layerHandler.getAttributesFromBlackList(networkLayer, \
                                                             attributeBlackList=attributeBlackList,\
                                                             ignoreVirtualFields=ignoreVirtualFields,\
@@ -1524,6 +1635,7 @@ class NetworkHandler(QObject):
         else:
             multiStepFeedback = None
         self.nodesToPop = []
+        self.modifiedLineIds = set()
         self.reclassifyNodeType = dict()
         if feedback is not None:
             multiStepFeedback.pushInfo('Identifying nodes...')
@@ -1540,7 +1652,8 @@ class NetworkHandler(QObject):
             waterSinkLayer=waterSinkLayer,
             spillwayLayer=spillwayLayer,
             ditchLayer=ditchLayer,
-            feedback=multiStepFeedback
+            feedback=multiStepFeedback,
+            cacheStore=cacheStore
         )
         networkLayerGeomType = networkLayer.geometryType()
         networkLayer.startEditing()
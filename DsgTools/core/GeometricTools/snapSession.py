@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import time
+from collections import defaultdict
+
+from qgis.analysis import QgsGeometrySnapper, QgsInternalGeometrySnapper
+from qgis.core import (QgsFeature, QgsFeatureRequest, QgsGeometry,
+                       QgsSpatialIndex, QgsWkbTypes)
+
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
+
+
+class ReferenceIndex(object):
+    """
+    In-memory spatial index of the geometries of a reference layer. It is
+    built once per snapping session and updated in place whenever the layer
+    itself is snapped, so later hierarchy levels see the snapped geometries
+    without reading the layer again.
+    """
+    def __init__(self):
+        self.spatialIdx = QgsSpatialIndex()
+        self.geomDict = dict()
+
+    def addGeometry(self, fid, geom):
+        self.geomDict[fid] = geom
+        self.spatialIdx.addFeature(fid, geom.boundingBox())
+
+    def removeGeometry(self, fid):
+        geom = self.geomDict.pop(fid, None)
+        if geom is None:
+            return
+        feat = QgsFeature(fid)
+        feat.setGeometry(geom)
+        self.spatialIdx.deleteFeature(feat)
+
+    def updateGeometry(self, fid, geom):
+        self.removeGeometry(fid)
+        self.addGeometry(fid, geom)
+
+    def candidates(self, geom, tol):
+        """
+        :param geom: (QgsGeometry) geometry to be snapped;
+        :param tol: (float) snapping tolerance.
+        :return: (list-of-QgsGeometry) reference geometries whose bounding
+            boxes are within tol of the bounding box of geom.
+        """
+        bbox = geom.boundingBox()
+        bbox.grow(tol)
+        return [self.geomDict[fid] for fid in self.spatialIdx.intersects(bbox)]
+
+
+class SnapSession(object):
+    """
+    Snaps layers onto each other over several hierarchy levels. Reference
+    layers are indexed once and kept for the whole session, snapped
+    geometries are kept in memory and written to the layers only on
+    commit(), in one edit command per layer.
+
+    Usage:
+        session = SnapSession()
+        for level, item in enumerate(snapHierarchy):
+            session.snapLayer(lyr, refLyr, tol, behavior, level=level)
+        session.commit()
+    """
+    def __init__(self):
+        self.layerDict = dict()
+        self.referenceDict = dict()
+        self.changedGeometryDict = defaultdict(dict)
+        self.deletedIdsDict = defaultdict(set)
+        self.reportList = []
+
+    def iterateGeometries(self, lyr, onlySelected=False):
+        """
+        Iterates over the geometries of lyr as they are on the session: the
+        snapped geometries replace the original ones and deleted features
+        are skipped.
+        :return: (generator) (featId, QgsGeometry) tuples.
+        """
+        request = QgsFeatureRequest().setNoAttributes()
+        iterator = lyr.getSelectedFeatures(request) if onlySelected else lyr.getFeatures(request)
+        changedGeometries = self.changedGeometryDict.get(lyr.id(), dict())
+        deletedIds = self.deletedIdsDict.get(lyr.id(), set())
+        for feat in iterator:
+            fid = feat.id()
+            if fid in deletedIds:
+                continue
+            yield fid, changedGeometries[fid] if fid in changedGeometries else feat.geometry()
+
+    def referenceIndex(self, refLyr, feedback=None):
+        """
+        Gets the index of refLyr, building it on its first use.
+        :return: (ReferenceIndex) index of refLyr.
+        """
+        if refLyr.id() in self.referenceDict:
+            return self.referenceDict[refLyr.id()]
+        referenceIndex = ReferenceIndex()
+        for fid, geom in self.iterateGeometries(refLyr):
+            if feedback is not None and feedback.isCanceled():
+                break
+            if geom.isNull() or geom.isEmpty():
+                continue
+            referenceIndex.addGeometry(fid, geom)
+        self.layerDict[refLyr.id()] = refLyr
+        self.referenceDict[refLyr.id()] = referenceIndex
+        return referenceIndex
+
+    @staticmethod
+    def prepareGeometry(geom, tol):
+        """
+        Cleans geom before snapping.
+        :return: (QgsGeometry) valid geometry, False if the feature must be
+            deleted (empty geometries and lines shorter than tol) or None if
+            the geometry cannot be fixed.
+        """
+        if geom.isNull() or geom.isEmpty():
+            return False
+        if geom.type() == QgsWkbTypes.LineGeometry and geom.length() < tol:
+            return False
+        geom = QgsGeometry(geom)
+        geom.removeDuplicateNodes()
+        fixedGeom = geom.makeValid()
+        return None if fixedGeom.isNull() else fixedGeom
+
+    @staticmethod
+    def movedVertexCount(oldGeom, newGeom):
+        """
+        Number of vertexes of newGeom that are not on a vertex of oldGeom,
+        i.e., vertexes that were moved or inserted by the snapping.
+        """
+        oldVertexSet = set((vertex.x(), vertex.y()) for vertex in oldGeom.vertices())
+        return sum(
+            1 for vertex in newGeom.vertices()
+            if (vertex.x(), vertex.y()) not in oldVertexSet
+        )
+
+    def snapResult(self, fid, geom, outputGeom):
+        """
+        :return: (tuple) (fid, outputGeom, number of moved vertexes).
+            outputGeom is None when the snapping did not change geom.
+        """
+        if outputGeom is None or outputGeom.isNull():
+            return fid, None, 0
+        movedCount = self.movedVertexCount(geom, outputGeom)
+        if not movedCount and outputGeom.equals(geom):
+            return fid, None, 0
+        return fid, outputGeom, movedCount
+
+    def snapLayer(self, inputLyr, refLyr, tol, behavior, onlySelected=False, level=0, feedback=None):
+        """
+        Snaps the geometries of inputLyr onto refLyr and keeps the results on
+        the session. When inputLyr is refLyr, the layer is snapped onto
+        itself with QgsInternalGeometrySnapper.
+        :param inputLyr: (QgsVectorLayer) layer to be snapped;
+        :param refLyr: (QgsVectorLayer) reference layer;
+        :param tol: (float) snapping tolerance;
+        :param behavior: (int) QgsGeometrySnapper.SnapMode;
+        :param onlySelected: (bool) snaps only the selected features of
+            inputLyr;
+        :param level: (int) hierarchy level, used on the report;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (dict) report of the step: level, input, reference,
+            featureCount, changedCount, deletedCount, movedVertexCount and
+            elapsed time (s).
+        """
+        startTime = time.perf_counter()
+        self.layerDict[inputLyr.id()] = inputLyr
+        featCount = inputLyr.selectedFeatureCount() if onlySelected else inputLyr.featureCount()
+        geometryIterator = self.iterateGeometries(inputLyr, onlySelected=onlySelected)
+        if inputLyr.id() == refLyr.id():
+            resultIterator = self.snapOnItself(geometryIterator, tol, behavior, feedback=feedback)
+        else:
+            referenceIndex = self.referenceIndex(refLyr, feedback=feedback)
+            def evaluate(item):
+                fid, geom = item
+                fixedGeom = self.prepareGeometry(geom, tol)
+                if not isinstance(fixedGeom, QgsGeometry):
+                    return fid, fixedGeom, 0
+                outputGeom = QgsGeometrySnapper.snapGeometry(
+                    fixedGeom, tol, referenceIndex.candidates(fixedGeom, tol), behavior)
+                return self.snapResult(fid, geom, outputGeom)
+            resultIterator = BoundedChunkExecutor(feedback=feedback).map(
+                evaluate, geometryIterator, total=featCount)
+        changedCount, deletedCount, movedVertexCount = 0, 0, 0
+        for fid, outputGeom, movedCount in resultIterator:
+            if outputGeom is False:
+                self.deleteGeometry(inputLyr, fid)
+                deletedCount += 1
+                continue
+            if outputGeom is None:
+                continue
+            self.changeGeometry(inputLyr, fid, outputGeom)
+            changedCount += 1
+            movedVertexCount += movedCount
+        report = {
+            'level': level,
+            'input': inputLyr.name(),
+            'reference': refLyr.name(),
+            'featureCount': featCount,
+            'changedCount': changedCount,
+            'deletedCount': deletedCount,
+            'movedVertexCount': movedVertexCount,
+            'elapsed': time.perf_counter() - startTime
+        }
+        self.reportList.append(report)
+        return report
+
+    def snapOnItself(self, geometryIterator, tol, behavior, feedback=None):
+        """
+        QgsInternalGeometrySnapper snaps each geometry onto the ones it has
+        already processed, so it must be fed sequentially.
+        """
+        snapper = QgsInternalGeometrySnapper(tol, behavior)
+        for fid, geom in geometryIterator:
+            if feedback is not None and feedback.isCanceled():
+                break
+            fixedGeom = self.prepareGeometry(geom, tol)
+            if not isinstance(fixedGeom, QgsGeometry):
+                yield fid, fixedGeom, 0
+                continue
+            feat = QgsFeature(fid)
+            feat.setGeometry(fixedGeom)
+            yield self.snapResult(fid, geom, snapper.snapFeature(feat))
+
+    def changeGeometry(self, lyr, fid, geom):
+        self.changedGeometryDict[lyr.id()][fid] = geom
+        if lyr.id() in self.referenceDict:
+            self.referenceDict[lyr.id()].updateGeometry(fid, geom)
+
+    def deleteGeometry(self, lyr, fid):
+        self.changedGeometryDict[lyr.id()].pop(fid, None)
+        self.deletedIdsDict[lyr.id()].add(fid)
+        if lyr.id() in self.referenceDict:
+            self.referenceDict[lyr.id()].removeGeometry(fid)
+
+    def levelReports(self):
+        """
+        Sums the step reports of each hierarchy level.
+        :return: (list-of-dict) one report per level, with level,
+            featureCount, changedCount, deletedCount, movedVertexCount and
+            elapsed.
+        """
+        levelDict = dict()
+        for report in self.reportList:
+            levelReport = levelDict.setdefault(report['level'], {
+                'level': report['level'],
+                'featureCount': 0,
+                'changedCount': 0,
+                'deletedCount': 0,
+                'movedVertexCount': 0,
+                'elapsed': 0.
+            })
+            for key in ('featureCount', 'changedCount', 'deletedCount', 'movedVertexCount', 'elapsed'):
+                levelReport[key] += report[key]
+        return [levelDict[level] for level in sorted(levelDict)]
+
+    def commit(self):
+        """
+        Writes every change of the session to the edit buffers of the
+        layers, in one edit command per layer.
+        """
+        for layerId, lyr in self.layerDict.items():
+            changedGeometries = self.changedGeometryDict.get(layerId, dict())
+            deletedIds = self.deletedIdsDict.get(layerId, set())
+            if not changedGeometries and not deletedIds:
+                continue
+            lyr.startEditing()
+            lyr.beginEditCommand('Snapping Features')
+            for fid, geom in changedGeometries.items():
+                lyr.changeGeometry(fid, geom)
+            lyr.deleteFeatures(list(deletedIds))
+            lyr.endEditCommand()
+        self.changedGeometryDict.clear()
+        self.deletedIdsDict.clear()
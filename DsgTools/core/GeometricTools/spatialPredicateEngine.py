@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import math
+import threading
+from collections import OrderedDict
+from itertools import islice
+
+import numpy as np
+
+from qgis.core import QgsGeometry, QgsWkbTypes
+
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
+
+from .geometryCache import LayerGeometryCache
+
+
+def strOrder(bboxes, nodeCapacity):
+    """
+    Sort-Tile-Recursive order of a set of bounding boxes: entries are sorted
+    by the x of their centers, cut into vertical slices and sorted by the y
+    of their centers inside each slice.
+    :param bboxes: (np.ndarray) (n, 4) boxes (xmin, ymin, xmax, ymax);
+    :param nodeCapacity: (int) number of entries per node.
+    :return: (np.ndarray) indexes of bboxes in STR order.
+    """
+    n = len(bboxes)
+    centerX = (bboxes[:, 0] + bboxes[:, 2]) / 2
+    centerY = (bboxes[:, 1] + bboxes[:, 3]) / 2
+    nNodes = math.ceil(n / nodeCapacity)
+    sliceSize = math.ceil(math.sqrt(nNodes)) * nodeCapacity
+    sliceId = np.empty(n, dtype=np.int64)
+    sliceId[np.argsort(centerX, kind='stable')] = np.arange(n) // sliceSize
+    return np.lexsort((centerY, sliceId))
+
+
+def boxesIntersect(bboxes, xmin, ymin, xmax, ymax):
+    return (bboxes[:, 0] <= xmax) & (bboxes[:, 2] >= xmin) & \
+        (bboxes[:, 1] <= ymax) & (bboxes[:, 3] >= ymin)
+
+
+def pairBoxesIntersect(boxesA, boxesB):
+    """
+    Same as boxesIntersect, testing row i of boxesA against row i of boxesB.
+    """
+    return (boxesA[:, 0] <= boxesB[:, 2]) & (boxesA[:, 2] >= boxesB[:, 0]) & \
+        (boxesA[:, 1] <= boxesB[:, 3]) & (boxesA[:, 3] >= boxesB[:, 1])
+
+
+class STRPackedIndex(object):
+    """
+    Read-only R-tree packed with the Sort-Tile-Recursive algorithm and stored
+    as NumPy arrays. It is built in one pass from the bounding boxes (no
+    insertions) and queries test a whole node level at a time. Instances are
+    never modified after being built, so they can be queried by many threads.
+    """
+    def __init__(self, bboxes, nodeCapacity=16):
+        """
+        :param bboxes: (np.ndarray) (n, 4) float64 boxes of the indexed
+            items (xmin, ymin, xmax, ymax);
+        :param nodeCapacity: (int) maximum number of children of each node.
+        """
+        self.bboxes = bboxes
+        self.nodeCapacity = nodeCapacity
+        # each level is (node boxes, children order); node j of a level has
+        # the children order[j*nodeCapacity:(j+1)*nodeCapacity] of the level
+        # below (the items, for the first level).
+        self.levels = []
+        entryBoxes = bboxes
+        while len(entryBoxes) > nodeCapacity:
+            order = strOrder(entryBoxes, nodeCapacity)
+            sortedBoxes = entryBoxes[order]
+            starts = np.arange(0, len(order), nodeCapacity)
+            nodeBoxes = np.column_stack((
+                np.minimum.reduceat(sortedBoxes[:, 0], starts),
+                np.minimum.reduceat(sortedBoxes[:, 1], starts),
+                np.maximum.reduceat(sortedBoxes[:, 2], starts),
+                np.maximum.reduceat(sortedBoxes[:, 3], starts),
+            ))
+            self.levels.append((nodeBoxes, order))
+            entryBoxes = nodeBoxes
+        self.rootBoxes = entryBoxes
+
+    def __len__(self):
+        return len(self.bboxes)
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """
+        :return: (np.ndarray) rows of the items whose boxes intersect the
+            given rectangle.
+        """
+        candidates = np.flatnonzero(boxesIntersect(self.rootBoxes, xmin, ymin, xmax, ymax))
+        childOffsets = np.arange(self.nodeCapacity)
+        for levelIdx in range(len(self.levels) - 1, -1, -1):
+            if not len(candidates):
+                break
+            order = self.levels[levelIdx][1]
+            positions = (candidates[:, None] * self.nodeCapacity + childOffsets).reshape(-1)
+            candidates = order[positions[positions < len(order)]]
+            entryBoxes = self.levels[levelIdx - 1][0] if levelIdx > 0 else self.bboxes
+            candidates = candidates[
+                boxesIntersect(entryBoxes[candidates], xmin, ymin, xmax, ymax)]
+        return candidates
+
+    def queryPairs(self, queryBoxes):
+        """
+        Generates every candidate pair at once: the tree is walked by all
+        the query rectangles together, one level at a time, keeping the
+        (query, node) pairs whose boxes intersect.
+        :param queryBoxes: (np.ndarray) (k, 4) query rectangles.
+        :return: (tuple) (queryRows, itemRows) int64 arrays of the same size,
+            sorted by query row.
+        """
+        nRoots = len(self.rootBoxes)
+        queryRows = np.repeat(np.arange(len(queryBoxes), dtype=np.int64), nRoots)
+        nodeRows = np.tile(np.arange(nRoots, dtype=np.int64), len(queryBoxes))
+        hit = pairBoxesIntersect(self.rootBoxes[nodeRows], queryBoxes[queryRows])
+        queryRows, nodeRows = queryRows[hit], nodeRows[hit]
+        childOffsets = np.arange(self.nodeCapacity)
+        for levelIdx in range(len(self.levels) - 1, -1, -1):
+            if not len(queryRows):
+                break
+            order = self.levels[levelIdx][1]
+            positions = (nodeRows[:, None] * self.nodeCapacity + childOffsets).reshape(-1)
+            queryRows = np.repeat(queryRows, self.nodeCapacity)
+            valid = positions < len(order)
+            queryRows, nodeRows = queryRows[valid], order[positions[valid]]
+            entryBoxes = self.levels[levelIdx - 1][0] if levelIdx > 0 else self.bboxes
+            hit = pairBoxesIntersect(entryBoxes[nodeRows], queryBoxes[queryRows])
+            queryRows, nodeRows = queryRows[hit], nodeRows[hit]
+        sortedIdx = np.argsort(queryRows, kind='stable')
+        return queryRows[sortedIdx], nodeRows[sortedIdx]
+
+
+def parseCardinality(cardinality=None):
+    """
+    Parses a cardinality string such as "1..*", "0..0" or "2..5".
+    :return: (tuple) (minimum, maximum); maximum is None when unbounded.
+    """
+    if cardinality is None:
+        return 1, None
+    minCard, maxCard = cardinality.split('..')
+    return int(minCard), None if maxCard == '*' else int(maxCard)
+
+
+def matchesPattern(matrix, pattern):
+    """
+    Checks a DE-9IM matrix string (e.g. "FF1FF0102") against a pattern
+    (e.g. "T*F**F***"), as GEOSRelatePattern does.
+    """
+    for value, expected in zip(matrix, pattern):
+        if expected == '*':
+            continue
+        if expected == 'T':
+            if value == 'F':
+                return False
+        elif expected != value:
+            return False
+    return True
+
+
+def geometryDimension(geom):
+    """
+    :return: (int) 0 for points, 1 for lines and 2 for polygons.
+    """
+    return {
+        QgsWkbTypes.PointGeometry: 0,
+        QgsWkbTypes.LineGeometry: 1,
+        QgsWkbTypes.PolygonGeometry: 2
+    }.get(geom.type(), -1)
+
+
+def predicateFromMatrix(predicateMethod, matrix, dimA, dimB, predicateArgs=tuple()):
+    """
+    Answers a QgsGeometryEngine predicate from the DE-9IM matrix of the pair,
+    following the OGC definitions.
+    :param predicateMethod: (str) one of SpatialPredicateEngine.PREDICATE_METHODS;
+    :param matrix: (str) DE-9IM matrix of (A, B);
+    :param dimA: (int) dimension of A;
+    :param dimB: (int) dimension of B;
+    :param predicateArgs: (tuple) (pattern,) for relatePattern.
+    :return: (bool) predicate result.
+    """
+    if predicateMethod == 'relatePattern':
+        return matchesPattern(matrix, predicateArgs[0])
+    if predicateMethod == 'isEqual':
+        return matchesPattern(matrix, 'T*F**FFF*')
+    if predicateMethod == 'disjoint':
+        return matchesPattern(matrix, 'FF*FF****')
+    if predicateMethod == 'intersects':
+        return not matchesPattern(matrix, 'FF*FF****')
+    if predicateMethod == 'touches':
+        if dimA == 0 and dimB == 0:
+            return False
+        return any(
+            matchesPattern(matrix, pattern) \
+                for pattern in ('FT*******', 'F**T*****', 'F***T****')
+        )
+    if predicateMethod == 'within':
+        return matchesPattern(matrix, 'T*F**F***')
+    if predicateMethod == 'contains':
+        return matchesPattern(matrix, 'T*****FF*')
+    if predicateMethod == 'crosses':
+        if dimA < dimB:
+            return matchesPattern(matrix, 'T*T******')
+        if dimA > dimB:
+            return matchesPattern(matrix, 'T*****T**')
+        return dimA == 1 and matchesPattern(matrix, '0********')
+    if predicateMethod == 'overlaps':
+        if dimA != dimB:
+            return False
+        return matchesPattern(matrix, '1*T***T**' if dimA == 1 else 'T*T***T**')
+    raise NotImplementedError(
+        'Invalid predicate method ({0}).'.format(predicateMethod))
+
+
+class RelationMatrixCache(object):
+    """
+    LRU of DE-9IM matrices of (feature of A, feature of B) pairs. When many
+    predicates compare the same pair of layers, the matrix of each candidate
+    pair is computed once (QgsGeometryEngine.relate) and every predicate and
+    DE-9IM pattern is answered from it.
+    """
+    def __init__(self, maxSize=500000):
+        self.maxSize = maxSize
+        self.matrixDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.matrixDict)
+
+    def get(self, key):
+        with self._lock:
+            matrix = self.matrixDict.get(key)
+            if matrix is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.matrixDict.move_to_end(key)
+            return matrix
+
+    def put(self, key, matrix):
+        with self._lock:
+            self.matrixDict[key] = matrix
+            self.matrixDict.move_to_end(key)
+            while len(self.matrixDict) > self.maxSize:
+                self.matrixDict.popitem(last=False)
+
+    def relate(self, fidA, fidB, engineFactory, geomB):
+        """
+        Gets the DE-9IM matrix of (fidA, fidB), computing it if needed.
+        :param engineFactory: (callable) returns the QgsGeometryEngine of A;
+        :param geomB: (QgsGeometry) geometry of B.
+        :return: (str) DE-9IM matrix.
+        """
+        key = (fidA, fidB)
+        matrix = self.get(key)
+        if matrix is None:
+            matrix = engineFactory().relate(geomB.constGet())
+            self.put(key, matrix)
+        return matrix
+
+
+class SpatialPredicateEngine(object):
+    """
+    Evaluates spatial predicates of the features of a layer A against the
+    features of a layer B. B is read only once (geometries and bounding
+    boxes), indexed with a STR packed R-tree and shared by every evaluation;
+    each feature of A is prepared once and tested against its candidates on
+    a pool of threads.
+
+    Cardinality is checked while the candidates are tested: as soon as a
+    feature is known to comply with an unbounded cardinality ("n..*") the
+    remaining candidates are skipped. Matches are only kept for the features
+    that offend the cardinality, as they are needed to build the flags.
+    """
+    PREDICATE_METHODS = (
+        'isEqual', 'disjoint', 'intersects', 'touches', 'crosses', 'within',
+        'overlaps', 'contains', 'relatePattern'
+    )
+
+    def __init__(self, layerB, cacheStore=None, feedback=None, maxWorkers=None, chunkSize=64):
+        """
+        :param layerB: (QgsVectorLayer) layer compared against;
+        :param cacheStore: (GeometryCacheStore) if given, the geometries of
+            layerB are taken from this store;
+        :param feedback: (QgsProcessingFeedback) feedback used while reading
+            layerB;
+        :param maxWorkers: (int) number of threads;
+        :param chunkSize: (int) number of features of A evaluated per task.
+        """
+        self.geometryCache = cacheStore.getLayerCache(layerB, feedback=feedback) \
+            if cacheStore is not None else LayerGeometryCache.fromLayer(layerB, feedback=feedback)
+        self.index = STRPackedIndex(self.geometryCache.bboxes)
+        self.idList = self.geometryCache.ids.tolist()
+        self.geometryList = [
+            self.geometryCache.geometry(fid) for fid in self.idList
+        ]
+        self.dimensionList = [geometryDimension(geom) for geom in self.geometryList]
+        self.maxWorkers = maxWorkers
+        self.chunkSize = chunkSize
+
+    def geometryB(self, fidB):
+        return self.geometryList[self.geometryCache.rowDict[fidB]]
+
+    def evaluateBatch(self, predicateMethod, predicateArgs, minCard, maxCard, relationCache, batch):
+        """
+        Tests a batch of features of A. Candidate pairs of the whole batch
+        are generated at once from the packed index and each feature of A is
+        prepared only once.
+        :param batch: (list-of-tuple) (fidA, geomA) items.
+        :return: (list-of-tuple) (fidA, geomA, matches) of the features that
+            offend the cardinality.
+        """
+        batch = [(fid, geom) for fid, geom in batch if not (geom.isNull() or geom.isEmpty())]
+        if not batch:
+            return []
+        queryBoxes = np.array([
+            (bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum())
+            for bbox in (geom.boundingBox() for _, geom in batch)
+        ], dtype=np.float64)
+        queryRows, itemRows = self.index.queryPairs(queryBoxes)
+        splitIdx = np.cumsum(np.bincount(queryRows, minlength=len(batch)))[:-1]
+        output = []
+        for (fidA, geomA), candidateRows in zip(batch, np.split(itemRows, splitIdx)):
+            matches = self.testCandidates(
+                fidA, geomA, candidateRows, predicateMethod, predicateArgs,
+                minCard, maxCard, relationCache=relationCache)
+            if matches is not None:
+                output.append((fidA, geomA, matches))
+        return output
+
+    def predicateTest(self, fidA, geomA, predicateMethod, predicateArgs, relationCache=None):
+        """
+        Builds the test of a feature of A against the rows of B: a prepared
+        GEOS predicate or, when relationCache is given, the answer read from
+        the (cached) DE-9IM matrix of the pair.
+        :return: (function) test(row) -> bool.
+        """
+        if relationCache is None:
+            engine = QgsGeometry.createGeometryEngine(geomA.constGet())
+            engine.prepareGeometry()
+            method = getattr(engine, predicateMethod)
+            return lambda row: method(self.geometryList[row].constGet(), *predicateArgs)
+        engineList = []
+        def engineFactory():
+            # the engine of A is only built if a matrix is not cached yet
+            if not engineList:
+                engineList.append(QgsGeometry.createGeometryEngine(geomA.constGet()))
+            return engineList[0]
+        dimA = geometryDimension(geomA)
+        return lambda row: predicateFromMatrix(
+            predicateMethod,
+            relationCache.relate(
+                fidA, self.idList[row], engineFactory, self.geometryList[row]),
+            dimA,
+            self.dimensionList[row],
+            predicateArgs
+        )
+
+    def testCandidates(self, fidA, geomA, candidateRows, predicateMethod, predicateArgs, minCard, maxCard, relationCache=None):
+        """
+        :return: (list-of-int) sorted ids of the matched features of B if geomA
+            offends the cardinality, None otherwise.
+        """
+        if maxCard is None and minCard <= 0:
+            return None
+        test = self.predicateTest(
+            fidA, geomA, predicateMethod, predicateArgs, relationCache=relationCache)
+        matches = []
+        for row in candidateRows.tolist():
+            if not test(row):
+                continue
+            matches.append(self.idList[row])
+            if maxCard is None and len(matches) >= minCard:
+                # any other match would not change the result
+                return None
+        count = len(matches)
+        if count >= minCard and (maxCard is None or count <= maxCard):
+            return None
+        return sorted(matches)
+
+    def evaluate(self, featuresA, predicateMethod, cardinality=None, predicateArgs=None, total=None, feedback=None, relationCache=None):
+        """
+        Evaluates a predicate for each feature of A.
+        :param featuresA: (iterable) QgsFeature of layer A;
+        :param predicateMethod: (str) QgsGeometryEngine method, one of
+            PREDICATE_METHODS;
+        :param cardinality: (str) cardinality string (default "1..*");
+        :param predicateArgs: (tuple) extra arguments of the method (e.g. the
+            DE-9IM mask of relatePattern);
+        :param total: (int) number of features of A, for progress;
+        :param feedback: (QgsProcessingFeedback) processing feedback;
+        :param relationCache: (RelationMatrixCache) if given, predicates are
+            answered from the DE-9IM matrices kept on it for this pair of
+            layers, instead of prepared GEOS predicates.
+        :return: (generator) (fidA, geomA, matchedIdsB) of the features that
+            offend the cardinality, in the order of featuresA.
+        """
+        if predicateMethod not in self.PREDICATE_METHODS:
+            raise NotImplementedError(
+                'Invalid predicate method ({0}).'.format(predicateMethod))
+        minCard, maxCard = parseCardinality(cardinality)
+        predicateArgs = tuple() if predicateArgs is None else tuple(predicateArgs)
+        # each task evaluates a whole batch, so the executor's chunks have a
+        # single item
+        executor = BoundedChunkExecutor(
+            maxWorkers=self.maxWorkers, chunkSize=1, feedback=feedback)
+        evaluateLambda = lambda batch: self.evaluateBatch(
+            predicateMethod, predicateArgs, minCard, maxCard, relationCache, batch)
+        items = ((feat.id(), feat.geometry()) for feat in featuresA)
+        batches = iter(lambda: list(islice(items, self.chunkSize)), [])
+        nBatches = math.ceil(total / self.chunkSize) if total else None
+        for output in executor.map(evaluateLambda, batches, ordered=True, total=nBatches):
+            for offense in output:
+                yield offense
@@ -44,6 +44,8 @@ from qgis.PyQt.QtGui import QRegExpValidator
 from .featureHandler import FeatureHandler
 from .geometryHandler import GeometryHandler
 from .layerHandler import LayerHandler
+from .geometryCache import geometryCacheStoreForContext
+from .spatialPredicateEngine import RelationMatrixCache, SpatialPredicateEngine
 from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
 
 class SpatialRelationsHandler(QObject):
@@ -709,7 +711,7 @@ class SpatialRelationsHandler(QObject):
         """
         pass
     
-    def validateSpatialRelations(self, ruleList, createSpatialIndex=True, feedback=None):
+    def validateSpatialRelations(self, ruleList, createSpatialIndex=True, feedback=None, cacheStore=None):
         """
         1. iterate over rule list and get all layers.
         2. build spatial index
@@ -718,7 +720,8 @@ class SpatialRelationsHandler(QObject):
         multiStepFeedback = QgsProcessingMultiStepFeedback(4, feedback) if feedback is not None else None
         if multiStepFeedback is not None:
             multiStepFeedback.setCurrentStep(0)
-        spatialDict = self.buildSpatialDictFromRuleList(ruleList, feedback=multiStepFeedback)
+        spatialDict = self.buildSpatialDictFromRuleList(
+            ruleList, feedback=multiStepFeedback, cacheStore=cacheStore)
         if multiStepFeedback is not None:
             multiStepFeedback.setCurrentStep(1)
         spatialRuleDict = self.buildSpatialRuleDict(ruleList, feedback=multiStepFeedback)
@@ -734,8 +737,9 @@ class SpatialRelationsHandler(QObject):
         flagList = self.identifyInvalidRelations(spatialDict, spatialRuleDict, feedback=multiStepFeedback)
         return flagList
 
-    def buildSpatialDictFromRuleList(self, ruleList, feedback=None):
+    def buildSpatialDictFromRuleList(self, ruleList, feedback=None, cacheStore=None):
         """
+        Unfiltered layers have their index taken from cacheStore, if given.
         returns {
             'key formed by layer name and filter' : {
                 'spatial_index' : QgsSpatialIndex
@@ -756,7 +760,8 @@ class SpatialRelationsHandler(QObject):
                 if key not in spatialDict:
                     spatialDict[key]['spatial_index'], spatialDict[key]['feature_id_dict'] = self.layerHandler.buildSpatialIndexAndIdDict(
                         inputLyr=rule['input_layer'],
-                        featureRequest=rule['input_layer_filter']
+                        featureRequest=rule['input_layer_filter'] or None,
+                        cacheStore=cacheStore
                     )
             if feedback is not None:
                 feedback.setProgress(current * progressStep)
@@ -949,61 +954,8 @@ class SpatialRelationsHandler(QObject):
         """
         return {i: p for i, p in enumerate(self.__predicates)}
 
-    def getCardinalityTest(self, cardinality=None):
-        """
-        Parses cardinality string and gets a callable to check if the iterable
-        tested (e.g. list of features) complies with the cardinality.
-        :param cardinality: (str) cardinality string to be tested against.
-        :return: (function) testing method to be applied to an iterable.
-        """
-        if cardinality is None:
-            # default is "1..*"
-            return lambda x: len(x) > 0
-        min_card, max_card = cardinality.split('..')
-        if max_card == '*':
-            return lambda x: len(x) >= int(min_card)
-        elif min_card == max_card:
-            return lambda x: len(x) == int(min_card)
-        else:
-            return lambda x: len(x) >= int(min_card) and len(x) <= int(max_card)
-                
-    def testPredicate(self, predicate, engine, targetGeometries):
-        """
-        Applies a predicate test to a given feature from a list of features.
-        :param predicate: (int) topological relation code to be tested against.
-        :param engine: (QgsGeometryEngine) reference feature's QGIS structure
-                       for based on geometries for faster spatial operations.
-        :param targetGeometries: (dict) maps feature ids to their geometries
-                                 that will be tested.
-        :param cardinality: (str) cardinality string to be tested against.
-        :return: (set-of-int) feature IDs for those that the geometries do
-                 comply with given predicate/cardinality. 
-        """
-        # negatives are disregarded. method simply apply the predicate comparison
-        positives = set()
-        negatives = set()
-        methods = {
-            self.EQUALS : "isEqual",
-            self.DISJOINT : "disjoint",
-            self.INTERSECTS : "intersects",
-            self.TOUCHES : "touches",
-            self.CROSSES : "crosses",
-            self.WITHIN : "within",
-            self.OVERLAPS : "overlaps",
-            self.CONTAINS : "contains"
-        }
-        if predicate not in methods:
-            raise NotImplementedError(
-                self.tr("Invalid predicate ({0}).").format(predicate)
-            )
-        predicateMethod = methods[predicate]
-        for test_fid, test_geom in targetGeometries.items():
-            if getattr(engine, predicateMethod)(test_geom.constGet()):
-                positives.add(test_fid)
-        return positives
-
     def checkPredicate(self, layerA, layerB, predicate, cardinality, ctx=None,
-                       feedback=None):
+                       feedback=None, engine=None, relationCache=None):
         """
         Checks if a duo of layers comply with a spatial predicate at a given
         cardinality.
@@ -1016,13 +968,16 @@ class SpatialRelationsHandler(QObject):
         :param ctx: (QgsProcessingContext) processing context in which algorithm
                     should be executed.
         :param feedback: (QgsFeedback) QGIS progress tracking component.
+        :param engine: (SpatialPredicateEngine) engine built on layerB. If
+                       not given, a new one is built.
+        :param relationCache: (RelationMatrixCache) DE-9IM matrices of the
+                              pairs of features of layerA and layerB, shared
+                              by the rules that compare the same layers.
         :return: (dict) a map from offended feature IDs to the list of its
                 offending features.
         """
         ctx = ctx or QgsProcessingContext()
         feedback = feedback or QgsProcessingFeedback()
-        size = layerA.featureCount()
-        stepSize = 100 / size if size else 0
         flags = defaultdict(list)
         predicates = self.availablePredicates()
         denials = [
@@ -1059,47 +1014,54 @@ class SpatialRelationsHandler(QObject):
             getFlagGeometryMethod = lambda geom, _: geom
         else:
             getFlagGeometryMethod = lambda geomA, geomB: geomA.intersection(geomB)
-        testingMethod = self.getCardinalityTest(cardinality)
-        for step, featA in enumerate(layerA.getFeatures()):
-            if feedback.isCanceled():
-                break
-            geomA = featA.geometry()
-            engine = QgsGeometry.createGeometryEngine(geomA.constGet())
-            engine.prepareGeometry()
-            geometriesB = {
-                f.id(): f.geometry() \
-                    for f in layerB.getFeatures(geomA.boundingBox())
-            }
-            positives = self.testPredicate(predicate, engine, geometriesB)
-            if predicate == self.DISJOINT:
-                # disjoint comparison wants those that are NOT disjoint to flag
-                positives = set(geometriesB.keys()) - positives
-            if not testingMethod(positives):
-                fidA = featA.id()
-                size = len(positives)
-                if not size:
-                    flags[fidA].append({
-                        "text": predicateFlagText.format(fid_a=fidA, size=0),
-                        "geom": geomA
-                    })
-                    continue
-                if size > 1:
-                    predicateFlagText_ = "{0} (IDs {1})"\
-                        .format(predicateFlagText, ", ".join(map(str, positives)))
-                elif size == 1:
-                    predicateFlagText_ = "{0} (ID {1})"\
-                        .format(predicateFlagText, str(set(positives).pop()))
-                for fidB in positives:
-                    flags[fidA].append({
-                        "text": predicateFlagText_\
-                                    .format(fid_a=fidA, size=size),
-                        "geom": getFlagGeometryMethod(geomA, geometriesB[fidB])
-                    })
-            feedback.setProgress(stepSize * (step + 1))
+        methods = {
+            self.EQUALS : "isEqual",
+            # disjoint comparison wants those that are NOT disjoint to flag
+            self.DISJOINT : "intersects",
+            self.INTERSECTS : "intersects",
+            self.TOUCHES : "touches",
+            self.CROSSES : "crosses",
+            self.WITHIN : "within",
+            self.OVERLAPS : "overlaps",
+            self.CONTAINS : "contains"
+        }
+        if predicate not in methods:
+            raise NotImplementedError(
+                self.tr("Invalid predicate ({0}).").format(predicate)
+            )
+        engine = engine or SpatialPredicateEngine(layerB)
+        offenses = engine.evaluate(
+            layerA.getFeatures(),
+            methods[predicate],
+            cardinality=cardinality,
+            total=layerA.featureCount(),
+            feedback=feedback,
+            relationCache=relationCache
+        )
+        for fidA, geomA, positives in offenses:
+            size = len(positives)
+            if not size:
+                flags[fidA].append({
+                    "text": predicateFlagText.format(fid_a=fidA, size=0),
+                    "geom": geomA
+                })
+                continue
+            if size > 1:
+                predicateFlagText_ = "{0} (IDs {1})"\
+                    .format(predicateFlagText, ", ".join(map(str, positives)))
+            elif size == 1:
+                predicateFlagText_ = "{0} (ID {1})"\
+                    .format(predicateFlagText, str(positives[0]))
+            for fidB in positives:
+                flags[fidA].append({
+                    "text": predicateFlagText_\
+                                .format(fid_a=fidA, size=size),
+                    "geom": getFlagGeometryMethod(geomA, engine.geometryB(fidB))
+                })
         return {fid: flag for fid, flag in flags.items() if flag}
 
     def checkDE9IM(self, layerA, layerB, mask, cardinality, ctx=None,
-                   feedback=None):
+                   feedback=None, engine=None, relationCache=None):
         """
         Applies a DE-9IM mask to compare the features of between and checks
         whether the occurrence limits are respected.
@@ -1113,12 +1075,15 @@ class SpatialRelationsHandler(QObject):
         :param ctx: (QgsProcessingContext) processing context in which algorithm
                     should be executed.
         :param feedback: (QgsFeedback) QGIS progress tracking component.
+        :param engine: (SpatialPredicateEngine) engine built on layerB. If
+                       not given, a new one is built.
+        :param relationCache: (RelationMatrixCache) DE-9IM matrices of the
+                              pairs of features of layerA and layerB, shared
+                              by the rules that compare the same layers.
         :return: (dict) a map from offended to flag text and its geometry.
         """
         ctx = ctx or QgsProcessingContext()
         feedback = feedback or QgsProcessingFeedback()
-        testingMethod = self.getCardinalityTest(cardinality)
-        candidates = defaultdict(list)
         flags = defaultdict(list)
         predicateFlagText = self.tr("feature ID {{fid_a}} from {layer_a} "
                                         "has {{size}} occurrences using the "
@@ -1127,43 +1092,41 @@ class SpatialRelationsHandler(QObject):
                                 .format(layer_a=layerA.name(),
                                         mask=mask,
                                         layer_b=layerB.name())
-        size = layerA.featureCount()
-        stepSize = 100 / size if size else 0
         iteratorA = layerA.getFeatures() if isinstance(layerA, QgsVectorLayer) else layerA
-        for step, featA in enumerate(iteratorA):
-            if feedback.isCanceled():
-                break
-            fidA = featA.id()
-            geomA = featA.geometry()
-            engine = QgsGeometry.createGeometryEngine(geomA.constGet())
-            for featB in layerB.getFeatures(geomA.boundingBox()):
-                if engine.relatePattern(featB.geometry().constGet(), mask):
-                    candidates[fidA].append(featB.id())
-            if not testingMethod(candidates[fidA]):
-                # if the mask has an 'invalid' count of occurrences, it is a flag!
-                size = len(candidates[fidA])
-                if not size:
-                    flags[fidA].append({
-                        "text": predicateFlagText.format(fid_a=fidA, size=0),
-                        "geom": geomA
-                    })
-                    continue
-                if size > 1:
-                    predicateFlagText_ = "{0} (IDs {1})".format(
-                        predicateFlagText,
-                        ", ".join(map(str, candidates[fidA]))
-                    )
-                elif size == 1:
-                    predicateFlagText_ = "{0} (ID {1})".format(
-                        predicateFlagText.replace("occurrences", "occurrence"),
-                        str(set(candidates[fidA]).pop())
-                    )
+        engine = engine or SpatialPredicateEngine(layerB)
+        offenses = engine.evaluate(
+            iteratorA,
+            "relatePattern",
+            cardinality=cardinality,
+            predicateArgs=(mask,),
+            total=layerA.featureCount() if isinstance(layerA, QgsVectorLayer) else None,
+            feedback=feedback,
+            relationCache=relationCache
+        )
+        for fidA, geomA, candidates in offenses:
+            # if the mask has an 'invalid' count of occurrences, it is a flag!
+            size = len(candidates)
+            if not size:
                 flags[fidA].append({
-                    "text": predicateFlagText_\
-                                .format(fid_a=fidA, size=size),
+                    "text": predicateFlagText.format(fid_a=fidA, size=0),
                     "geom": geomA
                 })
-            feedback.setProgress(stepSize * (step + 1))
+                continue
+            if size > 1:
+                predicateFlagText_ = "{0} (IDs {1})".format(
+                    predicateFlagText,
+                    ", ".join(map(str, candidates))
+                )
+            elif size == 1:
+                predicateFlagText_ = "{0} (ID {1})".format(
+                    predicateFlagText.replace("occurrences", "occurrence"),
+                    str(candidates[0])
+                )
+            flags[fidA].append({
+                "text": predicateFlagText_\
+                            .format(fid_a=fidA, size=size),
+                "geom": geomA
+            })
         return flags
 
     def setupLayer(self, layerName, exp, ctx=None, feedback=None):
@@ -1197,60 +1160,167 @@ class SpatialRelationsHandler(QObject):
             layer.setName(layerName)
         return layer
 
-    def enforceRule(self, rule, ctx=None, feedback=None):
+    def ruleInputKey(self, layerName, exp):
         """
-        Applies a given set of spatial restrictions to a duo of layers.
-        :param rule: (SpatialRule) objetc containing all properties for
-                     the feature comparison.
-        :param ctx: (QgsProcessingContext) processing context in which
-                    algorithm should be executed.
-        :param feedback: (QgsFeedback) QGIS progress tracking component.
-        :return: (dict) a map from offended feature's ID to offenders feature
-                 set.
+        Identifies a layer as it is compared by the rules: the same layer,
+        filtered by the same expression and set on the same CRS is only
+        prepared once for a whole rule set.
+        :param layerName: (str) layer's name on canvas.
+        :param exp: (str) filtering expression.
+        :return: (tuple) (layer name, expression, target CRS auth id).
+        """
+        return (layerName, exp or '', QgsProject.instance().crs().authid())
+
+    def planRules(self, ruleList):
+        """
+        Deduplicates the inputs of a set of rules.
+        :param ruleList: (list-of-SpatialRule) rules to be planned.
+        :return: (dict) {
+            'rules': [(rule, keyA, keyB)] for each valid rule,
+            'skipped': [(rule, error message)] for each invalid rule,
+            'inputs': {key: {'usedAsA': count, 'usedAsB': count}},
+            'pairs': {(keyA, keyB): number of rules comparing them},
+            'references': number of layer references made by the rules,
+            'reuseFactor': references / distinct inputs
+        }
         """
-        lh = LayerHandler()
-        ctx = ctx or QgsProcessingContext()
-        feedback = feedback or QgsProcessingFeedback()
-        # setup step is ignored for the enforcing rule progress tracking
-        layerA = self.setupLayer(rule.layerA(), rule.filterA(), ctx, None)
-        layerB = self.setupLayer(rule.layerB(), rule.filterB(), ctx, None)
-        method = self.checkDE9IM if rule.useDE9IM() else self.checkPredicate
-        return method(
-            layerA, layerB, rule.predicate(), rule.cardinality(), ctx, feedback
-        )
+        plan = {
+            'rules': [],
+            'skipped': [],
+            'inputs': OrderedDict(),
+            'pairs': OrderedDict(),
+            'references': 0,
+            'reuseFactor': 0
+        }
+        for rule in ruleList:
+            if not rule.isValid():
+                plan['skipped'].append((rule, rule.validate(checkLoaded=True)))
+                continue
+            keyA = self.ruleInputKey(rule.layerA(), rule.filterA())
+            keyB = self.ruleInputKey(rule.layerB(), rule.filterB())
+            for key, usage in ((keyA, 'usedAsA'), (keyB, 'usedAsB')):
+                if key not in plan['inputs']:
+                    plan['inputs'][key] = {'usedAsA': 0, 'usedAsB': 0}
+                plan['inputs'][key][usage] += 1
+            plan['pairs'][(keyA, keyB)] = plan['pairs'].get((keyA, keyB), 0) + 1
+            plan['rules'].append((rule, keyA, keyB))
+            plan['references'] += 2
+        if plan['inputs']:
+            plan['reuseFactor'] = plan['references'] / len(plan['inputs'])
+        return plan
+
+    def rulesPlanReport(self, plan):
+        """
+        Builds a readable (dry-run) report of a rule plan.
+        :param plan: (dict) output of planRules.
+        :return: (str) report text.
+        """
+        nIndexes = sum(1 for usage in plan['inputs'].values() if usage['usedAsB'])
+        lines = [
+            self.tr('{0} rule(s) to be checked, {1} skipped.').format(
+                len(plan['rules']), len(plan['skipped'])),
+            self.tr('{0} layer reference(s) over {1} distinct input(s) '
+                    '(reuse factor {2:.2f}); {3} spatial index(es) to be '
+                    'built.').format(
+                        plan['references'], len(plan['inputs']),
+                        plan['reuseFactor'], nIndexes),
+            self.tr('{0} pair(s) of layers compared by more than one rule '
+                    '(DE-9IM matrices computed once per pair of '
+                    'features).').format(
+                        sum(1 for count in plan['pairs'].values() if count > 1))
+        ]
+        for (layerName, exp, crs), usage in plan['inputs'].items():
+            lines.append(
+                self.tr('  - {0} [{1}] ({2}): used {3} time(s) as layer A '
+                        'and {4} time(s) as layer B').format(
+                            layerName, exp or self.tr('no filter'), crs,
+                            usage['usedAsA'], usage['usedAsB'])
+            )
+        for rule, error in plan['skipped']:
+            lines.append(
+                self.tr('  - rule "{0}" will be skipped: {1}').format(
+                    rule.ruleName(), error)
+            )
+        return '\n'.join(lines)
 
-    def enforceRules(self, ruleList, ctx=None, feedback=None):
+    def enforceRules(self, ruleList, ctx=None, feedback=None, dryRun=False):
         """
         Applies a set of spatial rules to current active layers on canvas.
+        The inputs of all rules are planned first, so that each (layer,
+        filter, CRS) is filtered, reprojected and indexed only once and
+        released after the last rule that uses it.
         :param ruleList: (list-of-SpatialRule) all rules that should be applied
                          to canvas.
         :param ctx: (QgsProcessingContext) processing context in which algorithm
                     should be executed.
         :param feedback: (QgsFeedback) QGIS progress tracking component.
+        :param dryRun: (bool) if True, only the plan report is pushed to the
+                       feedback and no rule is checked.
         :return: (dict) a map of offended rules to its flags.
         """
         out = dict()
         ctx = ctx or QgsProcessingContext()
-        size = len(ruleList)
         feedback = feedback or QgsProcessingFeedback()
+        plan = self.planRules(ruleList)
+        feedback.pushInfo(self.rulesPlanReport(plan))
+        if dryRun:
+            return out
+        for rule, error in plan['skipped']:
+            feedback.pushInfo(
+                self.tr('Rule {0} is invalid and will be skipped. '
+                        'Error: {1}').format(rule.ruleName(), error)
+            )
+        # number of rules that still need each input
+        pendingUses = {
+            key: usage['usedAsA'] + usage['usedAsB'] \
+                for key, usage in plan['inputs'].items()
+        }
+        pendingPairUses = dict(plan['pairs'])
+        layerDict = dict()
+        engineDict = dict()
+        cacheStore = geometryCacheStoreForContext(ctx)
+        relationCacheDict = {
+            pair: RelationMatrixCache() \
+                for pair, count in plan['pairs'].items() if count > 1
+        }
+        def getLayer(key):
+            if key not in layerDict:
+                # setup step is ignored for the enforcing rule progress tracking
+                layerDict[key] = self.setupLayer(key[0], key[1], ctx, None)
+            return layerDict[key]
+        def release(key):
+            pendingUses[key] -= 1
+            if pendingUses[key] == 0:
+                layerDict.pop(key, None)
+                engineDict.pop(key, None)
+        size = len(plan['rules'])
         multiStepFeedback = QgsProcessingMultiStepFeedback(size, feedback)
-        for idx, rule in enumerate(ruleList):
+        for idx, (rule, keyA, keyB) in enumerate(plan['rules']):
             ruleName = rule.ruleName()
             if multiStepFeedback.isCanceled():
                 break
+            multiStepFeedback.setCurrentStep(idx)
             multiStepFeedback.pushInfo(
                 self.tr('Checking rule "{0}"... [{1}/{2}]').format(
                     ruleName, idx + 1, size
                 )
             )
-            if not rule.isValid():
-                multiStepFeedback.pushInfo(
-                    self.tr('Rule {0} is invalid and will be skipped. '
-                            'Error: {1}').format(
-                                ruleName, rule.validate(checkLoaded=True))
-                )
-                continue
-            flags = self.enforceRule(rule, ctx, multiStepFeedback)
+            layerA = getLayer(keyA)
+            layerB = getLayer(keyB)
+            if keyB not in engineDict:
+                engineDict[keyB] = SpatialPredicateEngine(
+                    layerB, cacheStore=cacheStore)
+            method = self.checkDE9IM if rule.useDE9IM() else self.checkPredicate
+            flags = method(
+                layerA, layerB, rule.predicate(), rule.cardinality(), ctx,
+                multiStepFeedback, engine=engineDict[keyB],
+                relationCache=relationCacheDict.get((keyA, keyB))
+            )
+            release(keyA)
+            release(keyB)
+            pendingPairUses[(keyA, keyB)] -= 1
+            if pendingPairUses[(keyA, keyB)] == 0:
+                relationCacheDict.pop((keyA, keyB), None)
             if flags:
                 if ruleName in out:
                     previous = out[ruleName]
@@ -1262,16 +1332,13 @@ class SpatialRelationsHandler(QObject):
                 else:
                     out[ruleName] = flags
                 multiStepFeedback.reportError(
-                    self.tr('Rule "{0}" raised flags\n').format(
-                        ruleName, idx + 1, size
-                    )
+                    self.tr('Rule "{0}" raised flags\n').format(ruleName)
                 )
             else:
                 multiStepFeedback.pushDebugInfo(
                     self.tr('Rule "{0}" did not raise any flags\n')
                     .format(ruleName)
                 )
-            multiStepFeedback.setCurrentStep(idx + 1)
         return out
 
 
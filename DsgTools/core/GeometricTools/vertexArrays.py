@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import struct
+
+import numpy as np
+
+from qgis.core import QgsFeatureRequest, QgsWkbTypes
+
+# WKB geometry type codes (ISO dimension offsets and EWKB flags are removed)
+WKB_POINT, WKB_LINESTRING, WKB_POLYGON = 1, 2, 3
+WKB_MULTIPOINT, WKB_MULTILINESTRING, WKB_MULTIPOLYGON, WKB_COLLECTION = 4, 5, 6, 7
+EWKB_Z, EWKB_M, EWKB_SRID = 0x80000000, 0x40000000, 0x20000000
+
+
+def wkbVertexArray(wkb):
+    """
+    Reads the vertices of a WKB (points, lines, polygons and their
+    collections) straight into NumPy, without building one object per vertex.
+    :param wkb: (bytes) ISO WKB or EWKB;
+    :return: (tuple) (np.ndarray) (n, dim) float64 coordinates, (list-of-int)
+        number of vertices of each point, line or ring, in the WKB order and
+        (int) dimension (2, 3 or 4). Z comes before M when both are present.
+    """
+    wkb = bytes(wkb)
+    blockList, ringSizes, dims = [], [], set()
+
+    def readGeometry(offset):
+        endian = '<' if wkb[offset] == 1 else '>'
+        wkbType, = struct.unpack_from(endian + 'I', wkb, offset + 1)
+        offset += 5
+        if wkbType & EWKB_SRID:
+            offset += 4
+        hasZ = bool(wkbType & EWKB_Z) or (wkbType & 0xFFFF) // 1000 in (1, 3)
+        hasM = bool(wkbType & EWKB_M) or (wkbType & 0xFFFF) // 1000 in (2, 3)
+        baseType = (wkbType & 0xFFFF) % 1000
+        dim = 2 + hasZ + hasM
+        dtype = np.dtype(endian + 'f8')
+
+        def readPoints(offset, count):
+            dims.add(dim)
+            blockList.append(
+                np.frombuffer(wkb, dtype=dtype, count=count * dim, offset=offset).reshape(count, dim)
+            )
+            ringSizes.append(count)
+            return offset + 8 * dim * count
+
+        if baseType == WKB_POINT:
+            return readPoints(offset, 1)
+        count, = struct.unpack_from(endian + 'I', wkb, offset)
+        offset += 4
+        if baseType == WKB_LINESTRING:
+            return readPoints(offset, count)
+        if baseType == WKB_POLYGON:
+            for _ in range(count):
+                ringCount, = struct.unpack_from(endian + 'I', wkb, offset)
+                offset = readPoints(offset + 4, ringCount)
+            return offset
+        if baseType in (WKB_MULTIPOINT, WKB_MULTILINESTRING, WKB_MULTIPOLYGON, WKB_COLLECTION):
+            for _ in range(count):
+                offset = readGeometry(offset)
+            return offset
+        raise ValueError('Unsupported WKB geometry type: {0}'.format(wkbType))
+
+    if wkb:
+        readGeometry(0)
+    dim = max(dims) if dims else 2
+    if len(dims) > 1:
+        # mixed dimensions only happen on collections; missing ordinates are NaN
+        blockList = [
+            np.hstack((block, np.full((len(block), dim - block.shape[1]), np.nan))) \
+                if block.shape[1] < dim else block for block in blockList
+        ]
+    coords = np.concatenate(blockList).astype(np.float64) if blockList \
+        else np.zeros((0, dim), dtype=np.float64)
+    return coords, ringSizes, dim
+
+
+def geometryVertexArray(geom):
+    """
+    Vertices of a QgsGeometry as NumPy arrays. Curved geometries are read
+    vertex by vertex, so that their control points are returned as
+    QgsGeometry.vertices() does.
+    :param geom: (QgsGeometry) input geometry.
+    :return: (tuple) same as wkbVertexArray.
+    """
+    if geom.isNull() or geom.isEmpty():
+        return np.zeros((0, 2), dtype=np.float64), [], 2
+    if not QgsWkbTypes.isCurvedType(geom.wkbType()):
+        return wkbVertexArray(geom.asWkb())
+    hasZ, hasM = geom.constGet().is3D(), geom.constGet().isMeasure()
+    coordList = []
+    for vertex in geom.vertices():
+        coord = [vertex.x(), vertex.y()]
+        if hasZ:
+            coord.append(vertex.z())
+        if hasM:
+            coord.append(vertex.m())
+        coordList.append(coord)
+    dim = 2 + hasZ + hasM
+    return np.array(coordList, dtype=np.float64).reshape(-1, dim), [len(coordList)], dim
+
+
+def featureVertexArrays(featureIterator, feedback=None, total=None):
+    """
+    Reads the vertices of every feature into a single array.
+    :param featureIterator: (iterable) QgsFeature iterator;
+    :param feedback: (QgsProcessingFeedback) processing feedback;
+    :param total: (int) number of features, used to report progress.
+    :return: (tuple) (np.ndarray) (n, 4) float64 coordinates (x, y, z, m;
+        missing ordinates are NaN), (np.ndarray) int64 index of the feature
+        of each vertex, (list-of-int) feature ids and (list-of-int) number of
+        vertices of each point, line or ring, in order.
+    """
+    size = 100/total if total else 0
+    blockList, groupList, featIds, ringSizes = [], [], [], []
+    for current, feat in enumerate(featureIterator):
+        if feedback is not None and feedback.isCanceled():
+            break
+        geom = feat.geometry()
+        coords, featRingSizes, dim = geometryVertexArray(geom)
+        if len(coords):
+            if dim < 4:
+                # keeps z before m, as in (x, y, z, m)
+                hasZ = QgsWkbTypes.hasZ(geom.wkbType())
+                full = np.full((len(coords), 4), np.nan)
+                full[:, :2] = coords[:, :2]
+                if dim == 3:
+                    full[:, 2 if hasZ else 3] = coords[:, 2]
+                coords = full
+            blockList.append(coords)
+            groupList.append(np.full(len(coords), len(featIds), dtype=np.int64))
+            ringSizes.extend(featRingSizes)
+        featIds.append(feat.id())
+        if feedback is not None and size:
+            feedback.setProgress(size * current)
+    if not blockList:
+        return np.zeros((0, 4)), np.zeros(0, dtype=np.int64), featIds, ringSizes
+    return np.concatenate(blockList), np.concatenate(groupList), featIds, ringSizes
+
+
+def layerVertexArrays(lyr, onlySelected=False, feedback=None):
+    """
+    Same as featureVertexArrays, reading the features of lyr without
+    attributes.
+    """
+    request = QgsFeatureRequest().setNoAttributes()
+    if onlySelected:
+        iterator, total = lyr.getSelectedFeatures(request), lyr.selectedFeatureCount()
+    else:
+        iterator, total = lyr.getFeatures(request), lyr.featureCount()
+    return featureVertexArrays(iterator, feedback=feedback, total=total)
+
+
+def denseRank(values):
+    """
+    Maps integer cell coordinates, and the ones of their neighbours, to
+    consecutive integers, so that cell keys can be combined without overflow.
+    :param values: (np.ndarray) int64 cell coordinates.
+    :return: (tuple) (dict) { offset : (np.ndarray) rank of values + offset }
+        for offsets -1, 0 and 1 and (int) number of distinct ranks.
+    """
+    distinct, inverse = np.unique(
+        np.concatenate((values - 1, values, values + 1)), return_inverse=True)
+    inverse = inverse.reshape(3, -1)
+    return {offset: inverse[idx] for idx, offset in enumerate((-1, 0, 1))}, len(distinct)
+
+
+def closeVertexMask(xy, searchRadius, groups=None, pairBudget=2000000, feedback=None):
+    """
+    Finds the vertices that have another vertex (of the same group) at a
+    distance smaller or equal to searchRadius. Vertices are bucketed into a
+    uniform grid whose cell size is searchRadius, so only the 3x3 cells
+    around each vertex are compared.
+    :param xy: (np.ndarray) (n, 2) float64 vertex coordinates;
+    :param searchRadius: (float) search distance;
+    :param groups: (np.ndarray) int64 group (e.g. feature) of each vertex.
+        Only vertices of the same group are compared. If None, every vertex
+        is compared to every other vertex;
+    :param pairBudget: (int) maximum number of candidate pairs evaluated at
+        once, which bounds the memory used on dense cells;
+    :param feedback: (QgsProcessingFeedback) processing feedback.
+    :return: (np.ndarray) boolean mask of the vertices that have a close
+        vertex.
+    """
+    nVertexes = len(xy)
+    mask = np.zeros(nVertexes, dtype=bool)
+    if nVertexes < 2 or searchRadius <= 0:
+        return mask
+    groups = np.zeros(nVertexes, dtype=np.int64) if groups is None else groups
+    cells = np.floor((xy - xy.min(axis=0)) / searchRadius).astype(np.int64)
+    span = cells.max(axis=0) + 3
+    if float(span[0]) * float(span[1]) < 2**62:
+        # cells are shifted by one so that the neighbour cells are not negative
+        xRank = {offset: cells[:, 0] + 1 for offset in (-1, 0, 1)}
+        yRank = {offset: cells[:, 1] + 1 for offset in (-1, 0, 1)}
+        shift, yCount = 1, int(span[1])
+    else:
+        xRank, _ = denseRank(cells[:, 0])
+        yRank, yCount = denseRank(cells[:, 1])
+        shift = 0
+    cellKey = lambda dx, dy, rows: (xRank[dx][rows] + shift * dx) * yCount + yRank[dy][rows] + shift * dy
+    # working on the vertices sorted by cell makes every neighbour key array
+    # sorted as well, which keeps the searches below cache friendly
+    order = np.argsort(cellKey(0, 0, slice(None)), kind='stable')
+    cellKeys, cellStart, cellCount = np.unique(
+        cellKey(0, 0, order), return_index=True, return_counts=True)
+    sortedXy, sortedGroups = xy[order], groups[order]
+    radius2 = searchRadius * searchRadius
+    sortedMask = np.zeros(nVertexes, dtype=bool)
+    chunkSize = max(1, pairBudget // 9)
+    stepSize = 100/nVertexes
+    for chunkStart in range(0, nVertexes, chunkSize):
+        if feedback is not None and feedback.isCanceled():
+            break
+        chunk = np.arange(chunkStart, min(chunkStart + chunkSize, nVertexes))
+        rows = order[chunk]
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                neighborKeys = cellKey(dx, dy, rows)
+                cellIdx = np.minimum(np.searchsorted(cellKeys, neighborKeys), len(cellKeys) - 1)
+                counts = np.where(cellKeys[cellIdx] == neighborKeys, cellCount[cellIdx], 0)
+                # dense cells are split, so that at most pairBudget pairs are built at once
+                batchIdx = np.cumsum(counts) // pairBudget
+                for batch in np.split(np.arange(len(chunk)), np.flatnonzero(np.diff(batchIdx)) + 1):
+                    batchVertexes = chunk[batch]
+                    batchCounts = counts[batch]
+                    total = int(batchCounts.sum())
+                    if total == 0:
+                        continue
+                    vertexA = np.repeat(batchVertexes, batchCounts)
+                    # candidates of each vertex are consecutive on the sorted arrays
+                    start = np.repeat(
+                        cellStart[cellIdx[batch]] - np.cumsum(batchCounts) + batchCounts, batchCounts)
+                    vertexB = start + np.arange(total)
+                    delta = sortedXy[vertexA] - sortedXy[vertexB]
+                    close = (vertexA != vertexB) & (sortedGroups[vertexA] == sortedGroups[vertexB]) & \
+                        (np.einsum('ij,ij->i', delta, delta) <= radius2)
+                    sortedMask[vertexA[close]] = True
+        if feedback is not None:
+            feedback.setProgress(chunkStart * stepSize)
+    mask[order] = sortedMask
+    return mask
+
+
+def segmentStartIndexes(ringSizes):
+    """
+    Segments of the lines and rings read by featureVertexArrays. Segment k
+    goes from vertex segStart[k] to vertex segStart[k] + 1.
+    :param ringSizes: (list-of-int) number of vertices of each point, line or
+        ring, in the order of the vertex array.
+    :return: (tuple-of-np.ndarray) segStart, the first vertex of each segment,
+        and ringIds, the point/line/ring index of each vertex.
+    """
+    ringSizes = np.asarray(ringSizes, dtype=np.int64)
+    ringIds = np.repeat(np.arange(len(ringSizes), dtype=np.int64), ringSizes)
+    if len(ringIds) < 2:
+        return np.zeros(0, dtype=np.int64), ringIds
+    return np.flatnonzero(ringIds[:-1] == ringIds[1:]), ringIds
+
+
+def vertexNearSegmentPairs(xy, groups, ringSizes, searchRadius, ignoreSameGroup=False,
+                           pairBudget=2000000, feedback=None):
+    """
+    Finds the (vertex, segment) pairs closer than searchRadius. Segments are
+    binned into a uniform grid (each one in the cells covered by its bounding
+    box grown by searchRadius), so each vertex is only compared with the
+    segments of its own cell and the distances are computed in NumPy.
+    The segments that start or end on the vertex itself (the previous and the
+    next segment of its line or ring, found by index) are not compared, as
+    well as segments that have an end point on the same coordinates of the
+    vertex (shared nodes).
+    :param xy: (np.ndarray) (n, 2) float64 vertex coordinates;
+    :param groups: (np.ndarray) int64 feature index of each vertex;
+    :param ringSizes: (list-of-int) number of vertices of each point, line or
+        ring, as returned by featureVertexArrays;
+    :param searchRadius: (float) search distance;
+    :param ignoreSameGroup: (bool) if True, segments of the feature of the
+        vertex are not compared;
+    :param pairBudget: (int) maximum number of candidate pairs evaluated at
+        once;
+    :param feedback: (QgsProcessingFeedback) processing feedback.
+    :return: (tuple-of-np.ndarray) vertex indexes and start vertex indexes of
+        the segments near them.
+    """
+    emptyOutput = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    segStart, ringIds = segmentStartIndexes(ringSizes)
+    if len(segStart) == 0 or len(xy) == 0:
+        return emptyOutput
+    segA, segB = xy[segStart], xy[segStart + 1]
+    origin = xy.min(axis=0) - searchRadius
+    extent = float((xy.max(axis=0) - origin + searchRadius).max())
+    segExtent = np.abs(segB - segA).max(axis=1)
+    # cells about the size of a typical segment keep the number of cells per
+    # segment and of segments per cell low; the grid never has more than
+    # 2^30 cells per axis
+    cellSize = max(searchRadius, float(np.median(segExtent)), extent / 2**30)
+    if cellSize <= 0:
+        return emptyOutput
+    # long segments are binned by pieces no longer than a cell, so that they
+    # are not listed on every cell of their bounding boxes
+    pieceCount = np.maximum(1, np.ceil(segExtent / cellSize)).astype(np.int64)
+    pieceSeg = np.repeat(np.arange(len(segStart), dtype=np.int64), pieceCount)
+    pieceIdx = np.arange(len(pieceSeg), dtype=np.int64) - \
+        np.repeat(np.cumsum(pieceCount) - pieceCount, pieceCount)
+    direction = (segB - segA)[pieceSeg]
+    pieceA = segA[pieceSeg] + (pieceIdx / pieceCount[pieceSeg])[:, None] * direction
+    pieceB = segA[pieceSeg] + ((pieceIdx + 1) / pieceCount[pieceSeg])[:, None] * direction
+    cellMin = np.floor((np.minimum(pieceA, pieceB) - searchRadius - origin) / cellSize).astype(np.int64)
+    cellMax = np.floor((np.maximum(pieceA, pieceB) + searchRadius - origin) / cellSize).astype(np.int64)
+    yCount = int(max(cellMax[:, 1].max(), np.floor((xy[:, 1].max() - origin[1]) / cellSize))) + 1
+    # one entry per (piece, cell) covered by the piece
+    spanX = cellMax[:, 0] - cellMin[:, 0] + 1
+    spanY = cellMax[:, 1] - cellMin[:, 1] + 1
+    cellsPerPiece = spanX * spanY
+    entryPiece = np.repeat(np.arange(len(pieceSeg), dtype=np.int64), cellsPerPiece)
+    local = np.arange(len(entryPiece), dtype=np.int64) - \
+        np.repeat(np.cumsum(cellsPerPiece) - cellsPerPiece, cellsPerPiece)
+    entryKeys = (cellMin[entryPiece, 0] + local // spanY[entryPiece]) * yCount + \
+        cellMin[entryPiece, 1] + local % spanY[entryPiece]
+    order = np.argsort(entryKeys, kind='stable')
+    entryKeys, entrySeg = entryKeys[order], pieceSeg[entryPiece[order]]
+    vertexCells = np.floor((xy - origin) / cellSize).astype(np.int64)
+    vertexKeys = vertexCells[:, 0] * yCount + vertexCells[:, 1]
+    lower = np.searchsorted(entryKeys, vertexKeys, side='left')
+    counts = np.searchsorted(entryKeys, vertexKeys, side='right') - lower
+    radius2 = searchRadius * searchRadius
+    vertexList, segmentList = [], []
+    batchIdx = np.cumsum(counts) // max(1, pairBudget)
+    batchList = np.split(np.arange(len(xy)), np.flatnonzero(np.diff(batchIdx)) + 1)
+    stepSize = 100/len(batchList) if batchList else 0
+    for current, batch in enumerate(batchList):
+        if feedback is not None and feedback.isCanceled():
+            break
+        batchCounts = counts[batch]
+        total = int(batchCounts.sum())
+        if total == 0:
+            continue
+        vertex = np.repeat(batch, batchCounts)
+        entry = np.repeat(lower[batch] - np.cumsum(batchCounts) + batchCounts, batchCounts) + \
+            np.arange(total)
+        segment = entrySeg[entry]
+        start = segStart[segment]
+        # previous and next segments of the vertex, by index
+        keep = ~((ringIds[start] == ringIds[vertex]) & ((start == vertex) | (start + 1 == vertex)))
+        if ignoreSameGroup:
+            keep &= groups[start] != groups[vertex]
+        vertex, segment, start = vertex[keep], segment[keep], start[keep]
+        point, a, b = xy[vertex], segA[segment], segB[segment]
+        # end points on the vertex itself (e.g. closing vertex of a ring, nodes
+        # shared with other lines)
+        keep = ~(np.all(point == a, axis=1) | np.all(point == b, axis=1))
+        vertex, start, point, a, b = vertex[keep], start[keep], point[keep], a[keep], b[keep]
+        direction = b - a
+        length2 = np.einsum('ij,ij->i', direction, direction)
+        t = np.einsum('ij,ij->i', point - a, direction)
+        t = np.clip(np.divide(t, length2, out=np.zeros_like(t), where=length2 > 0), 0, 1)
+        delta = point - (a + t[:, None] * direction)
+        close = np.einsum('ij,ij->i', delta, delta) <= radius2
+        # pieces of the same segment may share a cell
+        pairs = np.unique(np.column_stack((vertex[close], start[close])), axis=0)
+        vertexList.append(pairs[:, 0])
+        segmentList.append(pairs[:, 1])
+        if feedback is not None:
+            feedback.setProgress(current * stepSize)
+    if not vertexList:
+        return emptyOutput
+    return np.concatenate(vertexList), np.concatenate(segmentList)
@@ -27,12 +27,17 @@ from uuid import uuid4
 import codecs, os, json, binascii
 
 #DSG Tools imports
+from DsgTools.core.Factories.DbFactory.connectionPool import connectionPool
 from DsgTools.core.Factories.DbFactory.dbFactory import DbFactory 
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
 from DsgTools.core.Utils.utils import Utils
 from DsgTools.core.dsgEnums import DsgEnums
 
 #qgis.PyQt imports
 from qgis.PyQt.Qt import QObject
+from qgis.PyQt.QtCore import QSettings
+
+MAX_CONCURRENT_DATABASES_KEY = 'DSGTools/maxConcurrentDatabases'
 
 class GenericDbManager(QObject):
     """
@@ -260,9 +265,11 @@ class GenericDbManager(QObject):
         self.createSetting(configName, edgvVersion, newJsonDict)
         return self.installSetting(configName,dbNameList = dbList)
 
-    def installSetting(self, configName, dbNameList = []):
+    def installSetting(self, configName, dbNameList = [], maxWorkers = None):
         """
         Generic install. Can be reimplenented in child methods.
+        Databases are handled concurrently (see runOnDatabases), each one
+        with its own connections and transactions.
         """
         errorDict = dict()
         settingType = self.getManagerType()
@@ -270,36 +277,46 @@ class GenericDbManager(QObject):
             dbNameList = list(self.dbDict.keys())
         successList = []
         configEdgvVersion = self.getSettingVersion(configName)
-        for dbName in dbNameList:
-            abstractDb = self.instantiateAbstractDb(dbName)
-            edgvVersion = abstractDb.getDatabaseVersion()
-            if edgvVersion != configEdgvVersion:
-                errorDict[dbName] = self.tr('Database version missmatch.')
-                continue
-            recDict = self.adminDb.getRecordFromAdminDb(settingType, configName, edgvVersion)
-            try:
-                if not abstractDb.checkIfExistsConfigTable(settingType):
-                    abstractDb.createPropertyTable(settingType, useTransaction = True)
-            except Exception as e:
-                errorDict[dbName] = ':'.join(e.args)
-                continue
-            try:
-                abstractDb.db.transaction()
-                self.adminDb.db.transaction()
-                self.materializeIntoDatabase(abstractDb, recDict)  #step done when property management involves changing database structure
-                abstractDb.insertRecordInsidePropertyTable(settingType, recDict, edgvVersion)
-                dbOid = abstractDb.getDbOID()
-                self.adminDb.insertInstalledRecordIntoAdminDb(settingType, recDict, dbOid)
-                abstractDb.db.commit()
-                self.adminDb.db.commit()
-            except Exception as e:
-                abstractDb.db.rollback()
-                self.adminDb.db.rollback()
-                errorDict[dbName] = ':'.join(e.args)
-            successList.append(dbName)
+        recDict = self.adminDb.getRecordFromAdminDb(settingType, configName, configEdgvVersion)
+        installLambda = lambda abstractDb, adminDb: self.installSettingOnDatabase(
+            abstractDb, adminDb, settingType, configEdgvVersion, recDict)
+        for dbName, (success, error) in zip(dbNameList, self.runOnDatabases(installLambda, dbNameList, maxWorkers=maxWorkers)):
+            if error is not None:
+                errorDict[dbName] = error
+            if success:
+                successList.append(dbName)
         return (successList, errorDict)
+
+    def installSettingOnDatabase(self, abstractDb, adminDb, settingType, configEdgvVersion, recDict):
+        """
+        Installs a setting on one database.
+        :return: (tuple) (success, error message or None).
+        """
+        edgvVersion = abstractDb.getDatabaseVersion()
+        if edgvVersion != configEdgvVersion:
+            return False, self.tr('Database version missmatch.')
+        try:
+            if not abstractDb.checkIfExistsConfigTable(settingType):
+                abstractDb.createPropertyTable(settingType, useTransaction = True)
+        except Exception as e:
+            return False, ':'.join(e.args)
+        try:
+            abstractDb.db.transaction()
+            adminDb.db.transaction()
+            self.materializeIntoDatabase(abstractDb, recDict)  #step done when property management involves changing database structure
+            abstractDb.invalidateMetadataCache()
+            abstractDb.insertRecordInsidePropertyTable(settingType, recDict, edgvVersion)
+            dbOid = abstractDb.getDbOID()
+            adminDb.insertInstalledRecordIntoAdminDb(settingType, recDict, dbOid)
+            abstractDb.db.commit()
+            adminDb.db.commit()
+        except Exception as e:
+            abstractDb.db.rollback()
+            adminDb.db.rollback()
+            return False, ':'.join(e.args)
+        return True, None
     
-    def deleteSetting(self, configName, dbNameList = []):
+    def deleteSetting(self, configName, dbNameList = [], maxWorkers = None):
         """
         Generic remove. Can be reimplenented in child methods.
         1. Get property dict from adminDb 
@@ -309,6 +326,7 @@ class GenericDbManager(QObject):
         settingType = self.getManagerType()
         propertyDict = self.adminDb.getPropertyPerspectiveDict(settingType, DsgEnums.Property)
         if configName in list(propertyDict.keys()):
+            dbList = []
             for dbName in propertyDict[configName]:
                 if not dbName:
                     try:
@@ -320,24 +338,38 @@ class GenericDbManager(QObject):
                         self.adminDb.db.rollback()
                         errorDict[dbName] = ':'.join(e.args)
                 else:
-                    abstractDb = self.instantiateAbstractDb(dbName)
-                    edgvVersion = abstractDb.getDatabaseVersion()
-                    try:
-                        abstractDb.db.transaction()
-                        self.adminDb.db.transaction()
-                        self.undoMaterializationFromDatabase(abstractDb, configName, settingType, edgvVersion) #step done when property management involves changing database structure
-                        abstractDb.removeRecordFromPropertyTable(settingType, configName, edgvVersion)
-                        self.adminDb.removeRecordFromPropertyTable(settingType, configName, edgvVersion)
-                        abstractDb.db.commit()
-                        self.adminDb.db.commit()
-                        successList.append(dbName)
-                    except Exception as e:
-                        abstractDb.db.rollback()
-                        self.adminDb.db.rollback()
-                        errorDict[dbName] = ':'.join(e.args)
+                    dbList.append(dbName)
+            deleteLambda = lambda abstractDb, adminDb: self.deleteSettingFromDatabase(
+                abstractDb, adminDb, settingType, configName)
+            for dbName, (success, error) in zip(dbList, self.runOnDatabases(deleteLambda, dbList, maxWorkers=maxWorkers)):
+                if error is not None:
+                    errorDict[dbName] = error
+                if success:
+                    successList.append(dbName)
         return (successList, errorDict)
 
-    def uninstallSetting(self, configName, dbNameList = []):
+    def deleteSettingFromDatabase(self, abstractDb, adminDb, settingType, configName):
+        """
+        Removes a setting from one database and from dsgtools_admindb.
+        :return: (tuple) (success, error message or None).
+        """
+        edgvVersion = abstractDb.getDatabaseVersion()
+        try:
+            abstractDb.db.transaction()
+            adminDb.db.transaction()
+            self.undoMaterializationFromDatabase(abstractDb, configName, settingType, edgvVersion) #step done when property management involves changing database structure
+            abstractDb.invalidateMetadataCache()
+            abstractDb.removeRecordFromPropertyTable(settingType, configName, edgvVersion)
+            adminDb.removeRecordFromPropertyTable(settingType, configName, edgvVersion)
+            abstractDb.db.commit()
+            adminDb.db.commit()
+        except Exception as e:
+            abstractDb.db.rollback()
+            adminDb.db.rollback()
+            return False, ':'.join(e.args)
+        return True, None
+
+    def uninstallSetting(self, configName, dbNameList = [], maxWorkers = None):
         """
         Generic uninstall. Can be reimplenented in child methods.
         This can uninstall setting on a list of databases or in all databases (if dbNameList == [])
@@ -351,23 +383,89 @@ class GenericDbManager(QObject):
                 dbList = propertyDict[configName]
             else: #builds filter dbList to uninstall in databases in dbNameList
                 dbList = [i for i in propertyDict[configName] if i in dbNameList]
-            for dbName in dbList:
-                abstractDb = self.instantiateAbstractDb(dbName)
-                edgvVersion = abstractDb.getDatabaseVersion()
-                try:
-                    abstractDb.db.transaction()
-                    self.adminDb.db.transaction()
-                    self.undoMaterializationFromDatabase(abstractDb, configName, settingType, edgvVersion) #step done when property management involves changing database structure
-                    abstractDb.removeRecordFromPropertyTable(settingType, configName, edgvVersion)
-                    self.adminDb.uninstallPropertyOnAdminDb(settingType, configName, edgvVersion, dbName = dbName)
-                    abstractDb.db.commit()
-                    self.adminDb.db.commit()
-                except Exception as e:
-                    abstractDb.db.rollback()
-                    self.adminDb.db.rollback()
-                    errorDict[dbName] = ':'.join(e.args)
-                successList.append(dbName)
+            uninstallLambda = lambda abstractDb, adminDb: self.uninstallSettingFromDatabase(
+                abstractDb, adminDb, settingType, configName)
+            for dbName, (success, error) in zip(dbList, self.runOnDatabases(uninstallLambda, dbList, maxWorkers=maxWorkers)):
+                if error is not None:
+                    errorDict[dbName] = error
+                if success:
+                    successList.append(dbName)
         return (successList, errorDict)
+
+    def uninstallSettingFromDatabase(self, abstractDb, adminDb, settingType, configName):
+        """
+        Uninstalls a setting from one database.
+        :return: (tuple) (success, error message or None).
+        """
+        edgvVersion = abstractDb.getDatabaseVersion()
+        dbName = abstractDb.getDatabaseName()
+        try:
+            abstractDb.db.transaction()
+            adminDb.db.transaction()
+            self.undoMaterializationFromDatabase(abstractDb, configName, settingType, edgvVersion) #step done when property management involves changing database structure
+            abstractDb.invalidateMetadataCache()
+            abstractDb.removeRecordFromPropertyTable(settingType, configName, edgvVersion)
+            adminDb.uninstallPropertyOnAdminDb(settingType, configName, edgvVersion, dbName = dbName)
+            abstractDb.db.commit()
+            adminDb.db.commit()
+        except Exception as e:
+            abstractDb.db.rollback()
+            adminDb.db.rollback()
+            return False, ':'.join(e.args)
+        return True, None
+
+    def getMaxConcurrentDatabases(self):
+        """
+        Maximum number of databases handled at the same time, stored on
+        QSettings under MAX_CONCURRENT_DATABASES_KEY (default 4). It bounds
+        the number of connections opened on the server by batch operations.
+        """
+        return max(1, QSettings().value(MAX_CONCURRENT_DATABASES_KEY, 4, type=int))
+
+    def runOnDatabases(self, func, dbNameList, maxWorkers = None):
+        """
+        Runs func on each database of dbNameList, on worker threads. Each
+        worker opens its own connections to the database and to
+        dsgtools_admindb (QSqlDatabase connections cannot cross threads) and
+        closes them when it is done.
+        :param func: (callable) function of (abstractDb, adminDb) that
+            returns a tuple (success, error message or None);
+        :param dbNameList: (list-of-str) database names;
+        :param maxWorkers: (int) maximum number of databases handled at the
+            same time. Defaults to getMaxConcurrentDatabases().
+        :return: (list-of-tuple) results of func, in the order of dbNameList.
+        """
+        if not dbNameList:
+            return []
+        maxWorkers = self.getMaxConcurrentDatabases() if maxWorkers is None else max(1, maxWorkers)
+        (host, port, user, password) = self.serverAbstractDb.getParamsFromConectedDb()
+
+        def evaluate(dbName):
+            abstractDb, adminDb = None, None
+            try:
+                abstractDb = self.openDatabaseOnWorker(dbName, host, port, user, password)
+                adminDb = self.openDatabaseOnWorker('dsgtools_admindb', host, port, user, password)
+                return func(abstractDb, adminDb)
+            except Exception as e:
+                return False, ':'.join(str(arg) for arg in e.args)
+            finally:
+                for db in (abstractDb, adminDb):
+                    if db is not None:
+                        db.closeDatabase()
+                connectionPool.closeThreadConnections()
+
+        executor = BoundedChunkExecutor(maxWorkers=maxWorkers, chunkSize=1, maxInFlight=maxWorkers)
+        return executor.run(evaluate, dbNameList, ordered=True)
+
+    def openDatabaseOnWorker(self, dbName, host, port, user, password):
+        """
+        Connects to dbName without asking for credentials, since worker
+        threads cannot open dialogs.
+        """
+        abstractDb = DbFactory().createDbFactory(DsgEnums.DriverPostGIS)
+        if not abstractDb.testCredentials(host, port, dbName, user, password):
+            raise Exception(self.tr('Unable to connect to database {0}.').format(dbName))
+        return abstractDb
     
     def materializeIntoDatabase(self, abstractDb, propertyDict):
         """
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import concurrent.futures
+import os
+from collections import deque
+from itertools import islice
+
+
+def evaluateChunk(func, chunk):
+    """
+    Applies func to each item of chunk. Module level so that it can also be
+    sent to process pools.
+    """
+    return [func(item) for item in chunk]
+
+
+class BoundedChunkExecutor(object):
+    """
+    Runs a function over an iterable on a pool of workers without holding
+    one future per item: items are grouped in chunks of chunkSize, at most
+    maxInFlight chunks are submitted at a time and the feedback is polled
+    between chunks.
+
+    Usage:
+        executor = BoundedChunkExecutor(feedback=feedback)
+        for result in executor.map(evaluate, iterator, total=featCount):
+            ...
+    """
+    def __init__(self, maxWorkers=None, chunkSize=500, maxInFlight=None,
+                 feedback=None, executorClass=None, executorKwargs=None):
+        """
+        :param maxWorkers: (int) number of workers. Defaults to
+            os.cpu_count() - 1;
+        :param chunkSize: (int) number of items evaluated by each task;
+        :param maxInFlight: (int) maximum number of submitted tasks that were
+            not consumed yet. Defaults to twice the number of workers;
+        :param feedback: (QgsProcessingFeedback) feedback used to check for
+            cancelation and to report progress;
+        :param executorClass: (class) concurrent.futures executor class.
+            Defaults to ThreadPoolExecutor;
+        :param executorKwargs: (dict) extra arguments of executorClass.
+        """
+        self.maxWorkers = max(1, os.cpu_count()-1) if maxWorkers is None else maxWorkers
+        self.chunkSize = max(1, chunkSize)
+        self.maxInFlight = 2*self.maxWorkers if maxInFlight is None else max(1, maxInFlight)
+        self.feedback = feedback
+        self.executorClass = concurrent.futures.ThreadPoolExecutor \
+            if executorClass is None else executorClass
+        self.executorKwargs = dict() if executorKwargs is None else executorKwargs
+
+    def isCanceled(self):
+        return self.feedback is not None and self.feedback.isCanceled()
+
+    def map(self, func, iterable, ordered=False, total=None):
+        """
+        Evaluates func on each item of iterable.
+        :param func: (callable) function of one argument;
+        :param iterable: (iterable) items to be evaluated. It is consumed
+            lazily, one chunk at a time;
+        :param ordered: (bool) if True, results are yielded in the same order
+            of iterable. Otherwise, they are yielded as chunks finish;
+        :param total: (int) number of items, used to report progress.
+        :return: (generator) results of func. The pool is shut down when the
+            generator is exhausted, closed or the feedback is canceled.
+        """
+        iterator = iter(iterable)
+        pending = deque()
+        processed = 0
+        stepSize = 100/total if total else 0
+        pool = self.executorClass(max_workers=self.maxWorkers, **self.executorKwargs)
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self.maxInFlight:
+                    chunk = list(islice(iterator, self.chunkSize))
+                    if not chunk or self.isCanceled():
+                        exhausted = True
+                        break
+                    pending.append(pool.submit(evaluateChunk, func, chunk))
+                if not pending or self.isCanceled():
+                    break
+                if ordered:
+                    doneList = [pending.popleft()]
+                else:
+                    doneSet, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    doneList = [future for future in pending if future in doneSet]
+                    for future in doneList:
+                        pending.remove(future)
+                for future in doneList:
+                    results = future.result()
+                    for result in results:
+                        yield result
+                    processed += len(results)
+                    if self.feedback is not None and stepSize:
+                        self.feedback.setProgress(processed * stepSize)
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def run(self, func, iterable, ordered=False, total=None):
+        """
+        Same as map, but returns a list with every result.
+        """
+        return list(self.map(func, iterable, ordered=ordered, total=total))
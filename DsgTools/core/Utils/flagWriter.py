@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import hashlib
+import queue
+import threading
+
+from qgis.core import QgsFeature, QgsFeatureSink, QgsGeometry
+
+# marks, on the queue, that the consumer must flush (and may stop)
+_FLUSH = object()
+_STOP = object()
+
+
+class FlagWriter(object):
+    """
+    Buffered writer of validation flags. Flags may be added from any thread:
+    they go through a bounded queue to a single consumer thread, that builds
+    the features and writes them to the sink with one addFeatures call per
+    batch of bufferSize flags. When the queue is full, addFlag blocks until
+    the consumer catches up, so memory stays bounded.
+
+    Usage:
+        writer = FlagWriter(flagSink, flagFields, deduplicate=True)
+        writer.addFlag(geom, 'reason')
+        ...
+        writer.close()
+
+    or, closing the writer even if an error is raised:
+        with FlagWriter(flagSink, flagFields) as writer:
+            writer.addFlag(geom, 'reason')
+    """
+    def __init__(self, sink, fields, bufferSize=1000, deduplicate=False, maxQueueSize=None):
+        """
+        :param sink: (QgsFeatureSink) sink that receives the flags;
+        :param fields: (QgsFields) fields of the flag features. The flag text
+            is stored on the 'reason' field;
+        :param bufferSize: (int) number of flags written by each addFeatures
+            call;
+        :param deduplicate: (bool) if True, flags with the same geometry and
+            text are written only once;
+        :param maxQueueSize: (int) maximum number of flags waiting to be
+            consumed. Defaults to twice bufferSize.
+        """
+        self.sink = sink
+        self.fields = fields
+        self.bufferSize = max(1, bufferSize)
+        self.deduplicate = deduplicate
+        self.flagsReceived = 0
+        self.flagsWritten = 0
+        self.duplicatesSkipped = 0
+        self.batchesFlushed = 0
+        self.writeError = None
+        self._seenKeys = set()
+        self._counterLock = threading.Lock()
+        self._queue = queue.Queue(
+            maxsize=2*self.bufferSize if maxQueueSize is None else max(1, maxQueueSize)
+        )
+        self._closed = False
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+    def addFlag(self, flagGeom, flagText):
+        """
+        Queues a flag to be written.
+        :param flagGeom: (QgsGeometry or bytes) geometry of the flag, or its
+            WKB;
+        :param flagText: (str) reason of the flag.
+        """
+        if self._closed:
+            raise RuntimeError('Flag writer is already closed.')
+        with self._counterLock:
+            self.flagsReceived += 1
+        self._queue.put((flagGeom, flagText))
+
+    def flush(self):
+        """
+        Blocks until every flag added so far is written to the sink.
+        """
+        self._queue.put(_FLUSH)
+        self._queue.join()
+        self._raiseWriteError()
+
+    def close(self):
+        """
+        Writes the pending flags and stops the consumer thread. Errors raised
+        while writing are re-raised here.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raiseWriteError()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+        return False
+
+    def counters(self):
+        """
+        :return: (dict) number of flags received, written and skipped as
+            duplicates, and number of flushed batches.
+        """
+        return {
+            'flagsReceived': self.flagsReceived,
+            'flagsWritten': self.flagsWritten,
+            'duplicatesSkipped': self.duplicatesSkipped,
+            'batchesFlushed': self.batchesFlushed,
+        }
+
+    def _raiseWriteError(self):
+        if self.writeError is not None:
+            raise self.writeError
+
+    def _consume(self):
+        batch = []
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _FLUSH or item is _STOP:
+                    self._writeBatch(batch)
+                    batch = []
+                    if item is _STOP:
+                        return
+                    continue
+                feat = self._buildFeature(*item)
+                if feat is None:
+                    continue
+                batch.append(feat)
+                if len(batch) >= self.bufferSize:
+                    self._writeBatch(batch)
+                    batch = []
+            except Exception as e:
+                # producers must not block forever if the sink fails, so
+                # the error is kept and raised on flush or close
+                if self.writeError is None:
+                    self.writeError = e
+                batch = []
+            finally:
+                self._queue.task_done()
+
+    def _buildFeature(self, flagGeom, flagText):
+        if isinstance(flagGeom, QgsGeometry):
+            wkb = bytes(flagGeom.asWkb()) if self.deduplicate else None
+            geom = flagGeom
+        else:
+            wkb = bytes(flagGeom)
+            geom = QgsGeometry()
+            geom.fromWkb(wkb)
+        if self.deduplicate:
+            key = (hashlib.sha1(wkb).digest(), flagText)
+            if key in self._seenKeys:
+                self.duplicatesSkipped += 1
+                return None
+            self._seenKeys.add(key)
+        newFeat = QgsFeature(self.fields)
+        newFeat['reason'] = flagText
+        newFeat.setGeometry(geom)
+        return newFeat
+
+    def _writeBatch(self, batch):
+        if not batch or self.writeError is not None:
+            return
+        self.sink.addFeatures(batch, QgsFeatureSink.FastInsert)
+        self.flagsWritten += len(batch)
+        self.batchesFlushed += 1
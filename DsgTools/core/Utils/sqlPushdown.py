@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import psycopg2
+
+from qgis.core import QgsApplication, QgsDataSourceUri, QgsGeometry
+from qgis.PyQt.QtCore import QSettings, QVariant
+
+PUSHDOWN_SETTINGS_KEY = 'DSGTools/useSqlPushdown'
+
+
+def isPushdownEnabled():
+    """
+    SQL pushdown is opt-in: it is turned on on QSettings under
+    PUSHDOWN_SETTINGS_KEY. Server side checks may differ from the client
+    side ones on tolerances and on invalid geometries.
+    """
+    return QSettings().value(PUSHDOWN_SETTINGS_KEY, False, type=bool)
+
+
+def quoteIdentifier(name):
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def connectionParameters(uri):
+    """
+    psycopg2 keyword arguments of the connection of a postgres layer. When
+    the uri uses an authentication configuration, the user name and the
+    password are read from the QGIS authentication database.
+    :param uri: (QgsDataSourceUri) layer uri.
+    :return: (dict) connection keyword arguments.
+    """
+    parameterDict = {
+        'service': uri.service(),
+        'host': uri.host(),
+        'port': uri.port(),
+        'dbname': uri.database(),
+        'user': uri.username(),
+        'password': uri.password(),
+    }
+    if uri.authConfigId():
+        updated, itemList = QgsApplication.authManager().updateDataSourceUriItems(
+            [], uri.authConfigId(), 'postgres')
+        for item in itemList if updated else []:
+            key, _, value = item.partition('=')
+            if key in ('user', 'password'):
+                parameterDict[key] = value.strip("'")
+    return {key: value for key, value in parameterDict.items() if value}
+
+
+class PostgisLayerSource(object):
+    """
+    Server side description of a layer read by the postgres provider: the
+    table, its geometry and key columns, the subset string the provider
+    applies and, optionally, the ids of the features to be checked. The
+    key column is the feature id, so only tables with a single integer
+    primary key are described.
+    """
+    def __init__(self, tableSchema, tableName, geometryColumn, keyColumn, subsetString='', connectionParameters=None):
+        """
+        :param tableSchema: (str) table schema;
+        :param tableName: (str) table name;
+        :param geometryColumn: (str) geometry column;
+        :param keyColumn: (str) primary key column, that gives the feature
+            ids;
+        :param subsetString: (str) provider filter, in SQL;
+        :param connectionParameters: (dict) psycopg2 connection arguments.
+        """
+        self.tableSchema = tableSchema
+        self.tableName = tableName
+        self.geometryColumn = geometryColumn
+        self.keyColumn = keyColumn
+        self.subsetString = subsetString or ''
+        self.connectionParameters = dict() if connectionParameters is None else connectionParameters
+        self.featureIds = None
+
+    @classmethod
+    def fromLayer(cls, lyr):
+        """
+        Describes lyr if its features can be read on the server.
+        :param lyr: (QgsVectorLayer) input layer.
+        :return: (PostgisLayerSource) layer source or None when lyr is not
+            a postgres table, has no integer key or has edits that are not
+            saved on the server.
+        """
+        if lyr is None or lyr.providerType() != 'postgres':
+            return None
+        if lyr.isEditable() and lyr.isModified():
+            return None
+        uri = QgsDataSourceUri(lyr.dataProvider().dataSourceUri())
+        tableName = uri.table()
+        keyColumn = uri.keyColumn().replace('"', '')
+        if not tableName or tableName.startswith('(') or not uri.geometryColumn() \
+                or not keyColumn or ',' in keyColumn:
+            # sql queries and composite keys
+            return None
+        fieldIdx = lyr.fields().indexFromName(keyColumn)
+        if fieldIdx < 0 or lyr.fields().field(fieldIdx).type() not in (QVariant.Int, QVariant.LongLong):
+            return None
+        return cls(
+            uri.schema() or 'public',
+            tableName,
+            uri.geometryColumn(),
+            keyColumn,
+            subsetString=lyr.subsetString(),
+            connectionParameters=connectionParameters(uri)
+        )
+
+    def setFeatureIds(self, featureIds):
+        """
+        Restricts the source to featureIds (e.g. the selected features).
+        :param featureIds: (iterable) feature ids or None for every feature.
+        """
+        self.featureIds = None if featureIds is None else sorted(int(i) for i in featureIds)
+
+    @property
+    def relation(self):
+        return '{0}.{1}'.format(quoteIdentifier(self.tableSchema), quoteIdentifier(self.tableName))
+
+    @property
+    def geometry(self):
+        return quoteIdentifier(self.geometryColumn)
+
+    @property
+    def key(self):
+        return quoteIdentifier(self.keyColumn)
+
+    def whereClause(self):
+        """
+        Filter that selects the same features the client would read.
+        :return: (str) boolean SQL expression.
+        """
+        clauseList = []
+        if self.subsetString.strip():
+            clauseList.append('({0})'.format(self.subsetString))
+        if self.featureIds is not None:
+            clauseList.append("{0} = ANY('{{{1}}}'::bigint[])".format(
+                self.key, ','.join(map(str, self.featureIds))))
+        return ' AND '.join(clauseList) if clauseList else 'TRUE'
+
+    def connect(self):
+        return psycopg2.connect(**self.connectionParameters)
+
+    def fetchRows(self, sql, feedback=None, itersize=1000):
+        """
+        Runs sql on a server side cursor and yields its rows, so that only
+        the flagged rows travel to the client and they are never held in
+        memory at once. The first column must be a geometry as WKB, that is
+        converted to QgsGeometry.
+        :param sql: (str) select statement;
+        :param feedback: (QgsProcessingFeedback) checked for cancelation;
+        :param itersize: (int) rows fetched per round trip.
+        :return: (generator) rows as tuples (QgsGeometry, *other columns).
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                with conn.cursor(name='dsgtools_pushdown') as cursor:
+                    cursor.itersize = itersize
+                    cursor.execute(sql)
+                    for row in cursor:
+                        if feedback is not None and feedback.isCanceled():
+                            break
+                        geom = QgsGeometry()
+                        if row[0] is not None:
+                            geom.fromWkb(bytes(row[0]))
+                        yield (geom,) + tuple(row[1:])
+        finally:
+            conn.close()
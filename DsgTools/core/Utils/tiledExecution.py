@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import concurrent.futures
+import math
+import sys
+from contextlib import closing
+
+from qgis.core import (QgsApplication, QgsCoordinateReferenceSystem,
+                       QgsCoordinateTransform, QgsFeatureRequest, QgsField,
+                       QgsFields, QgsGeometry, QgsPointXY, QgsProcessingContext,
+                       QgsProcessingFeatureSourceDefinition,
+                       QgsProcessingFeedback, QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterMapLayer,
+                       QgsProcessingParameterMultipleLayers,
+                       QgsProcessingParameterVectorLayer, QgsProcessingUtils,
+                       QgsProject, QgsRectangle, QgsVectorLayer,
+                       QgsWkbTypes)
+from qgis.PyQt.QtCore import QVariant
+
+from DsgTools.core.Utils.executorTools import BoundedChunkExecutor
+from DsgTools.core.Utils.FrameTools.map_index import UtmGrid
+
+
+class RegularTileGrid(object):
+    """
+    Square tiles of tileSize layer units, aligned to the origin of the
+    layer CRS. A point belongs to the tile [x0, x0 + tileSize) x
+    [y0, y0 + tileSize) that contains it, so every point has exactly one
+    tile.
+    """
+    def __init__(self, tileSize):
+        self.tileSize = float(tileSize)
+
+    def tileKey(self, point):
+        """
+        :param point: (QgsPointXY) point in the layer CRS.
+        :return: (tuple) (column, row) of the tile that contains point.
+        """
+        return (
+            int(math.floor(point.x() / self.tileSize)),
+            int(math.floor(point.y() / self.tileSize))
+        )
+
+    def tileRect(self, key):
+        """
+        :return: (QgsRectangle) core of the tile, in the layer CRS.
+        """
+        col, row = key
+        return QgsRectangle(
+            col * self.tileSize,
+            row * self.tileSize,
+            (col + 1) * self.tileSize,
+            (row + 1) * self.tileSize
+        )
+
+    def tileKeys(self, extent):
+        """
+        :param extent: (QgsRectangle) extent in the layer CRS.
+        :return: (list-of-tuple) keys of the tiles that cover extent.
+        """
+        minCol, minRow = self.tileKey(QgsPointXY(extent.xMinimum(), extent.yMinimum()))
+        maxCol, maxRow = self.tileKey(QgsPointXY(extent.xMaximum(), extent.yMaximum()))
+        return [
+            (col, row) for row in range(minRow, maxRow + 1)
+            for col in range(minCol, maxCol + 1)
+        ]
+
+
+class UtmTileGrid(RegularTileGrid):
+    """
+    Tiles given by the frames of the brazilian systematic map grid
+    (UtmGrid) on a given scale. Frames are regular on geographic
+    coordinates (SIRGAS 2000), so keys are computed there and the tile
+    rectangles are brought back to the layer CRS.
+    """
+    geographicAuthId = 'EPSG:4674'
+
+    def __init__(self, scale, crs, transformContext=None):
+        """
+        :param scale: (int) scale denominator in thousands (e.g. 250, 100,
+            50, 25), as on UtmGrid.scales;
+        :param crs: (QgsCoordinateReferenceSystem) layer CRS;
+        :param transformContext: (QgsCoordinateTransformContext) transform
+            context. Defaults to the one of the current project.
+        """
+        utmGrid = UtmGrid()
+        self.scale = scale
+        self.dx = utmGrid.getSpacingX(scale)
+        self.dy = utmGrid.getSpacingY(scale)
+        self.crsWkt = crs.toWkt()
+        self.transformContext = transformContext
+        self.buildTransforms()
+
+    def __getstate__(self):
+        return {'scale': self.scale, 'crsWkt': self.crsWkt}
+
+    def __setstate__(self, state):
+        crs = QgsCoordinateReferenceSystem.fromWkt(state['crsWkt'])
+        self.__init__(state['scale'], crs)
+
+    def buildTransforms(self):
+        transformContext = QgsProject.instance().transformContext() \
+            if self.transformContext is None else self.transformContext
+        crs = QgsCoordinateReferenceSystem.fromWkt(self.crsWkt)
+        geographicCrs = QgsCoordinateReferenceSystem(self.geographicAuthId)
+        self.toGeographic = QgsCoordinateTransform(crs, geographicCrs, transformContext)
+        self.fromGeographic = QgsCoordinateTransform(geographicCrs, crs, transformContext)
+
+    def tileKey(self, point):
+        geographicPoint = self.toGeographic.transform(point)
+        return (
+            int(math.floor(geographicPoint.x() / self.dx)),
+            int(math.floor(geographicPoint.y() / self.dy))
+        )
+
+    def tileRect(self, key):
+        col, row = key
+        frame = UtmGrid().makeQgsPolygon(
+            col * self.dx, row * self.dy, (col + 1) * self.dx, (row + 1) * self.dy,
+            xSubdivisions=8, ySubdivisions=8
+        )
+        frame.transform(self.fromGeographic)
+        return frame.boundingBox()
+
+    def tileKeys(self, extent):
+        geographicExtent = self.toGeographic.transformBoundingBox(extent)
+        minCol = int(math.floor(geographicExtent.xMinimum() / self.dx))
+        maxCol = int(math.floor(geographicExtent.xMaximum() / self.dx))
+        minRow = int(math.floor(geographicExtent.yMinimum() / self.dy))
+        maxRow = int(math.floor(geographicExtent.yMaximum() / self.dy))
+        return [
+            (col, row) for row in range(minRow, maxRow + 1)
+            for col in range(minCol, maxCol + 1)
+        ]
+
+
+def anchorPoint(geom):
+    """
+    Point used to decide which tile owns a flag. It depends only on the
+    flag geometry, so the same flag raised by two tiles gets the same
+    anchor.
+    """
+    if geom.isNull() or geom.isEmpty():
+        return None
+    point = geom.pointOnSurface()
+    if point.isNull() or point.isEmpty():
+        return geom.boundingBox().center()
+    return point.asPoint()
+
+
+def layerUri(lyr):
+    """
+    String that processing resolves to a layer on any process, in the form
+    provider://source. Memory layers cannot be shared, so None is returned
+    for them.
+    """
+    if lyr.providerType() == 'memory':
+        return None
+    return '{0}://{1}'.format(lyr.providerType(), lyr.source())
+
+
+class TileTask(object):
+    """
+    Runs an algorithm on the features of one tile and its halo. The task is
+    picklable, so that it can be sent to worker processes; in that case the
+    input layer and the other layer parameters are given as provider://source
+    strings.
+
+    When the algorithm honors selections, the features of the tile are given
+    to it as the selected features of a copy of the input, so that they keep
+    their ids and flags that refer to them read as on a run over the whole
+    layer. Algorithms with a SELECTED parameter get it set; the other ones
+    get the input as a selected features only source. The selection of the
+    layer given by the user is never changed. Otherwise, or when the input
+    cannot be copied with its features (memory layers and layers with
+    unsaved edits), the features of the tile are copied to a memory layer.
+    """
+    selectedKey = 'SELECTED'
+
+    def __init__(self, key, grid, halo, algName, parameterDict, inputKey, outputKey, inputLayer):
+        """
+        :param key: (tuple) key of the tile on grid;
+        :param grid: (RegularTileGrid) tile grid;
+        :param halo: (float) distance, in layer units, that the tile is grown
+            by when features are read;
+        :param algName: (str) algorithm id with provider;
+        :param parameterDict: (dict) algorithm parameters, except the input;
+        :param inputKey: (str) name of the input layer parameter;
+        :param outputKey: (str) name of the flag output parameter;
+        :param inputLayer: (QgsVectorLayer or str) input layer or its
+            provider://source string.
+        """
+        self.key = key
+        self.grid = grid
+        self.halo = halo
+        self.algName = algName
+        self.parameterDict = parameterDict
+        self.inputKey = inputKey
+        self.outputKey = outputKey
+        self.inputLayer = inputLayer
+
+    def hasSelectedParameter(self):
+        alg = QgsApplication.processingRegistry().algorithmById(self.algName)
+        return alg is not None and alg.parameterDefinition(self.selectedKey) is not None
+
+    def honorsSelection(self):
+        """
+        Whether the algorithm can be told to read only the selected features
+        of its input: it has a SELECTED parameter or its input is a feature
+        source. Vector layer parameters ignore selected features only
+        sources.
+        """
+        alg = QgsApplication.processingRegistry().algorithmById(self.algName)
+        if alg is None:
+            return False
+        return alg.parameterDefinition(self.selectedKey) is not None or \
+            isinstance(alg.parameterDefinition(self.inputKey), QgsProcessingParameterFeatureSource)
+
+    def keepsFeatureIds(self):
+        """
+        Whether the features of the tile are given to the algorithm as the
+        selected features of a copy of the input, with their ids.
+        """
+        if not self.honorsSelection():
+            return False
+        if not isinstance(self.inputLayer, QgsVectorLayer):
+            return True
+        return self.inputLayer.providerType() != 'memory' and not self.inputLayer.isModified()
+
+    def readTileLayer(self, context):
+        """
+        Gets the layer given to the algorithm. It is either a copy of the
+        input with the features of the tile and its halo selected or a memory
+        layer with only these features. Both are owned by the temporary layer
+        store of context.
+        :param context: (QgsProcessingContext) context of the tile run.
+        :return: (tuple) (QgsVectorLayer) tile layer, or None if the tile has
+            no features, and (bool) whether its features are selected.
+        """
+        if isinstance(self.inputLayer, QgsVectorLayer):
+            sourceLyr = self.inputLayer
+        else:
+            # loaded into the temporary layer store of context
+            sourceLyr = QgsProcessingUtils.mapLayerFromString(self.inputLayer, context)
+        request = QgsFeatureRequest().setFilterRect(
+            self.grid.tileRect(self.key).buffered(self.halo)).setNoAttributes()
+        tileIds = [feat.id() for feat in sourceLyr.getFeatures(request)]
+        if not tileIds:
+            return None, False
+        if not self.keepsFeatureIds():
+            tileLyr = sourceLyr.materialize(QgsFeatureRequest().setFilterFids(tileIds))
+            context.temporaryLayerStore().addMapLayer(tileLyr)
+            return tileLyr, False
+        if sourceLyr is self.inputLayer:
+            sourceLyr = self.inputLayer.clone()
+            context.temporaryLayerStore().addMapLayer(sourceLyr)
+        sourceLyr.selectByIds(tileIds)
+        return sourceLyr, True
+
+    def tileParameters(self, tileLyr, selected):
+        """
+        :param tileLyr: (QgsVectorLayer) layer given by readTileLayer;
+        :param selected: (bool) whether only the selected features of
+            tileLyr must be read.
+        :return: (dict) parameters of the tile run.
+        """
+        parameterDict = dict(self.parameterDict)
+        parameterDict[self.outputKey] = 'memory:'
+        if self.hasSelectedParameter():
+            parameterDict[self.inputKey] = tileLyr
+            parameterDict[self.selectedKey] = selected
+        elif selected:
+            parameterDict[self.inputKey] = QgsProcessingFeatureSourceDefinition(tileLyr.id(), True)
+        else:
+            parameterDict[self.inputKey] = tileLyr
+        return parameterDict
+
+    def run(self):
+        """
+        :return: (tuple) (list-of-tuple) (name, type) of the flag fields,
+            (int) wkb type of the flag output of the algorithm, or None if
+            the tile has no features, and (list-of-tuple) (wkb, attribute
+            list) of the flags whose anchor is on the core of the tile.
+        """
+        import processing
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        tileLyr, selected = self.readTileLayer(context)
+        if tileLyr is None:
+            return [], None, []
+        output = processing.run(
+            self.algName,
+            self.tileParameters(tileLyr, selected),
+            context=context,
+            feedback=QgsProcessingFeedback()
+        )
+        flagLyr = output[self.outputKey]
+        if isinstance(flagLyr, str):
+            flagLyr = QgsProcessingUtils.mapLayerFromString(flagLyr, context)
+        if flagLyr is None:
+            return [], None, []
+        fieldList = [(field.name(), field.type()) for field in flagLyr.fields()]
+        flagList = []
+        for feat in flagLyr.getFeatures():
+            geom = feat.geometry()
+            anchor = anchorPoint(geom)
+            if anchor is None or self.grid.tileKey(anchor) != self.key:
+                continue
+            # NULL values are QVariant objects, which are not picklable
+            attributes = [
+                None if isinstance(value, QVariant) else value for value in feat.attributes()
+            ]
+            flagList.append((bytes(geom.asWkb()), attributes))
+        return fieldList, int(flagLyr.wkbType()), flagList
+
+
+def runTileTask(task):
+    return task.key, task.run()
+
+
+# QgsApplication of each worker process, created by initTileWorker
+_workerApplication = None
+
+
+def initTileWorker(prefixPath, sysPath):
+    """
+    Starts QGIS, processing and the DSGTools provider on a worker process.
+    """
+    global _workerApplication
+    for path in sysPath:
+        if path not in sys.path:
+            sys.path.append(path)
+    QgsApplication.setPrefixPath(prefixPath, True)
+    _workerApplication = QgsApplication([], False)
+    _workerApplication.initQgis()
+    from processing.core.Processing import Processing
+    Processing.initialize()
+    from DsgTools.core.DSGToolsProcessingAlgs.dsgtoolsProcessingAlgorithmProvider import \
+        DSGToolsProcessingAlgorithmProvider
+    QgsApplication.processingRegistry().addProvider(DSGToolsProcessingAlgorithmProvider())
+
+
+class TiledExecution(object):
+    """
+    Runs an algorithm that raises flags tile by tile. Each tile reads only
+    its features and the ones within a halo around it, so the memory used
+    by each run is bounded by the tile size. A flag is kept only by the tile
+    whose core contains its anchor point and flags equal on geometry and
+    attributes are kept once.
+    """
+    def __init__(self, grid, halo, maxWorkers=0):
+        """
+        :param grid: (RegularTileGrid) tile grid;
+        :param halo: (float) halo distance, in layer units. It must be at
+            least the search radius of the algorithm;
+        :param maxWorkers: (int) number of worker processes. If 0, tiles
+            are run one after another on the current process.
+        """
+        self.grid = grid
+        self.halo = halo
+        self.maxWorkers = maxWorkers
+
+    def buildTasks(self, inputLyr, algName, parameterDict, inputKey, outputKey, inputLayer=None):
+        inputLayer = inputLyr if inputLayer is None else inputLayer
+        return [
+            TileTask(key, self.grid, self.halo, algName, parameterDict, inputKey, outputKey, inputLayer)
+            for key in self.grid.tileKeys(inputLyr.extent())
+        ]
+
+    # parameter types whose values are layers
+    layerParameterTypes = (
+        QgsProcessingParameterFeatureSource,
+        QgsProcessingParameterMapLayer,
+        QgsProcessingParameterMultipleLayers,
+        QgsProcessingParameterVectorLayer,
+    )
+
+    def portableParameters(self, algName, parameterDict, context):
+        """
+        Replaces the layers of parameterDict by provider://source strings.
+        Only the values of the layer parameters of algName are converted;
+        other strings (e.g. field names or expressions) are kept as given.
+        :return: (dict) parameters or None, if the algorithm is not found or
+            a layer cannot be opened by other processes (e.g. memory
+            layers).
+        """
+        alg = QgsApplication.processingRegistry().algorithmById(algName)
+        if alg is None:
+            return None
+        layerParameterSet = set(
+            parameter.name() for parameter in alg.parameterDefinitions()
+            if isinstance(parameter, self.layerParameterTypes)
+        )
+        portableDict = dict()
+        for key, value in parameterDict.items():
+            if key not in layerParameterSet:
+                portableDict[key] = value
+                continue
+            valueList = value if isinstance(value, list) else [value]
+            portableList = []
+            for item in valueList:
+                lyr = QgsProcessingUtils.mapLayerFromString(item, context) \
+                    if isinstance(item, str) and item else item
+                if isinstance(lyr, QgsVectorLayer):
+                    item = layerUri(lyr)
+                    if item is None:
+                        return None
+                portableList.append(item)
+            portableDict[key] = portableList if isinstance(value, list) else portableList[0]
+        return portableDict
+
+    def run(self, inputLyr, algName, parameterDict, context, inputKey='INPUT', outputKey='FLAGS', feedback=None):
+        """
+        Runs algName on every tile of inputLyr and gathers the flags. See
+        iterateFlags.
+        :return: (tuple) (QgsFields) flag fields and (list-of-QgsGeometry,
+            list) geometry and attributes of each unique flag.
+        """
+        fields, flagList = None, []
+        for tileFields, _, tileFlagList in self.iterateFlags(
+                inputLyr, algName, parameterDict, context,
+                inputKey=inputKey, outputKey=outputKey, feedback=feedback):
+            fields = tileFields if fields is None else fields
+            flagList.extend(tileFlagList)
+        return fields, flagList
+
+    def iterateFlags(self, inputLyr, algName, parameterDict, context, inputKey='INPUT', outputKey='FLAGS', feedback=None):
+        """
+        Runs algName on every tile of inputLyr, yielding the flags of each
+        tile as soon as it is done. A flag is only kept by the tile that owns
+        its anchor, so flags equal on geometry and attributes are only
+        looked for within each tile.
+        :param inputLyr: (QgsVectorLayer) input layer;
+        :param algName: (str) algorithm id with provider;
+        :param parameterDict: (dict) algorithm parameters, except the input;
+        :param context: (QgsProcessingContext) processing context;
+        :param inputKey: (str) name of the input layer parameter;
+        :param outputKey: (str) name of the flag output parameter;
+        :param feedback: (QgsProcessingFeedback) processing feedback.
+        :return: (generator) for each tile with features, (QgsFields) flag
+            fields, (QgsWkbTypes.Type) wkb type of the flag output of the
+            algorithm and (list-of-QgsGeometry, list) geometry and
+            attributes of each unique flag of the tile.
+        """
+        maxWorkers = self.maxWorkers
+        portableDict = self.portableParameters(algName, parameterDict, context) if maxWorkers else None
+        inputUri = layerUri(inputLyr) if maxWorkers else None
+        if maxWorkers and (portableDict is None or inputUri is None):
+            if feedback is not None:
+                feedback.pushInfo(
+                    'The layers cannot be read by worker processes (e.g. memory layers), tiles are run on the current process.')
+            maxWorkers = 0
+        if maxWorkers:
+            taskList = self.buildTasks(
+                inputLyr, algName, portableDict, inputKey, outputKey, inputLayer=inputUri)
+        else:
+            taskList = self.buildTasks(inputLyr, algName, parameterDict, inputKey, outputKey)
+        if taskList and not taskList[0].keepsFeatureIds() and feedback is not None:
+            feedback.pushInfo(
+                'The features of each tile are copied to a memory layer ({0} does not read only selected features or {1} is a memory layer or has unsaved edits), so feature ids on the flags refer to these copies.'.format(
+                    algName, inputLyr.name()))
+        if maxWorkers:
+            from DsgTools.core.GeometricTools.geometryExecutionBackend import spawnExecutable
+            # the executable is restored once the pool is shut down
+            with spawnExecutable() as mpContext:
+                executor = BoundedChunkExecutor(
+                    maxWorkers=maxWorkers,
+                    chunkSize=1,
+                    feedback=feedback,
+                    executorClass=concurrent.futures.ProcessPoolExecutor,
+                    executorKwargs={
+                        'mp_context': mpContext,
+                        'initializer': initTileWorker,
+                        'initargs': (QgsApplication.prefixPath(), list(sys.path))
+                    }
+                )
+                with closing(executor.map(runTileTask, taskList, total=len(taskList))) as resultIterator:
+                    yield from self.tileOutputs(resultIterator, feedback=feedback)
+        else:
+            yield from self.tileOutputs(self.runOnCurrentProcess(taskList, feedback=feedback), feedback=feedback)
+
+    def tileOutputs(self, resultIterator, feedback=None):
+        """
+        Turns the results of the tile tasks into the items yielded by iterateFlags.
+        """
+        for key, (fieldList, wkbType, tileFlagList) in resultIterator:
+            if feedback is not None and feedback.isCanceled():
+                break
+            if wkbType is None:
+                continue
+            yield self.tileFields(fieldList), QgsWkbTypes.Type(wkbType), self.uniqueFlags(tileFlagList)
+
+    def runOnCurrentProcess(self, taskList, feedback=None):
+        size = 100/len(taskList) if taskList else 0
+        for current, task in enumerate(taskList):
+            if feedback is not None and feedback.isCanceled():
+                break
+            yield runTileTask(task)
+            if feedback is not None:
+                feedback.setProgress(size * (current + 1))
+
+    def tileFields(self, fieldList):
+        fields = QgsFields()
+        for name, fieldType in fieldList:
+            fields.append(QgsField(name, fieldType))
+        return fields
+
+    def uniqueFlags(self, tileFlagList):
+        """
+        Keeps each flag of a tile once.
+        """
+        flagList = []
+        seenSet = set()
+        for wkb, attributes in tileFlagList:
+            flagKey = (wkb, tuple('{}'.format(value) for value in attributes))
+            if flagKey in seenSet:
+                continue
+            seenSet.add(flagKey)
+            geom = QgsGeometry()
+            geom.fromWkb(wkb)
+            flagList.append((geom, attributes))
+        return flagList
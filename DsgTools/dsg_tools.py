@@ -40,6 +40,8 @@ from qgis.core import QgsApplication
 
 from .gui.guiManager import GuiManager
 from .core.DSGToolsProcessingAlgs.dsgtoolsProcessingAlgorithmProvider import DSGToolsProcessingAlgorithmProvider
+from .core.GeometricTools.dirtyRegionTracker import dirtyRegionTracker
+from .core.Factories.DbFactory.connectionPool import connectionPool
 from .Modules.acquisitionMenu.controllers.acquisitionMenuCtrl import AcquisitionMenuCtrl
 
 class DsgTools(object):
@@ -108,6 +110,8 @@ class DsgTools(object):
             self.menuBar.removeAction(self.dsgTools.menuAction())
         self.iface.mainWindow().removeToolBar(self.toolbar)
         QgsApplication.processingRegistry().removeProvider(self.provider)
+        dirtyRegionTracker.stop()
+        connectionPool.closeAll()
         del self.dsgTools
         del self.toolbar
 
@@ -125,6 +129,9 @@ class DsgTools(object):
         self.guiManager.initGui()
         #provider
         QgsApplication.processingRegistry().addProvider(self.provider)
+        # edited regions are tracked for the incremental validation mode
+        if dirtyRegionTracker.isEnabled():
+            dirtyRegionTracker.start()
 
     def getAcquisitionMenu(self):
         return AcquisitionMenuCtrl()
\ No newline at end of file
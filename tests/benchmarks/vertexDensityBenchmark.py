@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Opt-in benchmark of the grid-hashed close vertex search of the large vertex
+density validation, from 10^4 to 10^7 vertexes (about one vertex per square
+unit and 1000 vertexes per feature). It is not collected by the test runner;
+run it with the Python of QGIS and DSGTools on the path:
+
+    python tests/benchmarks/vertexDensityBenchmark.py [size ...]
+"""
+
+import math
+import sys
+import time
+
+import numpy as np
+
+from DsgTools.core.GeometricTools.vertexArrays import closeVertexMask
+
+BENCHMARK_SIZES = [10**4, 10**5, 10**6, 10**7]
+
+
+def benchmark(sizeList=None, searchRadius=.05):
+    """
+    :param sizeList: (list-of-int) numbers of vertexes to search;
+    :param searchRadius: (float) search distance.
+    :return: (list-of-tuple) (size, elapsed seconds, close vertex count).
+    """
+    rng = np.random.default_rng(0)
+    resultList = []
+    for size in sizeList or BENCHMARK_SIZES:
+        xy = rng.random((size, 2)) * math.sqrt(size)
+        groups = np.arange(size) // 1000
+        start = time.perf_counter()
+        mask = closeVertexMask(xy, searchRadius, groups=groups)
+        resultList.append((size, time.perf_counter() - start, int(mask.sum())))
+    return resultList
+
+
+if __name__ == '__main__':
+    for size, elapsed, closeCount in benchmark([int(i) for i in sys.argv[1:]]):
+        print('{0:>9} vertexes: {1:.3f}s ({2} close vertexes)'.format(size, elapsed, closeCount))
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the compact network: its CSR adjacency, strongly connected
+components, loops and degree-2 chains, on small hand-built networks, and
+the line merge built on the chains. The 500k segment loop
+benchmark only runs when the DSGTOOLS_BENCHMARK environment variable is set.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+import processing
+from qgis.core import (QgsFeature, QgsGeometry, QgsPointXY,
+                       QgsProcessingContext, QgsProcessingFeedback,
+                       QgsProject, QgsVectorLayer, QgsWkbTypes)
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.compactNetwork import CompactNetwork
+from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.GeometricTools.lineEndPoints import LineEndPoints
+
+
+class CompactNetworkTest(unittest.TestCase):
+
+    def components(self, network):
+        """
+        :return: (list-of-list-of-int) sorted node ids of each strongly
+            connected component, in sorted order.
+        """
+        labels, componentCount = network.stronglyConnectedComponents()
+        self.assertEqual(len(labels), network.nodeCount())
+        self.assertEqual(len(set(labels.tolist())), componentCount)
+        componentDict = dict()
+        for node, label in enumerate(labels.tolist()):
+            componentDict.setdefault(label, []).append(node)
+        return sorted(componentDict.values())
+
+    def loops(self, network):
+        return sorted(sorted(network.lineIds[group].tolist()) for group in network.loopEdgeGroups())
+
+    def test_adjacency(self):
+        # lines 11 and 12 are parallel lines from node 1 to node 2
+        network = CompactNetwork([10, 11, 12], [0, 1, 1], [1, 2, 2], 4)
+        self.assertEqual((network.nodeCount(), network.edgeCount()), (4, 3))
+        self.assertEqual(network.neighbors(0), [1])
+        self.assertEqual(network.neighbors(1), [2, 2, 0])
+        self.assertEqual(network.neighbors(2), [1, 1])
+        self.assertEqual(network.neighbors(3), [])
+        self.assertEqual(
+            [network.degree(node) for node in range(4)], [1, 3, 2, 0])
+        self.assertEqual(network.otherEnd(11, 1), 2)
+        self.assertEqual(network.otherEnd(11, 2), 1)
+        self.assertIsNone(network.otherEnd(10, 2))
+        self.assertIsNone(network.otherEnd(99, 0))
+        indptr, indices, edgeIds = network.directedAdjacency()
+        self.assertEqual(indptr.tolist(), [0, 1, 3, 3, 3])
+        self.assertEqual(indices.tolist(), [1, 2, 2])
+        self.assertEqual(edgeIds.tolist(), [0, 1, 2])
+
+    def test_from_node_dict(self):
+        featDict = {fid: QgsFeature(fid) for fid in range(1, 5)}
+        # line 3 starts 0.0004 away from the end of line 1 and line 4 has no
+        # end node, so it is left out
+        nodeDict = {
+            QgsPointXY(0, 0): {'start': [featDict[1]], 'end': []},
+            QgsPointXY(1, 0): {'start': [featDict[2]], 'end': [featDict[1]]},
+            QgsPointXY(2, 0): {'start': [], 'end': [featDict[2]]},
+            QgsPointXY(1.0004, 0): {'start': [featDict[3]], 'end': []},
+            QgsPointXY(1, 1): {'start': [], 'end': [featDict[3]]},
+            QgsPointXY(3, 3): {'start': [featDict[4]], 'end': []},
+        }
+        network = CompactNetwork.fromNodeDict(nodeDict)
+        self.assertEqual((network.nodeCount(), network.edgeCount()), (6, 3))
+        self.assertEqual(network.lineIds.tolist(), [1, 2, 3])
+        node = network.nodeId(QgsPointXY(1, 0))
+        self.assertNotEqual(node, network.nodeId(QgsPointXY(1.0004, 0)))
+        self.assertEqual(network.degree(node), 2)
+        self.assertEqual(network.nodeKey(node), QgsPointXY(1, 0))
+        self.assertIsNone(network.nodeId(QgsPointXY(5, 5)))
+        # with a tolerance, close nodes get the same id and the first key
+        network = CompactNetwork.fromNodeDict(nodeDict, tolerance=1e-3)
+        self.assertEqual((network.nodeCount(), network.edgeCount()), (5, 3))
+        node = network.nodeId(QgsPointXY(1.0004, 0))
+        self.assertEqual(node, network.nodeId(QgsPointXY(1, 0)))
+        self.assertEqual(network.nodeKey(node), QgsPointXY(1, 0))
+        self.assertEqual(network.degree(node), 3)
+        self.assertEqual(network.otherEnd(3, node), network.nodeId(QgsPointXY(1, 1)))
+        self.assertEqual(network.otherEnd(1, node), network.nodeId(QgsPointXY(0, 0)))
+        network = CompactNetwork.fromNodeDict(dict())
+        self.assertEqual((network.nodeCount(), network.edgeCount()), (0, 0))
+
+    def test_from_line_end_points(self):
+        # each part of a multi line is an edge of its own
+        featList = []
+        for fid, wkt in (
+            (1, 'MultiLineString ((0 0, 1 0), (1 0, 1 1))'),
+            (2, 'LineString (2 0, 1 0)'),
+        ):
+            feat = QgsFeature(fid)
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            featList.append(feat)
+        network = CompactNetwork.fromLineEndPoints(LineEndPoints.fromFeatures(featList))
+        self.assertEqual((network.nodeCount(), network.edgeCount()), (4, 3))
+        self.assertEqual(network.lineIds.tolist(), [1, 1, 2])
+        node = network.nodeId(QgsPointXY(1, 0))
+        self.assertEqual(network.nodeKey(node), QgsPointXY(1, 0))
+        self.assertEqual(network.degree(node), 3)
+        self.assertEqual(
+            sorted((network.nodeKey(other).x(), network.nodeKey(other).y())
+                   for other in network.neighbors(node)),
+            [(0, 0), (1, 1), (2, 0)]
+        )
+        self.assertEqual(network.otherEnd(2, node), network.nodeId(QgsPointXY(2, 0)))
+
+    def test_strongly_connected_components(self):
+        # 0 -> 1 -> 2 -> 0 is a cycle, 2 -> 3 -> 4 -> 3 has a cycle on 3 and 4
+        # and 5 is isolated
+        network = CompactNetwork(
+            [10, 11, 12, 13, 14, 15],
+            [0, 1, 2, 2, 3, 4],
+            [1, 2, 0, 3, 4, 3],
+            6
+        )
+        self.assertEqual(self.components(network), [[0, 1, 2], [3, 4], [5]])
+        self.assertEqual(self.loops(network), [[10, 11, 12], [14, 15]])
+
+    def test_no_loop_on_undirected_cycle(self):
+        # the lines form a ring, but they do not follow each other
+        network = CompactNetwork([0, 1, 2], [0, 1, 0], [1, 2, 2], 3)
+        self.assertEqual(self.components(network), [[0], [1], [2]])
+        self.assertEqual(network.loopEdgeGroups(), [])
+
+    def test_self_loop_and_parallel_lines(self):
+        # line 0 starts and ends on node 0; lines 1 and 2 go from 1 to 2 and
+        # back; line 3 only leaves the loop
+        network = CompactNetwork([0, 1, 2, 3], [0, 1, 2, 2], [0, 2, 1, 3], 4)
+        self.assertEqual(self.components(network), [[0], [1, 2], [3]])
+        self.assertEqual(self.loops(network), [[0], [1, 2]])
+        self.assertEqual(CompactNetwork([], [], [], 0).loopEdgeGroups(), [])
+
+    def test_deep_chain_is_iterative(self):
+        # a single cycle deeper than the recursion limit
+        nodeCount = sys.getrecursionlimit() * 2
+        start = np.arange(nodeCount)
+        network = CompactNetwork(start, start, (start + 1) % nodeCount, nodeCount)
+        labels, componentCount = network.stronglyConnectedComponents()
+        self.assertEqual(componentCount, 1)
+        self.assertEqual(len(network.loopEdgeGroups()[0]), nodeCount)
+
+    def test_loop_through_interior_vertex(self):
+        # line 1 ends on an interior vertex of line 0, which was not split
+        polylineList = [
+            [QgsPointXY(0, 0), QgsPointXY(10, 0), QgsPointXY(10, 10)],
+            [QgsPointXY(10, 10), QgsPointXY(0, 10), QgsPointXY(10, 0)],
+        ]
+        endPointNetwork = CompactNetwork([0, 1], [0, 2], [2, 1], 3)
+        self.assertEqual(endPointNetwork.loopEdgeGroups(), [])
+        network, pieceList = CompactNetwork.fromPolylines([0, 1], polylineList)
+        self.assertEqual(network.edgeCount(), 3)
+        self.assertEqual(network.lineIds.tolist(), [0, 0, 1])
+        self.assertEqual(pieceList[0], [QgsPointXY(0, 0), QgsPointXY(10, 0)])
+        loopList = network.loopEdgeGroups()
+        self.assertEqual([group.tolist() for group in loopList], [[1, 2]])
+
+    def test_polylines_with_repeated_vertices(self):
+        # a closed line with a repeated vertex is a loop of one edge, a line
+        # that only repeats its last vertex is not
+        network, pieceList = CompactNetwork.fromPolylines(
+            [0, 1],
+            [
+                [QgsPointXY(0, 0), QgsPointXY(0, 0), QgsPointXY(1, 0), QgsPointXY(1, 1), QgsPointXY(0, 0)],
+                [QgsPointXY(5, 5), QgsPointXY(6, 5), QgsPointXY(6, 5)],
+            ]
+        )
+        self.assertEqual(len(pieceList[0]), 4)
+        self.assertEqual(pieceList[1], [QgsPointXY(5, 5), QgsPointXY(6, 5)])
+        self.assertEqual(self.loops(network), [[0]])
+        network, pieceList = CompactNetwork.fromPolylines([], [])
+        self.assertEqual((network.edgeCount(), pieceList), (0, []))
+
+    def test_drainage_loops_algorithm(self):
+        layer = QgsVectorLayer('LineString?crs=EPSG:31982', 'drainages', 'memory')
+        featList = []
+        for wkt in (
+            'LineString (0 0, 10 0, 10 10)',
+            'LineString (10 10, 0 10, 10 0)',
+            'LineString (20 0, 30 0)',
+        ):
+            feat = QgsFeature(layer.fields())
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            featList.append(feat)
+        layer.dataProvider().addFeatures(featList)
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        output = processing.run(
+            'dsgtools:identifydrainageloops',
+            {'INPUT': layer, 'FLAGS': 'memory:'},
+            context=context,
+            feedback=QgsProcessingFeedback()
+        )
+        flagList = list(output['FLAGS'].getFeatures())
+        self.assertEqual(output['FLAGS'].wkbType(), QgsWkbTypes.LineString)
+        self.assertEqual(len(flagList), 1)
+        self.assertEqual(flagList[0]['reason'], 'Loop on input drainages')
+        self.assertTrue(flagList[0].geometry().constGet().isClosed())
+        self.assertAlmostEqual(flagList[0].geometry().length(), 10 + 10 + 10 + 200**.5)
+
+    def test_degree_two_chains(self):
+        # 0 - 1 - 2 is an open chain even if line 1 is reversed; node 3 joins
+        # three lines, so lines 3 and 4 are chains of their own; line 5 is
+        # of another group and line 6 is never chained
+        network = CompactNetwork(
+            [0, 1, 2, 3, 4, 5, 6],
+            [0, 2, 2, 3, 3, 5, 6],
+            [1, 1, 3, 4, 5, 6, 7],
+            8
+        )
+        chainList = network.degreeTwoChains(np.array([0, 0, 0, 0, 0, 1, -1]))
+        self.assertEqual(chainList, [[0, 1, 2], [3], [4], [5], [6]])
+        chainList = network.degreeTwoChains(np.array([0, 0, 0, 0, 0, 0, -1]))
+        self.assertEqual(chainList, [[0, 1, 2], [3], [4, 5], [6]])
+
+    def test_degree_two_closed_chains(self):
+        # a ring of three lines, two parallel lines and a closed line
+        network = CompactNetwork(
+            [0, 1, 2, 3, 4, 5],
+            [0, 1, 2, 3, 4, 5],
+            [1, 2, 0, 4, 3, 5],
+            6
+        )
+        chainList = network.degreeTwoChains(np.zeros(6, dtype=np.int64))
+        # the closed line is never linked to itself, so it is found with the
+        # open chains; the rings are walked in connection order
+        self.assertEqual(chainList, [[5], [0, 2, 1], [3, 4]])
+
+    def test_degree_two_chains_max_vertex_count(self):
+        network = CompactNetwork([0, 1, 2, 3], [0, 1, 2, 3], [1, 2, 3, 4], 5)
+        groups = np.zeros(4, dtype=np.int64)
+        vertexCounts = np.array([3, 3, 3, 3])
+        # merged chains share their end vertexes: 3 + 2 + 2 + 2 vertexes
+        for maxVertexCount, expected in (
+            (None, [[0, 1, 2, 3]]),
+            (0, [[0, 1, 2, 3]]),
+            (9, [[0, 1, 2, 3]]),
+            (8, [[0, 1, 2], [3]]),
+            (5, [[0, 1], [2, 3]]),
+            (2, [[0], [1], [2], [3]]),
+        ):
+            self.assertEqual(
+                network.degreeTwoChains(
+                    groups, vertexCounts=vertexCounts, maxVertexCount=maxVertexCount),
+                expected
+            )
+        # a line longer than the limit is kept whole
+        self.assertEqual(
+            network.splitChain([0, 1, 2, 3], np.array([2, 7, 2, 2]), 4),
+            [[0], [1], [2, 3]]
+        )
+
+    def test_merge_lines_into_lowest_id(self):
+        layer = QgsVectorLayer(
+            'LineString?crs=EPSG:31982&field=name:string(10)', 'lines', 'memory')
+        featList = []
+        for wkt, name in (
+            ('LineString (10 0, 20 0)', 'a'),
+            ('LineString (0 0, 10 0)', 'a'),
+            ('LineString (30 0, 20 0)', 'a'),
+            ('LineString (30 0, 30 10)', 'b'),
+            ('LineString (40 0, 50 0)', 'a'),
+            ('LineString (50 0, 60 0)', 'a'),
+            ('LineString (50 0, 50 10)', 'a'),
+        ):
+            feat = QgsFeature(layer.fields())
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            feat['name'] = name
+            featList.append(feat)
+        layer.dataProvider().addFeatures(featList)
+        firstId = min(layer.allFeatureIds())
+        LayerHandler().mergeLinesOnLayer(layer)
+        featDict = {feat.id() - firstId: feat for feat in layer.getFeatures()}
+        # the chain of lines 0, 1 and 2 is kept on line 0, even if the chain
+        # does not start on it; lines 4, 5 and 6 meet on a node of degree 3
+        self.assertEqual(sorted(featDict), [0, 3, 4, 5, 6])
+        self.assertTrue(featDict[0].geometry().isGeosEqual(
+            QgsGeometry.fromWkt('LineString (0 0, 10 0, 20 0, 30 0)')))
+        self.assertEqual(featDict[0]['name'], 'a')
+        self.assertTrue(featDict[3].geometry().isGeosEqual(
+            QgsGeometry.fromWkt('LineString (30 0, 30 10)')))
+        layer.rollBack()
+
+    def test_loop_benchmark(self):
+        if not os.environ.get('DSGTOOLS_BENCHMARK'):
+            raise unittest.SkipTest('set DSGTOOLS_BENCHMARK to run the benchmark')
+        edgeCount = 500000
+        nodeCount = edgeCount // 2
+        rng = np.random.default_rng(0)
+        start = time.perf_counter()
+        network = CompactNetwork(
+            np.arange(edgeCount),
+            rng.integers(0, nodeCount, edgeCount),
+            rng.integers(0, nodeCount, edgeCount),
+            nodeCount
+        )
+        buildTime = time.perf_counter() - start
+        start = time.perf_counter()
+        loopList = network.loopEdgeGroups()
+        loopTime = time.perf_counter() - start
+        self.assertTrue(loopList)
+        print(
+            '\n{0} segments on {1} nodes: network built in {2:.3f}s, {3} loop(s) '
+            'found in {4:.3f}s'.format(edgeCount, nodeCount, buildTime, len(loopList), loopTime)
+        )
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(CompactNetworkTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
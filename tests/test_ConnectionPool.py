@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the PostgreSQL connection pool against a throwaway local server,
+started by the test fixture with initdb and pg_ctl (the tests are skipped
+when they are not on the PATH or on PG_BINDIR).
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from qgis.PyQt.QtCore import QSettings, QThread
+from qgis.PyQt.QtSql import QSqlQuery
+from qgis.testing import unittest
+
+from DsgTools.core.Factories.DbFactory.connectionPool import (
+    POOL_SETTINGS_KEY, ConnectionPool, ConnectionPoolExhausted, connectionPool)
+from DsgTools.core.Factories.DbFactory.postgisDb import PostgisDb
+
+
+def pgBinary(name):
+    binDir = os.environ.get('PG_BINDIR')
+    if binDir and os.path.exists(os.path.join(binDir, name)):
+        return os.path.join(binDir, name)
+    return shutil.which(name)
+
+
+def freePort():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class WorkerThread(QThread):
+    def __init__(self, work):
+        super(WorkerThread, self).__init__()
+        self.work = work
+
+    def run(self):
+        self.work()
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    USER = 'dsgtools_test'
+    PASSWORD = 'dsgtools_test'
+
+    @classmethod
+    def setUpClass(cls):
+        initdb, pgCtl = pgBinary('initdb'), pgBinary('pg_ctl')
+        if initdb is None or pgCtl is None:
+            raise unittest.SkipTest('PostgreSQL binaries not found')
+        cls.pgCtl = pgCtl
+        cls.dataDir = tempfile.mkdtemp(prefix='dsgtools_pg_')
+        cls.port = freePort()
+        pwFile = os.path.join(cls.dataDir, 'pwfile')
+        with open(pwFile, 'w') as f:
+            f.write(cls.PASSWORD)
+        clusterDir = os.path.join(cls.dataDir, 'cluster')
+        subprocess.run(
+            [initdb, '-D', clusterDir, '-U', cls.USER, '--pwfile', pwFile, '-A', 'md5'],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        subprocess.run(
+            [pgCtl, '-D', clusterDir, '-w', '-l', os.path.join(cls.dataDir, 'log'),
+             '-o', '-p {0} -k {1} -c listen_addresses=127.0.0.1'.format(cls.port, cls.dataDir),
+             'start'],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        cls.clusterDir = clusterDir
+
+    @classmethod
+    def tearDownClass(cls):
+        subprocess.run(
+            [cls.pgCtl, '-D', cls.clusterDir, '-m', 'immediate', 'stop'],
+            stdout=subprocess.DEVNULL
+        )
+        shutil.rmtree(cls.dataDir, ignore_errors=True)
+
+    def getParameters(self, database='postgres'):
+        return ('127.0.0.1', self.port, database, self.USER, self.PASSWORD)
+
+    def connectionKey(self):
+        return ConnectionPool.connectionKey(*self.getParameters()[:4])
+
+    def backendPid(self, db):
+        query = QSqlQuery(db)
+        self.assertTrue(query.exec_('SELECT pg_backend_pid()'))
+        query.next()
+        return query.value(0)
+
+    def test_reuse_and_health_check(self):
+        pool = ConnectionPool()
+        db = pool.acquire(*self.getParameters())
+        pid = self.backendPid(db)
+        pool.release(db)
+        db = pool.acquire(*self.getParameters())
+        self.assertEqual(self.backendPid(db), pid)
+        # kill the connection from another session while it is idle
+        other = pool.acquire(*self.getParameters())
+        pool.release(db)
+        QSqlQuery(other).exec_('SELECT pg_terminate_backend({0})'.format(pid))
+        db = pool.acquire(*self.getParameters())
+        self.assertNotEqual(self.backendPid(db), pid)
+        pool.release(db)
+        pool.release(other)
+        stats = pool.stats()
+        self.assertEqual(stats['healthCheckFailures'], 1)
+        self.assertEqual(stats['reused'], 1)
+        pool.closeAll()
+
+    def test_max_size(self):
+        pool = ConnectionPool(maxSize=2, checkoutTimeout=30)
+        dbList = [pool.acquire(*self.getParameters()) for _ in range(2)]
+        # the main thread does not wait for a free slot
+        start = time.monotonic()
+        with self.assertRaises(ConnectionPoolExhausted):
+            pool.acquire(*self.getParameters())
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+        for db in dbList:
+            pool.release(db)
+        pool.release(pool.acquire(*self.getParameters()))
+        pool.closeAll()
+
+    def test_worker_waits_for_slot(self):
+        pool = ConnectionPool(maxSize=1, checkoutTimeout=0.2)
+        db = pool.acquire(*self.getParameters())
+        errorList = []
+
+        def work():
+            try:
+                pool.acquire(*self.getParameters())
+            except ConnectionPoolExhausted as e:
+                errorList.append(e)
+
+        thread = WorkerThread(work)
+        start = time.monotonic()
+        thread.start()
+        thread.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(len(errorList), 1)
+        pool.release(db)
+        pool.closeAll()
+
+    def test_thread_affinity(self):
+        pool = ConnectionPool()
+        db = pool.acquire(*self.getParameters())
+        mainPid = self.backendPid(db)
+        pool.release(db)
+        pidList = []
+
+        def work():
+            threadDb = pool.acquire(*self.getParameters())
+            pidList.append(self.backendPid(threadDb))
+            pool.release(threadDb)
+
+        thread = WorkerThread(work)
+        thread.start()
+        thread.wait()
+        self.assertNotEqual(pidList, [mainPid])
+        # the idle connection of the finished thread was closed on it
+        self.assertEqual(pool.stats()['idle'], {self.connectionKey(): 1})
+        pool.closeAll()
+
+    def test_release_from_other_thread(self):
+        pool = ConnectionPool()
+        dbList = []
+        thread = WorkerThread(lambda: dbList.append(pool.acquire(*self.getParameters())))
+        thread.start()
+        thread.wait()
+        pool.release(dbList[0])
+        self.assertEqual(pool.stats()['idle'], {})
+        self.assertEqual(pool.stats()['discarded'], 1)
+        self.assertFalse(pool.watchedThreads - {QThread.currentThread()})
+
+    def setPoolEnabled(self, enabled):
+        settings = QSettings()
+        previous = settings.value(POOL_SETTINGS_KEY)
+        settings.setValue(POOL_SETTINGS_KEY, enabled)
+        if previous is None:
+            self.addCleanup(settings.remove, POOL_SETTINGS_KEY)
+        else:
+            self.addCleanup(settings.setValue, POOL_SETTINGS_KEY, previous)
+        self.addCleanup(connectionPool.closeAll)
+
+    def test_pool_is_opt_in(self):
+        settings = QSettings()
+        previous = settings.value(POOL_SETTINGS_KEY)
+        settings.remove(POOL_SETTINGS_KEY)
+        try:
+            self.assertFalse(connectionPool.isEnabled())
+            abstractDb = PostgisDb()
+            abstractDb.connectDatabaseWithParameters(*self.getParameters())
+            self.assertFalse(connectionPool.owns(abstractDb.db))
+            abstractDb.closeDatabase()
+        finally:
+            if previous is not None:
+                settings.setValue(POOL_SETTINGS_KEY, previous)
+
+    def test_postgis_db_uses_pool(self):
+        self.setPoolEnabled(True)
+        firstDb = PostgisDb()
+        firstDb.connectDatabaseWithParameters(*self.getParameters())
+        pid = self.backendPid(firstDb.db)
+        firstDb.closeDatabase()
+        secondDb = PostgisDb()
+        secondDb.connectDatabaseWithParameters(*self.getParameters())
+        self.assertEqual(self.backendPid(secondDb.db), pid)
+        secondDb.closeDatabase()
+
+    def test_release_rolls_back_open_transactions_only(self):
+        pool = ConnectionPool()
+        db = pool.acquire(*self.getParameters())
+        self.assertTrue(QSqlQuery(db).exec_('SELECT 1'))
+        pool.release(db)
+        self.assertNotIn('rollbacks', pool.stats())
+        db = pool.acquire(*self.getParameters())
+        self.assertTrue(db.transaction())
+        self.assertTrue(QSqlQuery(db).exec_('CREATE TABLE pool_rollback_test (id integer)'))
+        pool.release(db)
+        self.assertEqual(pool.stats()['rollbacks'], 1)
+        db = pool.acquire(*self.getParameters())
+        self.assertFalse(db.transactionOpen)
+        query = QSqlQuery(db)
+        self.assertTrue(query.exec_("SELECT to_regclass('pool_rollback_test') IS NULL"))
+        query.next()
+        self.assertTrue(query.value(0))
+        pool.release(db)
+        pool.closeAll()
+
+    def test_postgis_db_connections_are_pinned(self):
+        self.setPoolEnabled(True)
+        maxSize = connectionPool.maxSize
+        connectionPool.maxSize = 1
+        self.addCleanup(setattr, connectionPool, 'maxSize', maxSize)
+        dbList = []
+        for _ in range(2):
+            abstractDb = PostgisDb()
+            abstractDb.connectDatabaseWithParameters(*self.getParameters())
+            dbList.append(abstractDb)
+        # long-lived instances do not take the slots of the pool
+        for abstractDb in dbList:
+            self.assertTrue(connectionPool.owns(abstractDb.db))
+        stats = connectionPool.stats()
+        self.assertEqual(stats['pinned'], {self.connectionKey(): 2})
+        self.assertEqual(stats['checkedOut'], {})
+        errorList = []
+
+        def work():
+            try:
+                connectionPool.release(connectionPool.acquire(*self.getParameters()))
+            except ConnectionPoolExhausted as e:
+                errorList.append(e)
+
+        thread = WorkerThread(work)
+        start = time.monotonic()
+        thread.start()
+        thread.wait()
+        self.assertLess(time.monotonic() - start, connectionPool.checkoutTimeout)
+        self.assertEqual(errorList, [])
+        for abstractDb in dbList:
+            abstractDb.closeDatabase()
+        self.assertEqual(connectionPool.stats()['pinned'], {})
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(ConnectionPoolTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
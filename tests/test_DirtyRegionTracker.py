@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the edited regions recorded for the incremental validation mode.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import os
+import sys
+import tempfile
+
+from qgis.core import (QgsCoordinateReferenceSystem, QgsCoordinateTransform,
+                       QgsFeature, QgsGeometry, QgsProject, QgsRectangle,
+                       QgsVectorLayer)
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.dirtyRegionTracker import (
+    PROJECT_KEY, PROJECT_SCOPE, DirtyRegion, DirtyRegionTracker,
+    LayerDirtyState)
+
+
+class DirtyRegionTrackerTest(unittest.TestCase):
+
+    def test_state_checkpoints(self):
+        state = LayerDirtyState()
+        state.addRectangle(QgsRectangle(0, 0, 1, 1))
+        state.checkpointDict['alg_a'] = state.serial
+        state.checkpointDict['alg_b'] = 0
+        state.addRectangle(QgsRectangle(5, 5, 6, 6))
+        self.assertEqual(len(state.regionSince(state.checkpointDict['alg_a']).rectList), 1)
+        self.assertEqual(len(state.regionSince(state.checkpointDict['alg_b']).rectList), 2)
+        state.checkpointDict['alg_b'] = 1
+        state.prune()
+        self.assertEqual(len(state.rectList), 1)
+        restored = LayerDirtyState.fromJson(state.toJson())
+        self.assertEqual(restored.rectList, state.rectList)
+        self.assertEqual(restored.checkpointDict, state.checkpointDict)
+
+    def test_state_is_bounded(self):
+        state = LayerDirtyState()
+        for i in range(LayerDirtyState.maxRectangles + 10):
+            state.addRectangle(QgsRectangle(i, 0, i + 0.5, 0.5))
+        self.assertEqual(len(state.rectList), LayerDirtyState.maxRectangles)
+        region = state.regionSince(0)
+        lastPoint = QgsGeometry.fromWkt('Point ({0} 0.25)'.format(LayerDirtyState.maxRectangles + 9.25))
+        self.assertTrue(region.intersects(lastPoint))
+
+    def test_tracks_edits(self):
+        lyr = QgsVectorLayer('LineString?crs=epsg:31983', 'lines', 'memory')
+        feat = QgsFeature(lyr.fields())
+        feat.setGeometry(QgsGeometry.fromWkt('LineString (0 0, 10 0)'))
+        lyr.dataProvider().addFeatures([feat])
+        project = QgsProject()
+        project.addMapLayer(lyr)
+        tracker = DirtyRegionTracker()
+        tracker.start(project)
+        tracker.setCheckpoint(lyr, 'alg', tracker.currentSerial(lyr))
+        fid = next(lyr.getFeatures()).id()
+        lyr.startEditing()
+        lyr.changeGeometry(fid, QgsGeometry.fromWkt('LineString (100 100, 110 100)'))
+        lyr.commitChanges()
+        region = tracker.dirtyRegion(lyr, 'alg')
+        # both the old and the new extents are dirty
+        self.assertTrue(region.intersects(QgsGeometry.fromWkt('Point (5 0)')))
+        self.assertTrue(region.intersects(QgsGeometry.fromWkt('Point (105 100)')))
+        self.assertFalse(region.intersects(QgsGeometry.fromWkt('Point (50 50)')))
+        self.assertEqual(region.featureIds(lyr), {fid})
+        # checkpoints are saved without marking the project as modified
+        project.setDirty(False)
+        tracker.setCheckpoint(lyr, 'alg', tracker.currentSerial(lyr))
+        self.assertFalse(project.isDirty())
+        self.assertTrue(tracker.dirtyRegion(lyr, 'alg').isEmpty())
+        tracker.stop()
+
+    def test_batched_reads_and_lazy_project_entries(self):
+        lyr = QgsVectorLayer('LineString?crs=epsg:31983', 'lines', 'memory')
+        featList = []
+        for i in range(3):
+            feat = QgsFeature(lyr.fields())
+            feat.setGeometry(QgsGeometry.fromWkt('LineString ({0} 0, {0} 1)'.format(10 * i)))
+            featList.append(feat)
+        lyr.dataProvider().addFeatures(featList)
+        project = QgsProject()
+        project.addMapLayer(lyr)
+        tracker = DirtyRegionTracker()
+        tracker.start(project)
+        tracker.setCheckpoint(lyr, 'alg', tracker.currentSerial(lyr))
+        fidList = sorted(lyr.allFeatureIds())
+        lyr.startEditing()
+        lyr.deleteFeatures(fidList[:2])
+        # the old geometries are queued until the state is read
+        self.assertEqual(tracker.pendingDict[lyr.id()], set(fidList[:2]))
+        region = tracker.dirtyRegion(lyr, 'alg')
+        self.assertFalse(tracker.pendingDict)
+        self.assertTrue(region.intersects(QgsGeometry.fromWkt('Point (0 0.5)')))
+        self.assertTrue(region.intersects(QgsGeometry.fromWkt('Point (10 0.5)')))
+        self.assertFalse(region.intersects(QgsGeometry.fromWkt('Point (20 0.5)')))
+        lyr.rollBack()
+        # the state is only written to the project when it is saved
+        entryKey = PROJECT_KEY.format(lyr.id())
+        self.assertFalse(project.readEntry(PROJECT_SCOPE, entryKey, '')[1])
+        with tempfile.TemporaryDirectory() as tempDir:
+            projectPath = os.path.join(tempDir, 'project.qgs')
+            self.assertTrue(project.write(projectPath))
+            savedProject = QgsProject()
+            self.assertTrue(savedProject.read(projectPath))
+            jsonString, found = savedProject.readEntry(PROJECT_SCOPE, entryKey, '')
+        self.assertTrue(found)
+        self.assertIn('alg', LayerDirtyState.fromJson(jsonString).checkpointDict)
+        tracker.stop()
+
+    def test_region_union_and_transform(self):
+        region = DirtyRegion([QgsRectangle(0, 0, 1, 1)]).union(
+            DirtyRegion([QgsRectangle(5, 5, 6, 6)]))
+        self.assertEqual(len(region.rectList), 2)
+        transform = QgsCoordinateTransform(
+            QgsCoordinateReferenceSystem('EPSG:4674'),
+            QgsCoordinateReferenceSystem('EPSG:31983'),
+            QgsProject.instance()
+        )
+        transformed = DirtyRegion([QgsRectangle(-45.1, -23.1, -45, -23)]).transformed(transform)
+        self.assertTrue(transformed.intersects(
+            QgsGeometry.fromPointXY(transform.transform(-45.05, -23.05))))
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(DirtyRegionTrackerTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
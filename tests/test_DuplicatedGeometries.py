@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+"""
+Checks the duplicated geometry search: the geometry normalization (line
+direction, ring orientation and start vertex, precision grid) and the
+grouping by normalized WKB hash, with and without attributes.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import sys
+from unittest import mock
+
+from qgis.core import QgsFeature, QgsField, QgsFields, QgsGeometry
+from qgis.PyQt.QtCore import QVariant
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.geometryHandler import GeometryHandler
+from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+
+
+class DuplicatedGeometriesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.geometryHandler = GeometryHandler()
+        self.layerHandler = LayerHandler()
+        self.fields = QgsFields()
+        self.fields.append(QgsField('name', QVariant.String))
+
+    def normalizedWkt(self, wkt, gridSize=None):
+        return self.geometryHandler.normalizeGeometry(
+            QgsGeometry.fromWkt(wkt), gridSize=gridSize).asWkt()
+
+    def buildEntries(self, wktList, nameList=None):
+        """
+        :param wktList: (list-of-str) geometry of each feature, whose id is
+            its index on the list;
+        :param nameList: (list-of-str) value of the name field of each
+            feature.
+        :return: (list-of-dict) {'geom', 'feat'} entries.
+        """
+        nameList = ['a'] * len(wktList) if nameList is None else nameList
+        entryList = []
+        for fid, (wkt, name) in enumerate(zip(wktList, nameList)):
+            feat = QgsFeature(self.fields, fid)
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            feat['name'] = name
+            entryList.append({'geom': feat.geometry(), 'feat': feat})
+        return entryList
+
+    def duplicatedIds(self, duplicatedDict):
+        return sorted(
+            sorted(feat.id() for feat in featList)
+            for featList in duplicatedDict.values()
+        )
+
+    def test_normalize_line_direction(self):
+        reversedLine = QgsGeometry.fromWkt('LineString (2 0, 1 1, 0 0)')
+        self.assertEqual(
+            self.geometryHandler.normalizeLineDirection(reversedLine).asWkt(),
+            QgsGeometry.fromWkt('LineString (0 0, 1 1, 2 0)').asWkt()
+        )
+        line = QgsGeometry.fromWkt('LineString (0 0, 1 1, 2 0)')
+        self.assertEqual(
+            self.geometryHandler.normalizeLineDirection(line).asWkt(), line.asWkt())
+        # closed lines are kept as they are
+        ring = QgsGeometry.fromWkt('LineString (1 1, 0 0, 1 0, 1 1)')
+        self.assertEqual(
+            self.geometryHandler.normalizeLineDirection(ring).asWkt(), ring.asWkt())
+        # each part of a multi line is handled on its own
+        multiLine = QgsGeometry.fromWkt(
+            'MultiLineString ((0 0, 1 0), (3 3, 2 2))')
+        self.assertEqual(
+            self.geometryHandler.normalizeLineDirection(multiLine).asWkt(),
+            QgsGeometry.fromWkt('MultiLineString ((0 0, 1 0), (2 2, 3 3))').asWkt()
+        )
+
+    def test_normalize_geometry(self):
+        self.assertEqual(
+            self.normalizedWkt('LineString (2 0, 1 1, 0 0)'),
+            self.normalizedWkt('LineString (0 0, 1 1, 2 0)')
+        )
+        # ring orientation and start vertex
+        self.assertEqual(
+            self.normalizedWkt('Polygon ((0 0, 0 1, 1 1, 1 0, 0 0))'),
+            self.normalizedWkt('Polygon ((1 1, 1 0, 0 0, 0 1, 1 1))')
+        )
+        # part order
+        self.assertEqual(
+            self.normalizedWkt('MultiPoint ((1 1), (0 0))'),
+            self.normalizedWkt('MultiPoint ((0 0), (1 1))')
+        )
+        self.assertNotEqual(
+            self.normalizedWkt('LineString (0 0, 1 1, 2 0)'),
+            self.normalizedWkt('LineString (0 0, 1 -1, 2 0)')
+        )
+
+    def test_grid_size(self):
+        entryList = self.buildEntries([
+            'LineString (0 0, 1 1)',
+            'LineString (1.0000001 1, 0 0.0000001)',
+            'LineString (0 0, 1.1 1)',
+        ])
+        self.assertEqual(
+            self.duplicatedIds(self.layerHandler.searchDuplicatedFeatures(entryList)),
+            []
+        )
+        self.assertEqual(
+            self.duplicatedIds(
+                self.layerHandler.searchDuplicatedFeatures(entryList, gridSize=1e-3)),
+            [[0, 1]]
+        )
+
+    def test_exact_normalized_wkb(self):
+        # topologically equal geometries with different vertices are not
+        # duplicated, as the normalized WKB is compared instead of
+        # QgsGeometry.isGeosEqual
+        entryList = self.buildEntries([
+            'LineString (0 0, 2 0)',
+            'LineString (0 0, 1 0, 2 0)',
+            'LineString (2 0, 0 0)',
+        ])
+        self.assertTrue(entryList[0]['geom'].isGeosEqual(entryList[1]['geom']))
+        self.assertEqual(
+            self.duplicatedIds(self.layerHandler.searchDuplicatedFeatures(entryList)),
+            [[0, 2]]
+        )
+
+    def test_attribute_aware(self):
+        entryList = self.buildEntries(
+            ['Point (0 0)', 'Point (0 0)', 'Point (0 0)', 'Point (1 1)'],
+            nameList=['a', 'a', 'b', 'a']
+        )
+        self.assertEqual(
+            self.duplicatedIds(self.layerHandler.searchDuplicatedFeatures(entryList)),
+            [[0, 1, 2]]
+        )
+        duplicatedDict = self.layerHandler.searchDuplicatedFeatures(
+            entryList, columns=['name'], useAttributes=True)
+        self.assertEqual(self.duplicatedIds(duplicatedDict), [[0, 1]])
+        (geomWkb, attrKey), = duplicatedDict.keys()
+        self.assertEqual(attrKey, ('a',))
+        self.assertEqual(geomWkb, entryList[0]['geom'].asWkb())
+
+    def test_hash_collisions(self):
+        entryList = self.buildEntries(
+            ['Point (0 0)', 'Point (1 1)', 'Point (0 0)', 'Point (1 1)', 'Point (2 2)'],
+            nameList=['a', 'a', 'a', 'b', 'a']
+        )
+        collidingHash = mock.Mock(digest=lambda: bytes(16))
+        with mock.patch(
+                'DsgTools.core.GeometricTools.layerHandler.hashlib.blake2b',
+                return_value=collidingHash):
+            duplicatedDict = self.layerHandler.searchDuplicatedFeatures(entryList)
+            attributeDict = self.layerHandler.searchDuplicatedFeatures(
+                entryList, columns=['name'], useAttributes=True)
+        self.assertEqual(self.duplicatedIds(duplicatedDict), [[0, 2], [1, 3]])
+        self.assertEqual(self.duplicatedIds(attributeDict), [[0, 2]])
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(DuplicatedGeometriesTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the buffered flag writer used by the validation algorithms.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import sys
+import threading
+
+from qgis.core import QgsFields, QgsField, QgsGeometry, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+from qgis.testing import unittest
+
+from DsgTools.core.Utils.flagWriter import FlagWriter
+
+
+class FlagWriterTest(unittest.TestCase):
+
+    def getFlagLayer(self):
+        layer = QgsVectorLayer('Point?crs=EPSG:4674&field=reason:string', 'flags', 'memory')
+        self.assertTrue(layer.isValid())
+        return layer
+
+    def getFields(self):
+        fields = QgsFields()
+        fields.append(QgsField('reason', QVariant.String))
+        return fields
+
+    def test_batches_and_deduplication(self):
+        layer = self.getFlagLayer()
+        writer = FlagWriter(layer.dataProvider(), self.getFields(), bufferSize=10, deduplicate=True)
+        for i in range(25):
+            writer.addFlag(QgsGeometry.fromWkt('Point ({0} 0)'.format(i)), 'flag')
+        # same geometry and text as an already added flag, also given as WKB
+        writer.addFlag(bytes(QgsGeometry.fromWkt('Point (0 0)').asWkb()), 'flag')
+        writer.addFlag(QgsGeometry.fromWkt('Point (0 0)'), 'other flag')
+        writer.close()
+        self.assertEqual(layer.featureCount(), 26)
+        self.assertEqual(writer.flagsReceived, 27)
+        self.assertEqual(writer.flagsWritten, 26)
+        self.assertEqual(writer.duplicatesSkipped, 1)
+        self.assertEqual(writer.batchesFlushed, 3)
+
+    def test_concurrent_producers(self):
+        layer = self.getFlagLayer()
+        writer = FlagWriter(layer.dataProvider(), self.getFields(), bufferSize=7)
+
+        def produce(offset):
+            for i in range(100):
+                writer.addFlag(QgsGeometry.fromWkt('Point ({0} {1})'.format(i, offset)), 'flag')
+
+        threadList = [threading.Thread(target=produce, args=(offset,)) for offset in range(4)]
+        for thread in threadList:
+            thread.start()
+        for thread in threadList:
+            thread.join()
+        writer.flush()
+        self.assertEqual(layer.featureCount(), 400)
+        writer.close()
+        self.assertEqual(writer.flagsWritten, 400)
+
+    def test_closed_on_error(self):
+        layer = self.getFlagLayer()
+        with self.assertRaises(ValueError):
+            with FlagWriter(layer.dataProvider(), self.getFields()) as writer:
+                writer.addFlag(QgsGeometry.fromWkt('Point (0 0)'), 'flag')
+                raise ValueError('producer failed')
+        # the flags raised before the error are written and the writer stops
+        self.assertEqual(layer.featureCount(), 1)
+        self.assertFalse(writer._thread.is_alive())
+        with self.assertRaises(RuntimeError):
+            writer.addFlag(QgsGeometry.fromWkt('Point (1 0)'), 'flag')
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(FlagWriterTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
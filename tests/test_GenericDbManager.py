@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks how GenericDbManager reports the databases handled by its batch
+operations, using fake database objects. It is supposed to be run through
+QGIS with DSGTools installed.
+"""
+
+import sys
+
+from qgis.PyQt.Qt import QObject
+from qgis.testing import unittest
+
+from DsgTools.core.ServerManagementTools.genericDbManager import GenericDbManager
+
+
+class FakeConnection(object):
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def transaction(self):
+        return True
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeDb(object):
+    def __init__(self, dbName, failing=False):
+        self.dbName = dbName
+        self.failing = failing
+        self.db = FakeConnection()
+
+    def getDatabaseVersion(self):
+        return '3.0'
+
+    def getDatabaseName(self):
+        return self.dbName
+
+    def getDbOID(self):
+        return 1
+
+    def checkIfExistsConfigTable(self, settingType):
+        return True
+
+    def invalidateMetadataCache(self):
+        pass
+
+    def insertRecordInsidePropertyTable(self, settingType, recDict, edgvVersion):
+        pass
+
+    def removeRecordFromPropertyTable(self, settingType, configName, edgvVersion):
+        pass
+
+    def insertInstalledRecordIntoAdminDb(self, settingType, recDict, dbOid):
+        pass
+
+    def uninstallPropertyOnAdminDb(self, settingType, configName, edgvVersion, dbName=None):
+        pass
+
+    def getRecordFromAdminDb(self, settingType, configName, edgvVersion):
+        return {'name': configName}
+
+    def getPropertyPerspectiveDict(self, settingType, viewType, versionFilter=None):
+        return {'setting': ['db_a', 'db_b', 'db_c']}
+
+    def getParamsFromConectedDb(self):
+        return ('localhost', 5432, 'user', 'password')
+
+    def closeDatabase(self):
+        pass
+
+
+class FakeManager(GenericDbManager):
+    """
+    Manager that connects to fake databases. Materialization fails on the
+    databases listed in failingDbs.
+    """
+    def __init__(self, failingDbs):
+        QObject.__init__(self)
+        self.failingDbs = failingDbs
+        self.dbDict = dict()
+        self.serverAbstractDb = FakeDb('postgres')
+        self.adminDb = FakeDb('dsgtools_admindb')
+        self.openedDbs = dict()
+
+    def getSettingVersion(self, settingName):
+        return '3.0'
+
+    def openDatabaseOnWorker(self, dbName, host, port, user, password):
+        db = FakeDb(dbName, failing=dbName in self.failingDbs)
+        self.openedDbs.setdefault(dbName, []).append(db)
+        return db
+
+    def materializeIntoDatabase(self, abstractDb, propertyDict):
+        if abstractDb.failing:
+            raise Exception('materialization failed')
+
+    def undoMaterializationFromDatabase(self, abstractDb, configName, settingType, edgvVersion):
+        if abstractDb.failing:
+            raise Exception('materialization failed')
+
+
+class GenericDbManagerTest(unittest.TestCase):
+    DB_LIST = ['db_a', 'db_b', 'db_c']
+
+    def test_install_with_one_failing_database(self):
+        manager = FakeManager(failingDbs={'db_b'})
+        successList, errorDict = manager.installSetting('setting', dbNameList=self.DB_LIST, maxWorkers=2)
+        self.assertEqual(successList, ['db_a', 'db_c'])
+        self.assertEqual(errorDict, {'db_b': 'materialization failed'})
+        # the failing database was rolled back and the others committed
+        self.assertEqual(manager.openedDbs['db_b'][0].db.rollbacks, 1)
+        self.assertEqual(manager.openedDbs['db_b'][0].db.commits, 0)
+        self.assertEqual(manager.openedDbs['db_a'][0].db.commits, 1)
+
+    def test_uninstall_with_one_failing_database(self):
+        manager = FakeManager(failingDbs={'db_c'})
+        successList, errorDict = manager.uninstallSetting('setting', maxWorkers=2)
+        self.assertEqual(successList, ['db_a', 'db_b'])
+        self.assertEqual(errorDict, {'db_c': 'materialization failed'})
+
+    def test_delete_with_one_failing_database(self):
+        manager = FakeManager(failingDbs={'db_a'})
+        successList, errorDict = manager.deleteSetting('setting', maxWorkers=2)
+        self.assertEqual(successList, ['db_b', 'db_c'])
+        self.assertEqual(errorDict, {'db_a': 'materialization failed'})
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(GenericDbManagerTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks that the process pool geometry backend gives the same results as the
+threaded one, and that both give the same flags as serial, provider based
+implementations of the same rules. It is supposed to be run through QGIS
+with DSGTools installed.
+"""
+
+import multiprocessing.spawn
+import os
+import sys
+
+import numpy as np
+
+import processing
+from qgis.core import (QgsFeature, QgsFeatureRequest, QgsGeometry,
+                       QgsProcessingContext, QgsProcessingFeedback,
+                       QgsVectorLayer)
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.geometryCache import (
+    GeometryCacheStore, geometryCacheStoreForContext,
+    geometryCacheStoreRegistry, layerGenerationRegistry)
+from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.GeometricTools.geometryExecutionBackend import (
+    GeometryReference, ProcessGeometryBackend, ThreadGeometryBackend)
+from DsgTools.core.DSGToolsProcessingAlgs.Algs.ValidationAlgs.identifyDanglesAlgorithm import IdentifyDanglesAlgorithm
+from DsgTools.core.DSGToolsProcessingAlgs.Algs.ValidationAlgs.identifyPolygonUndershoots import IdentifyPolygonUndershootsAlgorithm
+
+
+def referenceUndershoots(boundaryLyr, referenceSegmentsLyr, searchRadius):
+    """
+    Former IdentifyPolygonUndershootsAlgorithm.getUndershoots, run serially.
+    """
+    undershootSet = set()
+    for feat in boundaryLyr.getFeatures():
+        geom = feat.geometry()
+        geomBuffer = geom.buffer(searchRadius, -1)
+        bbox = geomBuffer.boundingBox()
+        for boundFeat in referenceSegmentsLyr.getFeatures(bbox):
+            boundGeom = boundFeat.geometry()
+            buffer = boundGeom.buffer(searchRadius, -1)
+            if not geom.intersects(buffer):
+                continue
+            if geom.distance(boundGeom) > 10**-9:
+                undershootSet.add(geom.asWkt())
+                break
+    return undershootSet
+
+
+def referenceDanglesOnInputLayerFeatures(pointSet, inputLyr, searchRadius, ignoreDanglesOnUnsegmentedLines=False):
+    """
+    Former IdentifyDanglesAlgorithm.getDanglesOnInputLayerFeatures, run
+    serially with one provider request per point, for an input that is not
+    a boundary layer. Lines are counted when they are within searchRadius
+    of the point.
+    """
+    inputLayerDangles = set()
+    for point in pointSet:
+        qgisPoint = QgsGeometry.fromPointXY(point)
+        bbox = qgisPoint.boundingBox()
+        bbox.grow(searchRadius)
+        request = QgsFeatureRequest().setFilterRect(bbox)
+        bufferCount, intersectCount = 0, 0
+        for feat in inputLyr.getFeatures(request):
+            geom = feat.geometry()
+            if geom.distance(qgisPoint) <= searchRadius:
+                bufferCount += 1
+                related = qgisPoint.intersects(geom) if ignoreDanglesOnUnsegmentedLines \
+                    else qgisPoint.touches(geom)
+                if related:
+                    intersectCount += 1
+        if bufferCount != intersectCount:
+            inputLayerDangles.add(point)
+    return inputLayerDangles
+
+
+class GeometryExecutionBackendsTest(unittest.TestCase):
+
+    DATASET_PATH = os.path.join(
+        os.path.dirname(__file__), 'testing_datasets', 'GeoJSON', 'identify_dangles'
+    )
+
+    def getLayer(self, name):
+        layer = QgsVectorLayer(
+            os.path.join(self.DATASET_PATH, '{0}.geojson'.format(name)), name, 'ogr'
+        )
+        self.assertTrue(layer.isValid())
+        return layer
+
+    def getEndPoints(self, layer):
+        pointSet = set()
+        for feat in layer.getFeatures():
+            geom = feat.geometry()
+            lineList = geom.asMultiPolyline() if geom.isMultipart() else [
+                geom.asPolyline()]
+            for line in lineList:
+                pointSet.update([line[0], line[-1]])
+        return pointSet
+
+    def test_undershoot_equivalence(self):
+        alg = IdentifyPolygonUndershootsAlgorithm()
+        feedback = QgsProcessingFeedback()
+        for boundaryName, referenceName in (
+                ('water_body_boundary', 'river'), ('river', 'water_body_boundary')):
+            boundaryLyr = self.getLayer(boundaryName)
+            referenceLyr = self.getLayer(referenceName)
+            for searchRadius in (1e-4, 1e-3):
+                expected = referenceUndershoots(boundaryLyr, referenceLyr, searchRadius)
+                for backend in (ThreadGeometryBackend(), ProcessGeometryBackend(maxWorkers=2, chunkSize=8)):
+                    undershootSet = alg.getUndershoots(
+                        boundaryLyr, referenceLyr, searchRadius, feedback, backend=backend)
+                    self.assertEqual(set(geom.asWkt() for geom in undershootSet), expected)
+
+    def test_dangles_equivalence(self):
+        alg = IdentifyDanglesAlgorithm()
+        for name in ('river', 'boundary', 'water_body_boundary'):
+            inputLyr = self.getLayer(name)
+            pointSet = self.getEndPoints(inputLyr)
+            for searchRadius in (1e-4, 1e-3):
+                for ignoreUnsegmented in (False, True):
+                    expected = referenceDanglesOnInputLayerFeatures(
+                        pointSet, inputLyr, searchRadius,
+                        ignoreDanglesOnUnsegmentedLines=ignoreUnsegmented
+                    )
+                    for backend in (ThreadGeometryBackend(), ProcessGeometryBackend(maxWorkers=2, chunkSize=16)):
+                        output = alg.getDanglesOnInputLayerFeatures(
+                            pointSet=pointSet,
+                            inputLyr=inputLyr,
+                            searchRadius=searchRadius,
+                            ignoreDanglesOnUnsegmentedLines=ignoreUnsegmented,
+                            backend=backend
+                        )
+                        self.assertEqual(output, expected)
+        self.assertTrue(expected)
+
+    def test_dangle_count_uses_distance(self):
+        lineWkbList = [
+            bytes(QgsGeometry.fromWkt(wkt).asWkb()) for wkt in (
+                'LineString (0 0, 10 0)',
+                'LineString (10 0, 10 10)',
+                'LineString (0 1, 10 1)',
+            )
+        ]
+        reference = GeometryReference(
+            np.arange(3, dtype=np.int64),
+            np.array([(0, 0, 10, 0), (10, 0, 10, 10), (0, 1, 10, 1)], dtype=np.float64),
+            lineWkbList
+        )
+        pointWkbList = [
+            bytes(QgsGeometry.fromWkt(wkt).asWkb())
+            for wkt in (
+                'Point (10 0)', 'Point (0 0)', 'Point (5 0.5)', 'Point (9.6 5)',
+                'Point (10.3 10.3)'
+            )
+        ]
+        executable = multiprocessing.spawn.get_executable()
+        for backend in (ThreadGeometryBackend(), ProcessGeometryBackend(maxWorkers=2, chunkSize=1)):
+            output = backend.run(
+                'dangle_count', range(5), pointWkbList, reference,
+                params={'searchRadius': 0.5}
+            )
+            # the last point is within searchRadius of (10 10), even though
+            # it is outside of its one segment per quadrant buffer
+            self.assertEqual(
+                output, {0: (2, 2), 1: (1, 1), 2: (2, 0), 3: (1, 0), 4: (1, 0)})
+        # the process pool does not leave its interpreter set for other pools
+        self.assertEqual(multiprocessing.spawn.get_executable(), executable)
+
+    def test_explicit_cache_store(self):
+        layer = self.getLayer('river')
+        store = GeometryCacheStore()
+        layerHandler = LayerHandler()
+        for _ in range(3):
+            spatialIdx, idDict = layerHandler.buildSpatialIndexAndIdDict(layer, cacheStore=store)
+        self.assertEqual((store.misses, store.hits), (1, 2))
+        self.assertEqual(len(idDict), layer.featureCount())
+        # a store is not shared with other runs
+        otherStore = GeometryCacheStore()
+        layerHandler.buildSpatialIndexAndIdDict(layer, cacheStore=otherStore)
+        self.assertEqual((otherStore.misses, otherStore.hits), (1, 0))
+        # data changes renew the cached geometries
+        layer.dataChanged.emit()
+        layerHandler.buildSpatialIndexAndIdDict(layer, cacheStore=store)
+        self.assertEqual((store.misses, store.hits), (2, 2))
+
+    def memoryLayer(self, uri, wktList):
+        layer = QgsVectorLayer(uri, 'layer', 'memory')
+        featList = []
+        for wkt in wktList:
+            feat = QgsFeature(layer.fields())
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            featList.append(feat)
+        layer.dataProvider().addFeatures(featList)
+        return layer
+
+    def test_context_store_shared_across_runs(self):
+        networkLayer = self.memoryLayer(
+            'LineString?crs=EPSG:31983&field=name:string',
+            ['LineString (0 0, 10 0)', 'LineString (10 0, 20 5)', 'LineString (10 0, 20 -5)']
+        )
+        frameLayer = self.memoryLayer(
+            'Polygon?crs=EPSG:31983', ['Polygon ((-5 -10, 25 -10, 25 10, -5 10, -5 -10))'])
+        context = QgsProcessingContext()
+        store = geometryCacheStoreForContext(context)
+        parameters = {
+            'NETWORK_LAYER': networkLayer,
+            'REF_LAYER': frameLayer,
+            'SEARCH_RADIUS': 1e-3,
+            'NETWORK_NODES': 'memory:',
+            'FLAGS': 'memory:',
+        }
+        processing.run('dsgtools:createnetworknodes', parameters,
+                       feedback=QgsProcessingFeedback(), context=context)
+        self.assertEqual(store.hits, 0)
+        self.assertIn(networkLayer.id(), store.cacheDict)
+        misses = store.misses
+        # the second run reads the unchanged network layer from the store
+        processing.run('dsgtools:createnetworknodes', parameters,
+                       feedback=QgsProcessingFeedback(), context=context)
+        self.assertEqual(store.misses, misses)
+        self.assertGreater(store.hits, 0)
+        self.assertIs(geometryCacheStoreForContext(context), store)
+        # other contexts get their own store
+        self.assertIsNot(geometryCacheStoreForContext(QgsProcessingContext()), store)
+        geometryCacheStoreRegistry.releaseContext(context)
+        self.assertIsNot(geometryCacheStoreForContext(context), store)
+
+    def test_forget_layer_disconnects_signals(self):
+        layer = self.getLayer('river')
+        store = GeometryCacheStore()
+        store.getLayerCache(layer)
+        self.assertIn(layer.id(), layerGenerationRegistry.connectionDict)
+        layerGenerationRegistry.forgetLayer(layer.id())
+        self.assertNotIn(layer.id(), layerGenerationRegistry.connectionDict)
+        self.assertNotIn(layer.id(), layerGenerationRegistry.layerGenerationDict)
+        # the disconnected slot does not register the layer again
+        layer.dataChanged.emit()
+        self.assertNotIn(layer.id(), layerGenerationRegistry.layerGenerationDict)
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(GeometryExecutionBackendsTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+"""
+Checks the line end points: node merging (exact and with tolerance), node
+degrees, boundary degree of multi part and closed lines and the grouping of
+feature ids by node, on small hand-built lines.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import sys
+
+from qgis.core import QgsFeature, QgsGeometry, QgsPointXY
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.lineEndPoints import (LineEndPoints,
+                                                        quantizeCoordinates)
+
+
+class LineEndPointsTest(unittest.TestCase):
+
+    def buildEndPoints(self, wktDict, tolerance=None):
+        """
+        :param wktDict: (dict) {featId: wkt} of the lines.
+        :return: (LineEndPoints) end points of the lines.
+        """
+        featList = []
+        for fid, wkt in wktDict.items():
+            feat = QgsFeature(fid)
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            featList.append(feat)
+        return LineEndPoints.fromFeatures(featList, tolerance=tolerance)
+
+    def nodeIdx(self, endPoints, x, y):
+        for idx in range(endPoints.nodeCount()):
+            if endPoints.nodePoint(idx) == QgsPointXY(x, y):
+                return idx
+        self.fail('node ({0} {1}) not found'.format(x, y))
+
+    def nodePoints(self, endPoints, nodeIdxList):
+        return sorted(
+            (endPoints.nodePoint(idx).x(), endPoints.nodePoint(idx).y())
+            for idx in nodeIdxList
+        )
+
+    def test_nodes_and_degrees(self):
+        endPoints = self.buildEndPoints({
+            1: 'LineString (0 0, 1 0)',
+            2: 'LineString (1 0, 5 5, 2 0)',
+            3: 'LineString (1 1, 1 0)',
+        })
+        self.assertEqual(len(endPoints), 3)
+        self.assertEqual(endPoints.nodeCount(), 4)
+        node = self.nodeIdx(endPoints, 1, 0)
+        self.assertEqual(
+            (endPoints.degree[node], endPoints.outDegree[node], endPoints.inDegree[node]),
+            (3, 1, 2)
+        )
+        self.assertEqual(endPoints.startNode[1], node)
+        self.assertEqual(endPoints.endNode[2], node)
+        # interior vertexes are not nodes
+        self.assertEqual(
+            self.nodePoints(endPoints, range(endPoints.nodeCount())),
+            [(0, 0), (1, 0), (1, 1), (2, 0)]
+        )
+        self.assertEqual(
+            self.nodePoints(endPoints, endPoints.danglingNodes()),
+            [(0, 0), (1, 1), (2, 0)]
+        )
+
+    def test_multipart_and_closed_lines(self):
+        endPoints = self.buildEndPoints({
+            1: 'MultiLineString ((0 0, 1 0), (1 0, 2 0))',
+            2: 'LineString (5 5, 6 5, 6 6, 5 5)',
+            3: 'LineString (2 0, 3 0)',
+        })
+        self.assertEqual(endPoints.featIds.tolist(), [1, 1, 2, 3])
+        boundaryDegree = endPoints.boundaryDegree()
+        # parts of the same feature touching each other and closed lines are
+        # not on the boundary
+        self.assertEqual(boundaryDegree[self.nodeIdx(endPoints, 1, 0)], 0)
+        self.assertEqual(boundaryDegree[self.nodeIdx(endPoints, 5, 5)], 0)
+        self.assertEqual(endPoints.degree[self.nodeIdx(endPoints, 5, 5)], 2)
+        self.assertEqual(boundaryDegree[self.nodeIdx(endPoints, 2, 0)], 2)
+        self.assertEqual(
+            self.nodePoints(endPoints, endPoints.danglingNodes()),
+            [(0, 0), (3, 0)]
+        )
+
+    def test_tolerance(self):
+        wktDict = {
+            1: 'LineString (0 0, 1 0)',
+            2: 'LineString (1.0004 0, 2 0)',
+        }
+        self.assertEqual(self.buildEndPoints(wktDict).nodeCount(), 4)
+        endPoints = self.buildEndPoints(wktDict, tolerance=1e-3)
+        self.assertEqual(endPoints.nodeCount(), 3)
+        self.assertEqual(endPoints.endNode[0], endPoints.startNode[1])
+        # the node keeps the coordinates of its first end point
+        self.assertEqual(endPoints.nodePoint(endPoints.endNode[0]), QgsPointXY(1, 0))
+        # -0.0 and 0.0 are the same node when no tolerance is given
+        self.assertEqual(
+            quantizeCoordinates([[-0.0, 1.0]]).tolist(),
+            quantizeCoordinates([[0.0, 1.0]]).tolist()
+        )
+
+    def test_feature_ids_by_node(self):
+        endPoints = self.buildEndPoints({
+            1: 'LineString (0 0, 1 0)',
+            2: 'LineString (1 0, 2 0)',
+            3: 'LineString (1 0, 1 1)',
+        })
+        node = self.nodeIdx(endPoints, 1, 0)
+        self.assertEqual(endPoints.featureIdsByNode()[node].tolist(), [1, 2, 3])
+        self.assertEqual(endPoints.startFeatureIdsByNode()[node].tolist(), [2, 3])
+        self.assertEqual(endPoints.endFeatureIdsByNode()[node].tolist(), [1])
+        self.assertEqual(
+            endPoints.startFeatureIdsByNode()[self.nodeIdx(endPoints, 2, 0)].tolist(), [])
+
+    def test_no_lines(self):
+        endPoints = self.buildEndPoints({1: 'LineString EMPTY'})
+        self.assertEqual((len(endPoints), endPoints.nodeCount()), (0, 0))
+        self.assertEqual(endPoints.danglingNodes().tolist(), [])
+        self.assertEqual(endPoints.boundaryDegree().tolist(), [])
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(LineEndPointsTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the catalogue metadata cache of the database abstraction.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import sys
+import time
+
+from qgis.testing import unittest
+
+from DsgTools.core.Factories.DbFactory.metadataCache import MetadataCache
+from DsgTools.core.Factories.DbFactory.postgisDb import PostgisDb
+
+
+class CountingPostgisDb(PostgisDb):
+    """
+    PostgisDb whose catalogue queries are replaced by fixed results.
+    """
+    def __init__(self):
+        super(CountingPostgisDb, self).__init__()
+        self.queryCount = 0
+
+    def querySridTupleList(self):
+        self.queryCount += 1
+        return [
+            ('topology', 'topology', 'geom', 0),
+            ('edgv', 'hid_trecho_drenagem_l', 'geom', 31982),
+            ('validation', 'aux_flags_validacao_p', 'geom', 4674),
+        ]
+
+    def queryTableSchemaDict(self):
+        self.queryCount += 1
+        return {'hid_trecho_drenagem_l': 'edgv'}
+
+
+class MetadataCacheTest(unittest.TestCase):
+
+    def test_hits_misses_and_invalidation(self):
+        cache = MetadataCache()
+        loader = lambda: {'a': [1]}
+        value = cache.get('kind', loader)
+        value['a'].append(2)
+        self.assertEqual(cache.get('kind', loader), {'a': [1]})
+        self.assertEqual(cache.stats()['kind'], {'hits': 1, 'misses': 1})
+        cache.invalidate('kind')
+        cache.get('kind', loader)
+        self.assertEqual(cache.stats()['total'], {'hits': 1, 'misses': 2})
+
+    def test_ttl(self):
+        cache = MetadataCache(ttl=0.01)
+        cache.get('kind', lambda: 1)
+        time.sleep(0.02)
+        cache.get('kind', lambda: 1)
+        self.assertEqual(cache.stats()['kind'], {'hits': 0, 'misses': 2})
+
+    def test_postgis_lookups(self):
+        db = CountingPostgisDb()
+        for _ in range(10):
+            self.assertEqual(db.findEPSG(), 31982)
+            self.assertEqual(
+                db.findEPSG(parameters={'tableSchema': 'validation', 'tableName': 'aux_flags_validacao_p', 'geometryColumn': 'geom'}),
+                4674
+            )
+            self.assertEqual(db.findEPSG(parameters={'tableName': 'missing'}), -1)
+            self.assertEqual(db.getTableSchemaFromDb('hid_trecho_drenagem_l'), 'edgv')
+            self.assertIsNone(db.getTableSchemaFromDb('missing'))
+        self.assertEqual(db.queryCount, 2)
+        db.invalidateMetadataCache()
+        db.findEPSG()
+        self.assertEqual(db.queryCount, 3)
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(MetadataCacheTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
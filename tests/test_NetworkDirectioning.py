@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+"""
+Checks the network directioning against the breadth-first search it had
+before the compact network was introduced, on networks where lines are
+merged while directioning. It is supposed to be run through QGIS with
+DSGTools installed.
+"""
+
+import sys
+import types
+
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.compactNetwork import CompactNetwork
+from DsgTools.core.GeometricTools.networkHandler import NetworkHandler
+
+
+def referenceDirectNetwork(self, networkLayer, nodeLayer, nodeList=None):
+    """
+    NetworkHandler.directNetwork before the compact network: next nodes are
+    read from the line geometries on every visit. Valid lines are given to
+    the node checks as ids, as they expect now.
+    """
+    startingNodeTypes = [NetworkHandler.UpHillNode, NetworkHandler.WaterwayBegin, NetworkHandler.SpillwayNode]
+    deltaLinesCheckList = [NetworkHandler.Confluence, NetworkHandler.Ramification]
+    if not nodeList:
+        nodeList = [node for node, nodeType in self.nodeTypeDict.items() if nodeType in startingNodeTypes]
+        if not nodeList:
+            return None, None, "No network starting point was found"
+    geomType = networkLayer.geometryType()
+    visitedNodes, newNextNodes = [], []
+    nodeFlags = dict()
+    validLines, invalidLines = dict(), dict()
+    while nodeList:
+        for node in nodeList:
+            if node in self.nodeDict:
+                startLines = self.nodeDict[node]['start']
+                endLines = self.nodeDict[node]['end']
+            else:
+                visitedNodes.append(node)
+                continue
+            nodeLineIds = set(line.id() for line in startLines + endLines)
+            validLineIds = set(validLines)
+            if len(nodeLineIds - validLineIds) > 1:
+                hasStartCondition, _ = self.checkForStartConditions(
+                    node=node, validLines=validLineIds, networkLayer=networkLayer, nodeLayer=nodeLayer, geomType=geomType)
+                if not hasStartCondition and nodeLineIds & validLineIds:
+                    val, inval, reason = self.checkNodeValidity(
+                        node=node, connectedValidLines=validLineIds, networkLayer=networkLayer,
+                        deltaLinesCheckList=deltaLinesCheckList, geomType=geomType)
+                    if reason:
+                        continue
+            val, inval, reason = self.checkNodeValidity(
+                node=node, connectedValidLines=validLineIds, networkLayer=networkLayer,
+                deltaLinesCheckList=deltaLinesCheckList, geomType=geomType)
+            removeNode = []
+            if reason:
+                self.fixNodeFlagsNew(
+                    node=node, valDict=val, invalidDict=inval, reason=reason,
+                    connectedValidLines=validLineIds, networkLayer=networkLayer,
+                    nodeLayer=nodeLayer, geomType=geomType, deltaLinesCheckList=deltaLinesCheckList)
+                if reason:
+                    nodeFlags[node] = reason
+                endLineIds = set(line.id() for line in endLines)
+                for lineId, line in inval.items():
+                    if lineId in endLineIds:
+                        removeNode.append(self.getFirstNode(lyr=networkLayer, feat=line))
+                    else:
+                        removeNode.append(self.getLastNode(lyr=networkLayer, feat=line))
+            if node not in visitedNodes:
+                visitedNodes.append(node)
+            validLines.update(val)
+            invalidLines.update(inval)
+            newNextNodes += self.getNextNodes(node=node, networkLayer=networkLayer, geomType=geomType)
+            if removeNode:
+                newNextNodes = list(set(newNextNodes) - set(removeNode))
+        nodeList = sorted(set(newNextNodes) - set(visitedNodes), key=lambda point: (point.x(), point.y()))
+        newNextNodes = []
+    return nodeFlags, invalidLines, validLines
+
+
+class NetworkDirectioningTest(unittest.TestCase):
+    # the first line ends on an attribute change flag node (0 20) and is
+    # merged into the second one. The node it starts on (0 30) is only
+    # reached through the merged line on the next cycle.
+    LINES = [
+        'LineString (0 30, 0 20)',
+        'LineString (0 20, 0 10)',
+        'LineString (10 20, 0 10)',
+        'LineString (0 10, 0 0)',
+    ]
+    NODES = [
+        ('Point (0 30)', NetworkHandler.AttributeChange),
+        ('Point (0 20)', NetworkHandler.AttributeChangeFlag),
+        ('Point (10 20)', NetworkHandler.WaterwayBegin),
+        ('Point (0 10)', NetworkHandler.Confluence),
+        ('Point (0 0)', NetworkHandler.Sink),
+    ]
+
+    def buildLayer(self, uri, wktList, attributeList=None):
+        layer = QgsVectorLayer(uri, 'layer', 'memory')
+        featList = []
+        for idx, wkt in enumerate(wktList):
+            feat = QgsFeature(layer.fields())
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            if attributeList is not None:
+                feat.setAttributes([attributeList[idx]])
+            featList.append(feat)
+        layer.dataProvider().addFeatures(featList)
+        return layer
+
+    def runDirectioning(self, reference=False):
+        networkLayer = self.buildLayer(
+            'LineString?crs=EPSG:31982&field=nome:string', self.LINES, ['rio'] * len(self.LINES))
+        nodeLayer = self.buildLayer(
+            'Point?crs=EPSG:31982&field=node_type:integer',
+            [wkt for wkt, _ in self.NODES],
+            [int(nodeType) for _, nodeType in self.NODES]
+        )
+        handler = NetworkHandler()
+        if reference:
+            handler.directNetwork = types.MethodType(referenceDirectNetwork, handler)
+        nodeFlags, featList, _ = handler.verifyNetworkDirectioning(
+            networkLayer, nodeLayer, frame=[], searchRadius=1e-3, max_amount_cycles=3)
+        flags = {(node.x(), node.y()): reason for node, reason in nodeFlags.items()}
+        flagLines = sorted(
+            (feat.geometry().asWkt(), tuple(feat.attributes())) for feat in featList)
+        lines = sorted(
+            (feat.id(), feat.geometry().asWkt()) for feat in networkLayer.getFeatures())
+        return flags, flagLines, lines
+
+    def test_merge_matches_reference(self):
+        flags, flagLines, lines = self.runDirectioning()
+        expectedFlags, expectedFlagLines, expectedLines = self.runDirectioning(reference=True)
+        self.assertEqual(flags, expectedFlags)
+        self.assertEqual(flagLines, expectedFlagLines)
+        self.assertEqual(lines, expectedLines)
+        # the node after the merged line is checked on the second cycle
+        self.assertIn((0.0, 30.0), flags)
+
+    def test_static_node_validity(self):
+        # lines meet at a right angle on the confluence (0 10) and the last
+        # line ends on a waterway beginning
+        networkLayer = self.buildLayer('LineString?crs=EPSG:31982', [
+            'LineString (0 20, 0 10)',
+            'LineString (10 10, 0 10)',
+            'LineString (0 10, 0 0)',
+            'LineString (0 0, 10 -10)',
+        ])
+        nodeLayer = self.buildLayer(
+            'Point?crs=EPSG:31982&field=node_type:integer',
+            ['Point (0 20)', 'Point (10 10)', 'Point (0 10)', 'Point (0 0)', 'Point (10 -10)'],
+            [
+                NetworkHandler.WaterwayBegin, NetworkHandler.WaterwayBegin, NetworkHandler.Confluence,
+                NetworkHandler.AttributeChange, NetworkHandler.WaterwayBegin
+            ]
+        )
+        handler = NetworkHandler()
+        handler.reclassifyNodeType = dict()
+        handler.nodeDict = handler.identifyAllNodes(networkLayer=networkLayer)
+        handler.nodeTypeDict, _ = handler.getNodeTypeDictFromNodeLayer(networkNodeLayer=nodeLayer)
+        network = CompactNetwork.fromNodeDict(handler.nodeDict)
+        valid, _ = handler.staticNodeValidity(network=network, networkLayer=networkLayer)
+        staticValid = set(
+            (node.x(), node.y()) for node, isValid in zip(network.nodeKeys, valid) if isValid)
+        checkedValid = set(
+            (node.x(), node.y()) for node in network.nodeKeys
+            if not handler.checkNodeValidity(node=node, connectedValidLines=set(), networkLayer=networkLayer)[2]
+        )
+        self.assertEqual(staticValid, checkedValid)
+        self.assertEqual(staticValid, {(0.0, 20.0), (10.0, 10.0), (0.0, 0.0)})
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(NetworkDirectioningTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the bulk flag insertion of PostgisDb against a stand-in of a
+PostgreSQL connection, that records the statements and the COPY data.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import sys
+
+import psycopg2
+
+from qgis.core import QgsGeometry
+from qgis.testing import unittest
+
+from DsgTools.core.Factories.DbFactory.copyTools import (geometryFromValue,
+                                                         hexEwkb, sqlLiteral)
+from DsgTools.core.Factories.DbFactory.postgisDb import PostgisDb
+
+
+class StandInCursor(object):
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        """
+        Keeps sql and sets the row count a server would report for it: the
+        staged geometries are grouped by id on the UPDATE and the DELETE
+        removes the table ids that were not staged.
+        """
+        self.conn.statementList.append(sql)
+        stagedIdSet = {int(row[0]) for row in self.conn.copyRowList}
+        if sql.startswith('UPDATE'):
+            self.rowcount = len(stagedIdSet & self.conn.tableIdSet)
+        elif sql.startswith('DELETE'):
+            self.rowcount = len(self.conn.tableIdSet - stagedIdSet)
+        else:
+            self.rowcount = -1
+
+    def copy_expert(self, sql, stream):
+        self.conn.statementList.append(sql)
+        self.conn.copyRowList.extend(line.split('\t') for line in stream.read().splitlines())
+
+
+class StandInConnection(object):
+    def __init__(self, tableIdList=None):
+        self.tableIdSet = set() if tableIdList is None else set(tableIdList)
+        self.statementList = []
+        self.copyRowList = []
+        self.committed = False
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, *args):
+        self.committed = excType is None
+        return False
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class StandInPostgisDb(PostgisDb):
+    def __init__(self, connection=None):
+        super(StandInPostgisDb, self).__init__()
+        self.connection = connection
+        self.sridQueryList = []
+        self.fallbackRows = None
+
+    def checkAndOpenDb(self):
+        pass
+
+    def findEPSG(self, parameters=dict()):
+        self.sridQueryList.append(parameters['tableName'])
+        return 4674 if parameters['tableName'] == 'aux_flags_validacao_p' else 31982
+
+    def getCopyConnection(self):
+        if self.connection is None:
+            raise psycopg2.OperationalError('no server')
+        return self.connection
+
+    def insertFlagRows(self, flagRows, processName, flagSRID, useTransaction=True, batchSize=1000):
+        self.fallbackRows = flagRows
+        return len(flagRows)
+
+
+class PostgisFlagInsertionTest(unittest.TestCase):
+
+    def getFlagTupleList(self):
+        return [
+            ('cb.hid_trecho_drenagem_l', i, 'Dangle\t{0}'.format(i), 'POINT({0} 1)'.format(i), 'geom')
+            for i in range(50)
+        ] + [
+            ('cb.hid_massa_dagua_a', 1, "Invalid 'flow'", QgsGeometry.fromWkt('LINESTRING(0 0, 1 1)'), 'geom'),
+        ]
+
+    def test_copy(self):
+        connection = StandInConnection()
+        db = StandInPostgisDb(connection)
+        self.assertEqual(db.insertFlags(self.getFlagTupleList(), 'test_process'), 51)
+        # flag SRID once and each layer SRID once
+        self.assertEqual(
+            sorted(db.sridQueryList),
+            ['aux_flags_validacao_p', 'hid_massa_dagua_a', 'hid_trecho_drenagem_l']
+        )
+        self.assertTrue(connection.committed)
+        self.assertTrue(connection.closed)
+        self.assertEqual(len(connection.copyRowList), 51)
+        layer, featId, reason, ewkb, dimension, geometryColumn = connection.copyRowList[3]
+        self.assertEqual((layer, featId, reason, dimension), ('cb.hid_trecho_drenagem_l', '3', 'Dangle\\t3', '0'))
+        self.assertEqual(ewkb, hexEwkb(QgsGeometry.fromWkt('POINT(3 1)').asWkb(), 31982))
+        self.assertTrue(geometryFromValue(ewkb).equals(QgsGeometry.fromWkt('POINT(3 1)')))
+        insertList = [sql for sql in connection.statementList if sql.startswith('INSERT')]
+        self.assertEqual(len(insertList), 2)
+        self.assertIsNone(db.fallbackRows)
+
+    def test_fallback_without_copy(self):
+        db = StandInPostgisDb()
+        self.assertEqual(db.insertFlags(self.getFlagTupleList(), 'test_process'), 51)
+        self.assertEqual(len(db.fallbackRows), 51)
+
+    def test_fallback_sql(self):
+        db = StandInPostgisDb()
+        rowList = db.prepareFlagRows(self.getFlagTupleList(), 4674)
+        sql = db.gen.insertFlagValuesIntoDb(
+            'test_process', 1, [tuple(map(sqlLiteral, rowList[-1]))], 4674)
+        self.assertIn('aux_flags_validacao_l', sql)
+        self.assertIn("'Invalid ''flow'''", sql)
+        self.assertIn('ST_Transform', sql)
+
+    def test_geometry_update_copy(self):
+        connection = StandInConnection(tableIdList=[1, 2, 3, 7])
+        db = StandInPostgisDb(connection)
+        wkb = bytes(QgsGeometry.fromWkt('POLYGON((0 0, 1 0, 1 1, 0 0))').asWkb())
+        output = db.updateGeometries('cb', 'veg_campo_a', {1: [wkb, wkb.hex()], 7: [wkb]}, 31982)
+        self.assertTrue(connection.committed)
+        self.assertEqual(connection.copyRowList, [['1', wkb.hex()], ['1', wkb.hex()], ['7', wkb.hex()]])
+        # both rows of id 1 are merged into one update
+        self.assertEqual((output['updated'], output['deleted']), (2, 2))
+        self.assertIn('elapsed', output)
+        deleteList = [sql for sql in connection.statementList if sql.startswith('DELETE')]
+        self.assertEqual(len(deleteList), 1)
+        self.assertIn('NOT EXISTS', deleteList[0])
+        self.assertNotIn(' in (', deleteList[0])
+
+    def test_geometry_update_empty_input(self):
+        # an empty input would delete every feature of the table
+        for useCopy in (True, False):
+            connection = StandInConnection(tableIdList=[1, 2])
+            db = StandInPostgisDb(connection)
+            with self.assertRaises(Exception):
+                db.updateGeometries('cb', 'veg_campo_a', {}, 31982, useCopy=useCopy)
+            self.assertEqual(connection.statementList, [])
+            self.assertFalse(connection.committed)
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(PostgisFlagInsertionTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
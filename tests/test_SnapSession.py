@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-17
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks SnapSession against LayerHandler.snapToLayer, which snaps and writes
+one layer at a time. It is supposed to be run through QGIS with DSGTools
+installed.
+"""
+
+import sys
+
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.layerHandler import LayerHandler
+from DsgTools.core.GeometricTools.snapSession import SnapSession
+
+
+class SnapSessionTest(unittest.TestCase):
+    TOLERANCE = 0.1
+    REFERENCE = ['Polygon ((0 0, 10 0, 10 10, 0 10, 0 0))']
+    # the first two lines are snapped onto the reference, the third one is
+    # out of reach and the last one is shorter than the tolerance
+    LINES = [
+        'LineString (-5 0.05, 0.05 0.05)',
+        'LineString (10.08 5, 20 5)',
+        'LineString (30 30, 40 40)',
+        'LineString (50 50, 50.01 50)',
+    ]
+    # the start of the second line is snapped onto the end of the first one
+    SELF_SNAP_LINES = [
+        'LineString (0 0, 10 0)',
+        'LineString (10.05 0.05, 20 0)',
+        'LineString (30 30, 40 40)',
+    ]
+
+    def memoryLayer(self, uri, wktList):
+        layer = QgsVectorLayer(uri, 'layer', 'memory')
+        featList = []
+        for wkt in wktList:
+            feat = QgsFeature(layer.fields())
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            featList.append(feat)
+        layer.dataProvider().addFeatures(featList)
+        return layer
+
+    def lineLayer(self, wktList):
+        return self.memoryLayer('LineString?crs=EPSG:31983', wktList)
+
+    def geometryDict(self, layer):
+        return {feat.id(): feat.geometry().asWkt(6) for feat in layer.getFeatures()}
+
+    def movedVertexCount(self, originalLyr, snappedLyr):
+        originalDict = {feat.id(): feat.geometry() for feat in originalLyr.getFeatures()}
+        return sum(
+            SnapSession.movedVertexCount(originalDict[feat.id()], feat.geometry())
+            for feat in snappedLyr.getFeatures()
+        )
+
+    def test_snap_onto_reference(self):
+        refLyr = self.memoryLayer('Polygon?crs=EPSG:31983', self.REFERENCE)
+        expectedLyr = self.lineLayer(self.LINES)
+        LayerHandler().snapToLayer(expectedLyr, refLyr, self.TOLERANCE, 0)
+        lyr = self.lineLayer(self.LINES)
+        session = SnapSession()
+        report = session.snapLayer(lyr, refLyr, self.TOLERANCE, 0)
+        # nothing is written before commit
+        self.assertEqual(self.geometryDict(lyr), self.geometryDict(self.lineLayer(self.LINES)))
+        session.commit()
+        self.assertEqual(self.geometryDict(lyr), self.geometryDict(expectedLyr))
+        self.assertEqual(report['featureCount'], 4)
+        self.assertEqual(report['changedCount'], 2)
+        self.assertEqual(report['deletedCount'], 1)
+        self.assertEqual(
+            report['movedVertexCount'],
+            self.movedVertexCount(self.lineLayer(self.LINES), expectedLyr)
+        )
+        self.assertGreater(report['movedVertexCount'], 0)
+        self.assertEqual(lyr.undoStack().count(), 1)
+        # the reference layer is not changed
+        self.assertFalse(refLyr.isEditable())
+
+    def test_snap_onto_itself(self):
+        expectedLyr = self.lineLayer(self.SELF_SNAP_LINES)
+        LayerHandler().snapToLayer(expectedLyr, expectedLyr, self.TOLERANCE, 0)
+        lyr = self.lineLayer(self.SELF_SNAP_LINES)
+        session = SnapSession()
+        report = session.snapLayer(lyr, lyr, self.TOLERANCE, 0)
+        session.commit()
+        self.assertEqual(self.geometryDict(lyr), self.geometryDict(expectedLyr))
+        self.assertEqual(
+            (report['featureCount'], report['changedCount'], report['deletedCount']), (3, 1, 0))
+        self.assertEqual(report['movedVertexCount'], 1)
+
+    def test_one_edit_command_per_layer(self):
+        refLyr = self.memoryLayer('Polygon?crs=EPSG:31983', self.REFERENCE)
+        expectedLyr = self.lineLayer(self.LINES)
+        layerHandler = LayerHandler()
+        layerHandler.snapToLayer(expectedLyr, refLyr, self.TOLERANCE, 0)
+        layerHandler.snapToLayer(expectedLyr, expectedLyr, self.TOLERANCE, 0)
+        lyr = self.lineLayer(self.LINES)
+        session = SnapSession()
+        session.snapLayer(lyr, refLyr, self.TOLERANCE, 0, level=0)
+        session.snapLayer(lyr, lyr, self.TOLERANCE, 0, level=1)
+        self.assertEqual([report['level'] for report in session.levelReports()], [0, 1])
+        session.commit()
+        self.assertEqual(self.geometryDict(lyr), self.geometryDict(expectedLyr))
+        # both levels are undone at once
+        self.assertEqual(lyr.undoStack().count(), 1)
+        lyr.undoStack().undo()
+        self.assertEqual(self.geometryDict(lyr), self.geometryDict(self.lineLayer(self.LINES)))
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(SnapSessionTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
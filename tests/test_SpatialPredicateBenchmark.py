@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Benchmarks the evaluation of several spatial predicates over the same pair
+of layers, with prepared GEOS predicates (one relation per predicate) and
+with a shared DE-9IM matrix cache (one relation per pair of features). The
+timings are only printed when the DSGTOOLS_BENCHMARK environment variable is
+set. It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer
+from qgis.testing import unittest
+
+from DsgTools.core.GeometricTools.spatialPredicateEngine import (
+    RelationMatrixCache, SpatialPredicateEngine, STRPackedIndex)
+from DsgTools.core.GeometricTools.spatialRelationsHandler import SpatialRelationsHandler
+
+
+class SpatialPredicateBenchmarkTest(unittest.TestCase):
+    GRID_SIZE = 40
+
+    def buildLayer(self, geometryType, wktList):
+        layer = QgsVectorLayer('{0}?crs=EPSG:31982'.format(geometryType), geometryType, 'memory')
+        featList = []
+        for wkt in wktList:
+            feat = QgsFeature(layer.fields())
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            featList.append(feat)
+        layer.dataProvider().addFeatures(featList)
+        return layer
+
+    def buildLayers(self):
+        """
+        A: grid of squares; B: squares shifted by half a cell, so that each
+        feature of A overlaps four features of B and touches others.
+        """
+        polygonWkt = 'Polygon(({0} {1}, {2} {1}, {2} {3}, {0} {3}, {0} {1}))'
+        wktA, wktB = [], []
+        for i in range(self.GRID_SIZE):
+            for j in range(self.GRID_SIZE):
+                wktA.append(polygonWkt.format(i, j, i + 1, j + 1))
+                wktB.append(polygonWkt.format(i + .5, j + .5, i + 1.5, j + 1.5))
+        return self.buildLayer('Polygon', wktA), self.buildLayer('Polygon', wktB)
+
+    def runRuleSet(self, layerA, layerB, predicateList, relationCache):
+        handler = SpatialRelationsHandler()
+        engine = SpatialPredicateEngine(layerB)
+        start = time.perf_counter()
+        output = []
+        for predicate, cardinality in predicateList:
+            flags = handler.checkPredicate(
+                layerA, layerB, predicate, cardinality,
+                engine=engine, relationCache=relationCache
+            )
+            output.append({
+                fid: sorted(flag['text'] for flag in flagList) \
+                    for fid, flagList in flags.items()
+            })
+        return output, time.perf_counter() - start
+
+    def test_shared_relation_matrices(self):
+        layerA, layerB = self.buildLayers()
+        handler = SpatialRelationsHandler
+        predicateList = [
+            (handler.INTERSECTS, '0..2'),
+            (handler.OVERLAPS, '0..3'),
+            (handler.TOUCHES, '1..1'),
+            (handler.NOTCONTAINS, None),
+            (handler.NOTWITHIN, None),
+            (handler.NOTCROSSES, None),
+        ]
+        preparedOutput, preparedTime = self.runRuleSet(
+            layerA, layerB, predicateList, None)
+        relationCache = RelationMatrixCache()
+        cachedOutput, cachedTime = self.runRuleSet(
+            layerA, layerB, predicateList, relationCache)
+        self.assertEqual(preparedOutput, cachedOutput)
+        self.assertGreater(relationCache.hits, relationCache.misses)
+        if not os.environ.get('DSGTOOLS_BENCHMARK'):
+            return
+        print(
+            '\n{0} predicates over {1}x{1} features: prepared predicates '
+            '{2:.3f}s, shared DE-9IM matrices {3:.3f}s (speedup {4:.2f}x, '
+            '{5} matrices, {6} hits)'.format(
+                len(predicateList), layerA.featureCount(), preparedTime,
+                cachedTime, preparedTime / cachedTime if cachedTime else 0,
+                relationCache.misses, relationCache.hits
+            )
+        )
+
+    def test_batch_query(self):
+        rng = np.random.default_rng(0)
+        corners = rng.random((3000, 2)) * 100
+        bboxes = np.hstack((corners, corners + rng.random((3000, 2)) * 3))
+        index = STRPackedIndex(bboxes)
+        queryCorners = rng.random((64, 2)) * 100
+        queryBoxes = np.hstack((queryCorners, queryCorners + rng.random((64, 2)) * 10))
+        queryRows, itemRows = index.queryPairs(queryBoxes)
+        # pairs come grouped by query, as split by evaluateBatch
+        self.assertTrue((np.diff(queryRows) >= 0).all())
+        for queryRow, queryBox in enumerate(queryBoxes):
+            expected = np.flatnonzero(
+                (bboxes[:, 0] <= queryBox[2]) & (bboxes[:, 2] >= queryBox[0]) &
+                (bboxes[:, 1] <= queryBox[3]) & (bboxes[:, 3] >= queryBox[1]))
+            self.assertEqual(sorted(itemRows[queryRows == queryRow].tolist()), expected.tolist())
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(SpatialPredicateBenchmarkTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the filters and statements used to run validation checks on the
+server. It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import sys
+
+from qgis.core import QgsVectorLayer
+from qgis.PyQt.QtCore import QSettings
+from qgis.testing import unittest
+
+from DsgTools.core.dsgEnums import DsgEnums
+from DsgTools.core.Factories.SqlFactory.sqlGeneratorFactory import SqlGeneratorFactory
+from DsgTools.core.Utils.sqlPushdown import (PUSHDOWN_SETTINGS_KEY,
+                                             PostgisLayerSource,
+                                             isPushdownEnabled)
+
+
+class SqlPushdownTest(unittest.TestCase):
+
+    def getSource(self, subsetString=''):
+        return PostgisLayerSource('cb', 'hid_trecho_drenagem_l', 'geom', 'id', subsetString=subsetString)
+
+    def test_where_clause(self):
+        source = self.getSource()
+        self.assertEqual(source.whereClause(), 'TRUE')
+        self.assertEqual(source.relation, '"cb"."hid_trecho_drenagem_l"')
+        source = self.getSource(subsetString="nome LIKE 'Rio%' OR nome IS NULL")
+        source.setFeatureIds([7, 3])
+        self.assertEqual(
+            source.whereClause(),
+            """(nome LIKE 'Rio%' OR nome IS NULL) AND "id" = ANY('{3,7}'::bigint[])"""
+        )
+        source.setFeatureIds([])
+        self.assertIn("ANY('{}'::bigint[])", source.whereClause())
+
+    def test_statements(self):
+        gen = SqlGeneratorFactory().createSqlGenerator(driver=DsgEnums.DriverPostGIS)
+        source = self.getSource(subsetString='id > 10')
+        sql = gen.getSmallLengthFeatures(source.relation, source.geometry, source.key, source.whereClause(), 5)
+        self.assertIn('WHERE ((id > 10)) AND ST_Length("geom") < 5.0', sql)
+        sql = gen.getDuplicatedGeometryFeatures(source.relation, source.geometry, source.key, source.whereClause(), True)
+        self.assertIn('ST_Normalize(ST_Multi("geom"))', sql)
+        self.assertIn('HAVING count(*) > 1', sql)
+        # only the ids are aggregated, one geometry is read per set
+        self.assertNotIn('array_agg(ST_Multi', sql)
+        self.assertIn('feature."id" = duplicated.first_id', sql)
+
+    def test_non_postgres_layer(self):
+        layer = QgsVectorLayer('LineString?crs=epsg:4674&field=id:integer', 'lines', 'memory')
+        self.assertIsNone(PostgisLayerSource.fromLayer(layer))
+
+    def test_pushdown_is_opt_in(self):
+        settings = QSettings()
+        previous = settings.value(PUSHDOWN_SETTINGS_KEY)
+        settings.remove(PUSHDOWN_SETTINGS_KEY)
+        try:
+            self.assertFalse(isPushdownEnabled())
+            settings.setValue(PUSHDOWN_SETTINGS_KEY, True)
+            self.assertTrue(isPushdownEnabled())
+        finally:
+            settings.remove(PUSHDOWN_SETTINGS_KEY)
+            if previous is not None:
+                settings.setValue(PUSHDOWN_SETTINGS_KEY, previous)
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(SqlPushdownTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks that running an algorithm tile by tile raises the same flags as
+running it on the whole layer. It is supposed to be run through QGIS with
+DSGTools installed.
+"""
+
+import os
+import sys
+
+import processing
+from qgis.core import (QgsFeatureRequest, QgsGeometry, QgsPointXY,
+                       QgsProcessingContext, QgsProcessingFeedback,
+                       QgsProcessingUtils, QgsProject,
+                       QgsVectorLayer)
+from qgis.testing import unittest
+
+from DsgTools.core.Utils.tiledExecution import (RegularTileGrid,
+                                                TiledExecution, anchorPoint)
+
+
+class TiledExecutionTest(unittest.TestCase):
+
+    DATASET_PATH = os.path.join(
+        os.path.dirname(__file__), 'testing_datasets', 'GeoJSON', 'identify_dangles'
+    )
+
+    def test_every_point_has_one_tile(self):
+        grid = RegularTileGrid(10)
+        self.assertEqual(grid.tileKey(QgsPointXY(0, 0)), (0, 0))
+        self.assertEqual(grid.tileKey(QgsPointXY(10, 9.99)), (1, 0))
+        self.assertEqual(grid.tileKey(QgsPointXY(-0.01, 0)), (-1, 0))
+        self.assertEqual(grid.tileRect((1, -1)).toString(0), '10,-10 : 20,0')
+        line = QgsGeometry.fromWkt('LineString (0 0, 10 0, 10 10)')
+        self.assertEqual(anchorPoint(line), anchorPoint(QgsGeometry(line)))
+
+    def getInputLayer(self):
+        inputLyr = QgsVectorLayer(
+            os.path.join(self.DATASET_PATH, 'river.geojson'), 'river', 'ogr')
+        self.assertTrue(inputLyr.isValid())
+        return inputLyr
+
+    def test_portable_parameters(self):
+        inputLyr = self.getInputLayer()
+        QgsProject.instance().addMapLayer(inputLyr)
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        tiledExecution = TiledExecution(RegularTileGrid(1), halo=0, maxWorkers=2)
+        portableDict = tiledExecution.portableParameters(
+            'dsgtools:identifydangles',
+            {'LINEFILTERLAYERS': [inputLyr.id()], 'TOLERANCE': 1e-4, 'FIELD': inputLyr.name()},
+            context
+        )
+        # only layer parameters are converted
+        self.assertEqual(portableDict['LINEFILTERLAYERS'], ['ogr://' + inputLyr.source()])
+        QgsProject.instance().removeMapLayer(inputLyr.id())
+        self.assertEqual(portableDict['FIELD'], 'river')
+        self.assertIsNone(
+            tiledExecution.portableParameters('dsgtools:unknownalgorithm', {}, context))
+
+    def flagsOnWholeLayer(self, inputLyr, algName, parameterDict, context):
+        output = processing.run(
+            algName,
+            dict(parameterDict, INPUT=inputLyr, FLAGS='memory:'),
+            context=context,
+            feedback=QgsProcessingFeedback()
+        )
+        return sorted(
+            (feat.geometry().asWkt(8), ['{}'.format(value) for value in feat.attributes()])
+            for feat in output['FLAGS'].getFeatures()
+        )
+
+    def flagsOnTiles(self, inputLyr, algName, parameterDict, context, maxWorkers=0):
+        tileSize = max(inputLyr.extent().width(), inputLyr.extent().height()) / 3
+        tiledExecution = TiledExecution(
+            RegularTileGrid(tileSize), halo=1e-3, maxWorkers=maxWorkers)
+        _, flagList = tiledExecution.run(inputLyr, algName, parameterDict, context)
+        return sorted(
+            (geom.asWkt(8), ['{}'.format(value) for value in attributes])
+            for geom, attributes in flagList
+        )
+
+    def assertTiledFlags(self, inputLyr, algName, parameterDict, workers=True):
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        expected = self.flagsOnWholeLayer(inputLyr, algName, parameterDict, context)
+        self.assertTrue(expected)
+        self.assertEqual(
+            self.flagsOnTiles(inputLyr, algName, parameterDict, context), expected)
+        if workers:
+            # the same tiles on worker processes
+            self.assertEqual(
+                self.flagsOnTiles(inputLyr, algName, parameterDict, context, maxWorkers=2),
+                expected
+            )
+
+    def test_dangles_equivalence(self):
+        self.assertTiledFlags(
+            self.getInputLayer(),
+            'dsgtools:identifydangles',
+            {'SELECTED': False, 'TOLERANCE': 1e-4}
+        )
+
+    def test_flags_keep_feature_ids(self):
+        # the flag text has the id of the flagged feature
+        self.assertTiledFlags(
+            self.getInputLayer(), 'dsgtools:identifysmalllines', {'SELECTED': False, 'TOLERANCE': 1e6})
+
+    def test_memory_layer_selection_is_kept(self):
+        # memory layers are copied tile by tile, so only the flag geometries
+        # match and the selection of the layer is never changed
+        memoryLyr = self.getInputLayer().materialize(QgsFeatureRequest())
+        memoryLyr.setName('river')
+        memoryLyr.selectByIds(memoryLyr.allFeatureIds()[:1])
+        QgsProject.instance().addMapLayer(memoryLyr)
+        selectionChangeList = []
+        memoryLyr.selectionChanged.connect(lambda *args: selectionChangeList.append(args))
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        parameterDict = {'SELECTED': False, 'TOLERANCE': 1e6}
+        expected = sorted(wkt for wkt, _ in self.flagsOnWholeLayer(
+            memoryLyr, 'dsgtools:identifysmalllines', parameterDict, context))
+        self.assertTrue(expected)
+        self.assertEqual(
+            sorted(wkt for wkt, _ in self.flagsOnTiles(
+                memoryLyr, 'dsgtools:identifysmalllines', parameterDict, context)),
+            expected
+        )
+        self.assertEqual(selectionChangeList, [])
+        self.assertEqual(memoryLyr.selectedFeatureIds(), memoryLyr.allFeatureIds()[:1])
+        QgsProject.instance().removeMapLayer(memoryLyr.id())
+
+    def test_tiled_run_output(self):
+        inputLyr = self.getInputLayer()
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        wholeOutput = processing.run(
+            'dsgtools:identifydangles',
+            {'INPUT': inputLyr, 'SELECTED': False, 'TOLERANCE': 1e-4, 'FLAGS': 'memory:'},
+            context=context
+        )['FLAGS']
+        tileSize = max(inputLyr.extent().width(), inputLyr.extent().height()) / 3
+        output = processing.run(
+            'dsgtools:runalgorithmontiles',
+            {
+                'INPUT': inputLyr,
+                'ALG_NAME': 'dsgtools:identifydangles',
+                'PARAMETER_DICT': '{"SELECTED": false, "TOLERANCE": 0.0001}',
+                'TILE_SIZE': tileSize,
+                'HALO': 1e-3,
+                'OUTPUT': 'memory:'
+            },
+            context=context
+        )['OUTPUT']
+        if isinstance(output, str):
+            output = QgsProcessingUtils.mapLayerFromString(output, context)
+        # the sink has the layout of the flag output of the algorithm
+        self.assertEqual(output.wkbType(), wholeOutput.wkbType())
+        self.assertEqual(output.featureCount(), wholeOutput.featureCount())
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(TiledExecutionTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)
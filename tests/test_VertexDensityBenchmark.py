@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ DsgTools
+                                 A QGIS plugin
+ Brazilian Army Cartographic Production Tools
+                              -------------------
+        begin                : 2026-10-16
+        git sha              : $Format:%H$
+        copyright            : (C) 2026 by Brazilian Army - Geographic Service Bureau
+        email                : suporte.dsgtools@dsg.eb.mil.br
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+"""
+Checks the grid-hashed close vertex search of the large vertex density
+validation against the implementation it replaced and against a brute force
+search. The scaling benchmark lives in benchmarks/vertexDensityBenchmark.py.
+It is supposed to be run through QGIS with DSGTools installed.
+"""
+
+import math
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+from qgis.core import (QgsFeatureRequest, QgsProcessingContext,
+                       QgsVectorLayer, QgsWkbTypes)
+from qgis.testing import unittest
+
+from DsgTools.core.DSGToolsProcessingAlgs.algRunner import AlgRunner
+from DsgTools.core.DSGToolsProcessingAlgs.Algs.ValidationAlgs.identifyGeometriesWithLargeVertexDensityAlgorithm import \
+    IdentifyGeometriesWithLargeVertexDensityAlgorithm
+from DsgTools.core.GeometricTools.vertexArrays import (closeVertexMask,
+                                                       layerVertexArrays)
+
+
+class VertexDensityBenchmarkTest(unittest.TestCase):
+    DATASET_PATH = os.path.join(
+        os.path.dirname(__file__), 'testing_datasets', 'GeoJSON'
+    )
+    DATASETS = [
+        'land_cover_layers/vegetation',
+        'douglas_peucker/cb_veg_campo_a',
+    ]
+
+    def getLayer(self, name):
+        layer = QgsVectorLayer(
+            os.path.join(self.DATASET_PATH, '{0}.geojson'.format(name)), name, 'ogr'
+        )
+        self.assertTrue(layer.isValid())
+        return layer
+
+    def referenceCloseVertexes(self, layer, searchRadius):
+        """
+        Close vertex search as done by the algorithm before the grid search:
+        vertexes extracted to a memory layer with a spatial index and one
+        provider request per vertex.
+        """
+        algRunner = AlgRunner()
+        context = QgsProcessingContext()
+        incrementedLayer = algRunner.runAddAutoIncrementalField(layer, context)
+        vertexLayer = algRunner.runExtractVertices(incrementedLayer, context)
+        algRunner.runCreateSpatialIndex(vertexLayer, context)
+        flagDict = defaultdict(set)
+        for feat in vertexLayer.getFeatures():
+            geom = feat.geometry()
+            buffer = geom.buffer(searchRadius, -1)
+            request = QgsFeatureRequest().setFilterExpression(
+                'featid = {0}'.format(feat['featid'])).setFilterRect(buffer.boundingBox())
+            for candidateFeat in vertexLayer.getFeatures(request):
+                if candidateFeat.id() == feat.id():
+                    continue
+                if candidateFeat.geometry().intersects(buffer):
+                    flagDict[feat['featid']].add(bytes(geom.asWkb()))
+        return flagDict
+
+    def test_flags_match_reference(self):
+        alg = IdentifyGeometriesWithLargeVertexDensityAlgorithm()
+        for name in self.DATASETS:
+            layer = self.getLayer(name)
+            extent = layer.extent()
+            diagonal = math.hypot(extent.width(), extent.height())
+            vertexArray, featIndex, _, _ = layerVertexArrays(layer)
+            for searchRadius in (diagonal * 1e-4, diagonal * 1e-3):
+                flagDict = alg.getCloseVertexes(
+                    vertexArray,
+                    featIndex,
+                    searchRadius,
+                    hasZ=QgsWkbTypes.hasZ(layer.wkbType()),
+                    hasM=QgsWkbTypes.hasM(layer.wkbType())
+                )
+                self.assertEqual(
+                    dict(flagDict), dict(self.referenceCloseVertexes(layer, searchRadius)),
+                    '{0} with search radius {1}'.format(name, searchRadius)
+                )
+
+    def test_brute_force_equivalence(self):
+        rng = np.random.default_rng(0)
+        xy = rng.random((3000, 2)) * 10
+        groups = rng.integers(0, 5, len(xy))
+        searchRadius = .15
+        delta = xy[:, None, :] - xy[None, :, :]
+        closeMatrix = (delta ** 2).sum(axis=2) <= searchRadius ** 2
+        closeMatrix &= groups[:, None] == groups[None, :]
+        np.fill_diagonal(closeMatrix, False)
+        for pairBudget in (16, 2000000):
+            mask = closeVertexMask(xy, searchRadius, groups=groups, pairBudget=pairBudget)
+            self.assertTrue(np.array_equal(mask, closeMatrix.any(axis=1)))
+
+
+def run_all(filterString=None):
+    """Default function that is called by the runner if nothing else is specified"""
+    filterString = 'test_' if filterString is None else filterString
+    suite = unittest.TestSuite()
+    suite.addTests(unittest.makeSuite(VertexDensityBenchmarkTest, filterString))
+    unittest.TextTestRunner(verbosity=3, stream=sys.stdout).run(suite)